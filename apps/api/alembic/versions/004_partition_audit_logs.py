@@ -0,0 +1,178 @@
+"""Partition audit_logs by month
+
+Revision ID: 004_partition_audit_logs
+Revises: 003_add_audit_logs_ip_address
+Create Date: 2026-10-18
+
+Rebuilds analytics.audit_logs as a table range-partitioned on created_at with
+one partition per month plus a default partition, so recent-activity and
+per-entity lookups only scan the hot months. Partitions ahead of time are
+created by analytics.ensure_audit_log_partitions(), which the API's audit
+writer calls once per month.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "004_partition_audit_logs"
+down_revision: Union[str, None] = "003_add_audit_logs_ip_address"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute(
+        """
+        CREATE TABLE analytics.audit_logs_partitioned (
+            id text NOT NULL,
+            user_id text,
+            action text NOT NULL,
+            entity_type text,
+            entity_id text,
+            details text,
+            ip_address text,
+            user_agent text,
+            created_at timestamptz NOT NULL DEFAULT now(),
+            PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+        """
+    )
+
+    op.execute(
+        """
+        CREATE TABLE analytics.audit_logs_default
+        PARTITION OF analytics.audit_logs_partitioned DEFAULT
+        """
+    )
+
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION analytics.ensure_audit_log_partitions(
+            start_month date,
+            months_ahead integer DEFAULT 2
+        ) RETURNS void
+        LANGUAGE plpgsql AS $$
+        DECLARE
+            parent regclass;
+            month_start date;
+            partition_name text;
+        BEGIN
+            -- The partitioned parent (named audit_logs_partitioned mid-migration)
+            SELECT c.oid::regclass INTO parent
+            FROM pg_class c
+            JOIN pg_namespace n ON n.oid = c.relnamespace
+            WHERE n.nspname = 'analytics'
+              AND c.relname IN ('audit_logs', 'audit_logs_partitioned')
+              AND c.relkind = 'p'
+            LIMIT 1;
+            FOR i IN 0..months_ahead LOOP
+                month_start := (date_trunc('month', start_month) + make_interval(months => i))::date;
+                partition_name := format('audit_logs_y%sm%s',
+                                         to_char(month_start, 'YYYY'), to_char(month_start, 'MM'));
+                IF to_regclass('analytics.' || partition_name) IS NULL THEN
+                    EXECUTE format(
+                        'CREATE TABLE analytics.%I PARTITION OF %s FOR VALUES FROM (%L) TO (%L)',
+                        partition_name, parent, month_start,
+                        (month_start + interval '1 month')::date
+                    );
+                END IF;
+            END LOOP;
+        END;
+        $$
+        """
+    )
+
+    # Monthly partitions from the oldest existing row through two months ahead.
+    op.execute(
+        """
+        DO $$
+        DECLARE
+            oldest date := COALESCE(
+                (SELECT min(created_at)::date FROM analytics.audit_logs), current_date
+            );
+        BEGIN
+            PERFORM analytics.ensure_audit_log_partitions(
+                oldest,
+                ((date_part('year', current_date) - date_part('year', oldest)) * 12
+                 + date_part('month', current_date) - date_part('month', oldest))::int + 2
+            );
+        END;
+        $$
+        """
+    )
+
+    # user_agent comes from 001; make sure it is there so the copy keeps it.
+    op.execute(
+        """
+        ALTER TABLE analytics.audit_logs
+        ADD COLUMN IF NOT EXISTS user_agent text
+        """
+    )
+    op.execute(
+        """
+        INSERT INTO analytics.audit_logs_partitioned
+            (id, user_id, action, entity_type, entity_id, details, ip_address, user_agent, created_at)
+        SELECT id::text, user_id::text, action, entity_type, entity_id, details::text,
+               ip_address, user_agent, COALESCE(created_at, now())
+        FROM analytics.audit_logs
+        """
+    )
+
+    op.execute("DROP TABLE analytics.audit_logs")
+    op.execute("ALTER TABLE analytics.audit_logs_partitioned RENAME TO audit_logs")
+
+    op.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_audit_logs_created_at
+        ON analytics.audit_logs (created_at DESC)
+        """
+    )
+    op.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_audit_logs_entity_created
+        ON analytics.audit_logs (entity_type, entity_id, created_at DESC)
+        """
+    )
+    op.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_audit_logs_user_created
+        ON analytics.audit_logs (user_id, created_at DESC)
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute(
+        """
+        CREATE TABLE analytics.audit_logs_flat (
+            id text PRIMARY KEY,
+            user_id text,
+            action text NOT NULL,
+            entity_type text,
+            entity_id text,
+            details text,
+            ip_address text,
+            user_agent text,
+            created_at timestamptz DEFAULT now()
+        )
+        """
+    )
+    op.execute(
+        """
+        INSERT INTO analytics.audit_logs_flat
+        SELECT id, user_id, action, entity_type, entity_id, details, ip_address, user_agent, created_at
+        FROM analytics.audit_logs
+        ON CONFLICT (id) DO NOTHING
+        """
+    )
+    op.execute("DROP TABLE analytics.audit_logs CASCADE")
+    op.execute("ALTER TABLE analytics.audit_logs_flat RENAME TO audit_logs")
+    op.execute("DROP FUNCTION IF EXISTS analytics.ensure_audit_log_partitions(date, integer)")
+    op.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_audit_logs_created_at
+        ON analytics.audit_logs (created_at DESC)
+        """
+    )
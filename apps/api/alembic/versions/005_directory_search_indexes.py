@@ -0,0 +1,93 @@
+"""Trigram search columns and keyset indexes for the admin directory
+
+Revision ID: 005_directory_search_indexes
+Revises: 004_partition_audit_logs
+Create Date: 2026-10-18
+
+Adds stored, lower-cased search_text columns to user_master and company_master
+with pg_trgm GIN indexes for substring search, plus btree indexes matching the
+keyset orderings used by the admin user, company and assignment lists.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "005_directory_search_indexes"
+down_revision: Union[str, None] = "004_partition_audit_logs"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    op.execute(
+        """
+        ALTER TABLE analytics.user_master
+        ADD COLUMN IF NOT EXISTS search_text text
+        GENERATED ALWAYS AS (
+            lower(coalesce(user_email::text, '') || ' ' || coalesce(first_name, '') || ' ' || coalesce(last_name, ''))
+        ) STORED
+        """
+    )
+    op.execute(
+        """
+        ALTER TABLE analytics.company_master
+        ADD COLUMN IF NOT EXISTS search_text text
+        GENERATED ALWAYS AS (
+            lower(company_id || ' ' || coalesce(company_name, ''))
+        ) STORED
+        """
+    )
+
+    op.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_user_master_search_trgm
+        ON analytics.user_master USING gin (search_text gin_trgm_ops)
+        """
+    )
+    op.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_company_master_search_trgm
+        ON analytics.company_master USING gin (search_text gin_trgm_ops)
+        """
+    )
+
+    # Keyset orderings
+    op.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_user_master_keyset
+        ON analytics.user_master (created_date DESC, user_email, user_id)
+        """
+    )
+    op.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_company_master_keyset
+        ON analytics.company_master (company_name, company_id)
+        """
+    )
+    op.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_user_company_role_map_company_active
+        ON analytics.user_company_role_map (company_id, is_active, user_id)
+        """
+    )
+    op.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_user_company_role_map_user_active
+        ON analytics.user_company_role_map (user_id, is_active, role_id)
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS analytics.idx_user_company_role_map_user_active")
+    op.execute("DROP INDEX IF EXISTS analytics.idx_user_company_role_map_company_active")
+    op.execute("DROP INDEX IF EXISTS analytics.idx_company_master_keyset")
+    op.execute("DROP INDEX IF EXISTS analytics.idx_user_master_keyset")
+    op.execute("DROP INDEX IF EXISTS analytics.idx_company_master_search_trgm")
+    op.execute("DROP INDEX IF EXISTS analytics.idx_user_master_search_trgm")
+    op.execute("ALTER TABLE analytics.company_master DROP COLUMN IF EXISTS search_text")
+    op.execute("ALTER TABLE analytics.user_master DROP COLUMN IF EXISTS search_text")
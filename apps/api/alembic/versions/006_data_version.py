@@ -0,0 +1,156 @@
+"""Data-version tracking for conditional analytics responses
+
+Revision ID: 006_data_version
+Revises: 005_directory_search_indexes
+Create Date: 2026-10-18
+
+Adds analytics.data_version, one row per (company, period) holding the
+sequence number of the last write to that company's facts or workflow for the
+period. Statement-level triggers on financial_fact and financial_workflow
+(using transition tables, so a bulk import costs one upsert per distinct
+company/period) keep it current; company_master and cluster_master changes bump
+the ('*', 0) row. The API derives ETags from a digest of the rows for the
+periods and companies an endpoint reads.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "006_data_version"
+down_revision: Union[str, None] = "005_directory_search_indexes"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+_TRACKED_TABLES = ("financial_fact", "financial_workflow")
+_MASTER_TABLES = ("company_master", "cluster_master")
+
+
+def upgrade() -> None:
+    op.execute("CREATE SEQUENCE IF NOT EXISTS analytics.data_version_seq")
+    op.execute(
+        """
+        CREATE TABLE IF NOT EXISTS analytics.data_version (
+            company_id text NOT NULL,
+            period_id integer NOT NULL,
+            version bigint NOT NULL,
+            changed_at timestamptz NOT NULL DEFAULT now(),
+            PRIMARY KEY (company_id, period_id)
+        )
+        """
+    )
+    op.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_data_version_period
+        ON analytics.data_version (period_id, version)
+        """
+    )
+
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION analytics.bump_data_version() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        DECLARE
+            next_version bigint := nextval('analytics.data_version_seq');
+        BEGIN
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                INSERT INTO analytics.data_version (company_id, period_id, version, changed_at)
+                SELECT DISTINCT company_id, period_id, next_version, now() FROM new_rows
+                ON CONFLICT (company_id, period_id)
+                DO UPDATE SET version = EXCLUDED.version, changed_at = EXCLUDED.changed_at;
+            END IF;
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                INSERT INTO analytics.data_version (company_id, period_id, version, changed_at)
+                SELECT DISTINCT company_id, period_id, next_version, now() FROM old_rows
+                ON CONFLICT (company_id, period_id)
+                DO UPDATE SET version = EXCLUDED.version, changed_at = EXCLUDED.changed_at;
+            END IF;
+            RETURN NULL;
+        END;
+        $$
+        """
+    )
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION analytics.bump_master_data_version() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            INSERT INTO analytics.data_version (company_id, period_id, version, changed_at)
+            VALUES ('*', 0, nextval('analytics.data_version_seq'), now())
+            ON CONFLICT (company_id, period_id)
+            DO UPDATE SET version = EXCLUDED.version, changed_at = EXCLUDED.changed_at;
+            RETURN NULL;
+        END;
+        $$
+        """
+    )
+
+    for table in _TRACKED_TABLES:
+        op.execute(
+            f"""
+            CREATE TRIGGER trg_{table}_version_ins
+            AFTER INSERT ON analytics.{table}
+            REFERENCING NEW TABLE AS new_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION analytics.bump_data_version()
+            """
+        )
+        op.execute(
+            f"""
+            CREATE TRIGGER trg_{table}_version_upd
+            AFTER UPDATE ON analytics.{table}
+            REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION analytics.bump_data_version()
+            """
+        )
+        op.execute(
+            f"""
+            CREATE TRIGGER trg_{table}_version_del
+            AFTER DELETE ON analytics.{table}
+            REFERENCING OLD TABLE AS old_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION analytics.bump_data_version()
+            """
+        )
+
+    for table in _MASTER_TABLES:
+        op.execute(
+            f"""
+            CREATE TRIGGER trg_{table}_version
+            AFTER INSERT OR UPDATE OR DELETE ON analytics.{table}
+            FOR EACH STATEMENT EXECUTE FUNCTION analytics.bump_master_data_version()
+            """
+        )
+
+    # Seed versions for existing data so the first ETags are stable.
+    op.execute(
+        """
+        INSERT INTO analytics.data_version (company_id, period_id, version)
+        SELECT company_id, period_id, nextval('analytics.data_version_seq')
+        FROM (
+            SELECT company_id, period_id FROM analytics.financial_fact
+            UNION
+            SELECT company_id, period_id FROM analytics.financial_workflow
+        ) existing
+        ON CONFLICT (company_id, period_id) DO NOTHING
+        """
+    )
+    op.execute(
+        """
+        INSERT INTO analytics.data_version (company_id, period_id, version)
+        VALUES ('*', 0, nextval('analytics.data_version_seq'))
+        ON CONFLICT (company_id, period_id) DO NOTHING
+        """
+    )
+
+
+def downgrade() -> None:
+    for table in _MASTER_TABLES:
+        op.execute(f"DROP TRIGGER IF EXISTS trg_{table}_version ON analytics.{table}")
+    for table in _TRACKED_TABLES:
+        for suffix in ("ins", "upd", "del"):
+            op.execute(f"DROP TRIGGER IF EXISTS trg_{table}_version_{suffix} ON analytics.{table}")
+    op.execute("DROP FUNCTION IF EXISTS analytics.bump_master_data_version()")
+    op.execute("DROP FUNCTION IF EXISTS analytics.bump_data_version()")
+    op.execute("DROP TABLE IF EXISTS analytics.data_version")
+    op.execute("DROP SEQUENCE IF EXISTS analytics.data_version_seq")
@@ -0,0 +1,143 @@
+"""Company ACL index and per-user access versions
+
+Revision ID: 007_company_acl
+Revises: 006_data_version
+Create Date: 2026-10-18
+
+Adds two tables backing the token company bitmap:
+
+- analytics.company_acl_index gives every company a dense, append-only bit
+  position. Positions are never reused or renumbered, so a bitmap in a token
+  issued before a company was added still decodes to the same companies.
+- analytics.acl_version holds, per user, the sequence number of the last
+  change to their user_company_role_map rows. The API reads the user's row on
+  each request and compares it with the acl_v claim to spot tokens whose
+  company list is stale.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "007_company_acl"
+down_revision: Union[str, None] = "006_data_version"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+_ACCESS_TABLES = ("user_company_role_map",)
+
+
+def upgrade() -> None:
+    op.execute("CREATE SEQUENCE IF NOT EXISTS analytics.company_acl_index_seq MINVALUE 0 START 0")
+    op.execute(
+        """
+        CREATE TABLE IF NOT EXISTS analytics.company_acl_index (
+            company_id text PRIMARY KEY
+                REFERENCES analytics.company_master (company_id) ON DELETE CASCADE,
+            bit_index integer NOT NULL UNIQUE
+        )
+        """
+    )
+    op.execute(
+        """
+        INSERT INTO analytics.company_acl_index (company_id, bit_index)
+        SELECT company_id, nextval('analytics.company_acl_index_seq')
+        FROM (SELECT company_id FROM analytics.company_master ORDER BY company_id) existing
+        ON CONFLICT (company_id) DO NOTHING
+        """
+    )
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION analytics.assign_company_acl_index() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            INSERT INTO analytics.company_acl_index (company_id, bit_index)
+            VALUES (NEW.company_id, nextval('analytics.company_acl_index_seq'))
+            ON CONFLICT (company_id) DO NOTHING;
+            RETURN NULL;
+        END;
+        $$
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER trg_company_master_acl_index
+        AFTER INSERT ON analytics.company_master
+        FOR EACH ROW EXECUTE FUNCTION analytics.assign_company_acl_index()
+        """
+    )
+
+    op.execute("CREATE SEQUENCE IF NOT EXISTS analytics.acl_version_seq")
+    op.execute(
+        """
+        CREATE TABLE IF NOT EXISTS analytics.acl_version (
+            user_id text PRIMARY KEY,
+            version bigint NOT NULL,
+            changed_at timestamptz NOT NULL DEFAULT now()
+        )
+        """
+    )
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION analytics.bump_acl_version() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        DECLARE
+            next_version bigint := nextval('analytics.acl_version_seq');
+        BEGIN
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                INSERT INTO analytics.acl_version (user_id, version, changed_at)
+                SELECT DISTINCT user_id, next_version, now() FROM new_rows
+                ON CONFLICT (user_id)
+                DO UPDATE SET version = EXCLUDED.version, changed_at = EXCLUDED.changed_at;
+            END IF;
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                INSERT INTO analytics.acl_version (user_id, version, changed_at)
+                SELECT DISTINCT user_id, next_version, now() FROM old_rows
+                ON CONFLICT (user_id)
+                DO UPDATE SET version = EXCLUDED.version, changed_at = EXCLUDED.changed_at;
+            END IF;
+            RETURN NULL;
+        END;
+        $$
+        """
+    )
+    for table in _ACCESS_TABLES:
+        op.execute(
+            f"""
+            CREATE TRIGGER trg_{table}_acl_ins
+            AFTER INSERT ON analytics.{table}
+            REFERENCING NEW TABLE AS new_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION analytics.bump_acl_version()
+            """
+        )
+        op.execute(
+            f"""
+            CREATE TRIGGER trg_{table}_acl_upd
+            AFTER UPDATE ON analytics.{table}
+            REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION analytics.bump_acl_version()
+            """
+        )
+        op.execute(
+            f"""
+            CREATE TRIGGER trg_{table}_acl_del
+            AFTER DELETE ON analytics.{table}
+            REFERENCING OLD TABLE AS old_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION analytics.bump_acl_version()
+            """
+        )
+
+
+def downgrade() -> None:
+    for table in _ACCESS_TABLES:
+        for suffix in ("ins", "upd", "del"):
+            op.execute(f"DROP TRIGGER IF EXISTS trg_{table}_acl_{suffix} ON analytics.{table}")
+    op.execute("DROP FUNCTION IF EXISTS analytics.bump_acl_version()")
+    op.execute("DROP TABLE IF EXISTS analytics.acl_version")
+    op.execute("DROP SEQUENCE IF EXISTS analytics.acl_version_seq")
+    op.execute("DROP TRIGGER IF EXISTS trg_company_master_acl_index ON analytics.company_master")
+    op.execute("DROP FUNCTION IF EXISTS analytics.assign_company_acl_index()")
+    op.execute("DROP TABLE IF EXISTS analytics.company_acl_index")
+    op.execute("DROP SEQUENCE IF EXISTS analytics.company_acl_index_seq")
@@ -0,0 +1,101 @@
+"""Immutable snapshots of closed periods
+
+Revision ID: 008_period_snapshot
+Revises: 007_company_acl
+Create Date: 2026-10-18
+
+Adds analytics.period_snapshot: one row per closed month holding every
+company x scenario row of financial_monthly_view for that month as a packed,
+compressed blob. Historical trend and YTD reads decode snapshots instead of
+re-aggregating financial_fact through the view.
+
+A snapshot is never updated: closing inserts it and reopening deletes it.
+While a snapshot exists, writes to that period's financial_fact rows are
+rejected, so the snapshot cannot drift from the facts it was taken from.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "008_period_snapshot"
+down_revision: Union[str, None] = "007_company_acl"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute(
+        """
+        CREATE TABLE IF NOT EXISTS analytics.period_snapshot (
+            period_id integer PRIMARY KEY
+                REFERENCES analytics.period_master (period_id) ON DELETE CASCADE,
+            year integer NOT NULL,
+            month integer NOT NULL,
+            row_count integer NOT NULL,
+            checksum text NOT NULL,
+            payload bytea NOT NULL,
+            closed_by text,
+            closed_at timestamptz NOT NULL DEFAULT now()
+        )
+        """
+    )
+    op.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_period_snapshot_year_month
+        ON analytics.period_snapshot (year, month)
+        """
+    )
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION analytics.reject_period_snapshot_update() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            RAISE EXCEPTION 'period_snapshot rows are immutable; reopen the period instead'
+                USING ERRCODE = 'check_violation';
+        END;
+        $$
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER trg_period_snapshot_immutable
+        BEFORE UPDATE ON analytics.period_snapshot
+        FOR EACH ROW EXECUTE FUNCTION analytics.reject_period_snapshot_update()
+        """
+    )
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION analytics.reject_closed_period_fact() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        DECLARE
+            target_period integer := CASE WHEN TG_OP = 'DELETE' THEN OLD.period_id ELSE NEW.period_id END;
+        BEGIN
+            IF EXISTS (SELECT 1 FROM analytics.period_snapshot WHERE period_id = target_period)
+               OR (TG_OP = 'UPDATE' AND OLD.period_id <> NEW.period_id AND EXISTS (
+                   SELECT 1 FROM analytics.period_snapshot WHERE period_id = OLD.period_id))
+            THEN
+                RAISE EXCEPTION 'period % is closed; reopen it before changing its figures', target_period
+                    USING ERRCODE = 'check_violation';
+            END IF;
+            RETURN CASE WHEN TG_OP = 'DELETE' THEN OLD ELSE NEW END;
+        END;
+        $$
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER trg_financial_fact_closed_period
+        BEFORE INSERT OR UPDATE OR DELETE ON analytics.financial_fact
+        FOR EACH ROW EXECUTE FUNCTION analytics.reject_closed_period_fact()
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS trg_financial_fact_closed_period ON analytics.financial_fact")
+    op.execute("DROP FUNCTION IF EXISTS analytics.reject_closed_period_fact()")
+    op.execute("DROP TRIGGER IF EXISTS trg_period_snapshot_immutable ON analytics.period_snapshot")
+    op.execute("DROP FUNCTION IF EXISTS analytics.reject_period_snapshot_update()")
+    op.execute("DROP TABLE IF EXISTS analytics.period_snapshot")
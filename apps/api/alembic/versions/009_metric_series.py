@@ -0,0 +1,133 @@
+"""Pre-aggregated monthly metric series
+
+Revision ID: 009_metric_series
+Revises: 008_period_snapshot
+Create Date: 2026-10-18
+
+Adds analytics.metric_series: one row per (entity, scenario, metric, year)
+with the twelve monthly values in an array, for companies, clusters and the
+group. A multi-year, multi-metric trend is then a single index range scan
+over a handful of rows instead of an aggregation of financial_fact.
+
+analytics.refresh_metric_series(years, sources) rebuilds whole years from
+financial_monthly_view (every entity level in one GROUPING SETS pass) and
+records in analytics.metric_series_year the source token each year was built
+from: the master-data version and an md5 of the year's data_version rows. The
+API rebuilds years whose token no longer matches shortly after each write. A
+max(version) watermark would miss writes that commit after a higher version
+has already been built; the digest changes regardless of commit order.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "009_metric_series"
+down_revision: Union[str, None] = "008_period_snapshot"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Additive view columns stored as series; ratios are derived when read.
+_METRICS = (
+    "revenue_lkr", "gp", "other_income", "personal_exp", "admin_exp", "selling_exp",
+    "finance_exp", "depreciation", "provisions", "exchange_gl", "non_ops_exp", "non_ops_income",
+)
+
+
+def upgrade() -> None:
+    op.execute(
+        """
+        CREATE TABLE IF NOT EXISTS analytics.metric_series (
+            entity_type text NOT NULL,
+            entity_id text NOT NULL,
+            scenario text NOT NULL,
+            metric text NOT NULL,
+            year integer NOT NULL,
+            vals double precision[] NOT NULL,
+            PRIMARY KEY (entity_type, entity_id, scenario, metric, year),
+            CONSTRAINT ck_metric_series_entity CHECK (entity_type IN ('company', 'cluster', 'group')),
+            CONSTRAINT ck_metric_series_months CHECK (array_length(vals, 1) = 12)
+        )
+        """
+    )
+    op.execute(
+        """
+        CREATE TABLE IF NOT EXISTS analytics.metric_series_year (
+            year integer PRIMARY KEY,
+            source_token text NOT NULL,
+            refreshed_at timestamptz NOT NULL DEFAULT now()
+        )
+        """
+    )
+
+    metric_values = ",\n                    ".join(
+        f"('{metric}', v.{metric}::double precision)" for metric in _METRICS
+    )
+    op.execute(
+        f"""
+        CREATE OR REPLACE FUNCTION analytics.refresh_metric_series(p_years integer[], p_sources text[])
+        RETURNS void
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            DELETE FROM analytics.metric_series WHERE year = ANY(p_years);
+
+            INSERT INTO analytics.metric_series (entity_type, entity_id, scenario, metric, year, vals)
+            WITH facts AS (
+                SELECT v.company_id, c.cluster_id, v.scenario, v.year, v.month, m.metric, m.value
+                FROM analytics.financial_monthly_view v
+                JOIN analytics.company_master c ON c.company_id = v.company_id
+                CROSS JOIN LATERAL (VALUES
+                    {metric_values},
+                    ('revenue_usd', (v.revenue_lkr / COALESCE(NULLIF(v.exchange_rate, 0), 1))::double precision),
+                    ('rows', 1::double precision)
+                ) AS m(metric, value)
+                WHERE v.year = ANY(p_years)
+            ),
+            rolled AS (
+                SELECT
+                    CASE
+                        WHEN GROUPING(company_id) = 0 THEN 'company'
+                        WHEN GROUPING(cluster_id) = 0 THEN 'cluster'
+                        ELSE 'group'
+                    END AS entity_type,
+                    COALESCE(company_id, cluster_id, '*') AS entity_id,
+                    scenario, metric, year, month,
+                    sum(value) AS value
+                FROM facts
+                GROUP BY GROUPING SETS (
+                    (company_id, scenario, metric, year, month),
+                    (cluster_id, scenario, metric, year, month),
+                    (scenario, metric, year, month)
+                )
+                HAVING NOT (GROUPING(company_id) = 1 AND GROUPING(cluster_id) = 0 AND cluster_id IS NULL)
+            ),
+            series AS (
+                SELECT DISTINCT entity_type, entity_id, scenario, metric, year FROM rolled
+            )
+            SELECT s.entity_type, s.entity_id, s.scenario, s.metric, s.year,
+                   array_agg(r.value ORDER BY months.month)
+            FROM series s
+            CROSS JOIN generate_series(1, 12) AS months(month)
+            LEFT JOIN rolled r
+                ON r.entity_type = s.entity_type AND r.entity_id = s.entity_id
+               AND r.scenario = s.scenario AND r.metric = s.metric
+               AND r.year = s.year AND r.month = months.month
+            GROUP BY s.entity_type, s.entity_id, s.scenario, s.metric, s.year;
+
+            INSERT INTO analytics.metric_series_year (year, source_token, refreshed_at)
+            SELECT DISTINCT ON (built.year) built.year, built.source, now()
+            FROM unnest(p_years, p_sources) AS built(year, source)
+            ON CONFLICT (year)
+            DO UPDATE SET source_token = EXCLUDED.source_token, refreshed_at = EXCLUDED.refreshed_at;
+        END;
+        $$
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP FUNCTION IF EXISTS analytics.refresh_metric_series(integer[], text[])")
+    op.execute("DROP TABLE IF EXISTS analytics.metric_series_year")
+    op.execute("DROP TABLE IF EXISTS analytics.metric_series")
@@ -0,0 +1,108 @@
+"""Change notifications for live dashboards
+
+Revision ID: 010_live_changes
+Revises: 009_metric_series
+Create Date: 2026-10-18
+
+Statement-level triggers on financial_fact and financial_workflow send a
+NOTIFY on the analytics_changes channel describing what a statement changed:
+
+    {"t": "financial_workflow", "op": "UPDATE", "rows": [["CC0001", 62, 3]], "periods": [62]}
+
+rows holds distinct [company_id, period_id, status_id] (status_id is null for
+financial_fact). NOTIFY is transactional, so listeners hear of a change only
+once it has committed, and a rolled-back save sends nothing. Payloads are
+limited to 8000 bytes: when a bulk statement touches too many companies, rows
+is dropped and only the periods are sent.
+
+Every writer is covered: FO saves, the workflow transitions behind FD
+approve/reject, bulk review and budget imports, whether they use the ORM or
+Core statements. Each API worker LISTENs on the channel and forwards changes
+to its WebSocket subscribers (see live_service.py).
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "010_live_changes"
+down_revision: Union[str, None] = "009_metric_series"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+_TRACKED_TABLES = ("financial_fact", "financial_workflow")
+
+
+def upgrade() -> None:
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION analytics.notify_data_change() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        DECLARE
+            changed json;
+            periods json;
+            payload text;
+        BEGIN
+            IF TG_OP = 'DELETE' THEN
+                SELECT json_agg(json_build_array(company_id, period_id, NULL)), json_agg(DISTINCT period_id)
+                INTO changed, periods
+                FROM (SELECT DISTINCT company_id, period_id FROM old_rows) r;
+            ELSIF TG_TABLE_NAME = 'financial_workflow' THEN
+                SELECT json_agg(json_build_array(company_id, period_id, status_id)), json_agg(DISTINCT period_id)
+                INTO changed, periods
+                FROM (SELECT DISTINCT company_id, period_id, status_id FROM new_rows) r;
+            ELSE
+                SELECT json_agg(json_build_array(company_id, period_id, NULL)), json_agg(DISTINCT period_id)
+                INTO changed, periods
+                FROM (SELECT DISTINCT company_id, period_id FROM new_rows) r;
+            END IF;
+
+            IF changed IS NULL THEN
+                RETURN NULL;
+            END IF;
+
+            payload := json_build_object('t', TG_TABLE_NAME, 'op', TG_OP, 'rows', changed, 'periods', periods)::text;
+            IF octet_length(payload) > 7900 THEN
+                payload := json_build_object('t', TG_TABLE_NAME, 'op', TG_OP, 'periods', periods)::text;
+            END IF;
+            PERFORM pg_notify('analytics_changes', payload);
+            RETURN NULL;
+        END;
+        $$
+        """
+    )
+
+    for table in _TRACKED_TABLES:
+        op.execute(
+            f"""
+            CREATE TRIGGER trg_{table}_notify_ins
+            AFTER INSERT ON analytics.{table}
+            REFERENCING NEW TABLE AS new_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION analytics.notify_data_change()
+            """
+        )
+        op.execute(
+            f"""
+            CREATE TRIGGER trg_{table}_notify_upd
+            AFTER UPDATE ON analytics.{table}
+            REFERENCING NEW TABLE AS new_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION analytics.notify_data_change()
+            """
+        )
+        op.execute(
+            f"""
+            CREATE TRIGGER trg_{table}_notify_del
+            AFTER DELETE ON analytics.{table}
+            REFERENCING OLD TABLE AS old_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION analytics.notify_data_change()
+            """
+        )
+
+
+def downgrade() -> None:
+    for table in _TRACKED_TABLES:
+        for suffix in ("ins", "upd", "del"):
+            op.execute(f"DROP TRIGGER IF EXISTS trg_{table}_notify_{suffix} ON analytics.{table}")
+    op.execute("DROP FUNCTION IF EXISTS analytics.notify_data_change()")
@@ -0,0 +1,59 @@
+"""Running metric baselines for anomaly scoring
+
+Revision ID: 011_metric_baselines
+Revises: 010_live_changes
+Create Date: 2026-10-18
+
+Adds analytics.metric_baseline: per company and metric, the count, mean and
+sum of squared deviations (M2) of its approved actuals, over all months
+(month = 0) and per calendar month (month = 1..12, the seasonal baseline).
+Approvals fold their values in incrementally (Welford / Chan merge), so
+scoring a submission reads one row per metric instead of the history.
+
+analytics.metric_baseline_period records which approved (company, period)
+pairs the baselines include, so folding is idempotent. Both tables are
+rebuilt from financial_fact by `python -m src.jobs.backfill_metric_baselines`.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "011_metric_baselines"
+down_revision: Union[str, None] = "010_live_changes"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute(
+        """
+        CREATE TABLE IF NOT EXISTS analytics.metric_baseline (
+            company_id text NOT NULL,
+            metric_id integer NOT NULL,
+            month smallint NOT NULL,
+            n bigint NOT NULL,
+            mean double precision NOT NULL,
+            m2 double precision NOT NULL,
+            PRIMARY KEY (company_id, metric_id, month),
+            CONSTRAINT ck_metric_baseline_month CHECK (month BETWEEN 0 AND 12),
+            CONSTRAINT ck_metric_baseline_n CHECK (n > 0)
+        )
+        """
+    )
+    op.execute(
+        """
+        CREATE TABLE IF NOT EXISTS analytics.metric_baseline_period (
+            company_id text NOT NULL,
+            period_id integer NOT NULL,
+            folded_at timestamptz NOT NULL DEFAULT now(),
+            PRIMARY KEY (company_id, period_id)
+        )
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS analytics.metric_baseline_period")
+    op.execute("DROP TABLE IF EXISTS analytics.metric_baseline")
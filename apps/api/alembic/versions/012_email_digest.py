@@ -0,0 +1,49 @@
+"""Held workflow emails for per-recipient digests
+
+Revision ID: 012_email_digest
+Revises: 011_metric_baselines
+Create Date: 2026-10-18
+
+Adds analytics.email_digest_item. Per-event workflow emails (report
+submitted / approved / rejected, overdue reminders) are held here instead of
+going straight to email_outbox. The outbox worker releases a recipient's
+items once the oldest has waited email_digest_window_minutes, as a single
+outbox email: one provider call per recipient and window instead of one per
+event.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "012_email_digest"
+down_revision: Union[str, None] = "011_metric_baselines"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute(
+        """
+        CREATE TABLE IF NOT EXISTS analytics.email_digest_item (
+            id text PRIMARY KEY,
+            to_email text NOT NULL,
+            to_name text,
+            template_name text NOT NULL,
+            variables json NOT NULL,
+            related_type text,
+            related_id text,
+            created_at timestamptz NOT NULL DEFAULT now()
+        )
+        """
+    )
+    # Release groups by recipient and filters on the oldest held item.
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_email_digest_item_recipient "
+        "ON analytics.email_digest_item (to_email, created_at)"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS analytics.email_digest_item")
@@ -25,6 +25,7 @@ from src.db.models import (
     # Notifications & Email
     Notification,
     EmailOutbox,
+    EmailDigestItem,
     # Other
     FxRate,
     AuditLog,
@@ -34,6 +35,9 @@ from src.db.session import (
     engine,
     AsyncSessionLocal,
     get_db,
+    get_read_db,
+    open_read_session,
+    replica_router,
     init_db,
     close_db,
 )
@@ -63,6 +67,7 @@ __all__ = [
     # Notifications & Email
     "Notification",
     "EmailOutbox",
+    "EmailDigestItem",
     # Other
     "FxRate",
     "AuditLog",
@@ -70,6 +75,9 @@ __all__ = [
     "engine",
     "AsyncSessionLocal",
     "get_db",
+    "get_read_db",
+    "open_read_session",
+    "replica_router",
     "init_db",
     "close_db",
 ]
@@ -19,10 +19,12 @@ def _utcnow():
 from sqlalchemy import (
     Boolean,
     Column,
+    Computed,
     Date,
     DateTime,
     ForeignKey,
     Integer,
+    JSON,
     Numeric,
     String,
     Text,
@@ -32,7 +34,7 @@ from sqlalchemy import (
     select,
 )
 from sqlalchemy.ext.hybrid import hybrid_property
-from sqlalchemy.orm import DeclarativeBase, relationship, synonym
+from sqlalchemy.orm import DeclarativeBase, deferred, relationship, synonym
 
 
 class Base(DeclarativeBase):
@@ -117,6 +119,14 @@ class UserMaster(Base):
     is_active = Column(Boolean, nullable=False, default=True)
     created_date = Column(DateTime(timezone=True), nullable=False)
     modified_date = Column(DateTime(timezone=True), nullable=False)
+    # Lower-cased "email first last" for trigram search (migration 005); not loaded by default
+    search_text = deferred(Column(
+        Text,
+        Computed(
+            "lower(coalesce(user_email::text, '') || ' ' || coalesce(first_name, '') || ' ' || coalesce(last_name, ''))",
+            persisted=True,
+        ),
+    ))
 
     company_maps = relationship("UserCompanyMap", back_populates="user")
     role_maps = relationship("UserCompanyRoleMap", back_populates="user")
@@ -223,6 +233,11 @@ class CompanyMaster(Base):
     is_active = Column(Boolean, nullable=False, default=True)
     created_date = Column(DateTime(timezone=True), nullable=False)
     modified_date = Column(DateTime(timezone=True), nullable=False)
+    # Lower-cased "company_id company_name" for trigram search (migration 005); not loaded by default
+    search_text = deferred(Column(
+        Text,
+        Computed("lower(company_id || ' ' || coalesce(company_name, ''))", persisted=True),
+    ))
 
     cluster = relationship("ClusterMaster", back_populates="companies")
     user_maps = relationship("UserCompanyMap", back_populates="company")
@@ -642,6 +657,21 @@ class EmailOutbox(Base):
     sent_at = Column(DateTime(timezone=True), nullable=True)
 
 
+class EmailDigestItem(Base):
+    """A templated workflow email held for its recipient's next digest (see email_outbox_service)."""
+    __tablename__ = "email_digest_item"
+    __table_args__ = {"schema": "analytics", "extend_existing": True}
+
+    id = Column(Text, primary_key=True, default=lambda: str(uuid.uuid4()))
+    to_email = Column(Text, nullable=False)
+    to_name = Column(Text, nullable=True)
+    template_name = Column(Text, nullable=False)
+    variables = Column(JSON, nullable=False)
+    related_type = Column(Text, nullable=True)
+    related_id = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), default=_utcnow)
+
+
 class FxRate(Base):
     __tablename__ = "fx_rates"
     __table_args__ = {"schema": "analytics", "extend_existing": True}
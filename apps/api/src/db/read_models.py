@@ -0,0 +1,81 @@
+"""
+Read models for analytics scans.
+
+Loading FinancialMonthly entities costs a Numeric -> Decimal conversion per
+column and identity-map bookkeeping per row, for endpoints that read a handful
+of fields and immediately convert them with float(). The helpers here select
+the view's columns directly, cast the money columns to double precision in
+SQL, and map each result row into a MonthlyRow: a plain __slots__ record with
+the same attribute names as the entity. Rows are never added to the session,
+so they need no expunging and are safe to keep after it closes.
+
+Use FinancialMonthly itself only when the entity is needed (writes, or code
+that relies on ORM behaviour).
+"""
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import Float, Select, cast, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.db.models import FinancialMonthly
+
+# Numeric columns of financial_monthly_view, in storage order.
+MONTHLY_FIELDS: Tuple[str, ...] = (
+    "revenue_lkr", "gp", "gp_margin", "other_income", "personal_exp", "admin_exp",
+    "selling_exp", "finance_exp", "depreciation", "total_overhead", "provisions",
+    "exchange_gl", "pbt_before_non_ops", "pbt_after_non_ops", "non_ops_exp",
+    "non_ops_income", "np_margin", "ebit", "ebitda", "exchange_rate",
+)
+
+_KEY_COLUMNS = (
+    FinancialMonthly.company_id,
+    FinancialMonthly.period_id,
+    FinancialMonthly.scenario,
+    FinancialMonthly.year,
+    FinancialMonthly.month,
+)
+
+
+class MonthlyRow:
+    """One financial_monthly_view row with float (or None) money fields."""
+
+    __slots__ = ("company_id", "period_id", "scenario", "year", "month") + MONTHLY_FIELDS
+
+    def __init__(self, company_id: str, period_id: int, scenario: str, year: int, month: int, values: Sequence[Any]):
+        self.company_id = company_id
+        self.period_id = period_id
+        self.scenario = scenario
+        self.year = year
+        self.month = month
+        for field, value in zip(MONTHLY_FIELDS, values):
+            setattr(self, field, value)
+
+    @property
+    def id(self) -> str:
+        return f"{self.company_id}_{self.year}_{self.month}_{self.scenario}"
+
+
+def monthly_select(*criteria: Any) -> Select:
+    """Column-projected view query: key columns, then MONTHLY_FIELDS as double precision."""
+    money = [cast(getattr(FinancialMonthly, field), Float).label(field) for field in MONTHLY_FIELDS]
+    query = select(*_KEY_COLUMNS, *money)
+    return query.where(*criteria) if criteria else query
+
+
+async def fetch_monthly(
+    db: AsyncSession,
+    *criteria: Any,
+    query: Optional[Select] = None,
+    params: Optional[Dict[str, Any]] = None,
+) -> List[MonthlyRow]:
+    """
+    MonthlyRows matching the criteria (view column expressions, as for
+    select(FinancialMonthly).where(...)). Pass query - a monthly_select()
+    with ordering, or a prebuilt one from src.db.statements with its params -
+    to run that instead; criteria are added to it.
+    """
+    statement = query if query is not None else monthly_select()
+    if criteria:
+        statement = statement.where(*criteria)
+    result = await db.execute(statement, params)
+    return [MonthlyRow(row[0], row[1], row[2], row[3], row[4], row[5:]) for row in result]
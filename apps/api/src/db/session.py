@@ -1,18 +1,179 @@
 """
 Database Session Management
+
+Writes and anything that must see them go through the primary engine.
+Read-only analytics dependencies (get_read_db / open_read_session) are routed
+to a replica when DATABASE_REPLICA_URL is set, subject to ReplicaRouter's
+policy:
+
+- replica lag is sampled at most every replica_lag_check_seconds; above
+  replica_max_lag_seconds reads go to the primary until it catches up
+- a replica that fails to connect is skipped for replica_retry_seconds
+- a caller that committed a write within read_your_writes_seconds reads from
+  the primary, so a save followed by a dashboard refresh never shows old data
+
+Each request carries a ReadContext (read_context_var), set by
+ReadConsistencyMiddleware. A committed write is remembered in-process by
+caller key, and also returned to the client as an X-Last-Write marker; a
+client that echoes the marker back reads from the primary on any worker
+until read_your_writes_seconds have passed since that write.
+
+Both engines use TimedQueuePool, which records how long each checkout waited
+for a pooled connection, and separately how long opening new connections
+took (pool_monitor, exposed at /health/pool).
 """
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
-from sqlalchemy.orm import sessionmaker
+import asyncio
+import logging
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Set
+
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy import event, text
+from sqlalchemy.exc import DBAPIError, TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine, AsyncSession, async_sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from src.config.settings import settings
 from src.db.models import Base
 
+logger = logging.getLogger(__name__)
+
+def _connect_args(url: str) -> Dict[str, Any]:
+    """asyncpg prepares each distinct SQL string once per connection and reuses it."""
+    if "+asyncpg" in url:
+        return {"prepared_statement_cache_size": settings.db_prepared_statement_cache_size}
+    return {}
+
+
+# ============ POOL WAIT ============
+
+class PoolMonitor:
+    """
+    Checkout wait per named pool: cumulative counters plus the most recent
+    waits for percentiles. A wait is time spent queueing for a connection
+    while the pool is exhausted; opening a new one (below the pool size, or
+    as overflow) is counted under connects instead.
+    """
+
+    def __init__(self, samples: int = 2048):
+        self.samples = samples
+        self._totals: Dict[str, Dict[str, float]] = {}
+        self._waits: Dict[str, Deque[float]] = {}
+
+    def record(self, name: str, seconds: float, timed_out: bool = False) -> None:
+        totals = self._pool(name)
+        totals["checkouts"] += 1
+        totals["timeouts"] += int(timed_out)
+        totals["wait_seconds"] += seconds
+        totals["max_wait_seconds"] = max(totals["max_wait_seconds"], seconds)
+        self._waits[name].append(seconds)
+
+    def record_connect(self, name: str, seconds: float) -> None:
+        totals = self._pool(name)
+        totals["connects"] += 1
+        totals["connect_seconds"] += seconds
+        totals["max_connect_seconds"] = max(totals["max_connect_seconds"], seconds)
+
+    def _pool(self, name: str) -> Dict[str, float]:
+        totals = self._totals.get(name)
+        if totals is None:
+            totals = self._totals[name] = {
+                "checkouts": 0, "timeouts": 0, "wait_seconds": 0.0, "max_wait_seconds": 0.0,
+                "connects": 0, "connect_seconds": 0.0, "max_connect_seconds": 0.0,
+            }
+            self._waits[name] = deque(maxlen=self.samples)
+        return totals
+
+    def totals(self) -> Dict[str, Dict[str, float]]:
+        """Cumulative counters; diff two calls to measure an interval."""
+        return {name: dict(totals) for name, totals in self._totals.items()}
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        result = {}
+        for name, totals in self._totals.items():
+            waits = sorted(self._waits[name])
+
+            def percentile(p: float) -> Optional[float]:
+                if not waits:
+                    return None
+                return round(waits[min(len(waits) - 1, int(p * len(waits)))] * 1000, 2)
+
+            result[name] = {
+                "checkouts": int(totals["checkouts"]),
+                "timeouts": int(totals["timeouts"]),
+                "wait_ms_total": round(totals["wait_seconds"] * 1000, 1),
+                "wait_ms": {"p50": percentile(0.5), "p95": percentile(0.95), "p99": percentile(0.99),
+                            "max": round(totals["max_wait_seconds"] * 1000, 2)},
+                "connects": int(totals["connects"]),
+                "connect_ms_total": round(totals["connect_seconds"] * 1000, 1),
+                "connect_ms_max": round(totals["max_connect_seconds"] * 1000, 2),
+            }
+        return result
+
+
+pool_monitor = PoolMonitor()
+
+
+# Connect time spent inside the current checkout; _do_get and _create_connection
+# run in the same greenlet, so each checkout sees only its own connects.
+_checkout_connect_seconds: ContextVar[float] = ContextVar("checkout_connect_seconds", default=0.0)
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """
+    AsyncAdaptedQueuePool that reports checkout waits (queueing only) and
+    connect times to pool_monitor under its logging name.
+    """
+
+    @property
+    def _monitor_name(self) -> str:
+        return self._orig_logging_name or "default"
+
+    def _create_connection(self):
+        started = time.perf_counter()
+        try:
+            return super()._create_connection()
+        finally:
+            elapsed = time.perf_counter() - started
+            _checkout_connect_seconds.set(_checkout_connect_seconds.get() + elapsed)
+            pool_monitor.record_connect(self._monitor_name, elapsed)
+
+    def _do_get(self):
+        reset = _checkout_connect_seconds.set(0.0)
+        started = time.perf_counter()
+        try:
+            entry = super()._do_get()
+        except PoolTimeoutError:
+            pool_monitor.record(self._monitor_name, self._waited(started), timed_out=True)
+            raise
+        else:
+            pool_monitor.record(self._monitor_name, self._waited(started))
+            return entry
+        finally:
+            _checkout_connect_seconds.reset(reset)
+
+    @staticmethod
+    def _waited(started: float) -> float:
+        return max(time.perf_counter() - started - _checkout_connect_seconds.get(), 0.0)
+
+
 # Create async engine
 engine = create_async_engine(
     settings.database_url,
     echo=False,  # settings.debug was True by default, flooding logs with SQL
+    poolclass=TimedQueuePool,
+    pool_logging_name="primary",
     pool_pre_ping=True,
-    pool_size=10,
-    max_overflow=20
+    pool_size=settings.db_pool_size,
+    max_overflow=settings.db_max_overflow,
+    query_cache_size=settings.db_query_cache_size,
+    connect_args=_connect_args(settings.database_url),
 )
 
 # Create async session factory
@@ -24,6 +185,251 @@ AsyncSessionLocal = async_sessionmaker(
     autoflush=False
 )
 
+# Optional read replica
+replica_engine: Optional[AsyncEngine] = None
+ReplicaSessionLocal: Optional[async_sessionmaker] = None
+
+if settings.database_replica_url:
+    replica_engine = create_async_engine(
+        settings.database_replica_url,
+        echo=False,
+        poolclass=TimedQueuePool,
+        pool_logging_name="replica",
+        pool_pre_ping=True,
+        pool_size=settings.replica_pool_size,
+        max_overflow=settings.replica_max_overflow,
+        query_cache_size=settings.db_query_cache_size,
+        connect_args=_connect_args(settings.database_replica_url),
+    )
+    ReplicaSessionLocal = async_sessionmaker(
+        replica_engine,
+        class_=AsyncSession,
+        expire_on_commit=False,
+        autocommit=False,
+        autoflush=False
+    )
+
+@dataclass
+class ReadContext:
+    """Read-your-writes state of one request (see ReadConsistencyMiddleware)."""
+    # Identifies the caller for in-process stickiness
+    key: Optional[str] = None
+    # Wall-clock time of the caller's last write, from the marker it sent back
+    last_write_at: Optional[float] = None
+    # Set when this request commits a write
+    wrote_at: Optional[float] = None
+
+
+read_context_var: ContextVar[Optional[ReadContext]] = ContextVar("read_context", default=None)
+
+# Lag in seconds; 0 when the replica has replayed everything it received.
+_REPLICA_LAG_SQL = text(
+    """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+    """
+)
+
+# Errors that mean "replica unreachable", as opposed to a bad query.
+_CONNECT_ERRORS = (DBAPIError, OSError, asyncio.TimeoutError)
+
+
+class ReplicaRouter:
+    """Chooses the session factory for read-only work."""
+
+    def __init__(
+        self,
+        replica_factory: Optional[async_sessionmaker],
+        primary_factory: async_sessionmaker,
+        replica_engine: Optional[AsyncEngine] = None,
+        max_lag_seconds: float = 30.0,
+        check_interval_seconds: float = 5.0,
+        retry_seconds: float = 30.0,
+        sticky_seconds: float = 30.0,
+        probe_timeout_seconds: float = 2.0,
+    ):
+        self.replica_factory = replica_factory
+        self.primary_factory = primary_factory
+        self.replica_engine = replica_engine
+        self.max_lag_seconds = max_lag_seconds
+        self.check_interval_seconds = check_interval_seconds
+        self.retry_seconds = retry_seconds
+        self.sticky_seconds = sticky_seconds
+        self.probe_timeout_seconds = probe_timeout_seconds
+
+        self.lag_seconds: Optional[float] = None
+        self._checked_at = float("-inf")
+        self._unavailable_until = float("-inf")
+        self._last_error: Optional[str] = None
+        self._sticky: Dict[str, float] = {}
+        self._lock = asyncio.Lock()
+        self.stats: Dict[str, int] = {
+            "replica": 0,
+            "primary_sticky": 0,
+            "primary_lagging": 0,
+            "primary_unavailable": 0,
+            "fallbacks": 0,
+        }
+
+    @property
+    def enabled(self) -> bool:
+        return self.replica_factory is not None
+
+    # ============ READ-YOUR-WRITES ============
+
+    def mark_write(self, key: Optional[str]) -> None:
+        if not key:
+            return
+        now = time.monotonic()
+        self._sticky[key] = now + self.sticky_seconds
+        if len(self._sticky) > 10_000:
+            self._sticky = {k: until for k, until in self._sticky.items() if until > now}
+
+    def wrote_recently(self, last_write_at: Optional[float]) -> bool:
+        """True while a write the client reported (possibly on another worker) may not be on the replica."""
+        return last_write_at is not None and time.time() - last_write_at < self.sticky_seconds
+
+    def is_sticky(self, key: Optional[str]) -> bool:
+        if not key:
+            return False
+        until = self._sticky.get(key)
+        if until is None:
+            return False
+        if until <= time.monotonic():
+            self._sticky.pop(key, None)
+            return False
+        return True
+
+    # ============ REPLICA HEALTH ============
+
+    def mark_failed(self, exc: BaseException) -> None:
+        self._unavailable_until = time.monotonic() + self.retry_seconds
+        self._last_error = f"{type(exc).__name__}: {exc}"
+        logger.warning("Read replica unavailable, using primary for %ss: %s", self.retry_seconds, exc)
+
+    async def _measure_lag(self) -> float:
+        async with self.replica_engine.connect() as conn:
+            return float((await conn.execute(_REPLICA_LAG_SQL)).scalar() or 0)
+
+    async def refresh(self) -> None:
+        """Re-sample replica lag if the last sample is older than the check interval."""
+        if self.replica_engine is None:
+            return
+        if time.monotonic() - self._checked_at < self.check_interval_seconds:
+            return
+        if self._lock.locked():
+            # Someone else is probing; route on the previous sample.
+            return
+        async with self._lock:
+            try:
+                self.lag_seconds = await asyncio.wait_for(self._measure_lag(), self.probe_timeout_seconds)
+                self._last_error = None
+            except _CONNECT_ERRORS as exc:
+                self.lag_seconds = None
+                self.mark_failed(exc)
+            finally:
+                self._checked_at = time.monotonic()
+
+    # ============ ROUTING ============
+
+    async def choose(self, key: Optional[str] = None, last_write_at: Optional[float] = None) -> async_sessionmaker:
+        if not self.enabled:
+            return self.primary_factory
+        if self.is_sticky(key) or self.wrote_recently(last_write_at):
+            self.stats["primary_sticky"] += 1
+            return self.primary_factory
+        if time.monotonic() < self._unavailable_until:
+            self.stats["primary_unavailable"] += 1
+            return self.primary_factory
+
+        await self.refresh()
+        if self.lag_seconds is None:
+            self.stats["primary_unavailable"] += 1
+            return self.primary_factory
+        if self.lag_seconds > self.max_lag_seconds:
+            self.stats["primary_lagging"] += 1
+            return self.primary_factory
+
+        self.stats["replica"] += 1
+        return self.replica_factory
+
+    def snapshot(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        return {
+            "enabled": self.enabled,
+            "lag_seconds": None if self.lag_seconds is None else round(self.lag_seconds, 3),
+            "max_lag_seconds": self.max_lag_seconds,
+            "available": self.enabled and now >= self._unavailable_until,
+            "last_error": self._last_error,
+            "sticky_sessions": sum(1 for until in self._sticky.values() if until > now),
+            **self.stats,
+        }
+
+
+replica_router = ReplicaRouter(
+    replica_factory=ReplicaSessionLocal,
+    primary_factory=AsyncSessionLocal,
+    replica_engine=replica_engine,
+    max_lag_seconds=settings.replica_max_lag_seconds,
+    check_interval_seconds=settings.replica_lag_check_seconds,
+    retry_seconds=settings.replica_retry_seconds,
+    sticky_seconds=settings.read_your_writes_seconds,
+)
+
+
+@event.listens_for(Session, "after_flush")
+def _note_write(session, flush_context):
+    session.info["wrote"] = True
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _note_dml(orm_execute_state):
+    # insert() / update() / delete() run through session.execute never reach a flush.
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info["wrote"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _stick_to_primary(session):
+    if session.info.pop("wrote", False):
+        context = read_context_var.get()
+        if context is not None:
+            context.wrote_at = time.time()
+            replica_router.mark_write(context.key)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_write(session):
+    session.info.pop("wrote", None)
+
+
+@asynccontextmanager
+async def open_read_session() -> AsyncIterator[AsyncSession]:
+    """
+    Session for read-only work: the replica when the routing policy allows,
+    otherwise the primary. A replica that cannot be reached falls back to the
+    primary for this request and is skipped until the retry window passes.
+    """
+    router = replica_router
+    context = read_context_var.get() or ReadContext()
+    factory = await router.choose(context.key, context.last_write_at)
+    session = factory()
+    if factory is not router.primary_factory:
+        try:
+            await session.connection()
+        except _CONNECT_ERRORS as exc:
+            router.mark_failed(exc)
+            router.stats["fallbacks"] += 1
+            await session.close()
+            session = router.primary_factory()
+    try:
+        yield session
+    finally:
+        await session.close()
+
 
 async def get_db() -> AsyncSession:
     """Dependency for getting database session"""
@@ -34,12 +440,120 @@ async def get_db() -> AsyncSession:
             await session.close()
 
 
+async def get_read_db() -> AsyncSession:
+    """Dependency for read-only endpoints; may be served by the read replica."""
+    async with open_read_session() as session:
+        yield session
+
+
 async def init_db():
     """Initialize database tables"""
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
 
 
+# ============ STARTUP ============
+
+ALEMBIC_DIR = Path(__file__).resolve().parents[2] / "alembic"
+
+
+class SchemaRevisionError(RuntimeError):
+    """The database is not at the migration revision this build expects."""
+
+
+def schema_mode() -> str:
+    if settings.db_schema_mode:
+        return settings.db_schema_mode.lower()
+    is_prod = settings.environment.lower() in ("production", "staging")
+    return "revision" if is_prod else "create_all"
+
+
+def expected_revisions(script_location: Path = ALEMBIC_DIR) -> Set[str]:
+    """Head revision(s) of the migrations shipped with this build."""
+    return set(ScriptDirectory(str(script_location)).get_heads())
+
+
+async def check_schema_revision(target: Optional[AsyncEngine] = None, expected: Optional[Set[str]] = None) -> str:
+    """Raise SchemaRevisionError unless the database's alembic revision is the expected head."""
+    expected = expected if expected is not None else expected_revisions()
+    async with (target or engine).connect() as conn:
+        current = set(await conn.run_sync(lambda sync_conn: MigrationContext.configure(sync_conn).get_current_heads()))
+    if current != expected:
+        raise SchemaRevisionError(
+            f"Database is at {sorted(current) or 'no revision'}, this build expects {sorted(expected)}; "
+            "run `alembic upgrade head`"
+        )
+    return ", ".join(sorted(current))
+
+
+async def prepare_schema() -> str:
+    """Startup schema step, per db_schema_mode."""
+    mode = schema_mode()
+    if mode == "create_all":
+        await init_db()
+        return "create_all"
+    if mode == "revision":
+        return await check_schema_revision()
+    return "skipped"
+
+
+async def prefill_pool(target: AsyncEngine, connections: int) -> int:
+    """
+    Open up to `connections` pool connections at once and return them to the
+    pool, so early requests do not pay connection setup. Raises if none opens.
+    """
+    async def open_one():
+        conn = await target.connect()
+        try:
+            await conn.execute(text("SELECT 1"))
+        except BaseException:
+            await conn.close()
+            raise
+        return conn
+
+    results = await asyncio.gather(*(open_one() for _ in range(max(0, connections))), return_exceptions=True)
+    opened: List[Any] = [r for r in results if not isinstance(r, BaseException)]
+    for conn in opened:
+        await conn.close()
+    errors = [r for r in results if isinstance(r, BaseException)]
+    if errors and not opened:
+        raise errors[0]
+    if errors:
+        logger.warning("Pool prefill opened %d of %d connections: %s", len(opened), connections, errors[0])
+    return len(opened)
+
+
+async def prefill_pools() -> Dict[str, int]:
+    filled = {"primary": await prefill_pool(engine, settings.startup_pool_prefill)}
+    if replica_engine is not None:
+        try:
+            filled["replica"] = await prefill_pool(replica_engine, settings.startup_pool_prefill)
+        except _CONNECT_ERRORS as exc:
+            # Reads fall back to the primary; not a reason to stay out of rotation.
+            replica_router.mark_failed(exc)
+            filled["replica"] = 0
+    return filled
+
+
+def pool_stats() -> Dict[str, Any]:
+    """Checkout waits and current occupancy of the primary and replica pools."""
+    waits = pool_monitor.snapshot()
+    stats = {}
+    for name, target in (("primary", engine), ("replica", replica_engine)):
+        if target is None:
+            continue
+        pool = target.pool
+        stats[name] = {
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "overflow": max(0, pool.overflow()),
+            **waits.get(name, {"checkouts": 0}),
+        }
+    return stats
+
+
 async def close_db():
     """Close database connections"""
+    if replica_engine is not None:
+        await replica_engine.dispose()
     await engine.dispose()
@@ -0,0 +1,245 @@
+"""
+Registry of hot analytics statements.
+
+The dashboard routers used to rebuild the same SELECTs from Python
+expressions on every request: period lookups, approved company IDs, the
+financial_monthly_view read for a period, FinancialFact sums by metric.
+Building them costs Python time. Each fresh object also has to be walked to
+compute its cache key before SQLAlchemy can find the compiled form.
+
+Statements here are built once at import with bindparam() placeholders and
+executed with a parameter dict:
+
+    period_id = (await db.execute(PERIOD_ID, {"year": 2025, "month": 3})).scalar()
+
+A prebuilt statement memoizes its cache key, so every execution after the
+first is a compiled-cache hit (engine query_cache_size). asyncpg prepares
+each distinct SQL string once per connection (prepared_statement_cache_size).
+List parameters use expanding bindparams: the compiled form is cached once
+for any list length, but each execution renders one placeholder per element,
+so the SQL text, and with it the prepared statement, differs per list length.
+
+Each statement carries a hot_statement execution option; an Engine listener
+counts executions and compiles per statement (see snapshot(), /health/statements).
+"""
+import logging
+from typing import Any, Dict, Set
+
+from sqlalchemy import Float, and_, bindparam, cast, event, func, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Executable
+
+from src.db.models import (
+    ClusterMaster,
+    CompanyMaster,
+    FinancialFact,
+    FinancialMonthly,
+    PeriodMaster,
+    Report,
+    ReportStatus,
+)
+from src.db.read_models import monthly_select
+
+logger = logging.getLogger(__name__)
+
+_registry: Dict[str, Executable] = {}
+_per_statement: Dict[str, Dict[str, int]] = {}
+_stats: Dict[str, int] = {"executions": 0, "compile_hits": 0, "compiles": 0, "uncached": 0}
+
+
+def hot(name: str, statement: Executable) -> Executable:
+    """Register a prebuilt statement under name and return it, tagged for metrics."""
+    if name in _registry:
+        raise ValueError(f"Hot statement {name!r} is already registered")
+    statement = statement.execution_options(hot_statement=name)
+    _registry[name] = statement
+    _per_statement[name] = {"executions": 0, "compiles": 0}
+    return statement
+
+
+def registered() -> Dict[str, Executable]:
+    return dict(_registry)
+
+
+def bind_names(statement: Executable) -> Set[str]:
+    """Parameters a caller must supply (literal values such as statuses are bound already)."""
+    return {name for name, bind in statement.compile().binds.items() if bind.required}
+
+
+# Values warm() binds; no row matches them.
+_WARM_PARAMS: Dict[str, Any] = {
+    "year": 0, "month": 0, "months": [0], "company_id": "", "cluster_id": "",
+    "company_ids": [""], "period_ids": [0], "scenario": "ACTUAL", "metric_id": 0,
+}
+
+
+async def warm(db: AsyncSession) -> int:
+    """
+    Execute every registered statement once, so it is compiled (per engine)
+    and prepared (on this connection) before the first request needs it.
+    """
+    for statement in _registry.values():
+        await db.execute(statement, {name: _WARM_PARAMS[name] for name in bind_names(statement)})
+    return len(_registry)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _count_compiles(conn, cursor, statement, parameters, context, executemany):
+    name = context.execution_options.get("hot_statement") if context is not None else None
+    if name is None or name not in _per_statement:
+        return
+    counters = _per_statement[name]
+    counters["executions"] += 1
+    _stats["executions"] += 1
+    if context.cache_hit == context.dialect.CACHE_HIT:
+        _stats["compile_hits"] += 1
+    elif context.cache_hit == context.dialect.CACHE_MISS:
+        counters["compiles"] += 1
+        _stats["compiles"] += 1
+    else:
+        # Caching disabled or not possible for this statement: compiled every time.
+        counters["compiles"] += 1
+        _stats["uncached"] += 1
+
+
+def snapshot() -> Dict[str, Any]:
+    executions = _stats["executions"]
+    return {
+        **_stats,
+        "hit_ratio": round(_stats["compile_hits"] / executions, 4) if executions else 0.0,
+        "statements": {name: dict(counters) for name, counters in _per_statement.items()},
+    }
+
+
+_SUBMITTED_OR_APPROVED = [ReportStatus.SUBMITTED, ReportStatus.APPROVED]
+
+
+# ============ PERIODS ============
+
+PERIOD_ID = hot("period_id", select(PeriodMaster.period_id).where(
+    and_(PeriodMaster.year == bindparam("year"), PeriodMaster.month == bindparam("month"))
+))
+
+PERIOD_IDS_BY_MONTH = hot("period_ids_by_month", select(PeriodMaster.month, PeriodMaster.period_id).where(
+    PeriodMaster.year == bindparam("year")
+))
+
+
+# ============ MASTER DATA ============
+
+ACTIVE_CLUSTERS = hot("active_clusters", select(ClusterMaster).where(
+    ClusterMaster.is_active == True
+).order_by(ClusterMaster.name))
+
+ACTIVE_COMPANIES = hot("active_companies", select(CompanyMaster).where(CompanyMaster.is_active == True))
+
+ACTIVE_COMPANY_COUNT = hot("active_company_count", select(func.count(CompanyMaster.id)).where(
+    CompanyMaster.is_active == True
+))
+
+# Inactive included: lookups for companies that still have data
+ALL_CLUSTERS = hot("all_clusters", select(ClusterMaster).order_by(ClusterMaster.name))
+
+ALL_COMPANIES = hot("all_companies", select(CompanyMaster))
+
+COMPANY_BY_ID = hot("company_by_id", select(CompanyMaster).where(CompanyMaster.id == bindparam("company_id")))
+
+CLUSTER_BY_ID = hot("cluster_by_id", select(ClusterMaster).where(ClusterMaster.id == bindparam("cluster_id")))
+
+
+# ============ WORKFLOW ============
+
+APPROVED_COMPANY_IDS = hot("approved_company_ids", select(Report.company_id).where(
+    and_(Report.year == bindparam("year"), Report.status == ReportStatus.APPROVED)
+))
+
+APPROVED_COMPANY_IDS_MONTH = hot("approved_company_ids_month", select(Report.company_id).where(
+    and_(
+        Report.year == bindparam("year"),
+        Report.month == bindparam("month"),
+        Report.status == ReportStatus.APPROVED,
+    )
+))
+
+APPROVED_COMPANY_IDS_MONTHS = hot("approved_company_ids_months", select(Report.company_id).where(
+    and_(
+        Report.year == bindparam("year"),
+        Report.month.in_(bindparam("months", expanding=True)),
+        Report.status == ReportStatus.APPROVED,
+    )
+))
+
+REPORTS_FOR_PERIOD = hot("reports_for_period", select(Report).where(
+    and_(Report.year == bindparam("year"), Report.month == bindparam("month"))
+))
+
+REPORTING_COMPANY_COUNT = hot("reporting_company_count", select(func.count(func.distinct(Report.company_id))).where(
+    and_(
+        Report.year == bindparam("year"),
+        Report.month == bindparam("month"),
+        Report.status.in_(_SUBMITTED_OR_APPROVED),
+    )
+))
+
+REPORTING_COMPANY_COUNT_MONTHS = hot(
+    "reporting_company_count_months",
+    select(func.count(func.distinct(Report.company_id))).where(
+        and_(
+            Report.year == bindparam("year"),
+            Report.month.in_(bindparam("months", expanding=True)),
+            Report.status.in_(_SUBMITTED_OR_APPROVED),
+        )
+    ),
+)
+
+
+# ============ FINANCIAL_MONTHLY_VIEW (read models) ============
+
+_PERIOD_SCENARIO = (
+    FinancialMonthly.year == bindparam("year"),
+    FinancialMonthly.month == bindparam("month"),
+    FinancialMonthly.scenario == bindparam("scenario"),
+)
+
+MONTHLY_FOR_PERIOD = hot("monthly_for_period", monthly_select(*_PERIOD_SCENARIO))
+
+MONTHLY_FOR_PERIOD_COMPANIES = hot("monthly_for_period_companies", monthly_select(
+    *_PERIOD_SCENARIO,
+    FinancialMonthly.company_id.in_(bindparam("company_ids", expanding=True)),
+))
+
+# Approved companies by subquery (shares the year / month parameters)
+MONTHLY_FOR_PERIOD_APPROVED = hot("monthly_for_period_approved", monthly_select(
+    *_PERIOD_SCENARIO,
+    FinancialMonthly.company_id.in_(
+        select(Report.company_id).where(
+            and_(
+                Report.year == bindparam("year"),
+                Report.month == bindparam("month"),
+                Report.status == ReportStatus.APPROVED,
+            )
+        )
+    ),
+))
+
+
+# ============ FINANCIAL_FACT ============
+
+_FACT_SCOPE = (
+    FinancialFact.company_id == bindparam("company_id"),
+    FinancialFact.period_id.in_(bindparam("period_ids", expanding=True)),
+    func.upper(FinancialFact.actual_budget) == bindparam("scenario"),
+)
+
+FACT_AMOUNTS_BY_PERIOD = hot("fact_amounts_by_period", select(
+    FinancialFact.period_id, FinancialFact.metric_id, cast(FinancialFact.amount, Float)
+).where(*_FACT_SCOPE))
+
+FACT_SUMS_BY_METRIC = hot("fact_sums_by_metric", select(
+    FinancialFact.metric_id, cast(func.sum(FinancialFact.amount), Float).label("total")
+).where(*_FACT_SCOPE).group_by(FinancialFact.metric_id))
+
+FACT_METRIC_SUM = hot("fact_metric_sum", select(cast(func.sum(FinancialFact.amount), Float)).where(
+    *_FACT_SCOPE, FinancialFact.metric_id == bindparam("metric_id")
+))
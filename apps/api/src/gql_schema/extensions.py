@@ -0,0 +1,265 @@
+"""
+GraphQL schema extensions: static cost limits and per-operation timing.
+
+/graphql is exempt from RateLimitMiddleware because one request can be a
+trivial `health` check or a dozen dashboard resolvers. Instead each operation
+is priced before execution:
+
+- every root field has a weight reflecting the FinancialService queries it
+  fans out into (ROOT_FIELD_COSTS, default DEFAULT_ROOT_COST)
+- every nested field costs FIELD_COST, multiplied by the field's `limit` /
+  `first` argument when it returns a list
+- aliases and fragments are counted as often as they are selected
+
+Operations over graphql_max_operation_cost are rejected outright; the rest
+draw from a per-client budget refilled at graphql_cost_budget_per_minute.
+"""
+import logging
+import time
+from typing import Any, Dict, FrozenSet, Mapping, Optional
+
+from graphql import GraphQLError
+from graphql.language import (
+    DocumentNode,
+    FieldNode,
+    FragmentDefinitionNode,
+    FragmentSpreadNode,
+    InlineFragmentNode,
+    IntValueNode,
+    SelectionSetNode,
+    VariableNode,
+)
+from graphql.utilities import get_operation_ast
+from strawberry.extensions import SchemaExtension
+
+from src.config.settings import settings
+from src.security.audit_context import get_client_ip
+
+logger = logging.getLogger(__name__)
+
+
+# ============ COST ANALYSIS ============
+
+ROOT_FIELD_COSTS: Dict[str, int] = {
+    # Analytics
+    "ceoDashboard": 20,
+    "clusterPerformance": 10,
+    "companyPerformance": 10,
+    "riskClusters": 10,
+    "clusterForecasts": 10,
+    "groupKpis": 8,
+    "topPerformers": 8,
+    "bottomPerformers": 8,
+    "runScenario": 8,
+    "recentAlerts": 2,
+    "forecastData": 1,
+    # Admin / reports
+    "dashboardStats": 5,
+    "users": 5,
+    "companies": 5,
+    "reports": 5,
+    "pendingReports": 5,
+    "clusters": 3,
+    "health": 0,
+}
+DEFAULT_ROOT_COST = 2
+FIELD_COST = 1
+LIST_SIZE_ARGUMENTS = ("limit", "first")
+MAX_LIST_MULTIPLIER = 100
+
+
+def _list_multiplier(field: FieldNode, variables: Mapping[str, Any]) -> int:
+    for argument in field.arguments or ():
+        if argument.name.value not in LIST_SIZE_ARGUMENTS:
+            continue
+        value = argument.value
+        if isinstance(value, IntValueNode):
+            size = int(value.value)
+        elif isinstance(value, VariableNode):
+            size = variables.get(value.name.value)
+        else:
+            size = None
+        if isinstance(size, int):
+            return max(1, min(size, MAX_LIST_MULTIPLIER))
+    return 1
+
+
+def _selection_cost(
+    selection_set: Optional[SelectionSetNode],
+    fragments: Mapping[str, FragmentDefinitionNode],
+    variables: Mapping[str, Any],
+    root: bool,
+    visited: FrozenSet[str],
+) -> int:
+    if selection_set is None:
+        return 0
+    total = 0
+    for selection in selection_set.selections:
+        if isinstance(selection, FieldNode):
+            name = selection.name.value
+            if name.startswith("__"):
+                continue
+            own = ROOT_FIELD_COSTS.get(name, DEFAULT_ROOT_COST) if root else FIELD_COST
+            children = _selection_cost(selection.selection_set, fragments, variables, False, visited)
+            total += own + children * _list_multiplier(selection, variables)
+        elif isinstance(selection, InlineFragmentNode):
+            total += _selection_cost(selection.selection_set, fragments, variables, root, visited)
+        elif isinstance(selection, FragmentSpreadNode):
+            name = selection.name.value
+            fragment = fragments.get(name)
+            if fragment is not None and name not in visited:
+                total += _selection_cost(
+                    fragment.selection_set, fragments, variables, root, visited | {name}
+                )
+    return total
+
+
+def operation_cost(
+    document: DocumentNode,
+    operation_name: Optional[str] = None,
+    variables: Optional[Mapping[str, Any]] = None,
+) -> int:
+    """Static cost of the operation that would execute for this document."""
+    operation = get_operation_ast(document, operation_name)
+    if operation is None:
+        return 0
+    fragments = {
+        definition.name.value: definition
+        for definition in document.definitions
+        if isinstance(definition, FragmentDefinitionNode)
+    }
+    return _selection_cost(operation.selection_set, fragments, variables or {}, True, frozenset())
+
+
+class CostBudget:
+    """Per-client token bucket of query cost, refilled continuously."""
+
+    def __init__(self, per_minute: int, max_clients: int = 10_000):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.max_clients = max_clients
+        self._buckets: Dict[str, tuple] = {}
+
+    def consume(self, client: str, cost: int) -> Optional[int]:
+        """Deduct cost; return None if allowed, else seconds until it would be."""
+        now = time.monotonic()
+        tokens, updated = self._buckets.get(client, (self.capacity, now))
+        tokens = min(self.capacity, tokens + (now - updated) * self.rate)
+        if cost > tokens:
+            self._buckets[client] = (tokens, now)
+            return max(1, int((cost - tokens) / self.rate) + 1) if self.rate else 60
+        if len(self._buckets) >= self.max_clients and client not in self._buckets:
+            self._buckets.clear()
+        self._buckets[client] = (tokens - cost, now)
+        return None
+
+
+cost_budget = CostBudget(settings.graphql_cost_budget_per_minute)
+
+
+def _client_key(context: Any) -> str:
+    user = context.get("user") if isinstance(context, dict) else None
+    if user is not None and getattr(user, "user_id", None):
+        return f"user:{user.user_id}"
+    return f"ip:{get_client_ip() or 'unknown'}"
+
+
+class CostLimitExtension(SchemaExtension):
+    """Rejects operations over the per-operation cost cap or the client's budget."""
+
+    cost: Optional[int] = None
+
+    def on_execute(self):
+        context = self.execution_context
+        self.cost = operation_cost(
+            context.graphql_document, context.operation_name, context.variables
+        )
+        if self.cost > settings.graphql_max_operation_cost:
+            raise GraphQLError(
+                f"Query cost {self.cost} exceeds the maximum of {settings.graphql_max_operation_cost}",
+                extensions={
+                    "code": "QUERY_TOO_COSTLY",
+                    "cost": self.cost,
+                    "maxCost": settings.graphql_max_operation_cost,
+                },
+            )
+        retry_after = cost_budget.consume(_client_key(context.context), self.cost)
+        if retry_after is not None:
+            raise GraphQLError(
+                f"Query budget exhausted. Retry in {retry_after}s",
+                extensions={"code": "RATE_LIMITED", "cost": self.cost, "retryAfter": retry_after},
+            )
+        yield
+
+    def get_results(self) -> Dict[str, Any]:
+        if self.cost is None or not settings.graphql_timing_in_response:
+            return {}
+        return {"cost": {"requested": self.cost, "maximum": settings.graphql_max_operation_cost}}
+
+
+# ============ TIMING ============
+
+_MAX_TRACKED_OPERATIONS = 500
+operation_stats: Dict[str, Dict[str, float]] = {}
+
+
+def _record(name: str, total_ms: float, failed: bool) -> None:
+    if name not in operation_stats and len(operation_stats) >= _MAX_TRACKED_OPERATIONS:
+        name = "(other)"
+    stats = operation_stats.setdefault(
+        name, {"count": 0, "errors": 0, "total_ms": 0.0, "max_ms": 0.0}
+    )
+    stats["count"] += 1
+    stats["errors"] += int(failed)
+    stats["total_ms"] += total_ms
+    stats["max_ms"] = max(stats["max_ms"], total_ms)
+
+
+def timing_snapshot() -> Dict[str, Any]:
+    return {
+        name: {
+            "count": int(s["count"]),
+            "errors": int(s["errors"]),
+            "avg_ms": round(s["total_ms"] / s["count"], 2) if s["count"] else 0.0,
+            "max_ms": round(s["max_ms"], 2),
+        }
+        for name, s in sorted(operation_stats.items())
+    }
+
+
+class OperationTimingExtension(SchemaExtension):
+    """Times parse / validate / execute for each operation and logs slow ones."""
+
+    def __init__(self, *, execution_context=None):
+        super().__init__(execution_context=execution_context)
+        self.phases: Dict[str, float] = {}
+        self.total_ms = 0.0
+
+    def _phase(self, name: str):
+        started = time.perf_counter()
+        yield
+        self.phases[name] = round((time.perf_counter() - started) * 1000, 2)
+
+    def on_parse(self):
+        yield from self._phase("parse_ms")
+
+    def on_validate(self):
+        yield from self._phase("validate_ms")
+
+    def on_execute(self):
+        yield from self._phase("execute_ms")
+
+    def on_operation(self):
+        started = time.perf_counter()
+        yield
+        self.total_ms = round((time.perf_counter() - started) * 1000, 2)
+        context = self.execution_context
+        name = context.operation_name or "(anonymous)"
+        _record(name, self.total_ms, bool(context.errors))
+        if self.total_ms >= settings.graphql_slow_operation_ms:
+            logger.warning("Slow GraphQL operation %s: %.1fms %s", name, self.total_ms, self.phases)
+
+    def get_results(self) -> Dict[str, Any]:
+        if not settings.graphql_timing_in_response:
+            return {}
+        return {"timing": {"total_ms": self.total_ms, **self.phases}}
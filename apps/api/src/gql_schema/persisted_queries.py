@@ -0,0 +1,174 @@
+"""
+Persisted GraphQL queries (Apollo APQ protocol).
+
+Clients send {"extensions": {"persistedQuery": {"version": 1, "sha256Hash": ...}}}
+and omit the query text once the server knows the hash. Documents come from
+a build-time manifest (graphql_persisted_queries_path, a JSON object of
+hash -> query) and, outside production, are registered automatically the
+first time a client sends hash + text. With graphql_persisted_only enabled,
+only manifest documents may run.
+
+Because the query text for a hash never changes, the parser / validation
+caches in the schema are hit on every repeat.
+"""
+import hashlib
+import json
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from graphql import GraphQLError
+from strawberry.fastapi import GraphQLRouter
+from strawberry.http import GraphQLRequestData
+from strawberry.http.exceptions import HTTPException
+from strawberry.types import ExecutionResult
+
+from src.config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+class PersistedQueryError(Exception):
+    """Raised for APQ failures; reported to clients as a GraphQL error with code."""
+
+    def __init__(self, message: str, code: str):
+        super().__init__(message)
+        self.code = code
+
+
+def query_hash(query: str) -> str:
+    return hashlib.sha256(query.encode("utf-8")).hexdigest()
+
+
+class PersistedQueryRegistry:
+    """hash -> document; manifest entries are permanent, registered ones form a bounded LRU."""
+
+    def __init__(self, auto_register: bool, persisted_only: bool, max_registered: int = 1000):
+        self.auto_register = auto_register
+        self.persisted_only = persisted_only
+        self.max_registered = max_registered
+        self._manifest: Dict[str, str] = {}
+        self._registered: "OrderedDict[str, str]" = OrderedDict()
+        self.stats = {"hits": 0, "misses": 0, "registered": 0, "rejected": 0}
+
+    def __len__(self) -> int:
+        return len(self._manifest) + len(self._registered)
+
+    def load_manifest(self, path: str) -> int:
+        with open(path, "r", encoding="utf-8") as fh:
+            entries = json.load(fh)
+        for digest, query in entries.items():
+            if query_hash(query) != digest:
+                logger.warning("Skipping persisted query %s: hash does not match its text", digest)
+                continue
+            self._manifest[digest] = query
+        logger.info("Loaded %s persisted GraphQL queries from %s", len(self._manifest), path)
+        return len(self._manifest)
+
+    def get(self, digest: str) -> Optional[str]:
+        query = self._manifest.get(digest)
+        if query is None:
+            query = self._registered.get(digest)
+            if query is not None:
+                self._registered.move_to_end(digest)
+        return query
+
+    def register(self, digest: str, query: str) -> None:
+        self._registered[digest] = query
+        self._registered.move_to_end(digest)
+        while len(self._registered) > self.max_registered:
+            self._registered.popitem(last=False)
+        self.stats["registered"] += 1
+
+    def resolve(self, query: Optional[str], extensions: Any) -> Optional[str]:
+        """The document to execute for a request's query text and extensions."""
+        if isinstance(extensions, str):
+            try:
+                extensions = json.loads(extensions)
+            except ValueError:
+                extensions = None
+        persisted = (extensions or {}).get("persistedQuery") if isinstance(extensions, dict) else None
+
+        if not persisted:
+            if self.persisted_only and query:
+                self.stats["rejected"] += 1
+                raise PersistedQueryError("Only persisted queries are accepted", "PERSISTED_QUERY_REQUIRED")
+            return query
+
+        digest = persisted.get("sha256Hash")
+        if persisted.get("version") != 1 or not isinstance(digest, str):
+            raise PersistedQueryError("Unsupported persisted query version", "PERSISTED_QUERY_NOT_SUPPORTED")
+
+        known = self.get(digest)
+        if known is not None:
+            self.stats["hits"] += 1
+            return known
+
+        if not query:
+            self.stats["misses"] += 1
+            raise PersistedQueryError("PersistedQueryNotFound", "PERSISTED_QUERY_NOT_FOUND")
+        if query_hash(query) != digest:
+            raise PersistedQueryError("provided sha does not match query", "BAD_USER_INPUT")
+        if self.persisted_only:
+            self.stats["rejected"] += 1
+            raise PersistedQueryError("Query is not in the persisted query manifest", "PERSISTED_QUERY_REQUIRED")
+        if self.auto_register:
+            self.register(digest, query)
+        return query
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "manifest": len(self._manifest),
+            "registered": len(self._registered),
+            "auto_register": self.auto_register,
+            "persisted_only": self.persisted_only,
+            **self.stats,
+        }
+
+
+def _auto_register_default() -> bool:
+    if settings.graphql_apq_auto_register is not None:
+        return settings.graphql_apq_auto_register
+    return settings.environment.lower() not in ("production", "staging")
+
+
+persisted_queries = PersistedQueryRegistry(
+    auto_register=_auto_register_default(),
+    persisted_only=settings.graphql_persisted_only,
+)
+
+
+def load_persisted_queries() -> None:
+    if settings.graphql_persisted_queries_path:
+        persisted_queries.load_manifest(settings.graphql_persisted_queries_path)
+
+
+class PersistedQueryRouter(GraphQLRouter):
+    """GraphQLRouter that resolves APQ hashes before execution."""
+
+    async def parse_http_body(self, request) -> GraphQLRequestData:
+        content_type = request.content_type or ""
+
+        if request.method == "GET":
+            data = self.parse_query_params(request.query_params)
+        elif "application/json" in content_type:
+            data = self.parse_json(await request.get_body())
+        elif content_type.startswith("multipart/form-data"):
+            data = await self.parse_multipart(request)
+        else:
+            raise HTTPException(400, "Unsupported content type")
+
+        return GraphQLRequestData(
+            query=persisted_queries.resolve(data.get("query"), data.get("extensions")),
+            variables=data.get("variables"),
+            operation_name=data.get("operationName"),
+        )
+
+    async def execute_operation(self, request, context, root_value) -> ExecutionResult:
+        try:
+            return await super().execute_operation(request, context, root_value)
+        except PersistedQueryError as exc:
+            return ExecutionResult(
+                data=None,
+                errors=[GraphQLError(str(exc), extensions={"code": exc.code})],
+            )
@@ -12,6 +12,7 @@ from src.gql_schema.types import (
     FinancialDataInput, PnLDataInput
 )
 from src.services.financial_service import FinancialService
+from src.utils.fanout import fan_out
 
 
 @strawberry.type
@@ -25,7 +26,7 @@ class AnalyticsQuery:
         month: int
     ) -> List[ClusterPerformance]:
         """Get all clusters performance with monthly and YTD metrics"""
-        db = info.context["db"]
+        db = info.context.get("read_db", info.context["db"])
         
         data = await FinancialService.get_cluster_performance(db, year, month)
         
@@ -50,7 +51,7 @@ class AnalyticsQuery:
         month: int
     ) -> List[CompanyPerformance]:
         """Get company performance within a cluster"""
-        db = info.context["db"]
+        db = info.context.get("read_db", info.context["db"])
         
         data = await FinancialService.get_company_performance(db, cluster_id, year, month)
         
@@ -75,7 +76,7 @@ class AnalyticsQuery:
         is_ytd: bool = False
     ) -> GroupKPIs:
         """Get group-level KPIs for executive dashboard"""
-        db = info.context["db"]
+        db = info.context.get("read_db", info.context["db"])
         
         data = await FinancialService.get_group_kpis(db, year, month, is_ytd=is_ytd)
         
@@ -100,7 +101,7 @@ class AnalyticsQuery:
         is_ytd: bool = False
     ) -> List[TopPerformer]:
         """Get top performing clusters"""
-        db = info.context["db"]
+        db = info.context.get("read_db", info.context["db"])
         
         data = await FinancialService.get_top_performers(
             db, year, month, limit, bottom=False, is_ytd=is_ytd
@@ -126,7 +127,7 @@ class AnalyticsQuery:
         is_ytd: bool = False
     ) -> List[TopPerformer]:
         """Get bottom performing clusters"""
-        db = info.context["db"]
+        db = info.context.get("read_db", info.context["db"])
         
         data = await FinancialService.get_top_performers(
             db, year, month, limit, bottom=True, is_ytd=is_ytd
@@ -145,7 +146,7 @@ class AnalyticsQuery:
     @strawberry.field
     async def risk_clusters(self, info: Info, year: int, month: int) -> List[RiskCluster]:
         """Get clusters with risk indicators"""
-        db = info.context["db"]
+        db = info.context.get("read_db", info.context["db"])
         
         # Get bottom performers as risk clusters
         data = await FinancialService.get_top_performers(db, year, month, 5, bottom=True)
@@ -207,13 +208,13 @@ class AnalyticsQuery:
     @strawberry.field
     async def ceo_dashboard(self, info: Info, year: int, month: int) -> CEODashboardData:
         """Get complete CEO dashboard data in one query"""
-        db = info.context["db"]
-        
-        # Fetch all data
-        kpis = await FinancialService.get_group_kpis(db, year, month)
-        top = await FinancialService.get_top_performers(db, year, month, 3, bottom=False)
-        bottom = await FinancialService.get_top_performers(db, year, month, 3, bottom=True)
-        clusters = await FinancialService.get_cluster_performance(db, year, month)
+        # Fetch all data; the four reads are independent, so run them concurrently
+        kpis, top, bottom, clusters = await fan_out(
+            lambda db: FinancialService.get_group_kpis(db, year, month),
+            lambda db: FinancialService.get_top_performers(db, year, month, 3, bottom=False),
+            lambda db: FinancialService.get_top_performers(db, year, month, 3, bottom=True),
+            lambda db: FinancialService.get_cluster_performance(db, year, month),
+        )
         
         # Build risk clusters from bottom performers
         risk_clusters = []
@@ -275,7 +276,7 @@ class AnalyticsQuery:
         year: int
     ) -> List[ClusterForecast]:
         """Get cluster-level forecasts"""
-        db = info.context["db"]
+        db = info.context.get("read_db", info.context["db"])
         
         # Get current performance and project
         clusters = await FinancialService.get_cluster_performance(db, year, 10)
@@ -300,7 +301,7 @@ class AnalyticsQuery:
         input: ScenarioInput
     ) -> ScenarioResult:
         """Run what-if scenario analysis"""
-        db = info.context["db"]
+        db = info.context.get("read_db", info.context["db"])
         
         kpis = await FinancialService.get_group_kpis(db, year, month)
         
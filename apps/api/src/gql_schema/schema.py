@@ -2,9 +2,13 @@
 GraphQL Schema Definition
 """
 import strawberry
+from strawberry.extensions import ParserCache, QueryDepthLimiter, ValidationCache
 from strawberry.fastapi import GraphQLRouter
 from typing import Optional
 
+from src.config.settings import settings
+from src.gql_schema.extensions import CostLimitExtension, OperationTimingExtension
+
 from src.gql_schema.resolvers.auth import AuthQuery, AuthMutation
 from src.gql_schema.resolvers.admin import AdminQuery, AdminMutation
 from src.gql_schema.resolvers.analytics import AnalyticsQuery, AnalyticsMutation
@@ -27,7 +31,19 @@ class Mutation(AuthMutation, AdminMutation, AnalyticsMutation, ReportMutation):
 
 
 # Create schema
-schema = strawberry.Schema(query=Query, mutation=Mutation)
+# Timing wraps everything; parsed and validated documents are cached by query
+# text, so persisted queries skip both steps after their first use.
+schema = strawberry.Schema(
+    query=Query,
+    mutation=Mutation,
+    extensions=[
+        OperationTimingExtension,
+        ParserCache(maxsize=settings.graphql_document_cache_size),
+        QueryDepthLimiter(max_depth=settings.graphql_max_depth),
+        ValidationCache(maxsize=settings.graphql_document_cache_size),
+        CostLimitExtension,
+    ],
+)
 
 
 async def get_context(db, user=None):
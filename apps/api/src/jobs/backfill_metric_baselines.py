@@ -0,0 +1,49 @@
+#!/usr/bin/env python
+"""
+Metric Baseline Backfill - rebuild anomaly baselines from approved actuals
+
+Usage:
+    python -m src.jobs.backfill_metric_baselines
+
+This script:
+1. Locks out approvals folding into the baselines meanwhile
+2. Recomputes every company's per-metric count / mean / M2, overall and per
+   calendar month, from financial_fact in one set-based pass
+3. Records the approved periods it covered, so later approvals are folded
+   in incrementally without double counting
+
+Run it once after migration 011, and again whenever approved figures have
+been corrected in place. Safe to repeat.
+
+Environment:
+    Set DATABASE_URL
+"""
+import asyncio
+import logging
+import time
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger("baseline_backfill")
+
+
+async def backfill_metric_baselines() -> dict:
+    """Rebuild analytics.metric_baseline in one transaction."""
+    from src.db.session import AsyncSessionLocal
+    from src.services.anomaly_service import AnomalyService
+
+    started = time.monotonic()
+    async with AsyncSessionLocal() as db:
+        stats = await AnomalyService.backfill(db)
+        await db.commit()
+    logger.info(
+        "Backfilled %d baselines from %d approved periods in %.1fs",
+        stats["baselines"], stats["periods"], time.monotonic() - started,
+    )
+    return stats
+
+
+if __name__ == "__main__":
+    asyncio.run(backfill_metric_baselines())
@@ -6,10 +6,11 @@ Usage:
     python -m src.jobs.send_outbox_emails
     
 This script:
-1. Fetches pending emails from the outbox
-2. Sends them via the configured email provider (Mailpit/Resend/Graph)
-3. Marks them as sent or failed
-4. Can be run repeatedly - won't resend already sent emails
+1. Releases held workflow emails whose digest window has passed (one email per recipient)
+2. Fetches pending emails from the outbox
+3. Sends them via the configured email provider (Mailpit/Resend/Graph)
+4. Marks them as sent or failed
+5. Can be run repeatedly - won't resend already sent emails
 
 Recommended cron schedule:
     * * * * * cd /app && python -m src.jobs.send_outbox_emails >> /var/log/email_worker.log 2>&1
@@ -47,6 +48,7 @@ async def send_outbox_emails(
     from src.db.session import AsyncSessionLocal
     from src.db.models import EmailOutbox, EmailStatus
     from src.services.email_provider import get_email_provider_instance
+    from src.services.email_outbox_service import EmailOutboxService
     from src.config.settings import settings
     
     logger.info("=" * 60)
@@ -63,10 +65,22 @@ async def send_outbox_emails(
         "sent": 0,
         "failed": 0,
         "skipped": 0,
+        "released": 0,
     }
     
     async with AsyncSessionLocal() as db:
         try:
+            # Coalesce held workflow emails into per-recipient digests
+            if not dry_run:
+                released = await EmailOutboxService.release_digests(db)
+                await db.commit()
+                stats["released"] = released["items"]
+                if released["items"]:
+                    logger.info(
+                        f"Released {released['items']} held email(s) as "
+                        f"{released['digests'] + released['singles']} outbox email(s)"
+                    )
+            
             # Fetch pending emails
             result = await db.execute(
                 select(EmailOutbox)
@@ -0,0 +1,5 @@
+"""
+Load Test Package - Concurrent role mixes against the API, with baselines
+
+    python -m src.loadtest --help
+"""
@@ -0,0 +1,161 @@
+#!/usr/bin/env python
+"""
+Load Test - month-end role mix against the API
+
+Usage:
+    python -m src.loadtest --users fo=40,fd=6,md=2,ceo=2 \\
+        --accounts fo=fo1@mclarens.lk,fo2@mclarens.lk --accounts fd=fd1@mclarens.lk \\
+        --accounts md=md@mclarens.lk --accounts ceo=md@mclarens.lk \\
+        --duration 300 --baseline loadtest/month_end.json
+
+This script:
+1. Starts main.app in-process (or targets --base-url) and waits for /health/ready
+2. Signs in each virtual user through /auth/login/dev (AUTH_MODE=dev)
+3. Runs every role's scenario in a loop with think time, ramping users up
+4. Prints throughput, latency per step, error / shed rates, pool and lock waits
+5. With --baseline: compares against it and exits 1 on regression;
+   with --save-baseline: records this run as the new baseline
+
+Writes real actuals, approvals and rejections for the target period: run it
+against a disposable or staging database, or pass --read-only.
+
+Environment:
+    Set DATABASE_URL (in-process) and AUTH_MODE=dev
+"""
+import asyncio
+import json
+import logging
+import sys
+from pathlib import Path
+from typing import Dict, List
+
+from src.loadtest.harness import (
+    LoadConfig,
+    RoleConfig,
+    Tolerances,
+    compare_to_baseline,
+    format_report,
+    load_baseline,
+    run_load,
+    save_baseline,
+)
+from src.loadtest.scenarios import SCENARIOS
+
+logging.basicConfig(
+    level=logging.WARNING,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+
+# Mean seconds between steps: officers key in figures, executives read dashboards.
+DEFAULT_THINK_SECONDS = {"fo": 8.0, "fd": 6.0, "md": 10.0, "ceo": 15.0}
+
+
+def _role(item: str, option: str):
+    role, sep, value = item.partition("=")
+    if not sep or role not in SCENARIOS:
+        raise SystemExit(f"{option}: expected role=value with role in {sorted(SCENARIOS)}, got {item!r}")
+    return role, value
+
+
+def _role_values(values: List[str], option: str) -> Dict[str, str]:
+    """--users fo=40,fd=6 (repeatable) -> {"fo": "40", "fd": "6"}"""
+    return dict(_role(item, option) for value in values for item in value.split(","))
+
+
+def _role_accounts(values: List[str]) -> Dict[str, List[str]]:
+    """--accounts fo=a@x.lk,b@x.lk (repeatable) -> {"fo": ["a@x.lk", "b@x.lk"]}"""
+    accounts: Dict[str, List[str]] = {}
+    for value in values:
+        role, emails = _role(value, "--accounts")
+        accounts.setdefault(role, []).extend(e.strip() for e in emails.split(",") if e.strip())
+    return accounts
+
+
+def build_config(args) -> LoadConfig:
+    users = {role: int(n) for role, n in _role_values(args.users, "--users").items()}
+    accounts = _role_accounts(args.accounts)
+    think = {**DEFAULT_THINK_SECONDS, **{role: float(s) for role, s in _role_values(args.think, "--think").items()}}
+
+    database_url = args.database_url
+    if database_url is None and not args.base_url:
+        from src.config.settings import settings
+        database_url = settings.database_url if settings.database_url.startswith("postgresql") else None
+
+    return LoadConfig(
+        roles={role: RoleConfig(users=n, accounts=accounts.get(role, []), think_seconds=think[role])
+               for role, n in users.items()},
+        duration_seconds=args.duration,
+        ramp_seconds=args.ramp,
+        think_scale=args.think_scale,
+        base_url=args.base_url,
+        year=args.year,
+        month=args.month,
+        writes=not args.read_only,
+        seed=args.seed,
+        database_url=database_url or None,
+    )
+
+
+async def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run a concurrent role mix against the API")
+    parser.add_argument("--users", action="append", default=[], help="Virtual users per role, e.g. fo=40,fd=6")
+    parser.add_argument("--accounts", action="append", default=[],
+                        help="Accounts a role signs in as, e.g. fo=a@x.lk,b@x.lk (repeatable)")
+    parser.add_argument("--think", action="append", default=[], help="Mean think seconds per role, e.g. fo=8")
+    parser.add_argument("--think-scale", type=float, default=1.0, help="Multiply all think times (0 = none)")
+    parser.add_argument("--duration", type=float, default=120.0, help="Seconds at full load, after the ramp")
+    parser.add_argument("--ramp", type=float, default=15.0, help="Seconds over which users start")
+    parser.add_argument("--base-url", default=None, help="Target a running server instead of in-process")
+    parser.add_argument("--year", type=int, default=None, help="Period year (default: last month)")
+    parser.add_argument("--month", type=int, default=None, help="Period month (default: last month)")
+    parser.add_argument("--read-only", action="store_true", help="Skip save / submit / approve / reject")
+    parser.add_argument("--database-url", default=None,
+                        help="PostgreSQL URL for lock-wait sampling (default: DATABASE_URL in-process, '' = off)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", type=Path, default=None, help="Also write the full report here")
+    parser.add_argument("--baseline", type=Path, default=None, help="Baseline report to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="Write this run to --baseline")
+    parser.add_argument("--latency-tolerance", type=float, default=Tolerances.latency_ratio,
+                        help="Allowed fractional p95/p99 growth")
+    parser.add_argument("--throughput-tolerance", type=float, default=Tolerances.throughput_ratio,
+                        help="Allowed fractional throughput drop")
+
+    args = parser.parse_args()
+    if not args.users:
+        parser.error("--users is required")
+    if args.save_baseline and not args.baseline:
+        parser.error("--save-baseline needs --baseline")
+
+    report = await run_load(build_config(args), SCENARIOS)
+    print(format_report(report))
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2))
+
+    if not args.baseline:
+        return
+    if args.save_baseline:
+        save_baseline(report, args.baseline)
+        print(f"\nBaseline saved to {args.baseline}")
+        return
+    if not args.baseline.exists():
+        print(f"\nNo baseline at {args.baseline}; run with --save-baseline first")
+        sys.exit(2)
+
+    tolerances = Tolerances(latency_ratio=args.latency_tolerance, throughput_ratio=args.throughput_tolerance)
+    try:
+        regressions = compare_to_baseline(report, load_baseline(args.baseline), tolerances)
+    except ValueError as exc:
+        print(f"\nNot comparable with {args.baseline}: {exc}")
+        sys.exit(2)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) against {args.baseline}:")
+        for regression in regressions:
+            print(f"  {regression}")
+        sys.exit(1)
+    print(f"\nNo regressions against {args.baseline}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
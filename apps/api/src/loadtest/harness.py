@@ -0,0 +1,708 @@
+"""
+Load Harness
+
+Drives the API with concurrent virtual users. Each user logs in through
+/auth/login/dev as one role and runs that role's scenario (see scenarios.py)
+in a loop, with randomised think time between steps, until the run ends.
+The target is main.app in-process (ASGI, lifespan included) or a running
+server at base_url.
+
+A run reports:
+- throughput, and latency percentiles overall and per named step
+- outcomes per step: ok, conflict (an expected business-rule refusal, e.g.
+  approving something another director just approved), shed (429/503 from
+  rate limiting or admission control) and error (anything else)
+- connection pool checkout waits, from /health/pool before and after; its
+  counters are per worker, so they are left out (with a note saying why)
+  when more than one worker answers
+- lock waits, sampled from pg_stat_activity when a PostgreSQL URL is given
+
+Reports can be saved as a baseline and later runs compared against it
+(compare_to_baseline); see __main__.py for the command line.
+"""
+import asyncio
+import json
+import logging
+import random
+import time
+from collections import Counter, defaultdict
+from contextlib import AsyncExitStack
+from dataclasses import dataclass
+from datetime import date
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import httpx
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+
+logger = logging.getLogger(__name__)
+
+# Role -> portal passed to /auth/login/dev. Executives sign in to the MD portal.
+ROLE_PORTALS: Dict[str, str] = {
+    "fo": "finance-officer",
+    "fd": "finance-director",
+    "md": "md",
+    "ceo": "md",
+}
+
+SHED_STATUSES = (429, 503)
+
+OUTCOMES = ("ok", "conflict", "shed", "error")
+
+
+class RunExpired(Exception):
+    """Raised inside a scenario once the run is over; ends the user's iteration."""
+
+
+def percentile(values: Sequence[float], p: float) -> Optional[float]:
+    """Nearest-rank percentile of sorted values, in the values' unit, rounded to 0.01."""
+    if not values:
+        return None
+    return round(values[min(len(values) - 1, int(p * len(values)))], 2)
+
+
+def latency_summary(latencies_ms: Iterable[float]) -> Dict[str, Optional[float]]:
+    ordered = sorted(latencies_ms)
+    return {
+        "p50": percentile(ordered, 0.5),
+        "p95": percentile(ordered, 0.95),
+        "p99": percentile(ordered, 0.99),
+        "max": percentile(ordered, 1.0),
+    }
+
+
+def previous_month(today: Optional[date] = None) -> Tuple[int, int]:
+    """The period finance officers are closing during month-end."""
+    today = today or date.today()
+    return (today.year, today.month - 1) if today.month > 1 else (today.year - 1, 12)
+
+
+# ============ CONFIGURATION ============
+
+@dataclass
+class RoleConfig:
+    """Virtual users for one role, the accounts they sign in as, and their mean think time."""
+    users: int
+    accounts: List[str]
+    think_seconds: float = 5.0
+
+
+@dataclass
+class LoadConfig:
+    roles: Dict[str, RoleConfig]
+    duration_seconds: float = 60.0
+    ramp_seconds: float = 10.0
+    # Multiplies every think time; 0 runs the scenarios back to back.
+    think_scale: float = 1.0
+    # None drives main.app in-process.
+    base_url: Optional[str] = None
+    # Period the scenarios work on; defaults to the month being closed.
+    year: Optional[int] = None
+    month: Optional[int] = None
+    # False drops the steps that save, submit, approve or reject.
+    writes: bool = True
+    seed: int = 1
+    request_timeout_seconds: float = 30.0
+    ready_timeout_seconds: float = 60.0
+    # PostgreSQL URL to sample lock waits from; None skips lock sampling.
+    database_url: Optional[str] = None
+    lock_sample_seconds: float = 1.0
+
+    @property
+    def period(self) -> Tuple[int, int]:
+        if self.year and self.month:
+            return self.year, self.month
+        return previous_month()
+
+    def mix(self) -> Dict[str, int]:
+        return {role: cfg.users for role, cfg in sorted(self.roles.items()) if cfg.users}
+
+
+# ============ RECORDING ============
+
+class Recorder:
+    """Latency and outcome per named step, plus run-level counters."""
+
+    def __init__(self, max_error_samples: int = 20):
+        self.latencies_ms: Dict[str, List[float]] = defaultdict(list)
+        self.outcomes: Dict[str, Counter] = defaultdict(Counter)
+        self.statuses: Counter = Counter()
+        self.iterations: Counter = Counter()
+        self.scenario_errors: Counter = Counter()
+        self.error_samples: List[str] = []
+        self.max_error_samples = max_error_samples
+        self.first_at: Optional[float] = None
+        self.last_at: Optional[float] = None
+
+    def record(self, name: str, seconds: float, outcome: str, status: Optional[int] = None,
+               detail: Optional[str] = None) -> None:
+        now = time.monotonic()
+        if self.first_at is None:
+            self.first_at = now - seconds
+        self.last_at = now
+        self.latencies_ms[name].append(seconds * 1000)
+        self.outcomes[name][outcome] += 1
+        self.statuses[status if status is not None else "exception"] += 1
+        if outcome == "error" and len(self.error_samples) < self.max_error_samples:
+            self.error_samples.append(f"{name}: {status if status is not None else ''} {detail or ''}".strip())
+
+    def scenario_failed(self, role: str, exc: BaseException) -> None:
+        self.scenario_errors[role] += 1
+        if len(self.error_samples) < self.max_error_samples:
+            self.error_samples.append(f"{role} scenario: {type(exc).__name__}: {exc}")
+
+    @property
+    def requests(self) -> int:
+        return sum(len(v) for v in self.latencies_ms.values())
+
+    def endpoint_stats(self) -> Dict[str, Dict[str, Any]]:
+        stats = {}
+        for name in sorted(self.latencies_ms):
+            outcomes = self.outcomes[name]
+            count = len(self.latencies_ms[name])
+            stats[name] = {
+                "count": count,
+                **{outcome: outcomes[outcome] for outcome in OUTCOMES},
+                "error_rate": round(outcomes["error"] / count, 4) if count else 0.0,
+                "latency_ms": latency_summary(self.latencies_ms[name]),
+            }
+        return stats
+
+
+# ============ VIRTUAL USERS ============
+
+class VirtualUser:
+    """
+    One signed-in user. Scenarios call get/post/think; each request is timed
+    and classified. ETags are remembered per URL, so repeated dashboard reads
+    are conditional the way the browser makes them.
+    """
+
+    def __init__(
+        self,
+        index: int,
+        role: str,
+        account: str,
+        client: httpx.AsyncClient,
+        recorder: Recorder,
+        rng: random.Random,
+        think_seconds: float,
+        period: Tuple[int, int],
+        deadline: float,
+        writes: bool = True,
+    ):
+        self.index = index
+        self.role = role
+        self.account = account
+        self.client = client
+        self.recorder = recorder
+        self.rng = rng
+        self.think_seconds = think_seconds
+        self.period = period
+        self.deadline = deadline
+        self.writes = writes
+        self.state: Dict[str, Any] = {}
+        # Distinct client address per user, so per-client rate limits apply per user.
+        self.headers: Dict[str, str] = {"X-Forwarded-For": f"10.{index // 65536 % 256}.{index // 256 % 256}.{index % 256}"}
+        self._etags: Dict[str, str] = {}
+
+    @property
+    def expired(self) -> bool:
+        return time.monotonic() >= self.deadline
+
+    async def login(self) -> bool:
+        response = await self.request(
+            "auth.login", "POST", "/auth/login/dev",
+            json={"email": self.account, "portal": ROLE_PORTALS[self.role]},
+        )
+        if response is None:
+            return False
+        self.headers["Authorization"] = f"Bearer {response.json()['access_token']}"
+        return True
+
+    async def think(self, scale: float = 1.0) -> None:
+        """Pause like a user reading the page: exponential around the mean, capped at 3x."""
+        mean = self.think_seconds * scale
+        if mean <= 0:
+            # Still yield, so back-to-back users against an in-process app take turns.
+            await asyncio.sleep(0)
+            return
+        pause = min(self.rng.expovariate(1 / mean), 3 * mean, max(0.0, self.deadline - time.monotonic()))
+        await asyncio.sleep(pause)
+
+    async def request(
+        self,
+        name: str,
+        method: str,
+        path: str,
+        expect: Sequence[int] = (200,),
+        conflict: Sequence[int] = (),
+        conditional: bool = False,
+        **kwargs: Any,
+    ) -> Optional[httpx.Response]:
+        """
+        Send one request as step `name`. Returns the response when its status
+        is in `expect`, otherwise None. Statuses in `conflict` are expected
+        refusals and are not counted as errors.
+        """
+        if self.expired:
+            raise RunExpired()
+        headers = dict(self.headers)
+        cache_key = None
+        if conditional:
+            cache_key = f"{path}?{sorted((kwargs.get('params') or {}).items())}"
+            if cache_key in self._etags:
+                headers["If-None-Match"] = self._etags[cache_key]
+            expect = tuple(expect) + (304,)
+
+        started = time.perf_counter()
+        try:
+            response = await self.client.request(method, path, headers=headers, **kwargs)
+            await response.aread()
+        except httpx.HTTPError as exc:
+            self.recorder.record(name, time.perf_counter() - started, "error", None, f"{type(exc).__name__}: {exc}")
+            return None
+        elapsed = time.perf_counter() - started
+
+        status = response.status_code
+        if status in expect:
+            outcome = "ok"
+        elif status in conflict:
+            outcome = "conflict"
+        elif status in SHED_STATUSES:
+            outcome = "shed"
+        else:
+            outcome = "error"
+        self.recorder.record(name, elapsed, outcome, status, response.text[:200] if outcome == "error" else None)
+
+        if response.headers.get("x-last-write"):
+            # Echoed like the frontend does, so reads after a write stay on the primary.
+            self.headers["X-Last-Write"] = response.headers["x-last-write"]
+        if cache_key is not None and status == 200 and response.headers.get("etag"):
+            self._etags[cache_key] = response.headers["etag"]
+        return response if outcome == "ok" else None
+
+    async def get(self, name: str, path: str, **kwargs: Any) -> Optional[httpx.Response]:
+        return await self.request(name, "GET", path, **kwargs)
+
+    async def post(self, name: str, path: str, **kwargs: Any) -> Optional[httpx.Response]:
+        return await self.request(name, "POST", path, **kwargs)
+
+    @staticmethod
+    def body(response: Optional[httpx.Response]) -> Any:
+        """JSON body of a fresh 200, or None (failed, 304 Not Modified, or not JSON)."""
+        if response is None or response.status_code != 200:
+            return None
+        try:
+            return response.json()
+        except ValueError:
+            return None
+
+
+Scenario = Callable[[VirtualUser], Awaitable[None]]
+
+
+async def _run_user(vu: VirtualUser, scenario: Scenario, start_delay: float) -> None:
+    await asyncio.sleep(start_delay)
+    if vu.expired:
+        return
+    try:
+        while not await vu.login():
+            # Refused or shed; retry like a user pressing the button again.
+            await asyncio.sleep(1.0)
+        while not vu.expired:
+            try:
+                await scenario(vu)
+            except RunExpired:
+                break
+            except (AttributeError, KeyError, IndexError, TypeError, ValueError) as exc:
+                # A response the scenario could not follow; start the next iteration.
+                vu.recorder.scenario_failed(vu.role, exc)
+                await vu.think()
+                continue
+            vu.recorder.iterations[vu.role] += 1
+    except RunExpired:
+        pass
+
+
+# ============ DATABASE SAMPLING ============
+
+_LOCK_WAIT_SQL = text(
+    """
+    SELECT
+        count(*) FILTER (WHERE wait_event_type = 'Lock') AS waiting,
+        COALESCE(max(EXTRACT(EPOCH FROM now() - state_change)) FILTER (WHERE wait_event_type = 'Lock'), 0)
+            AS longest_seconds
+    FROM pg_stat_activity
+    WHERE datname = current_database() AND pid <> pg_backend_pid()
+    """
+)
+
+_DEADLOCKS_SQL = text("SELECT deadlocks FROM pg_stat_database WHERE datname = current_database()")
+
+
+class LockSampler:
+    """Samples backends waiting on locks at a fixed interval over one connection."""
+
+    def __init__(self, database_url: str, interval_seconds: float = 1.0):
+        self.database_url = database_url
+        self.interval_seconds = interval_seconds
+        self.samples: List[Tuple[int, float]] = []
+        self.deadlocks: Optional[int] = None
+        self.error: Optional[str] = None
+
+    async def run(self, stop: asyncio.Event) -> None:
+        engine = create_async_engine(self.database_url, poolclass=NullPool)
+        try:
+            async with engine.connect() as conn:
+                deadlocks_before = (await conn.execute(_DEADLOCKS_SQL)).scalar() or 0
+                await conn.commit()
+                while not stop.is_set():
+                    row = (await conn.execute(_LOCK_WAIT_SQL)).one()
+                    # A new transaction per sample, so now() moves.
+                    await conn.commit()
+                    self.samples.append((int(row.waiting), float(row.longest_seconds)))
+                    try:
+                        await asyncio.wait_for(stop.wait(), self.interval_seconds)
+                    except asyncio.TimeoutError:
+                        pass
+                self.deadlocks = ((await conn.execute(_DEADLOCKS_SQL)).scalar() or 0) - deadlocks_before
+        except Exception as exc:
+            self.error = f"{type(exc).__name__}: {exc}"
+            logger.warning("Lock sampling stopped: %s", self.error)
+        finally:
+            await engine.dispose()
+
+    def summary(self) -> Dict[str, Any]:
+        waiting = [w for w, _ in self.samples]
+        return {
+            "samples": len(self.samples),
+            "waiting_max": max(waiting, default=0),
+            "waiting_mean": round(sum(waiting) / len(waiting), 3) if waiting else 0.0,
+            "waiting_fraction": round(sum(1 for w in waiting if w) / len(waiting), 4) if waiting else 0.0,
+            "longest_wait_ms": round(max((s for _, s in self.samples), default=0.0) * 1000, 1),
+            "deadlocks": self.deadlocks,
+            "error": self.error,
+        }
+
+
+def _pool_delta(before: Dict[str, Any], after: Dict[str, Any]) -> Dict[str, Any]:
+    """Checkout waits during the run, from two /health/pool snapshots."""
+    result = {}
+    for name, end in after.items():
+        start = before.get(name, {})
+        checkouts = end.get("checkouts", 0) - start.get("checkouts", 0)
+        wait_ms = end.get("wait_ms_total", 0.0) - start.get("wait_ms_total", 0.0)
+        connects = end.get("connects", 0) - start.get("connects", 0)
+        connect_ms = end.get("connect_ms_total", 0.0) - start.get("connect_ms_total", 0.0)
+        result[name] = {
+            "size": end.get("size"),
+            "checkouts": checkouts,
+            "timeouts": end.get("timeouts", 0) - start.get("timeouts", 0),
+            "wait_ms_mean": round(wait_ms / checkouts, 3) if checkouts else 0.0,
+            # Over the pool's most recent checkouts (see PoolMonitor), i.e. the end of the run.
+            "wait_ms": end.get("wait_ms", {}),
+            # New connections opened during checkouts; not part of the wait.
+            "connects": connects,
+            "connect_ms_mean": round(connect_ms / connects, 3) if connects else 0.0,
+        }
+    return result
+
+
+# ============ RUN ============
+
+async def _wait_ready(client: httpx.AsyncClient, timeout_seconds: float) -> None:
+    deadline = time.monotonic() + timeout_seconds
+    while True:
+        response = await client.get("/health/ready")
+        if response.status_code == 200:
+            return
+        if time.monotonic() >= deadline:
+            raise RuntimeError(f"API not ready after {timeout_seconds}s: {response.text[:200]}")
+        await asyncio.sleep(0.5)
+
+
+# /health/pool requests per snapshot, each on a fresh connection, to see which workers answer.
+POOL_PROBES = 4
+
+
+async def _pool_snapshot(client: httpx.AsyncClient) -> Tuple[Dict[str, Any], Set[Any]]:
+    """The last /health/pool answer, and the pids of the workers that answered any probe."""
+    snapshot: Dict[str, Any] = {}
+    pids: Set[Any] = set()
+    for _ in range(POOL_PROBES):
+        try:
+            response = await client.get("/health/pool", headers={"Connection": "close"})
+        except httpx.HTTPError:
+            continue
+        if response.status_code == 200:
+            snapshot = response.json()
+            pids.add(snapshot.pop("pid", None))
+    return snapshot, pids
+
+
+async def run_load(
+    config: LoadConfig,
+    scenarios: Dict[str, Scenario],
+    app: Any = None,
+) -> Dict[str, Any]:
+    """
+    Run the configured mix and return the report. With config.base_url unset,
+    `app` (default: src.main.app) is driven in-process with its lifespan.
+    """
+    unknown = set(config.mix()) - set(scenarios)
+    if unknown:
+        raise ValueError(f"No scenario for role(s): {', '.join(sorted(unknown))}")
+    for role, role_config in config.roles.items():
+        if role_config.users and not role_config.accounts:
+            raise ValueError(f"No accounts configured for role {role}")
+
+    async with AsyncExitStack() as stack:
+        if config.base_url:
+            transport: httpx.AsyncBaseTransport = httpx.AsyncHTTPTransport(retries=0)
+            base_url = config.base_url
+        else:
+            if app is None:
+                from src.main import app
+            await stack.enter_async_context(app.router.lifespan_context(app))
+            transport = httpx.ASGITransport(app=app)
+            base_url = "http://loadtest"
+        users = sum(config.mix().values())
+        client = await stack.enter_async_context(httpx.AsyncClient(
+            transport=transport,
+            base_url=base_url,
+            timeout=config.request_timeout_seconds,
+            limits=httpx.Limits(max_connections=max(10, users), max_keepalive_connections=max(10, users)),
+        ))
+        await _wait_ready(client, config.ready_timeout_seconds)
+
+        recorder = Recorder()
+        rng = random.Random(config.seed)
+        pool_before, pids_before = await _pool_snapshot(client)
+
+        stop = asyncio.Event()
+        sampler = LockSampler(config.database_url, config.lock_sample_seconds) if config.database_url else None
+        sampler_task = asyncio.create_task(sampler.run(stop)) if sampler else None
+
+        started = time.monotonic()
+        deadline = started + config.ramp_seconds + config.duration_seconds
+        tasks = []
+        index = 0
+        for role, role_config in sorted(config.roles.items()):
+            for n in range(role_config.users):
+                vu = VirtualUser(
+                    index=index,
+                    role=role,
+                    account=role_config.accounts[n % len(role_config.accounts)],
+                    client=client,
+                    recorder=recorder,
+                    rng=random.Random(rng.random()),
+                    think_seconds=role_config.think_seconds * config.think_scale,
+                    period=config.period,
+                    deadline=deadline,
+                    writes=config.writes,
+                )
+                tasks.append((vu, scenarios[role]))
+                index += 1
+        # Interleave roles over the ramp so every role is present from the start.
+        rng.shuffle(tasks)
+        await asyncio.gather(*(
+            _run_user(vu, scenario, config.ramp_seconds * i / max(1, len(tasks)))
+            for i, (vu, scenario) in enumerate(tasks)
+        ))
+        elapsed = time.monotonic() - started
+
+        stop.set()
+        if sampler_task is not None:
+            await sampler_task
+        pool_after, pids_after = await _pool_snapshot(client)
+
+    workers = pids_before | pids_after
+    if len(workers) > 1:
+        # Counters from different workers do not subtract; one worker's alone understate the run.
+        pool: Dict[str, Any] = {}
+        pool_note = (
+            f"not measured: /health/pool was answered by {len(workers)} workers "
+            f"(pids {', '.join(str(pid) for pid in sorted(workers, key=str))}) and its counters are per worker"
+        )
+    else:
+        pool, pool_note = _pool_delta(pool_before, pool_after), None
+    return build_report(config, recorder, elapsed, pool, sampler.summary() if sampler else None, pool_note)
+
+
+def build_report(
+    config: LoadConfig,
+    recorder: Recorder,
+    elapsed_seconds: float,
+    pool: Dict[str, Any],
+    locks: Optional[Dict[str, Any]],
+    pool_note: Optional[str] = None,
+) -> Dict[str, Any]:
+    requests = recorder.requests
+    outcomes = Counter()
+    for counts in recorder.outcomes.values():
+        outcomes.update(counts)
+    # Throughput over the span in which requests actually completed.
+    span = (recorder.last_at - recorder.first_at) if requests > 1 else elapsed_seconds
+    span = span or elapsed_seconds or 1.0
+    return {
+        "target": config.base_url or "in-process",
+        "mix": config.mix(),
+        "think_scale": config.think_scale,
+        "writes": config.writes,
+        "period": list(config.period),
+        "duration_seconds": round(elapsed_seconds, 2),
+        "requests": requests,
+        "throughput_rps": round(requests / span, 2),
+        "ok_rps": round(outcomes["ok"] / span, 2),
+        **{outcome: outcomes[outcome] for outcome in OUTCOMES},
+        "error_rate": round(outcomes["error"] / requests, 4) if requests else 0.0,
+        "shed_rate": round(outcomes["shed"] / requests, 4) if requests else 0.0,
+        "latency_ms": latency_summary(v for values in recorder.latencies_ms.values() for v in values),
+        "iterations": dict(recorder.iterations),
+        "scenario_errors": dict(recorder.scenario_errors),
+        "statuses": {str(k): v for k, v in sorted(recorder.statuses.items(), key=lambda kv: str(kv[0]))},
+        "endpoints": recorder.endpoint_stats(),
+        "pool": pool,
+        "pool_note": pool_note,
+        "locks": locks,
+        "error_samples": recorder.error_samples,
+    }
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    lines = [
+        f"Target {report['target']}, mix {report['mix']}, think x{report['think_scale']}, "
+        f"period {report['period'][0]}-{report['period'][1]:02d}, {report['duration_seconds']}s",
+        f"Requests {report['requests']}  throughput {report['throughput_rps']}/s  ok {report['ok_rps']}/s  "
+        f"errors {report['error_rate']:.2%}  shed {report['shed_rate']:.2%}  conflicts {report['conflict']}",
+        "Latency ms  " + "  ".join(f"{k} {v}" for k, v in report["latency_ms"].items()),
+        f"Iterations {report['iterations']}",
+        "",
+        f"{'step':<28}{'count':>7}{'err%':>7}{'shed':>6}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}",
+    ]
+    for name, stats in report["endpoints"].items():
+        latency = stats["latency_ms"]
+        lines.append(
+            f"{name:<28}{stats['count']:>7}{stats['error_rate'] * 100:>7.1f}{stats['shed']:>6}"
+            + "".join(f"{latency[k] if latency[k] is not None else '-':>9}" for k in ("p50", "p95", "p99", "max"))
+        )
+    for name, pool in report["pool"].items():
+        lines.append(
+            f"\nPool {name}: {pool['checkouts']} checkouts, wait mean {pool['wait_ms_mean']}ms, "
+            f"p95 {pool['wait_ms'].get('p95')}ms, max {pool['wait_ms'].get('max')}ms, timeouts {pool['timeouts']}, "
+            f"{pool.get('connects', 0)} connects (mean {pool.get('connect_ms_mean', 0.0)}ms)"
+        )
+    if report.get("pool_note"):
+        lines.append(f"\nPool {report['pool_note']}")
+    if report["locks"]:
+        locks = report["locks"]
+        lines.append(
+            f"Locks: max {locks['waiting_max']} waiting, mean {locks['waiting_mean']}, "
+            f"{locks['waiting_fraction']:.1%} of samples, longest {locks['longest_wait_ms']}ms, "
+            f"deadlocks {locks['deadlocks']}" + (f" (sampling failed: {locks['error']})" if locks["error"] else "")
+        )
+    if report["error_samples"]:
+        lines.append("\nErrors:")
+        lines.extend(f"  {sample}" for sample in report["error_samples"])
+    return "\n".join(lines)
+
+
+# ============ BASELINES ============
+
+@dataclass
+class Tolerances:
+    """How far a run may drift from its baseline before it counts as a regression."""
+    # Latency (p95/p99) and pool wait may grow by this fraction ...
+    latency_ratio: float = 0.25
+    # ... and by at least this many ms, so tiny numbers do not trip on noise.
+    latency_floor_ms: float = 10.0
+    pool_wait_floor_ms: float = 2.0
+    # Absolute increase allowed in error / shed rates and the share of samples with lock waiters.
+    error_rate: float = 0.01
+    lock_waiting_fraction: float = 0.05
+    throughput_ratio: float = 0.15
+    # Steps with fewer requests than this in either run are not compared.
+    min_samples: int = 20
+
+
+@dataclass
+class Regression:
+    metric: str
+    baseline: float
+    current: float
+    limit: float
+
+    def __str__(self) -> str:
+        return f"{self.metric}: {self.current} (baseline {self.baseline}, limit {self.limit})"
+
+
+def save_baseline(report: Dict[str, Any], path: Path) -> None:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    baseline = {key: value for key, value in report.items() if key != "error_samples"}
+    path.write_text(json.dumps(baseline, indent=2, sort_keys=True))
+
+
+def load_baseline(path: Path) -> Dict[str, Any]:
+    return json.loads(Path(path).read_text())
+
+
+def compare_to_baseline(
+    report: Dict[str, Any],
+    baseline: Dict[str, Any],
+    tolerances: Optional[Tolerances] = None,
+) -> List[Regression]:
+    """
+    Regressions of `report` against `baseline`. Raises ValueError when the two
+    runs used a different role mix or think time, which makes them incomparable.
+    """
+    tol = tolerances or Tolerances()
+    for key in ("mix", "think_scale", "writes"):
+        if report.get(key) != baseline.get(key):
+            raise ValueError(f"Baseline {key} {baseline.get(key)!r} differs from this run's {report.get(key)!r}")
+
+    regressions: List[Regression] = []
+
+    def higher(metric: str, base: Optional[float], current: Optional[float], limit: float) -> None:
+        if base is not None and current is not None and current > limit:
+            regressions.append(Regression(metric, base, current, round(limit, 4)))
+
+    def latency(metric: str, base: Optional[float], current: Optional[float], floor: float) -> None:
+        if base is not None:
+            higher(metric, base, current, max(base * (1 + tol.latency_ratio), base + floor))
+
+    base_rps, rps = baseline.get("throughput_rps"), report.get("throughput_rps")
+    if base_rps and rps is not None and rps < base_rps * (1 - tol.throughput_ratio):
+        regressions.append(Regression("throughput_rps", base_rps, rps, round(base_rps * (1 - tol.throughput_ratio), 2)))
+    for rate in ("error_rate", "shed_rate"):
+        higher(rate, baseline.get(rate), report.get(rate), baseline.get(rate, 0.0) + tol.error_rate)
+    for p in ("p95", "p99"):
+        latency(f"latency_ms.{p}", baseline["latency_ms"].get(p), report["latency_ms"].get(p), tol.latency_floor_ms)
+
+    for name, base in baseline.get("endpoints", {}).items():
+        current = report["endpoints"].get(name)
+        if current is None or min(base["count"], current["count"]) < tol.min_samples:
+            continue
+        higher(f"{name}.error_rate", base["error_rate"], current["error_rate"], base["error_rate"] + tol.error_rate)
+        for p in ("p95", "p99"):
+            latency(f"{name}.latency_ms.{p}", base["latency_ms"].get(p), current["latency_ms"].get(p),
+                    tol.latency_floor_ms)
+
+    for name, base in baseline.get("pool", {}).items():
+        current = report.get("pool", {}).get(name)
+        if current is None:
+            continue
+        latency(f"pool.{name}.wait_ms_mean", base["wait_ms_mean"], current["wait_ms_mean"], tol.pool_wait_floor_ms)
+        higher(f"pool.{name}.timeouts", base["timeouts"], current["timeouts"], base["timeouts"])
+
+    base_locks, locks = baseline.get("locks"), report.get("locks")
+    if base_locks and locks and not base_locks.get("error") and not locks.get("error"):
+        higher("locks.waiting_fraction", base_locks["waiting_fraction"], locks["waiting_fraction"],
+               base_locks["waiting_fraction"] + tol.lock_waiting_fraction)
+        latency("locks.longest_wait_ms", base_locks["longest_wait_ms"], locks["longest_wait_ms"], tol.latency_floor_ms)
+        if base_locks.get("deadlocks") is not None:
+            higher("locks.deadlocks", base_locks["deadlocks"], locks.get("deadlocks"), base_locks["deadlocks"])
+    return regressions
@@ -0,0 +1,152 @@
+"""
+Load Scenarios
+
+One iteration of each role's month-end work, built from the routes the
+portals call. Every step is named "<role>.<action>" in the report.
+
+- fo:  open actual entry, look up the budget, save a draft, submit some
+- fd:  refresh the dashboard, open the review queue (most unusual first),
+       approve or occasionally reject one submission
+- md:  load the MD page bundle, the performance hierarchy, drill into a cluster
+- ceo: load the CEO page bundle, rankings, then one cluster's detail
+
+Writes (save / submit / approve / reject) are skipped when the run is
+read-only. Dashboard reads are conditional (If-None-Match), as in the browser.
+"""
+from typing import Dict
+
+from src.config.constants import MetricID
+from src.loadtest.harness import Scenario, VirtualUser
+
+# Metrics a finance officer keys in; the rest are derived.
+ENTRY_METRICS = (
+    MetricID.REVENUE,
+    MetricID.GP,
+    MetricID.OTHER_INCOME,
+    MetricID.PERSONAL_EXP,
+    MetricID.ADMIN_EXP,
+    MetricID.SELLING_EXP,
+    MetricID.FINANCE_EXP,
+    MetricID.DEPRECIATION,
+)
+
+SUBMIT_RATIO = 0.5
+REJECT_RATIO = 0.15
+
+MD_SECTIONS = ("strategic_overview", "performers", "cluster_contribution", "risk_radar", "pbt_trend")
+CEO_SECTIONS = ("dashboard", "trends")
+
+
+def _entry_payload(vu: VirtualUser, company_id: str) -> Dict:
+    year, month = vu.period
+    revenue = vu.rng.uniform(1_000_000, 50_000_000)
+    shares = {
+        MetricID.REVENUE: 1.0,
+        MetricID.GP: vu.rng.uniform(0.2, 0.4),
+        MetricID.OTHER_INCOME: vu.rng.uniform(0.0, 0.02),
+        MetricID.PERSONAL_EXP: vu.rng.uniform(0.05, 0.12),
+        MetricID.ADMIN_EXP: vu.rng.uniform(0.02, 0.06),
+        MetricID.SELLING_EXP: vu.rng.uniform(0.01, 0.05),
+        MetricID.FINANCE_EXP: vu.rng.uniform(0.0, 0.03),
+        MetricID.DEPRECIATION: vu.rng.uniform(0.005, 0.02),
+    }
+    return {
+        "company_id": company_id,
+        "year": year,
+        "month": month,
+        "metrics": [{"metric_id": int(m), "amount": f"{revenue * shares[m]:.2f}"} for m in ENTRY_METRICS],
+        "actual_comment": "Load test entry",
+    }
+
+
+async def finance_officer(vu: VirtualUser) -> None:
+    year, month = vu.period
+    await vu.get("fo.entry_clusters", "/fo/actual-entry/clusters")
+    companies = vu.body(await vu.get("fo.entry_companies", "/fo/actual-entry/companies"))
+    if not companies or not companies["items"]:
+        await vu.think()
+        return
+    company_id = vu.rng.choice(companies["items"])["company_id"]
+    await vu.think()
+
+    # No budget loaded for the month is a normal 404.
+    await vu.get("fo.entry_budget", "/fo/actual-entry/budget",
+                 params={"company_id": company_id, "year": year, "month": month, "metric_id": 1}, conflict=(404,))
+    await vu.get("fo.drafts", "/fo/actual-drafts")
+    await vu.think(scale=2)  # keying in the figures
+    if not vu.writes:
+        return
+
+    payload = _entry_payload(vu, company_id)
+    # 400 = the period's entry window is closed.
+    await vu.post("fo.save_draft", "/fo/actual-entry/draft", json=payload, conflict=(400,))
+    await vu.think()
+    if vu.rng.random() < SUBMIT_RATIO:
+        await vu.post("fo.submit", "/fo/actual-entry/submit", json=payload, conflict=(400,))
+        await vu.get("fo.rejected", "/fo/rejected-actuals")
+
+
+async def finance_director(vu: VirtualUser) -> None:
+    await vu.get("fd.dashboard", "/fd/dashboard", conditional=True)
+    await vu.think(scale=0.5)
+    queue = vu.body(await vu.get("fd.submitted_actuals", "/fd/submitted-actuals", params={"sort": "anomaly"}))
+    await vu.think()
+    if not vu.writes or not queue or not queue["reports"]:
+        return
+
+    report = vu.rng.choice(queue["reports"][:5])
+    path = f"{report['company_id']}/{report['period_id']}"
+    await vu.think()  # reading the figures
+    # Another director may have reviewed it meanwhile: 400 (no longer submitted) / 404.
+    if vu.rng.random() < REJECT_RATIO:
+        await vu.post("fd.reject", f"/fd/reject-actual/{path}",
+                      json={"reason": "Load test: please recheck overheads"}, conflict=(400, 404))
+    else:
+        await vu.post("fd.approve", f"/fd/approve-actual/{path}", conflict=(400, 404))
+
+
+async def managing_director(vu: VirtualUser) -> None:
+    year, month = vu.period
+    await vu.post("md.bundle", "/md/bundle", json={
+        "mode": "month", "year": year, "month": month,
+        "sections": [{"section": section} for section in MD_SECTIONS],
+    })
+    await vu.think()
+    hierarchy = vu.body(await vu.get("md.performance_hierarchy", "/md/performance-hierarchy",
+                                     params={"year": year, "month": month}, conditional=True))
+    await vu.think()
+    clusters = (hierarchy or {}).get("clusters") or vu.state.get("clusters")
+    if clusters:
+        vu.state["clusters"] = clusters
+        cluster_id = vu.rng.choice(clusters)["id"]
+        await vu.get("md.cluster_drilldown", f"/md/drilldown/cluster/{cluster_id}",
+                     params={"year": year, "month": month}, conditional=True)
+        await vu.think()
+
+
+async def chief_executive(vu: VirtualUser) -> None:
+    year, month = vu.period
+    await vu.post("ceo.bundle", "/ceo/bundle", json={
+        "year": year, "month": month,
+        "sections": [{"section": section} for section in CEO_SECTIONS],
+    })
+    await vu.think()
+    await vu.get("ceo.rankings", f"/ceo/rankings/{year}/{month}", conditional=True)
+    await vu.think()
+    dashboard = vu.body(await vu.get("ceo.dashboard", "/ceo/dashboard",
+                                     params={"year": year, "month": month}, conditional=True))
+    clusters = (dashboard or {}).get("clusters") or vu.state.get("clusters")
+    if clusters:
+        vu.state["clusters"] = clusters
+        cluster_id = vu.rng.choice(clusters)["id"]
+        await vu.get("ceo.cluster", f"/ceo/clusters/{cluster_id}",
+                     params={"year": year, "month": month}, conditional=True)
+    await vu.think()
+
+
+SCENARIOS: Dict[str, Scenario] = {
+    "fo": finance_officer,
+    "fd": finance_director,
+    "md": managing_director,
+    "ceo": chief_executive,
+}
@@ -7,17 +7,49 @@ import aiosmtplib
 from email.message import EmailMessage
 
 from fastapi import FastAPI, Depends, HTTPException, Request, Query
-from fastapi.responses import Response
+from fastapi.responses import JSONResponse, Response
 from pydantic import BaseModel, EmailStr
 from fastapi.middleware.cors import CORSMiddleware
-from strawberry.fastapi import GraphQLRouter
 
 from src.config.settings import settings
-from src.db.session import init_db, close_db, AsyncSessionLocal
+from src.db import statements
+from src.db.session import (
+    close_db,
+    AsyncSessionLocal,
+    open_read_session,
+    pool_stats,
+    prefill_pools,
+    prepare_schema,
+    replica_router,
+)
 from src.gql_schema.schema import schema
+from src.gql_schema.extensions import timing_snapshot
+from src.gql_schema.persisted_queries import (
+    PersistedQueryRouter,
+    load_persisted_queries,
+    persisted_queries,
+)
+from src.services.acl_service import AclService, company_registry
+from src.services.anomaly_service import AnomalyService
 from src.services.auth_service import AuthService
 from src.services.health_service import HealthService
 from src.services.export_service import ExportService
+from src.services.fx_service import FxService
+from src.services.period_snapshot_service import PeriodSnapshotService
+from src.services.timeseries_service import TimeSeriesService, series_maintainer
+from src.services.audit_service import audit_writer
+from src.services.live_service import change_listener
+from src.utils.executors import (
+    ExecutorSaturatedError,
+    executor_stats,
+    shutdown_executors,
+    start_executors,
+    warm_executors,
+)
+from src.utils import fanout
+from src.utils.warmup import startup
+from src.utils.profiler import ProfilerMiddleware, profiler
+from src.utils.singleflight import analytics_flight
 from src.routers.auth_router import router as auth_router
 from src.routers.admin_router import router as admin_router
 from src.routers.admin_reports_router import router as admin_reports_router
@@ -26,8 +58,34 @@ from src.routers.fd_router import router as fd_router
 from src.routers.ceo_router import router as ceo_router
 from src.routers.md_router import router as md_router
 from src.routers.notifications_router import router as notifications_router
+from src.routers.extract_router import router as extract_router
+from src.routers.live_router import router as live_router
+from src.routers.profiler_router import router as profiler_router
 from src.security.rate_limit import RateLimitMiddleware
+from src.security.admission import AdmissionMiddleware, admission_controller
 from src.security.audit_context import AuditMiddleware
+from src.security.read_consistency import ReadConsistencyMiddleware
+
+
+async def _warm_master_data():
+    """Company bit index and FX rates, loaded before the first request needs them."""
+    async with AsyncSessionLocal() as db:
+        await company_registry.refresh(db)
+        rates = await FxService.rates(db)
+    return {"companies": len(company_registry), "fx_version": rates.version}
+
+
+async def _warm_statements():
+    """Compile the hot statement registry and prepare it on a pooled connection."""
+    async with AsyncSessionLocal() as db:
+        return await statements.warm(db)
+
+
+async def _warm_graphql():
+    """First execution builds Strawberry's per-schema state (extensions, type map lookups)."""
+    result = await schema.execute("query Warmup { __typename }", context_value={})
+    if result.errors:
+        raise RuntimeError(result.errors[0].message)
 
 
 @asynccontextmanager
@@ -42,11 +100,38 @@ async def lifespan(app: FastAPI):
     print(f"   Auth Mode: {auth_mode}")
     print(f"   Email Provider: {email_provider} (enabled: {settings.email_enabled})")
     
-    await init_db()
-    print("Database initialized")
+    # Schema check and pool prefill gate readiness; warm-up runs alongside (see /health/ready)
+    startup.start(
+        required=[("schema", prepare_schema), ("pool", prefill_pools)],
+        warm=[
+            ("jwks", AuthService.warm_jwks),
+            ("master_data", _warm_master_data),
+            ("statements", _warm_statements),
+            ("graphql", _warm_graphql),
+        ],
+    )
+    print("Startup warm-up started")
+    if settings.audit_buffer_enabled:
+        audit_writer.start()
+        print("Audit writer started")
+    if settings.timeseries_maintainer_enabled:
+        series_maintainer.start()
+        print("Metric series maintainer started")
+    if settings.live_updates_enabled and change_listener.start():
+        print("Live change listener started")
+    load_persisted_queries()
+    start_executors()
+    await warm_executors()
+    print("Render and hash executors started")
     yield
     # Shutdown
     print("Shutting down...")
+    await startup.stop()
+    await audit_writer.stop()
+    await series_maintainer.stop()
+    await change_listener.stop()
+    profiler.stop("shutdown")
+    shutdown_executors()
     await close_db()
 
 
@@ -65,6 +150,12 @@ app = FastAPI(
 # Audit context middleware (must be near outer layer to capture IP for all requests)
 app.add_middleware(AuditMiddleware)
 
+# Read-your-writes tagging for replica routing
+app.add_middleware(ReadConsistencyMiddleware)
+
+# Admission control: per-route-class concurrency caps and load shedding
+app.add_middleware(AdmissionMiddleware)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -72,6 +163,8 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Read by the frontend and echoed back for read-your-writes across workers
+    expose_headers=["X-Last-Write"],
 )
 
 # Rate limiting middleware (global)
@@ -82,6 +175,9 @@ app.add_middleware(
     exclude_paths=["/health", "/docs", "/openapi.json", "/graphql"]
 )
 
+# On-demand sampling profiler (outermost, so middleware time is profiled too)
+app.add_middleware(ProfilerMiddleware)
+
 # Include auth router
 app.include_router(auth_router)
 
@@ -106,10 +202,19 @@ app.include_router(md_router)
 # Include notifications router
 app.include_router(notifications_router)
 
+# Include bulk extract router
+app.include_router(extract_router)
+
+# Include admin profiler router
+app.include_router(profiler_router)
+
+# Include live updates WebSocket
+app.include_router(live_router)
+
 
 async def get_context(request: Request):
     """Create GraphQL context with database session and authenticated user"""
-    async with AsyncSessionLocal() as db:
+    async with AsyncSessionLocal() as db, open_read_session() as read_db:
         user = None
         auth_error = None
         
@@ -127,7 +232,14 @@ async def get_context(request: Request):
                     if user:
                         user.current_role_id = payload.get("role_id")
                         user.current_role = payload.get("role")
-                        user.accessible_companies = payload.get("companies", [])
+                        user.current_portal = payload.get("portal")
+                        AclService.attach(
+                            user,
+                            await AclService.access_from_token(
+                                db, user.user_id, payload,
+                                AuthService.PORTAL_ROLE_MAP.get(user.current_portal),
+                            ),
+                        )
                 else:
                     entra_payload = await AuthService.verify_entra_token(token)
                     if entra_payload:
@@ -151,14 +263,15 @@ async def get_context(request: Request):
 
         return {
             "db": db,
+            "read_db": read_db,
             "user": user,
             "auth_error": auth_error,
             "request": request
         }
 
 
-# GraphQL router
-graphql_app = GraphQLRouter(
+# GraphQL router (persisted queries, see gql_schema/persisted_queries.py)
+graphql_app = PersistedQueryRouter(
     schema,
     context_getter=get_context
 )
@@ -185,6 +298,13 @@ async def health_quick():
     return {"status": "healthy", "service": "mclarens-api"}
 
 
+@app.get("/health/ready")
+async def health_ready():
+    """Readiness: 200 once the schema is verified and caches are warm, 503 until then"""
+    state = startup.snapshot()
+    return JSONResponse(state, status_code=200 if state["ready"] else 503)
+
+
 @app.get("/health/db")
 async def health_database():
     """Check database connection"""
@@ -217,6 +337,94 @@ async def health_config():
     return HealthService.get_config_summary()
 
 
+@app.get("/health/executors")
+async def health_executors():
+    """Render / hash pool queue depth and timings"""
+    return executor_stats()
+
+
+@app.get("/health/admission")
+async def health_admission():
+    """In-flight requests, queue depth and shed counts per route class"""
+    return admission_controller.snapshot()
+
+
+@app.get("/health/coalescing")
+async def health_coalescing():
+    """Executed vs coalesced dashboard computations"""
+    return analytics_flight.snapshot()
+
+
+@app.get("/health/graphql")
+async def health_graphql():
+    """Per-operation GraphQL timings and persisted query registry"""
+    return {
+        "operations": timing_snapshot(),
+        "persisted_queries": persisted_queries.snapshot(),
+    }
+
+
+@app.get("/health/acl")
+async def health_acl():
+    """Company ACL index and version tracking state"""
+    return AclService.snapshot()
+
+
+@app.get("/health/fx")
+async def health_fx():
+    """FX rate table version and conversion cache counters"""
+    return FxService.snapshot()
+
+
+@app.get("/health/snapshots")
+async def health_snapshots():
+    """Closed-period snapshot cache counters"""
+    return PeriodSnapshotService.snapshot()
+
+
+@app.get("/health/timeseries")
+async def health_timeseries():
+    """Metric series store maintenance and read counters"""
+    return TimeSeriesService.snapshot()
+
+
+@app.get("/health/fanout")
+async def health_fanout():
+    """Concurrent query fan-out counters"""
+    return fanout.snapshot()
+
+
+@app.get("/health/statements")
+async def health_statements():
+    """Hot statement registry: executions and compiled-cache hits"""
+    return statements.snapshot()
+
+
+@app.get("/health/anomaly")
+async def health_anomaly():
+    """Anomaly baseline folds and submission scoring counters"""
+    return AnomalyService.snapshot()
+
+
+@app.get("/health/live")
+async def health_live():
+    """Live update listener state, connections and fan-out latency"""
+    return change_listener.snapshot()
+
+
+@app.get("/health/pool")
+async def health_pool():
+    """Connection pool occupancy and checkout wait times of the worker (pid) that answers"""
+    return {"pid": os.getpid(), **pool_stats()}
+
+
+@app.get("/health/replica")
+async def health_replica():
+    """Read replica lag and routing counters"""
+    await replica_router.refresh()
+    return replica_router.snapshot()
+
+
 # ============ EXPORT ENDPOINTS ============
 
 @app.get("/export/financial-summary")
@@ -228,7 +436,7 @@ async def export_financial_summary(
     Export Group Financial Summary as Excel file.
     Downloads P&L Template with data from the database.
     """
-    async with AsyncSessionLocal() as db:
+    async with open_read_session() as db:
         try:
             excel_bytes = await ExportService.generate_excel_report(db, year, month)
             
@@ -242,6 +450,12 @@ async def export_financial_summary(
                     "Access-Control-Expose-Headers": "Content-Disposition"
                 }
             )
+        except ExecutorSaturatedError as e:
+            raise HTTPException(
+                status_code=503,
+                detail="Export is busy. Please retry shortly.",
+                headers={"Retry-After": str(e.retry_after)},
+            )
         except Exception as e:
             import logging
             logging.getLogger(__name__).error("Export failed: %s", e)
@@ -254,7 +468,7 @@ async def export_financial_summary(
 @app.get("/export/available-periods")
 async def get_available_periods():
     """Get list of periods with financial data available for export."""
-    async with AsyncSessionLocal() as db:
+    async with open_read_session() as db:
         periods = await ExportService.get_available_periods(db)
         return {"periods": periods}
 
@@ -8,6 +8,9 @@ from src.routers.fo_router import router as fo_router
 from src.routers.fd_router import router as fd_router
 from src.routers.ceo_router import router as ceo_router
 from src.routers.md_router import router as md_router
+from src.routers.extract_router import router as extract_router
+from src.routers.live_router import router as live_router
+from src.routers.profiler_router import router as profiler_router
 
 __all__ = [
     "auth_router",
@@ -17,4 +20,7 @@ __all__ = [
     "fd_router",
     "ceo_router",
     "md_router",
+    "extract_router",
+    "live_router",
+    "profiler_router",
 ]
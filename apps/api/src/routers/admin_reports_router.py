@@ -14,13 +14,15 @@ from sqlalchemy.ext.asyncio import AsyncSession
 logger = logging.getLogger(__name__)
 
 from src.db.models import User
-from src.security.middleware import get_db, require_admin
+from src.security.middleware import get_db, get_read_db, require_admin
 from src.security.rate_limit import rate_limit_heavy
 from src.services.admin_report_service import (
     AdminReportService,
     ReportNotFoundError,
     ReportValidationError,
 )
+from src.utils.conditional import ConditionalRequest, years_around
+from src.utils.executors import ExecutorSaturatedError, run_render
 
 router = APIRouter(prefix="/admin/reports", tags=["Admin Reports"])
 
@@ -104,6 +106,12 @@ def _to_http_exception(exc: Exception) -> HTTPException:
         return HTTPException(status_code=404, detail=str(exc))
     if isinstance(exc, ReportValidationError):
         return HTTPException(status_code=400, detail=str(exc))
+    if isinstance(exc, ExecutorSaturatedError):
+        return HTTPException(
+            status_code=503,
+            detail="Report rendering is busy. Please retry shortly.",
+            headers={"Retry-After": str(exc.retry_after)},
+        )
     logger.exception("Unexpected report service error: %s", exc)
     return HTTPException(
         status_code=500,
@@ -115,7 +123,7 @@ def _to_http_exception(exc: Exception) -> HTTPException:
 async def get_report_years(
     company_id: str = Query(...),
     current_user: User = Depends(require_admin),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     try:
         years = await AdminReportService.get_available_years(db, company_id)
@@ -129,7 +137,7 @@ async def get_report_months(
     company_id: str = Query(...),
     year: int = Query(...),
     current_user: User = Depends(require_admin),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     try:
         months = await AdminReportService.get_available_months(db, company_id, year)
@@ -149,9 +157,14 @@ async def get_report_preview(
     year: int = Query(...),
     month: int = Query(..., ge=1, le=12),
     current_user: User = Depends(require_admin),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
+    conditional: ConditionalRequest = Depends(),
 ):
     try:
+        # Month + fiscal YTD, which can start in the prior calendar year
+        not_modified = await conditional.check(db, years=years_around(year), company_ids=[company_id])
+        if not_modified:
+            return not_modified
         preview = await AdminReportService.build_report_preview(
             db=db,
             cluster_id=cluster_id,
@@ -172,17 +185,18 @@ async def export_report_pdf(
     month: int = Query(..., ge=1, le=12),
     current_user: User = Depends(require_admin),
     db: AsyncSession = Depends(get_db),
+    read_db: AsyncSession = Depends(get_read_db),
 ):
     try:
         preview = await AdminReportService.build_report_preview(
-            db=db,
+            db=read_db,
             cluster_id=cluster_id,
             company_id=company_id,
             year=year,
             month=month,
         )
         file_name = f"Financial_Report_{company_id}_{year}_{month:02d}.pdf"
-        pdf_bytes = AdminReportService.generate_pdf(preview)
+        pdf_bytes = await run_render(AdminReportService.generate_pdf, preview)
         await AdminReportService.record_export(
             db=db,
             exported_by=current_user.user_id,
@@ -212,17 +226,18 @@ async def export_report_excel(
     month: int = Query(..., ge=1, le=12),
     current_user: User = Depends(require_admin),
     db: AsyncSession = Depends(get_db),
+    read_db: AsyncSession = Depends(get_read_db),
 ):
     try:
         preview = await AdminReportService.build_report_preview(
-            db=db,
+            db=read_db,
             cluster_id=cluster_id,
             company_id=company_id,
             year=year,
             month=month,
         )
         file_name = f"Financial_Report_{company_id}_{year}_{month:02d}.xlsx"
-        excel_bytes = AdminReportService.generate_excel(preview)
+        excel_bytes = await run_render(AdminReportService.generate_excel, preview)
         await AdminReportService.record_export(
             db=db,
             exported_by=current_user.user_id,
@@ -249,7 +264,7 @@ async def get_report_export_history(
     limit: int = Query(default=20, ge=1, le=100),
     offset: int = Query(default=0, ge=0),
     current_user: User = Depends(require_admin),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     try:
         history = await AdminReportService.list_export_history(db, limit=limit, offset=offset)
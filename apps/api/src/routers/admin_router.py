@@ -10,7 +10,6 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.config.constants import MetricID, StatusID
 from src.db.models import (
-    AuditLog,
     Cluster,
     Company,
     FinancialFact,
@@ -22,8 +21,10 @@ from src.db.models import (
     UserCompanyRoleMap,
 )
 from src.security.middleware import get_db, require_admin
-from src.security.audit_context import get_client_ip
+from src.services.audit_service import AuditService
+from src.services.directory_search_service import DirectorySearchService, SearchValidationError
 from src.services.budget_import_service import BudgetImportService
+from src.services.period_snapshot_service import PeriodCloseError, PeriodSnapshotService
 
 router = APIRouter(prefix="/admin", tags=["Admin"])
 
@@ -122,6 +123,8 @@ class CompanyListResponse(BaseModel):
     page: int
     page_size: int
     total_pages: int
+    total_is_estimate: bool = False
+    next_cursor: Optional[str] = None
 
 
 class UserRoleAssignment(BaseModel):
@@ -151,6 +154,8 @@ class UserListResponse(BaseModel):
     page: int
     page_size: int
     total_pages: int
+    total_is_estimate: bool = False
+    next_cursor: Optional[str] = None
 
 
 class UserCreate(BaseModel):
@@ -204,6 +209,22 @@ class AssignmentCreateRequest(BaseModel):
 class AssignmentListResponse(BaseModel):
     assignments: List[UserAssignmentResponse]
     total: int
+    total_is_estimate: bool = False
+    next_cursor: Optional[str] = None
+
+
+class DirectorySearchItem(BaseModel):
+    type: str
+    id: str
+    label: str
+    detail: Optional[str] = None
+    is_active: bool
+    score: float
+
+
+class DirectorySearchResponse(BaseModel):
+    query: str
+    results: List[DirectorySearchItem]
 
 
 class BudgetImportResponse(BaseModel):
@@ -255,20 +276,14 @@ async def _audit(
     ip_address: Optional[str] = None,  # Can be passed explicitly or pulled from context
 ) -> None:
     try:
-        # If ip_address not provided, try to get it from audit context
-        if ip_address is None:
-            ip_address = get_client_ip()
-            
-        db.add(
-            AuditLog(
-                user_id=actor_user_id,
-                action=action,
-                entity_type=entity_type,
-                entity_id=entity_id,
-                details=details,
-                ip_address=ip_address,
-                created_at=_utcnow(),
-            )
+        AuditService.record(
+            db,
+            action,
+            user_id=actor_user_id,
+            entity_type=entity_type,
+            entity_id=entity_id,
+            details=details,
+            ip_address=ip_address,
         )
     except Exception:
         pass
@@ -386,41 +401,45 @@ async def get_admin_dashboard(
     )
 
 
+def _activity_items(rows) -> List[ActivityItem]:
+    return [
+        ActivityItem(
+            id=str(log.id),
+            timestamp=log.created_at,
+            user_id=log.user_id,
+            user_email=user.user_email if user else None,
+            user_name=_display_name(user) if user else None,
+            action=log.action,
+            entity_type=log.entity_type,
+            entity_id=log.entity_id,
+            details=log.details,
+            ip_address=log.ip_address or "-",
+        )
+        for log, user in rows
+    ]
+
+
 @router.get("/activity", response_model=ActivityListResponse)
 async def get_recent_activity(
     limit: int = Query(default=10, ge=1, le=100),
     current_user: User = Depends(require_admin),
     db: AsyncSession = Depends(get_db),
 ):
-    total = (await db.execute(select(func.count(AuditLog.id)))).scalar() or 0
+    total = await AuditService.estimate_total(db)
+    rows = await AuditService.recent(db, limit=limit)
+    return ActivityListResponse(activities=_activity_items(rows), total=total)
 
-    rows = (
-        await db.execute(
-            select(AuditLog, User)
-            .outerjoin(User, User.user_id == AuditLog.user_id)
-            .order_by(AuditLog.created_at.desc())
-            .limit(limit)
-        )
-    ).all()
-
-    activities: List[ActivityItem] = []
-    for log, user in rows:
-        activities.append(
-            ActivityItem(
-                id=str(log.id),
-                timestamp=log.created_at,
-                user_id=log.user_id,
-                user_email=user.user_email if user else None,
-                user_name=_display_name(user) if user else None,
-                action=log.action,
-                entity_type=log.entity_type,
-                entity_id=log.entity_id,
-                details=log.details,
-                ip_address=log.ip_address or "-",
-            )
-        )
 
-    return ActivityListResponse(activities=activities, total=total)
+@router.get("/activity/{entity_type}/{entity_id}", response_model=ActivityListResponse)
+async def get_entity_activity(
+    entity_type: str,
+    entity_id: str,
+    limit: int = Query(default=50, ge=1, le=200),
+    current_user: User = Depends(require_admin),
+    db: AsyncSession = Depends(get_db),
+):
+    rows = await AuditService.for_entity(db, entity_type, entity_id, limit=limit)
+    return ActivityListResponse(activities=_activity_items(rows), total=len(rows))
 
 
 @router.get("/roles", response_model=List[RoleResponse])
@@ -687,6 +706,9 @@ async def get_cluster_companies(
 
 # ==================== COMPANIES ====================
 
+_COMPANY_KEYS = [(Company.company_name, False), (Company.company_id, False)]
+
+
 @router.get("/companies", response_model=CompanyListResponse)
 async def list_companies(
     page: int = Query(default=1, ge=1),
@@ -694,23 +716,38 @@ async def list_companies(
     search: Optional[str] = Query(default=None),
     cluster_id: Optional[str] = Query(default=None),
     is_active: Optional[bool] = Query(default=None),
+    cursor: Optional[str] = Query(default=None, description="Keyset cursor from next_cursor; replaces page"),
     current_user: User = Depends(require_admin),
     db: AsyncSession = Depends(get_db),
 ):
-    conditions = []
-
-    if search:
-        q = f"%{search.strip()}%"
-        conditions.append(Company.company_name.ilike(q))
+    conditions = DirectorySearchService.match_conditions(Company.search_text, search)
     if cluster_id:
         conditions.append(Company.cluster_id == cluster_id)
     if is_active is not None:
         conditions.append(Company.is_active.is_(is_active))
 
-    total_query = select(func.count(Company.company_id))
-    if conditions:
-        total_query = total_query.where(*conditions)
-    total = (await db.execute(total_query)).scalar() or 0
+    total, total_is_estimate = await DirectorySearchService.count(
+        db, select(Company.company_id).where(*conditions)
+    )
+
+    page_conditions = list(conditions)
+    if cursor:
+        try:
+            after = DirectorySearchService.decode_cursor(cursor, len(_COMPANY_KEYS))
+        except SearchValidationError as exc:
+            raise HTTPException(status_code=400, detail=str(exc))
+        page_conditions.append(DirectorySearchService.after_condition(_COMPANY_KEYS, after))
+
+    # Page the companies first, then count users only for that page.
+    page_query = (
+        select(Company.company_id)
+        .where(*page_conditions)
+        .order_by(*DirectorySearchService.order_by(_COMPANY_KEYS))
+        .limit(page_size)
+    )
+    if not cursor:
+        page_query = page_query.offset((page - 1) * page_size)
+    page_ids = page_query.subquery()
 
     statement = (
         select(
@@ -718,6 +755,7 @@ async def list_companies(
             Cluster.cluster_name,
             func.count(func.distinct(UserCompanyRoleMap.user_id)).label("user_count"),
         )
+        .join(page_ids, page_ids.c.company_id == Company.company_id)
         .join(Cluster, Cluster.cluster_id == Company.cluster_id)
         .outerjoin(
             UserCompanyRoleMap,
@@ -726,16 +764,8 @@ async def list_companies(
                 UserCompanyRoleMap.is_active.is_(True),
             ),
         )
-    )
-    if conditions:
-        statement = statement.where(*conditions)
-
-    statement = (
-        statement
         .group_by(Company.company_id, Cluster.cluster_name)
-        .order_by(Company.company_name)
-        .offset((page - 1) * page_size)
-        .limit(page_size)
+        .order_by(*DirectorySearchService.order_by(_COMPANY_KEYS))
     )
 
     data_rows = (await db.execute(statement)).all()
@@ -755,6 +785,11 @@ async def list_companies(
         for company, cluster_name, user_count in data_rows
     ]
 
+    next_cursor = None
+    if len(data_rows) == page_size:
+        last = data_rows[-1][0]
+        next_cursor = DirectorySearchService.encode_cursor([last.company_name, last.company_id])
+
     total_pages = ceil(total / page_size) if total else 0
     return CompanyListResponse(
         companies=companies,
@@ -762,6 +797,8 @@ async def list_companies(
         page=page,
         page_size=page_size,
         total_pages=total_pages,
+        total_is_estimate=total_is_estimate,
+        next_cursor=next_cursor,
     )
 
 
@@ -1029,6 +1066,9 @@ async def assign_user_to_company(
 
 # ==================== USERS ====================
 
+_USER_KEYS = [(User.created_date, True), (User.user_email, False), (User.user_id, False)]
+
+
 @router.get("/users", response_model=UserListResponse)
 async def list_users(
     page: int = Query(default=1, ge=1),
@@ -1037,19 +1077,11 @@ async def list_users(
     role_id: Optional[int] = Query(default=None),
     company_id: Optional[str] = Query(default=None),
     is_active: Optional[bool] = Query(default=None),
+    cursor: Optional[str] = Query(default=None, description="Keyset cursor from next_cursor; replaces page"),
     current_user: User = Depends(require_admin),
     db: AsyncSession = Depends(get_db),
 ):
-    user_conditions = []
-    if search:
-        q = f"%{search.strip()}%"
-        user_conditions.append(
-            or_(
-                User.user_email.ilike(q),
-                User.first_name.ilike(q),
-                User.last_name.ilike(q),
-            )
-        )
+    user_conditions = DirectorySearchService.match_conditions(User.search_text, search)
 
     if is_active is not None:
         user_conditions.append(User.is_active.is_(is_active))
@@ -1065,18 +1097,22 @@ async def list_users(
             role_filters.append(UserCompanyRoleMap.company_id == company_id)
         user_conditions.append(exists(select(1).where(*role_filters)))
 
-    total_query = select(func.count(User.user_id))
-    if user_conditions:
-        total_query = total_query.where(*user_conditions)
-    total = (await db.execute(total_query)).scalar() or 0
+    total, total_is_estimate = await DirectorySearchService.count(
+        db, select(User.user_id).where(*user_conditions)
+    )
 
-    user_statement = select(User)
-    if user_conditions:
-        user_statement = user_statement.where(*user_conditions)
+    user_statement = select(User).where(*user_conditions)
+    if cursor:
+        try:
+            after = DirectorySearchService.decode_cursor(cursor, len(_USER_KEYS))
+        except SearchValidationError as exc:
+            raise HTTPException(status_code=400, detail=str(exc))
+        user_statement = user_statement.where(DirectorySearchService.after_condition(_USER_KEYS, after))
+    else:
+        user_statement = user_statement.offset((page - 1) * page_size)
     user_statement = (
         user_statement
-        .order_by(User.created_date.desc(), User.user_email.asc())
-        .offset((page - 1) * page_size)
+        .order_by(*DirectorySearchService.order_by(_USER_KEYS))
         .limit(page_size)
     )
 
@@ -1098,6 +1134,11 @@ async def list_users(
         for user in users
     ]
 
+    next_cursor = None
+    if len(users) == page_size:
+        last = users[-1]
+        next_cursor = DirectorySearchService.encode_cursor([last.created_date, last.user_email, last.user_id])
+
     total_pages = ceil(total / page_size) if total else 0
     return UserListResponse(
         users=response_users,
@@ -1105,7 +1146,25 @@ async def list_users(
         page=page,
         page_size=page_size,
         total_pages=total_pages,
+        total_is_estimate=total_is_estimate,
+        next_cursor=next_cursor,
+    )
+
+
+@router.get("/search", response_model=DirectorySearchResponse)
+async def search_directory(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(default=10, ge=1, le=50),
+    include_users: bool = Query(default=True),
+    include_companies: bool = Query(default=True),
+    current_user: User = Depends(require_admin),
+    db: AsyncSession = Depends(get_db),
+):
+    """Typeahead across users and companies, ranked by trigram similarity."""
+    results = await DirectorySearchService.typeahead(
+        db, q, limit=limit, include_users=include_users, include_companies=include_companies
     )
+    return DirectorySearchResponse(query=q, results=[DirectorySearchItem(**r) for r in results])
 
 
 @router.post("/users", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
@@ -1293,11 +1352,23 @@ async def delete_user(
 
 # ==================== ASSIGNMENTS ====================
 
+_ASSIGNMENT_KEYS = [
+    (Company.company_name, False),
+    (Company.company_id, False),
+    (User.user_email, False),
+    (User.user_id, False),
+    (UserCompanyRoleMap.role_id, False),
+]
+
+
 @router.get("/assignments", response_model=AssignmentListResponse)
 async def list_assignments(
     company_id: Optional[str] = Query(default=None),
     user_id: Optional[str] = Query(default=None),
     include_inactive: bool = Query(default=False),
+    search: Optional[str] = Query(default=None, description="Matches user or company"),
+    limit: Optional[int] = Query(default=None, ge=1, le=2000, description="Page size; all rows when omitted"),
+    cursor: Optional[str] = Query(default=None),
     current_user: User = Depends(require_admin),
     db: AsyncSession = Depends(get_db),
 ):
@@ -1308,16 +1379,33 @@ async def list_assignments(
         conditions.append(UserCompanyRoleMap.user_id == user_id)
     if not include_inactive:
         conditions.append(UserCompanyRoleMap.is_active.is_(True))
+    for term in DirectorySearchService.normalize_terms(search):
+        conditions.append(
+            or_(
+                *DirectorySearchService.match_conditions(User.search_text, term),
+                *DirectorySearchService.match_conditions(Company.search_text, term),
+            )
+        )
 
-    statement = (
+    base = (
         select(User, Company, RoleMaster, UserCompanyRoleMap)
         .join(UserCompanyRoleMap, UserCompanyRoleMap.user_id == User.user_id)
         .join(Company, Company.company_id == UserCompanyRoleMap.company_id)
         .join(RoleMaster, RoleMaster.role_id == UserCompanyRoleMap.role_id)
-        .order_by(Company.company_name, User.user_email)
+        .where(*conditions)
     )
-    if conditions:
-        statement = statement.where(*conditions)
+
+    total_is_estimate = False
+    statement = base
+    if cursor:
+        try:
+            after = DirectorySearchService.decode_cursor(cursor, len(_ASSIGNMENT_KEYS))
+        except SearchValidationError as exc:
+            raise HTTPException(status_code=400, detail=str(exc))
+        statement = statement.where(DirectorySearchService.after_condition(_ASSIGNMENT_KEYS, after))
+    statement = statement.order_by(*DirectorySearchService.order_by(_ASSIGNMENT_KEYS))
+    if limit:
+        statement = statement.limit(limit)
 
     rows = (await db.execute(statement)).all()
 
@@ -1336,7 +1424,25 @@ async def list_assignments(
         for user, company, role, mapping in rows
     ]
 
-    return AssignmentListResponse(assignments=assignments, total=len(assignments))
+    next_cursor = None
+    if limit:
+        total, total_is_estimate = await DirectorySearchService.count(
+            db, base.with_only_columns(UserCompanyRoleMap.user_id)
+        )
+        if len(rows) == limit:
+            user, company, role, _mapping = rows[-1]
+            next_cursor = DirectorySearchService.encode_cursor(
+                [company.company_name, company.company_id, user.user_email, user.user_id, role.role_id]
+            )
+    else:
+        total = len(assignments)
+
+    return AssignmentListResponse(
+        assignments=assignments,
+        total=total,
+        total_is_estimate=total_is_estimate,
+        next_cursor=next_cursor,
+    )
 
 
 @router.post("/assignments", response_model=UserAssignmentResponse, status_code=status.HTTP_201_CREATED)
@@ -2192,3 +2298,73 @@ async def get_actual_entry(
         "status": workflow.status.value if workflow else None,
         "has_data": len(fact_rows) > 0,
     }
+
+
+# ==================== PERIOD CLOSE ====================
+
+class PeriodReopenRequest(BaseModel):
+    reason: str = Field(..., min_length=3, max_length=500)
+
+
+class PeriodCloseResponse(BaseModel):
+    period_id: int
+    year: int
+    month: int
+    row_count: int
+    size_bytes: int
+    checksum: str
+
+
+class ClosedPeriodItem(BaseModel):
+    period_id: int
+    year: int
+    month: int
+    row_count: int
+    size_bytes: int
+    closed_by: Optional[str]
+    closed_at: Optional[datetime]
+
+
+@router.get("/periods/closed", response_model=List[ClosedPeriodItem])
+async def list_closed_periods(
+    year_from: int = Query(default=2020, ge=2000, le=2100),
+    year_to: Optional[int] = Query(default=None, ge=2000, le=2100),
+    current_user: User = Depends(require_admin),
+    db: AsyncSession = Depends(get_db),
+):
+    year_to = year_to or _utcnow().year
+    return await PeriodSnapshotService.closed_periods(db, year_from, year_to)
+
+
+@router.post("/periods/{period_id}/close", response_model=PeriodCloseResponse)
+async def close_period(
+    period_id: int,
+    current_user: User = Depends(require_admin),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Freeze a fully approved month into an immutable snapshot. Its figures can
+    no longer change until the period is reopened.
+    """
+    try:
+        return await PeriodSnapshotService.close_period(db, period_id, current_user.user_id)
+    except LookupError:
+        raise HTTPException(status_code=404, detail="Period not found")
+    except PeriodCloseError as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
+
+
+@router.post("/periods/{period_id}/reopen", status_code=status.HTTP_204_NO_CONTENT)
+async def reopen_period(
+    period_id: int,
+    request: PeriodReopenRequest,
+    current_user: User = Depends(require_admin),
+    db: AsyncSession = Depends(get_db),
+):
+    """Invalidate a closed month's snapshot so its figures can be corrected."""
+    try:
+        await PeriodSnapshotService.reopen_period(db, period_id, current_user.user_id, request.reason.strip())
+    except LookupError:
+        raise HTTPException(status_code=404, detail="Period not found")
+    except PeriodCloseError as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
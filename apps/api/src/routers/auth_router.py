@@ -92,6 +92,7 @@ def _build_token_response(
     role_id: int,
     companies: list[str],
     portal: Optional[str] = None,
+    acl_version: Optional[int] = None,
 ) -> TokenResponse:
     """Build a standardised TokenResponse with portal-aware JWT."""
     access_token = AuthService.create_access_token(
@@ -101,6 +102,7 @@ def _build_token_response(
         role_id=role_id,
         portal=portal,
         companies=companies,
+        acl_version=acl_version,
     )
     return TokenResponse(
         access_token=access_token,
@@ -152,6 +154,7 @@ async def _login_with_rbac(
         role_id=user_context["role_id"],
         companies=user_context["accessible_companies"],
         portal=portal,
+        acl_version=user_context.get("acl_version"),
     )
 
 
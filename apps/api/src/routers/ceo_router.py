@@ -11,9 +11,11 @@ Endpoints:
 - GET /ceo/companies/{company_id}        - Company detail
 - GET /ceo/rankings/{year}/{month}       - Performance rankings
 - GET /ceo/trends                        - Historical trends
+- POST /ceo/bundle                       - Dashboard and trends in one request, streamed as NDJSON
 """
 from datetime import datetime
-from typing import Optional, List, Dict, Any
+from enum import Enum
+from typing import Optional, List, Dict, Any, Sequence
 
 from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import BaseModel, Field
@@ -25,9 +27,19 @@ from src.db.models import (
     FinancialMonthly, Scenario
 )
 from src.security.middleware import (
-    get_db, get_current_active_user, require_ceo
+    get_read_db, get_current_active_user, require_ceo
 )
 from src.security.permissions import has_permission, Permission
+from src.db import statements
+from src.db.read_models import MonthlyRow, fetch_monthly
+from src.services.dashboard_data import DashboardData
+from src.services.period_snapshot_service import PeriodSnapshotService
+from src.services.timeseries_service import EntityType, Grain, GROUP_ENTITY_ID, SUPPORTED_METRICS, TimeSeriesService
+from src.services.fx_service import FxService, MetricMatrix
+from src.utils.conditional import ConditionalRequest, years_around
+from src.utils.fanout import fan_out, scalar_of, scalars_of
+from src.utils.ndjson import ndjson_response, section_ids
+from src.utils.singleflight import SingleFlightTimeout, analytics_flight, make_key
 
 router = APIRouter(prefix="/ceo", tags=["CEO Dashboard"])
 
@@ -152,6 +164,29 @@ class TrendsResponse(BaseModel):
     series: List[TrendSeries]
 
 
+class BundleSection(str, Enum):
+    DASHBOARD = "dashboard"
+    TRENDS = "trends"
+
+
+class BundleSectionRequest(BaseModel):
+    """One section of a bundle; parameters not used by the section are ignored"""
+    section: BundleSection
+    id: Optional[str] = None  # echoed on the section's line; defaults to the section name
+    company_id: Optional[str] = None
+    metrics: str = "revenue_lkr,gp,pbt_before"
+    year_from: Optional[int] = None
+    year_to: Optional[int] = None
+    grain: Grain = Grain.MONTH
+
+
+class DashboardBundleRequest(BaseModel):
+    """Sections for one page, sharing its period"""
+    year: Optional[int] = None
+    month: Optional[int] = Field(default=None, ge=1, le=12)
+    sections: List[BundleSectionRequest] = Field(min_length=1)
+
+
 # ============ HELPER FUNCTIONS ============
 
 MONTH_NAMES = [
@@ -160,48 +195,14 @@ MONTH_NAMES = [
 ]
 
 
-def compute_financials(records: List[FinancialMonthly]) -> Optional[FinancialSummary]:
+def compute_financials(records: Sequence[MonthlyRow]) -> Optional[FinancialSummary]:
     """Aggregate financial records into summary"""
     if not records:
         return None
     
-    # Sum all numeric fields
-    total = {
-        'revenue_lkr': 0.0,
-        'gp': 0.0,
-        'other_income': 0.0,
-        'personal_exp': 0.0,
-        'admin_exp': 0.0,
-        'selling_exp': 0.0,
-        'finance_exp': 0.0,
-        'depreciation': 0.0,
-        'provisions': 0.0,
-        'exchange_gl': 0.0,
-        'non_ops_exp': 0.0,
-        'non_ops_income': 0.0,
-        'exchange_rate_sum': 0.0,
-        'count': 0
-    }
-    
-    for r in records:
-        total['revenue_lkr'] += r.revenue_lkr or 0
-        total['gp'] += r.gp or 0
-        total['other_income'] += r.other_income or 0
-        total['personal_exp'] += r.personal_exp or 0
-        total['admin_exp'] += r.admin_exp or 0
-        total['selling_exp'] += r.selling_exp or 0
-        total['finance_exp'] += r.finance_exp or 0
-        total['depreciation'] += r.depreciation or 0
-        total['provisions'] += r.provisions or 0
-        total['exchange_gl'] += r.exchange_gl or 0
-        total['non_ops_exp'] += r.non_ops_exp or 0
-        total['non_ops_income'] += r.non_ops_income or 0
-        total['exchange_rate_sum'] += r.exchange_rate or 1
-        total['count'] += 1
-    
-    # Calculate averages and derived metrics
-    avg_fx = total['exchange_rate_sum'] / total['count'] if total['count'] > 0 else 1
-    revenue_usd = total['revenue_lkr'] / avg_fx if avg_fx > 0 else 0
+    # Sum all money columns; USD revenue converts each row at its period's rate
+    total = FxService.totals(FxService.current(), MetricMatrix.from_records(records), "LKR")
+    revenue_usd = total['revenue_lkr'] / total['fx_rate']
     gp_margin = (total['gp'] / total['revenue_lkr'] * 100) if total['revenue_lkr'] > 0 else 0
     total_overheads = (
         total['personal_exp'] + total['admin_exp'] + 
@@ -283,16 +284,10 @@ async def get_approved_company_ids(
     month: Optional[int] = None
 ) -> List[str]:
     """Get company IDs with approved reports for period"""
-    query = select(Report.company_id).where(
-        and_(
-            Report.year == year,
-            Report.status == ReportStatus.APPROVED
-        )
-    )
     if month:
-        query = query.where(Report.month == month)
-    
-    result = await db.execute(query)
+        result = await db.execute(statements.APPROVED_COMPANY_IDS_MONTH, {"year": year, "month": month})
+    else:
+        result = await db.execute(statements.APPROVED_COMPANY_IDS, {"year": year})
     return [row[0] for row in result.all()]
 
 
@@ -303,11 +298,14 @@ async def get_ceo_dashboard(
     year: int = Query(default=None, description="Year (default: current)"),
     month: Optional[int] = Query(default=None, ge=1, le=12, description="Month (default: current)"),
     user: User = Depends(get_current_active_user),
-    db: AsyncSession = Depends(get_db),
+    conditional: ConditionalRequest = Depends(),
 ):
     """
     Main CEO dashboard with group-level P&L summary.
     Only includes data from APPROVED reports.
+
+    The summary is group-wide, so concurrent requests for the same period
+    share one computation.
     """
     # Check permission
     if not has_permission(user, Permission.VIEW_ANALYTICS):
@@ -318,43 +316,60 @@ async def get_ceo_dashboard(
     year = year or now.year
     month = month or now.month
     
-    # Get all clusters
-    clusters_result = await db.execute(
-        select(Cluster).where(Cluster.is_active == True).order_by(Cluster.name)
-    )
-    clusters = clusters_result.scalars().all()
-    
-    # Get all active companies
-    companies_result = await db.execute(
-        select(Company).where(Company.is_active == True)
-    )
-    companies = companies_result.scalars().all()
-    
-    # Get approved report company IDs
-    approved_ids = await get_approved_company_ids(db, year, month)
-    
-    # Get actual data for approved companies only
-    actual_query = select(FinancialMonthly).where(
-        and_(
-            FinancialMonthly.year == year,
-            FinancialMonthly.month == month,
-            FinancialMonthly.scenario == Scenario.ACTUAL,
-            FinancialMonthly.company_id.in_(approved_ids) if approved_ids else False
-        )
-    )
-    actual_result = await db.execute(actual_query)
-    actual_records = actual_result.scalars().all()
-    
-    # Get budget data
-    budget_query = select(FinancialMonthly).where(
-        and_(
-            FinancialMonthly.year == year,
-            FinancialMonthly.month == month,
-            FinancialMonthly.scenario == Scenario.BUDGET
-        )
+    not_modified = await conditional.check(years=years_around(year), params=(year, month))
+    if not_modified:
+        return not_modified
+    
+    return await _coalesced_ceo_dashboard(year, month)
+
+
+async def _coalesced_ceo_dashboard(year: int, month: int) -> CEODashboard:
+    """The dashboard computed once for all concurrent requests (endpoint and bundle) for the period"""
+    async def compute() -> CEODashboard:
+        return await _build_ceo_dashboard(year, month)
+    
+    key = make_key("ceo.dashboard", {"year": year, "month": month})
+    try:
+        return await analytics_flight.do(key, compute)
+    except SingleFlightTimeout:
+        raise HTTPException(status_code=504, detail="Dashboard is taking too long to compute. Please retry.")
+
+
+async def _build_ceo_dashboard(year: int, month: int) -> CEODashboard:
+    # The queries below are independent: run them concurrently on pooled sessions.
+    # Actuals are restricted to approved companies by subquery rather than by
+    # waiting for the approved ID list.
+    (
+        clusters,
+        companies,
+        approved_ids,
+        actual_records,
+        budget_records,
+        companies_reporting,
+        _rates,
+    ) = await fan_out(
+        # All clusters
+        scalars_of(statements.ACTIVE_CLUSTERS),
+        # All active companies
+        scalars_of(statements.ACTIVE_COMPANIES),
+        # Approved report company IDs
+        lambda s: get_approved_company_ids(s, year, month),
+        # Actual data for approved companies only
+        lambda s: fetch_monthly(
+            s,
+            query=statements.MONTHLY_FOR_PERIOD_APPROVED,
+            params={"year": year, "month": month, "scenario": Scenario.ACTUAL.value},
+        ),
+        # Budget data
+        lambda s: fetch_monthly(
+            s,
+            query=statements.MONTHLY_FOR_PERIOD,
+            params={"year": year, "month": month, "scenario": Scenario.BUDGET.value},
+        ),
+        # Companies with submitted+ status
+        scalar_of(statements.REPORTING_COMPANY_COUNT, {"year": year, "month": month}),
+        FxService.rates,
     )
-    budget_result = await db.execute(budget_query)
-    budget_records = budget_result.scalars().all()
     
     # Compute group-level summary
     group_actual = compute_financials(actual_records)
@@ -412,27 +427,14 @@ async def get_ceo_dashboard(
             companies=None  # Don't include company details in main dashboard
         ))
     
-    # Calculate avg exchange rate
-    avg_fx = 1.0
-    if actual_records:
-        fx_sum = sum(r.exchange_rate or 1 for r in actual_records)
-        avg_fx = fx_sum / len(actual_records)
+    # Revenue-weighted effective exchange rate
+    avg_fx = group_actual.revenue_lkr / group_actual.revenue_usd if group_actual.revenue_usd else 1.0
     
     # Compute reporting metrics
     total_companies = len(companies)
     companies_approved = len(approved_ids)
     
-    # Count companies with submitted+ status
-    reporting_query = await db.execute(
-        select(func.count(func.distinct(Report.company_id))).where(
-            and_(
-                Report.year == year,
-                Report.month == month,
-                Report.status.in_([ReportStatus.SUBMITTED, ReportStatus.APPROVED])
-            )
-        )
-    )
-    companies_reporting = reporting_query.scalar() or 0
+    companies_reporting = companies_reporting or 0
     
     reporting_rate = (companies_reporting / total_companies * 100) if total_companies > 0 else 0
     
@@ -456,7 +458,8 @@ async def get_ytd_summary(
     year: int,
     through_month: Optional[int] = Query(default=None, ge=1, le=12, description="Through month"),
     user: User = Depends(get_current_active_user),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
+    conditional: ConditionalRequest = Depends(),
 ):
     """
     YTD (Year-to-Date) financial summary.
@@ -470,6 +473,10 @@ async def get_ytd_summary(
     now = datetime.utcnow()
     through_month = through_month or (now.month if year == now.year else 12)
     
+    not_modified = await conditional.check(db, years=years_around(year), params=(year, through_month))
+    if not_modified:
+        return not_modified
+    
     # Get clusters and companies
     clusters_result = await db.execute(
         select(Cluster).where(Cluster.is_active == True).order_by(Cluster.name)
@@ -484,30 +491,17 @@ async def get_ytd_summary(
     # Get approved company IDs for YTD (any month approved counts)
     approved_ids = await get_approved_company_ids(db, year)
     
-    # Get YTD actual data
-    actual_query = select(FinancialMonthly).where(
-        and_(
-            FinancialMonthly.year == year,
-            FinancialMonthly.month <= through_month,
-            FinancialMonthly.scenario == Scenario.ACTUAL,
-            FinancialMonthly.company_id.in_(approved_ids) if approved_ids else False
-        )
-    )
-    actual_result = await db.execute(actual_query)
-    actual_records = actual_result.scalars().all()
-    
-    # Get YTD budget data
-    budget_query = select(FinancialMonthly).where(
-        and_(
-            FinancialMonthly.year == year,
-            FinancialMonthly.month <= through_month,
-            FinancialMonthly.scenario == Scenario.BUDGET
-        )
+    # Get YTD actual and budget data; closed months come from their snapshots
+    months = list(range(1, through_month + 1))
+    actual_records = await PeriodSnapshotService.load_records(
+        db, Scenario.ACTUAL, year_from=year, year_to=year, months=months, company_ids=approved_ids
+    ) if approved_ids else []
+    budget_records = await PeriodSnapshotService.load_records(
+        db, Scenario.BUDGET, year_from=year, year_to=year, months=months
     )
-    budget_result = await db.execute(budget_query)
-    budget_records = budget_result.scalars().all()
     
     # Compute group summary
+    await FxService.rates(db)
     group_actual = compute_financials(actual_records)
     group_budget = compute_financials(budget_records)
     
@@ -564,11 +558,8 @@ async def get_ytd_summary(
             companies=None
         ))
     
-    # Calculate avg exchange rate
-    avg_fx = 1.0
-    if actual_records:
-        fx_sum = sum(r.exchange_rate or 1 for r in actual_records)
-        avg_fx = fx_sum / len(actual_records)
+    # Revenue-weighted effective exchange rate
+    avg_fx = group_actual.revenue_lkr / group_actual.revenue_usd if group_actual.revenue_usd else 1.0
     
     total_companies = len(companies)
     companies_approved = len(set(r.company_id for r in actual_records))
@@ -594,7 +585,8 @@ async def get_cluster_detail(
     year: int = Query(default=None),
     month: Optional[int] = Query(default=None, ge=1, le=12),
     user: User = Depends(get_current_active_user),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
+    conditional: ConditionalRequest = Depends(),
 ):
     """Get cluster detail with company breakdown"""
     if not has_permission(user, Permission.VIEW_ANALYTICS):
@@ -604,6 +596,10 @@ async def get_cluster_detail(
     year = year or now.year
     month = month or now.month
     
+    not_modified = await conditional.check(db, years=years_around(year), params=(year, month))
+    if not_modified:
+        return not_modified
+    
     # Get cluster
     cluster_result = await db.execute(
         select(Cluster).where(Cluster.id == cluster_id)
@@ -626,38 +622,28 @@ async def get_cluster_detail(
     
     # Get approved IDs
     approved_ids = await get_approved_company_ids(db, year, month)
+    await FxService.rates(db)
     
     # Build company summaries
     company_summaries = []
     cluster_actual_records = []
     cluster_budget_records = []
     
+    # Actual and budget rows for the cluster's companies (one per company at most)
+    company_ids = [c.id for c in companies]
+    period_rows = await fetch_monthly(
+        db,
+        FinancialMonthly.company_id.in_(company_ids),
+        FinancialMonthly.year == year,
+        FinancialMonthly.month == month,
+        FinancialMonthly.scenario.in_([Scenario.ACTUAL.value, Scenario.BUDGET.value]),
+    ) if company_ids else []
+    actual_by_company = {r.company_id: r for r in period_rows if r.scenario == Scenario.ACTUAL.value}
+    budget_by_company = {r.company_id: r for r in period_rows if r.scenario == Scenario.BUDGET.value}
+    
     for company in companies:
-        # Get actual
-        actual_result = await db.execute(
-            select(FinancialMonthly).where(
-                and_(
-                    FinancialMonthly.company_id == company.id,
-                    FinancialMonthly.year == year,
-                    FinancialMonthly.month == month,
-                    FinancialMonthly.scenario == Scenario.ACTUAL
-                )
-            )
-        )
-        actual = actual_result.scalar_one_or_none()
-        
-        # Get budget
-        budget_result = await db.execute(
-            select(FinancialMonthly).where(
-                and_(
-                    FinancialMonthly.company_id == company.id,
-                    FinancialMonthly.year == year,
-                    FinancialMonthly.month == month,
-                    FinancialMonthly.scenario == Scenario.BUDGET
-                )
-            )
-        )
-        budget = budget_result.scalar_one_or_none()
+        actual = actual_by_company.get(company.id)
+        budget = budget_by_company.get(company.id)
         
         # Get report status
         report_result = await db.execute(
@@ -738,7 +724,8 @@ async def get_performance_rankings(
     metric: str = Query(default="pbt_before", description="Metric to rank by"),
     limit: int = Query(default=10, ge=1, le=50),
     user: User = Depends(get_current_active_user),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
+    conditional: ConditionalRequest = Depends(),
 ):
     """
     Get company performance rankings by specified metric.
@@ -753,6 +740,10 @@ async def get_performance_rankings(
     if metric not in valid_metrics:
         raise HTTPException(status_code=400, detail=f"Invalid metric. Use one of: {valid_metrics}")
     
+    not_modified = await conditional.check(db, years=years_around(year))
+    if not_modified:
+        return not_modified
+    
     # Get approved IDs
     approved_ids = await get_approved_company_ids(db, year, month)
     
@@ -763,18 +754,22 @@ async def get_performance_rankings(
             rankings=[]
         )
     
-    # Get actual data for approved companies
-    actual_result = await db.execute(
-        select(FinancialMonthly).where(
-            and_(
-                FinancialMonthly.year == year,
-                FinancialMonthly.month == month,
-                FinancialMonthly.scenario == Scenario.ACTUAL,
-                FinancialMonthly.company_id.in_(approved_ids)
-            )
-        )
+    # Get actual data for approved companies, and their budgets for variance
+    params = {"year": year, "month": month, "company_ids": approved_ids}
+    actuals = await fetch_monthly(
+        db,
+        query=statements.MONTHLY_FOR_PERIOD_COMPANIES,
+        params={**params, "scenario": Scenario.ACTUAL.value},
     )
-    actuals = actual_result.scalars().all()
+    budget_by_company = {
+        r.company_id: r
+        for r in await fetch_monthly(
+            db,
+            query=statements.MONTHLY_FOR_PERIOD_COMPANIES,
+            params={**params, "scenario": Scenario.BUDGET.value},
+        )
+    }
+    await FxService.rates(db)
     
     # Build ranking data
     ranking_data = []
@@ -792,18 +787,7 @@ async def get_performance_rankings(
         )
         cluster = cluster_result.scalar_one_or_none()
         
-        # Get budget for variance
-        budget_result = await db.execute(
-            select(FinancialMonthly).where(
-                and_(
-                    FinancialMonthly.company_id == actual.company_id,
-                    FinancialMonthly.year == year,
-                    FinancialMonthly.month == month,
-                    FinancialMonthly.scenario == Scenario.BUDGET
-                )
-            )
-        )
-        budget = budget_result.scalar_one_or_none()
+        budget = budget_by_company.get(actual.company_id)
         
         # Calculate metric value
         summary = compute_financials([actual])
@@ -890,13 +874,17 @@ async def get_trends(
     metrics: str = Query(default="revenue_lkr,gp,pbt_before", description="Comma-separated metrics"),
     year_from: int = Query(default=None),
     year_to: int = Query(default=None),
+    grain: Grain = Query(default=Grain.MONTH, description="month, quarter or year"),
     user: User = Depends(get_current_active_user),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
+    conditional: ConditionalRequest = Depends(),
 ):
     """
     Get historical trends for specified metrics.
     If company_id is provided, shows company-level trends.
     Otherwise, shows group-level aggregate trends.
+    All metrics come from one read of the pre-aggregated monthly series;
+    quarter and year grains sum the months.
     """
     if not has_permission(user, Permission.VIEW_ANALYTICS):
         raise HTTPException(status_code=403, detail="Not authorized to view analytics")
@@ -905,66 +893,61 @@ async def get_trends(
     year_to = year_to or now.year
     year_from = year_from or year_to - 1  # Default 2 years
     
-    metric_list = [m.strip() for m in metrics.split(",")]
-    
-    # Build query
-    query = select(FinancialMonthly).where(
-        and_(
-            FinancialMonthly.year >= year_from,
-            FinancialMonthly.year <= year_to,
-            FinancialMonthly.scenario == Scenario.ACTUAL
-        )
-    ).order_by(FinancialMonthly.year, FinancialMonthly.month)
+    not_modified = await conditional.check(
+        db,
+        years=range(year_from, year_to + 1),
+        company_ids=[company_id] if company_id else None,
+        params=(year_from, year_to),
+    )
+    if not_modified:
+        return not_modified
     
+    metric_list = [m.strip() for m in metrics.split(",")]
+    return await _build_trends(DashboardData(db), company_id, metric_list, year_from, year_to, grain)
+
+
+async def _build_trends(
+    data: DashboardData,
+    company_id: Optional[str],
+    metric_list: List[str],
+    year_from: int,
+    year_to: int,
+    grain: Grain,
+) -> TrendsResponse:
     company_name = None
     if company_id:
-        query = query.where(FinancialMonthly.company_id == company_id)
-        company_result = await db.execute(
-            select(Company).where(Company.id == company_id)
-        )
-        company = company_result.scalar_one_or_none()
+        company = await data.company(company_id)
         company_name = company.name if company else None
     
-    result = await db.execute(query)
-    records = result.scalars().all()
-    
-    # Group by period
-    period_data: Dict[str, List[FinancialMonthly]] = {}
-    for r in records:
-        key = f"{r.year}-{r.month:02d}"
-        if key not in period_data:
-            period_data[key] = []
-        period_data[key].append(r)
+    async with data.session() as db:
+        frame = await TimeSeriesService.fetch(
+            db,
+            [m for m in metric_list if m in SUPPORTED_METRICS],
+            year_from,
+            year_to,
+            entity_type=EntityType.COMPANY if company_id else EntityType.GROUP,
+            entity_id=company_id or GROUP_ENTITY_ID,
+            scenario=Scenario.ACTUAL,
+            grain=grain,
+            rates=await FxService.rates(db),
+        )
     
-    # Build series for each metric
+    # Build series for each metric (unknown metrics read as 0, as before)
+    present = [i for i, has_data in enumerate(frame.present) if has_data]
     series_list = []
     for metric in metric_list:
-        data_points = []
-        for period_key in sorted(period_data.keys()):
-            records_in_period = period_data[period_key]
-            summary = compute_financials(records_in_period)
-            if summary:
-                year_val = int(period_key.split("-")[0])
-                month_val = int(period_key.split("-")[1])
-                
-                # Get metric value
-                if metric == "gp_margin":
-                    value = summary.gp_margin_pct
-                elif metric == "np_margin":
-                    value = summary.np_margin_pct
-                else:
-                    value = getattr(summary, metric, 0)
-                
-                data_points.append(TrendDataPoint(
-                    year=year_val,
-                    month=month_val,
-                    period=f"{MONTH_NAMES[month_val][:3]} {year_val}",
-                    value=value
-                ))
-        
+        values = dict(frame.points(metric))
         series_list.append(TrendSeries(
             metric=metric,
-            data=data_points
+            data=[
+                TrendDataPoint(
+                    year=frame.buckets[i][0],
+                    month=frame.last_month(i),
+                    period=frame.label(i),
+                    value=values.get(i) or 0,
+                )
+                for i in present
+            ]
         ))
     
     return TrendsResponse(
@@ -973,3 +956,44 @@ async def get_trends(
         period_range=f"{year_from} - {year_to}",
         series=series_list
     )
+
+
+@router.post("/bundle")
+async def get_dashboard_bundle(
+    bundle: DashboardBundleRequest,
+    user: User = Depends(get_current_active_user),
+):
+    """
+    Dashboard and trend sections in one request, streamed as NDJSON.
+    
+    The caller is authorized once; sections are computed concurrently, share
+    one load of master data and are each written as soon as they are ready
+    (see src/utils/ndjson.py for the line format).
+    """
+    if not has_permission(user, Permission.VIEW_ANALYTICS):
+        raise HTTPException(status_code=403, detail="Not authorized to view analytics")
+    
+    now = datetime.utcnow()
+    year = bundle.year or now.year
+    month = bundle.month or now.month
+    ids = section_ids(bundle.sections)
+    
+    data = DashboardData()
+    
+    def compute(section: BundleSectionRequest):
+        if section.section == BundleSection.DASHBOARD:
+            return lambda: _coalesced_ceo_dashboard(year, month)
+        year_to = section.year_to or now.year
+        return lambda: _build_trends(
+            data,
+            section.company_id,
+            [m.strip() for m in section.metrics.split(",")],
+            section.year_from or year_to - 1,
+            year_to,
+            section.grain,
+        )
+    
+    return ndjson_response([
+        (section_id, section.section.value, compute(section))
+        for section_id, section in zip(ids, bundle.sections)
+    ])
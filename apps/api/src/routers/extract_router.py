@@ -0,0 +1,147 @@
+"""
+Bulk Extract Router
+Raw company x period x metric extracts for analysts, streamed as CSV or XLSX,
+plus a year-partitioned Parquet / Arrow cube for BI tools.
+"""
+import logging
+from datetime import datetime
+from enum import Enum
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.db.models import User
+from src.security.middleware import get_read_db, get_current_active_user
+from src.security.permissions import (
+    Permission,
+    get_accessible_company_ids,
+    has_permission,
+)
+from src.security.rate_limit import rate_limit_heavy
+from src.services.bulk_extract_service import BulkExtractService, ExtractValidationError
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/extract", tags=["Bulk Extract"])
+
+
+class ExtractFormat(str, Enum):
+    CSV = "csv"
+    XLSX = "xlsx"
+
+
+class CubeFormat(str, Enum):
+    PARQUET = "parquet"
+    ARROW = "arrow"
+
+
+_MEDIA_TYPES = {
+    ExtractFormat.CSV: "text/csv; charset=utf-8",
+    ExtractFormat.XLSX: "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+
+async def _resolve_filters(
+    db: AsyncSession,
+    user: User,
+    cluster_id: Optional[str],
+    company_id: Optional[str],
+    year_from: Optional[int],
+    year_to: Optional[int],
+    scenario: Optional[str],
+    since: Optional[datetime],
+):
+    if not has_permission(user, Permission.EXPORT_DATA):
+        raise HTTPException(status_code=403, detail="Not authorized")
+
+    accessible = await get_accessible_company_ids(db, user)
+    if company_id and accessible is not None and company_id not in accessible:
+        raise HTTPException(status_code=403, detail="No access to this company")
+
+    try:
+        return BulkExtractService.normalize_filters(
+            cluster_id=cluster_id,
+            company_id=company_id,
+            year_from=year_from,
+            year_to=year_to,
+            scenario=scenario,
+            company_ids=accessible,
+            since=since,
+        )
+    except ExtractValidationError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+
+def _attachment(body, media_type: str, filename: str) -> StreamingResponse:
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={
+            "Content-Disposition": f"attachment; filename={filename}",
+            "Access-Control-Expose-Headers": "Content-Disposition",
+        },
+    )
+
+
+@router.get("/financials", dependencies=[rate_limit_heavy()])
+async def extract_financials(
+    format: ExtractFormat = Query(ExtractFormat.CSV),
+    cluster_id: Optional[str] = Query(None),
+    company_id: Optional[str] = Query(None),
+    year_from: Optional[int] = Query(None, ge=2000, le=2100),
+    year_to: Optional[int] = Query(None, ge=2000, le=2100),
+    scenario: Optional[str] = Query(None, description="ACTUAL or BUDGET; both when omitted"),
+    since: Optional[datetime] = Query(None, description="Only periods whose workflow changed after this time"),
+    user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """
+    Stream every matching financial_fact row.
+
+    Rows are read from a server-side cursor and encoded chunk by chunk, so the
+    extract size does not affect worker memory. Results are limited to the
+    companies the caller can access.
+    """
+    filters = await _resolve_filters(db, user, cluster_id, company_id, year_from, year_to, scenario, since)
+
+    # The streaming body outlives the request-scoped session, so the
+    # generators open their own session.
+    if format == ExtractFormat.XLSX:
+        body = BulkExtractService.stream_xlsx(filters)
+    else:
+        body = BulkExtractService.stream_csv(filters)
+
+    filename = f"financial_extract_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.{format.value}"
+    logger.info("Bulk extract (%s) started by %s", format.value, user.user_id)
+    return _attachment(body, _MEDIA_TYPES[format], filename)
+
+
+@router.get("/financials/cube", dependencies=[rate_limit_heavy()])
+async def extract_financial_cube(
+    format: CubeFormat = Query(CubeFormat.PARQUET),
+    cluster_id: Optional[str] = Query(None),
+    company_id: Optional[str] = Query(None),
+    year_from: Optional[int] = Query(None, ge=2000, le=2100),
+    year_to: Optional[int] = Query(None, ge=2000, le=2100),
+    scenario: Optional[str] = Query(None, description="ACTUAL or BUDGET; both when omitted"),
+    since: Optional[datetime] = Query(None, description="Only periods whose workflow changed after this time"),
+    user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """
+    Columnar P&L cube: one row per company x period x scenario with derived
+    metrics precomputed, written as a year-partitioned Parquet or Arrow IPC
+    dataset and returned as a zip. Pass the manifest's generated_at back as
+    `since` to fetch only periods whose workflow changed afterwards.
+    """
+    if not BulkExtractService.columnar_available():
+        raise HTTPException(status_code=501, detail="Columnar export is not available (pyarrow missing)")
+
+    filters = await _resolve_filters(db, user, cluster_id, company_id, year_from, year_to, scenario, since)
+    body = BulkExtractService.stream_columnar(filters, fmt=format.value)
+
+    filename = f"financial_cube_{format.value}_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.zip"
+    logger.info("Columnar cube extract (%s) started by %s", format.value, user.user_id)
+    return _attachment(body, "application/zip", filename)
@@ -14,8 +14,8 @@ Endpoints:
 from datetime import datetime
 from typing import Optional, List, Dict
 
-from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
-from pydantic import BaseModel, Field
+from fastapi import APIRouter, Depends, HTTPException, Query, status, BackgroundTasks
+from pydantic import BaseModel, Field, model_validator
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, and_, func
 
@@ -23,9 +23,11 @@ from src.db.models import (
     User, UserRole, Company, Report, ReportStatus, ReportComment,
     FinancialMonthly, Scenario, ReportStatusHistory, Notification, NotificationType,
     FinancialWorkflow, FinancialFact, CompanyMaster, ClusterMaster, PeriodMaster,
-    UserCompanyRoleMap, UserMaster,
+    UserMaster,
 )
 from src.config.constants import MetricID, StatusID, RoleID
+from src.db import statements
+from src.db.session import AsyncSessionLocal
 from src.security.middleware import (
     get_db, get_current_active_user, require_fd
 )
@@ -33,8 +35,14 @@ from src.security.permissions import (
     can_access_company, get_accessible_company_ids,
     has_permission, Permission
 )
+from src.services.acl_service import AclService
+from src.services.actual_review_service import ActualReviewService, ReviewAction
+from src.services.anomaly_service import AnomalyService
 from src.services.company_service import CompanyService
 from src.services.workflow_service import WorkflowService
+from src.utils.conditional import ConditionalRequest, years_around
+from src.utils.fanout import fan_out, rows_of
+from src.utils.singleflight import company_fingerprint
 
 router = APIRouter(prefix="/fd", tags=["Finance Director"])
 
@@ -254,10 +262,10 @@ async def get_fd_companies(
 ):
     """
     Return only the companies assigned to this Financial Director
-    via user_company_role_map.  Each FD sees only their own companies.
+    (user_company_role_map, via AclService).  Each FD sees only their own companies.
     """
     # Get the list of company IDs mapped to this FD
-    fd_company_ids = await _get_fd_company_ids(db, user.user_id if hasattr(user, 'user_id') else str(user.id))
+    fd_company_ids = await _get_fd_company_ids(db, user)
 
     if not fd_company_ids:
         return []
@@ -827,6 +835,7 @@ async def add_comment(
 async def get_fd_dashboard(
     user: User = Depends(get_current_active_user),
     db: AsyncSession = Depends(get_db),
+    conditional: ConditionalRequest = Depends(),
 ):
     """Get dashboard statistics for FD"""
     accessible = await get_accessible_company_ids(db, user)
@@ -845,6 +854,16 @@ async def get_fd_dashboard(
             )
         company_filter = Report.company_id.in_(accessible)
     
+    # "This month" counts depend on the calendar month as well as the data.
+    not_modified = await conditional.check(
+        db,
+        company_ids=accessible,
+        scope=company_fingerprint(accessible),
+        params=(datetime.utcnow().strftime("%Y-%m"),),
+    )
+    if not_modified:
+        return not_modified
+    
     # Count pending
     pending_result = await db.execute(
         select(func.count(Report.id)).where(
@@ -952,6 +971,14 @@ _METRIC_ID_TO_FIELD: Dict[int, str] = {
 }
 
 
+class ActualAnomaly(BaseModel):
+    metric: str
+    value: float
+    expected: float
+    z_score: float
+    baseline: str                               # "seasonal" (same month) or "overall"
+
+
 class SubmittedActualItem(BaseModel):
     company_id: str
     company_name: str
@@ -969,6 +996,9 @@ class SubmittedActualItem(BaseModel):
     ytd_actual_metrics: Dict[str, Optional[float]] = {}
     ytd_budget_metrics: Dict[str, Optional[float]] = {}
     fin_year_start_month: Optional[int] = None
+    # Largest |z| of the submitted metrics against the company's approved history
+    anomaly_score: Optional[float] = None
+    anomalies: List[ActualAnomaly] = []
 
 
 class SubmittedActualsListResponse(BaseModel):
@@ -984,6 +1014,39 @@ class FDRejectActualRequest(BaseModel):
     reason: str = Field(..., min_length=1, max_length=2000)
 
 
+class FDBulkReviewItem(BaseModel):
+    company_id: str
+    period_id: int
+
+
+class FDBulkReviewRequest(BaseModel):
+    action: ReviewAction
+    items: List[FDBulkReviewItem] = Field(..., min_length=1, max_length=ActualReviewService.MAX_ITEMS)
+    reason: Optional[str] = Field(None, min_length=1, max_length=2000)
+    comment: Optional[str] = None
+
+    @model_validator(mode="after")
+    def _reason_required_for_reject(self):
+        if self.action == ReviewAction.REJECT and not self.reason:
+            raise ValueError("reason is required when rejecting")
+        return self
+
+
+class FDBulkReviewResult(BaseModel):
+    company_id: str
+    period_id: int
+    outcome: str
+    detail: Optional[str] = None
+
+
+class FDBulkReviewResponse(BaseModel):
+    success: bool
+    action: str
+    succeeded: int
+    failed: int
+    results: List[FDBulkReviewResult]
+
+
 class FDUpdateCommentsRequest(BaseModel):
     actual_comment: Optional[str] = None
     budget_comment: Optional[str] = None
@@ -1092,20 +1155,9 @@ class CompanyAnalyticsResponse(BaseModel):
     available_fy_labels: List[str]
 
 
-async def _get_fd_company_ids(db: AsyncSession, user_id: str) -> List[str]:
-    """Get company_ids accessible to this FD user via user_company_role_map."""
-    stmt = (
-        select(UserCompanyRoleMap.company_id)
-        .where(
-            and_(
-                UserCompanyRoleMap.user_id == user_id,
-                UserCompanyRoleMap.is_active == True,
-            )
-        )
-        .distinct()
-    )
-    result = await db.execute(stmt)
-    return [row[0] for row in result.all()]
+async def _get_fd_company_ids(db: AsyncSession, user: User) -> List[str]:
+    """Get company_ids assigned to this FD user (resolved by AclService, usually from the token)."""
+    return await AclService.company_ids(db, user)
 
 
 async def _get_ytd_period_ids(
@@ -1167,16 +1219,8 @@ async def _get_ytd_metrics(
 
     rows = (
         await db.execute(
-            select(
-                FinancialFact.metric_id,
-                func.sum(FinancialFact.amount).label("total"),
-            )
-            .where(
-                FinancialFact.company_id == company_id,
-                FinancialFact.period_id.in_(period_ids),
-                func.upper(FinancialFact.actual_budget) == scenario.upper(),
-            )
-            .group_by(FinancialFact.metric_id)
+            statements.FACT_SUMS_BY_METRIC,
+            {"company_id": company_id, "period_ids": list(period_ids), "scenario": scenario.upper()},
         )
     ).all()
 
@@ -1221,14 +1265,18 @@ async def _get_ytd_metrics(
 
 @router.get("/submitted-actuals", response_model=SubmittedActualsListResponse)
 async def get_submitted_actuals(
+    sort: str = Query("submitted", pattern="^(submitted|anomaly)$"),
     user: User = Depends(get_current_active_user),
     db: AsyncSession = Depends(get_db),
 ):
     """
     Get all actual submissions with status_id=Submitted for companies
     accessible to the current FD user.
+
+    Each is scored against the company's approved history (AnomalyService);
+    sort=anomaly puts the most unusual submissions first.
     """
-    fd_companies = await _get_fd_company_ids(db, user.user_id)
+    fd_companies = await _get_fd_company_ids(db, user)
     if not fd_companies:
         return SubmittedActualsListResponse(reports=[], total=0)
 
@@ -1255,6 +1303,7 @@ async def get_submitted_actuals(
     ).all()
 
     reports: List[SubmittedActualItem] = []
+    submitted_values: Dict[tuple, tuple] = {}
     for workflow, company_name, cluster_name, period, fin_year_start_month in rows:
         # Get actual metrics
         actual_rows = (
@@ -1272,6 +1321,10 @@ async def get_submitted_actuals(
             field_name = _METRIC_ID_TO_FIELD.get(int(metric_id))
             if field_name:
                 actual_data[field_name] = float(amount) if amount is not None else None
+        submitted_values[(workflow.company_id, workflow.period_id)] = (
+            period.month,
+            {int(metric_id): float(amount) for metric_id, amount in actual_rows if amount is not None},
+        )
 
         # Get budget metrics for comparison
         budget_rows = (
@@ -1325,6 +1378,25 @@ async def get_submitted_actuals(
             )
         )
 
+    scores = await AnomalyService.score(db, submitted_values)
+    for report in reports:
+        result = scores.get((report.company_id, report.period_id))
+        if result is None or result.score is None:
+            continue
+        report.anomaly_score = round(result.score, 2)
+        report.anomalies = [
+            ActualAnomaly(
+                metric=_METRIC_ID_TO_FIELD.get(anomaly.metric_id, str(anomaly.metric_id)),
+                value=anomaly.value,
+                expected=round(anomaly.expected, 2),
+                z_score=round(anomaly.z, 2),
+                baseline="seasonal" if anomaly.seasonal else "overall",
+            )
+            for anomaly in result.anomalies
+        ]
+    if sort == "anomaly":
+        reports.sort(key=lambda report: -(report.anomaly_score or 0.0))
+
     return SubmittedActualsListResponse(reports=reports, total=len(reports))
 
 
@@ -1340,7 +1412,7 @@ async def approve_actual(
     Approve a submitted actual report.
     Sets status_id=Approved, approved_by=current user email, approved_date=now.
     """
-    fd_companies = await _get_fd_company_ids(db, user.user_id)
+    fd_companies = await _get_fd_company_ids(db, user)
     if company_id not in fd_companies:
         raise HTTPException(status_code=403, detail="Access denied to this company")
 
@@ -1407,6 +1479,16 @@ async def approve_actual(
             )
             db.add(notification)
 
+    ActualReviewService.record_audit(
+        db,
+        user.user_id,
+        user.user_email,
+        ReviewAction.APPROVE,
+        company_id,
+        period_id,
+        comment=request.comment if request else None,
+    )
+    await AnomalyService.record_approved(db, [(company_id, period_id)])
     await db.commit()
 
     return {
@@ -1431,7 +1513,7 @@ async def reject_actual(
     Sets status_id=Rejected, rejected_by, rejected_date, reject_reason.
     Creates a notification for the FO.
     """
-    fd_companies = await _get_fd_company_ids(db, user.user_id)
+    fd_companies = await _get_fd_company_ids(db, user)
     if company_id not in fd_companies:
         raise HTTPException(status_code=403, detail="Access denied to this company")
 
@@ -1497,6 +1579,15 @@ async def reject_actual(
             )
             db.add(notification)
 
+    ActualReviewService.record_audit(
+        db,
+        user.user_id,
+        user.user_email,
+        ReviewAction.REJECT,
+        company_id,
+        period_id,
+        reason=request.reason,
+    )
     await db.commit()
 
     return {
@@ -1509,6 +1600,37 @@ async def reject_actual(
     }
 
 
+@router.post("/actuals/bulk-review", response_model=FDBulkReviewResponse)
+async def bulk_review_actuals(
+    request: FDBulkReviewRequest,
+    user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Approve or reject many submitted actuals in one transaction.
+    Each item is reported separately (approved / rejected / forbidden /
+    not_found / invalid_state / conflict); failures do not block the rest.
+    """
+    fd_companies = await _get_fd_company_ids(db, user)
+    results = await ActualReviewService.bulk_review(
+        db,
+        user,
+        [(item.company_id, item.period_id) for item in request.items],
+        request.action,
+        allowed_company_ids=fd_companies,
+        reason=request.reason,
+        comment=request.comment,
+    )
+    succeeded = sum(1 for result in results if result.succeeded)
+    return FDBulkReviewResponse(
+        success=succeeded == len(results),
+        action=request.action.value,
+        succeeded=succeeded,
+        failed=len(results) - succeeded,
+        results=[FDBulkReviewResult(**result.as_dict()) for result in results],
+    )
+
+
 @router.put("/update-comments/{company_id}/{period_id}")
 async def update_comments(
     company_id: str,
@@ -1518,7 +1640,7 @@ async def update_comments(
     db: AsyncSession = Depends(get_db),
 ):
     """Update actual_comment and/or budget_comment on a financial workflow."""
-    fd_companies = await _get_fd_company_ids(db, user.user_id)
+    fd_companies = await _get_fd_company_ids(db, user)
     if company_id not in fd_companies:
         raise HTTPException(status_code=403, detail="Access denied to this company")
 
@@ -1558,18 +1680,25 @@ async def get_company_rank(
     month: int,
     user: User = Depends(get_current_active_user),
     db: AsyncSession = Depends(get_db),
+    conditional: ConditionalRequest = Depends(),
 ):
     """
     Rank the requested company among all FD-accessible companies
     based on monthly PBT Before actual data. Higher PBT = better rank.
     """
-    fd_companies = await _get_fd_company_ids(db, user.user_id)
+    fd_companies = await _get_fd_company_ids(db, user)
     if not fd_companies:
         raise HTTPException(status_code=404, detail="No accessible companies")
 
     if company_id not in fd_companies:
         raise HTTPException(status_code=403, detail="Access denied to this company")
 
+    not_modified = await conditional.check(
+        db, years=[year], company_ids=fd_companies, scope=company_fingerprint(fd_companies)
+    )
+    if not_modified:
+        return not_modified
+
     # Get period_id
     period_result = await db.execute(
         select(PeriodMaster.period_id).where(
@@ -1653,24 +1782,22 @@ async def _get_metric_for_periods(
         return None
 
     result = await db.execute(
-        select(func.sum(FinancialFact.amount)).where(
-            FinancialFact.company_id == company_id,
-            FinancialFact.period_id.in_(period_ids),
-            FinancialFact.metric_id == metric_id,
-            func.upper(FinancialFact.actual_budget) == scenario.upper(),
-        )
+        statements.FACT_METRIC_SUM,
+        {"company_id": company_id, "period_ids": list(period_ids), "metric_id": metric_id, "scenario": scenario.upper()},
     )
     val = result.scalar_one_or_none()
     return float(val) if val is not None else None
 
 
+async def _period_ids_by_month(db: AsyncSession, year: int) -> Dict[int, int]:
+    """Map month -> period_id for every period of a year."""
+    result = await db.execute(statements.PERIOD_IDS_BY_MONTH, {"year": year})
+    return {month: period_id for month, period_id in result.all()}
+
+
 async def _period_id_for(db: AsyncSession, year: int, month: int) -> Optional[int]:
     """Look up single period_id for a given year+month."""
-    result = await db.execute(
-        select(PeriodMaster.period_id).where(
-            and_(PeriodMaster.year == year, PeriodMaster.month == month)
-        )
-    )
+    result = await db.execute(statements.PERIOD_ID, {"year": year, "month": month})
     return result.scalar_one_or_none()
 
 
@@ -1682,6 +1809,7 @@ async def get_company_analytics(
     fy_label: Optional[str] = None,
     user: User = Depends(get_current_active_user),
     db: AsyncSession = Depends(get_db),
+    conditional: ConditionalRequest = Depends(),
 ):
     """
     Full analytics payload for the Company Analytics tab.
@@ -1697,15 +1825,17 @@ async def get_company_analytics(
     """
 
     # ── 0. Access control ──────────────────────────────────────
-    fd_companies = await _get_fd_company_ids(db, user.user_id)
+    fd_companies = await _get_fd_company_ids(db, user)
     if company_id not in fd_companies:
         raise HTTPException(status_code=403, detail="Access denied to this company")
 
+    not_modified = await conditional.check(db, years=years_around(year), company_ids=[company_id])
+    if not_modified:
+        return not_modified
+
     # ── 1. Load company master for FY start month ──────────────
     company_row = (
-        await db.execute(
-            select(CompanyMaster).where(CompanyMaster.company_id == company_id)
-        )
+        await db.execute(statements.COMPANY_BY_ID, {"company_id": company_id})
     ).scalar_one_or_none()
     if not company_row:
         raise HTTPException(status_code=404, detail="Company not found")
@@ -1713,43 +1843,92 @@ async def get_company_analytics(
     fin_year_start = company_row.fin_year_start_month or 1
     company_name = company_row.company_name
 
+    # The rest runs on fan-out sessions: hand the request connection back to
+    # the pool first so this request never holds it while waiting for more.
+    await db.close()
+
     # ── 2. Resolve period IDs ──────────────────────────────────
-    # Current selected period
-    current_pid = await _period_id_for(db, year, month)
-    # Same month last year (for YoY)
-    prev_year_pid = await _period_id_for(db, year - 1, month)
-
-    # YTD period range: FY start → selected month
-    ytd_pids = await _get_ytd_period_ids(db, fin_year_start, year, month)
-    # YTD same range last year (for YoY)
-    ytd_pids_prev = await _get_ytd_period_ids(db, fin_year_start, year - 1, month)
-
-    # ── Helper: fetch single-period metrics ────────────────────
-    async def _single(pid: Optional[int], scenario: str) -> Dict[str, Optional[float]]:
-        """Fetch all metrics for one period+scenario, return dict."""
-        if pid is None:
+    # The lookups are independent: run them concurrently on pooled sessions
+    fy_years = [year - y_offset for y_offset in range(2, -1, -1)]
+    (
+        current_pid,        # Current selected period
+        prev_year_pid,      # Same month last year (for YoY)
+        ytd_pids,           # YTD period range: FY start → selected month
+        ytd_pids_prev,      # YTD same range last year (for YoY)
+        month_pids,         # month → period_id for every month of the selected year
+        distinct_year_rows, # Years with facts for this company (FY dropdown)
+        *fy_pid_lists,      # Last 3 fiscal years, the current one to date
+    ) = await fan_out(
+        lambda s: _period_id_for(s, year, month),
+        lambda s: _period_id_for(s, year - 1, month),
+        lambda s: _get_ytd_period_ids(s, fin_year_start, year, month),
+        lambda s: _get_ytd_period_ids(s, fin_year_start, year - 1, month),
+        lambda s: _period_ids_by_month(s, year),
+        rows_of(
+            select(PeriodMaster.year)
+            .join(FinancialFact, FinancialFact.period_id == PeriodMaster.period_id)
+            .where(FinancialFact.company_id == company_id)
+            .distinct()
+            .order_by(PeriodMaster.year.desc())
+        ),
+        *[
+            lambda s, fy_year=fy_year: _get_ytd_period_ids(
+                s, fin_year_start, fy_year, 12 if fy_year < year else month
+            )
+            for fy_year in fy_years
+        ],
+        session_factory=AsyncSessionLocal,
+    )
+
+    # ── Helper: fetch metrics per period ───────────────────────
+    async def _by_period(session: AsyncSession, pids: List[int], scenario: str) -> Dict[int, Dict[str, Optional[float]]]:
+        """Fetch all metrics for the given periods+scenario, return {period_id: dict}."""
+        if not pids:
             return {}
         rows = (
-            await db.execute(
-                select(FinancialFact.metric_id, FinancialFact.amount).where(
-                    FinancialFact.company_id == company_id,
-                    FinancialFact.period_id == pid,
-                    func.upper(FinancialFact.actual_budget) == scenario.upper(),
-                )
+            await session.execute(
+                statements.FACT_AMOUNTS_BY_PERIOD,
+                {"company_id": company_id, "period_ids": list(pids), "scenario": scenario.upper()},
             )
         ).all()
-        out: Dict[str, Optional[float]] = {}
-        for mid, amt in rows:
+        out: Dict[int, Dict[str, Optional[float]]] = {}
+        for pid, mid, amt in rows:
             fname = _METRIC_ID_TO_FIELD.get(int(mid))
             if fname:
-                out[fname] = float(amt) if amt is not None else None
+                out.setdefault(pid, {})[fname] = float(amt) if amt is not None else None
         return out
 
-    # Fetch current-month actuals + budget
-    cur_actual = await _single(current_pid, "ACTUAL")
-    cur_budget = await _single(current_pid, "BUDGET")
-    # Same month last year actuals
-    prev_actual = await _single(prev_year_pid, "ACTUAL")
+    async def _single(session: AsyncSession, pid: Optional[int], scenario: str) -> Dict[str, Optional[float]]:
+        """Fetch all metrics for one period+scenario, return dict."""
+        if pid is None:
+            return {}
+        return (await _by_period(session, [pid], scenario)).get(pid, {})
+
+    # Current-month actuals + budget, same month last year, YTD sums,
+    # the 12 months of the selected year and the last 3 fiscal years
+    (
+        cur_actual,
+        cur_budget,
+        prev_actual,
+        ytd_actual,
+        ytd_budget,
+        ytd_prev,
+        month_actuals,
+        *fy_metrics_list,
+    ) = await fan_out(
+        lambda s: _single(s, current_pid, "ACTUAL"),
+        lambda s: _single(s, current_pid, "BUDGET"),
+        lambda s: _single(s, prev_year_pid, "ACTUAL"),
+        lambda s: _get_ytd_metrics(s, company_id, ytd_pids, "ACTUAL"),
+        lambda s: _get_ytd_metrics(s, company_id, ytd_pids, "BUDGET"),
+        lambda s: _get_ytd_metrics(s, company_id, ytd_pids_prev, "ACTUAL"),
+        lambda s: _by_period(s, list(month_pids.values()), "ACTUAL"),
+        *[
+            lambda s, pids=pids: _get_ytd_metrics(s, company_id, pids, "ACTUAL")
+            for pids in fy_pid_lists
+        ],
+        session_factory=AsyncSessionLocal,
+    )
 
     # ── 3. Monthly KPIs (Section 1) ───────────────────────────
     # GP Margin = (GP / Revenue) * 100
@@ -1804,9 +1983,6 @@ async def get_company_analytics(
     )
 
     # ── 4. Yearly / YTD KPIs (Section 2) ─────────────────────
-    ytd_actual = await _get_ytd_metrics(db, company_id, ytd_pids, "ACTUAL")
-    ytd_budget = await _get_ytd_metrics(db, company_id, ytd_pids, "BUDGET")
-    ytd_prev = await _get_ytd_metrics(db, company_id, ytd_pids_prev, "ACTUAL")
 
     ytd_revenue = ytd_actual.get("revenue") or 0
     ytd_gp = ytd_actual.get("gp") or 0
@@ -1847,11 +2023,11 @@ async def get_company_analytics(
     month_names_short = ["", "Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
 
     for m in range(1, 13):
-        pid = await _period_id_for(db, year, m)
+        pid = month_pids.get(m)
         if pid is None:
             pbt_comp_monthly.append(PBTComparisonItem(label=month_names_short[m], pbt_before=0, pbt_after=0))
             continue
-        m_data = await _single(pid, "ACTUAL")
+        m_data = month_actuals.get(pid, {})
         pb = m_data.get("pbt_before_non_ops")
         if pb is None:
             oh_m = sum(m_data.get(k, 0) or 0 for k in ["personal_exp", "admin_exp", "selling_exp", "finance_exp", "depreciation"])
@@ -1867,10 +2043,7 @@ async def get_company_analytics(
 
     # Yearly: sum per FY for last 3 years using company FY start
     pbt_comp_yearly: List[PBTComparisonItem] = []
-    for y_offset in range(2, -1, -1):
-        fy_year = year - y_offset
-        fy_pids = await _get_ytd_period_ids(db, fin_year_start, fy_year, 12 if fy_year < year else month)
-        fy_metrics = await _get_ytd_metrics(db, company_id, fy_pids, "ACTUAL")
+    for fy_year, fy_metrics in zip(fy_years, fy_metrics_list):
         pb_y = fy_metrics.get("pbt_before_non_ops") or 0
         pa_y = fy_metrics.get("pbt_after_non_ops") or 0
         pbt_comp_yearly.append(PBTComparisonItem(
@@ -1893,11 +2066,11 @@ async def get_company_analytics(
     # ── 7. Profitability Margins (Section 5) ──────────────────
     profitability_list: List[ProfitabilityItem] = []
     for m in range(1, 13):
-        pid = await _period_id_for(db, year, m)
+        pid = month_pids.get(m)
         if pid is None:
             profitability_list.append(ProfitabilityItem(label=month_names_short[m]))
             continue
-        m_data = await _single(pid, "ACTUAL")
+        m_data = month_actuals.get(pid, {})
         m_rev = m_data.get("revenue") or 0
         m_gp = m_data.get("gp") or 0
         m_gp_margin = (m_gp / m_rev * 100) if m_rev else 0
@@ -1948,15 +2121,8 @@ async def get_company_analytics(
     )
 
     # ── 10. Available FY Labels for dropdown ──────────────────
-    # Query distinct years from FinancialFact for this company
-    distinct_years_result = await db.execute(
-        select(PeriodMaster.year)
-        .join(FinancialFact, FinancialFact.period_id == PeriodMaster.period_id)
-        .where(FinancialFact.company_id == company_id)
-        .distinct()
-        .order_by(PeriodMaster.year.desc())
-    )
-    distinct_years = [row[0] for row in distinct_years_result.all()]
+    # Distinct years from FinancialFact for this company (loaded in step 2)
+    distinct_years = [row[0] for row in distinct_year_rows]
     # Generate FY labels based on fin_year_start
     fy_labels: List[str] = []
     seen = set()
@@ -39,6 +39,7 @@ from src.security.middleware import (
     verify_company_access
 )
 from src.security.permissions import can_access_company, get_accessible_company_ids
+from src.services.acl_service import AclService
 from src.services.company_service import CompanyService
 from src.services.workflow_service import WorkflowService
 
@@ -1902,20 +1903,9 @@ class FORejectedListResponse(BaseModel):
     total: int
 
 
-async def _get_fo_user_company_ids(db: AsyncSession, user_id: str) -> List[str]:
-    """Get company_ids accessible to this FO user via user_company_role_map."""
-    stmt = (
-        select(UserCompanyRoleMap.company_id)
-        .where(
-            and_(
-                UserCompanyRoleMap.user_id == user_id,
-                UserCompanyRoleMap.is_active == True,
-            )
-        )
-        .distinct()
-    )
-    result = await db.execute(stmt)
-    return [row[0] for row in result.all()]
+async def _get_fo_user_company_ids(db: AsyncSession, user: User) -> List[str]:
+    """Get company_ids assigned to this FO user (resolved by AclService, usually from the token)."""
+    return await AclService.company_ids(db, user)
 
 
 @router.get("/actual-drafts", response_model=FODraftListResponse)
@@ -1924,7 +1914,7 @@ async def get_fo_actual_drafts(
     db: AsyncSession = Depends(get_db),
 ):
     """Get actual drafts for the logged-in FO's companies. status_id=1 (Draft) with ACTUAL financial_fact rows."""
-    user_companies = await _get_fo_user_company_ids(db, user.user_id)
+    user_companies = await _get_fo_user_company_ids(db, user)
     if not user_companies:
         return FODraftListResponse(drafts=[], total=0)
 
@@ -2001,7 +1991,7 @@ async def get_fo_rejected_actuals(
     db: AsyncSession = Depends(get_db),
 ):
     """Get rejected actual reports for the logged-in FO's companies. status_id=4 (Rejected)."""
-    user_companies = await _get_fo_user_company_ids(db, user.user_id)
+    user_companies = await _get_fo_user_company_ids(db, user)
     if not user_companies:
         return FORejectedListResponse(reports=[], total=0)
 
@@ -0,0 +1,136 @@
+"""
+Live Updates Router
+
+WebSocket feed of committed analytics changes (see live_service.py).
+
+Protocol (JSON messages):
+  client -> {"type": "subscribe", "token": "<access token>",
+             "periods": [{"year": 2025, "month": 3}, {"year": 2024}],
+             "company_ids": ["CC0001"]}                    (periods/company_ids optional)
+  server -> {"type": "subscribed", "periods": [...], "company_ids": [...]}
+  server -> {"type": "change", "kind": "facts" | "workflow", "op": "UPDATE",
+             "periods": [{"year": 2025, "month": 3}], "complete": true,
+             "changes": [{"company_id": "CC0001", "year": 2025, "month": 3, "status": "Approved"}]}
+  server -> {"type": "resync"}    (updates were missed: refetch everything shown)
+
+The first message must be a subscribe carrying the token (browsers cannot
+set headers on a WebSocket); later subscribe messages replace the
+subscription and need no token. Users with analytics access hear about every
+company; others only about companies they are granted. The socket is closed
+(1008) when the token expires so the client reconnects with a fresh one.
+"""
+import asyncio
+import json
+import logging
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect, status
+from fastapi.security import HTTPAuthorizationCredentials
+
+from src.config.settings import settings
+from src.db.models import UserMaster
+from src.db.session import AsyncSessionLocal
+from src.security.middleware import get_current_user_optional
+from src.security.permissions import Permission, has_permission
+from src.services.acl_service import AclService, CompanyAccess
+from src.services.auth_service import AuthService
+from src.services.live_service import Subscription, live_hub
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(tags=["Live Updates"])
+
+
+async def _authenticate(token: str) -> Tuple[Optional[UserMaster], Optional[CompanyAccess], Optional[float]]:
+    """(user, access or None for every company, expiry epoch seconds) for a token."""
+    async with AsyncSessionLocal() as db:
+        credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+        user = await get_current_user_optional(None, credentials, db)
+        if user is None or not user.is_active:
+            return None, None, None
+        access = None
+        if not has_permission(user, Permission.VIEW_ANALYTICS):
+            access = await AclService.access_for(db, user)
+    payload = AuthService.decode_token(token) or {}
+    expires_at = payload.get("exp")
+    return user, access, float(expires_at) if expires_at is not None else None
+
+
+def _subscribed(subscription: Subscription) -> Dict[str, Any]:
+    periods = [{"year": year} for year in sorted(subscription.years)]
+    periods += [{"year": year, "month": month} for year, month in sorted(subscription.months)]
+    return {
+        "type": "subscribed",
+        "periods": periods,
+        "company_ids": sorted(subscription.company_ids) if subscription.company_ids is not None else None,
+    }
+
+
+async def _receive(websocket: WebSocket, timeout: Optional[float]) -> Dict[str, Any]:
+    message = await asyncio.wait_for(websocket.receive_text(), timeout)
+    data = json.loads(message)
+    if not isinstance(data, dict):
+        raise ValueError("expected a JSON object")
+    return data
+
+
+@router.websocket("/ws/live")
+async def live_updates(websocket: WebSocket):
+    """Push analytics changes within the subscribed periods and the user's companies."""
+    await websocket.accept()
+
+    try:
+        first = await _receive(websocket, settings.live_auth_timeout_seconds)
+        token = first.get("token") if first.get("type") == "subscribe" else None
+        if not token:
+            raise ValueError("first message must be a subscribe with a token")
+        user, access, expires_at = await _authenticate(token)
+        if user is None:
+            await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Not authenticated")
+            return
+        subscription = Subscription.from_message(first, access)
+    except WebSocketDisconnect:
+        return
+    except asyncio.TimeoutError:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="No subscribe message")
+        return
+    except (ValueError, TypeError, KeyError) as exc:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason=str(exc)[:120])
+        return
+
+    client = live_hub.connect(subscription)
+    if client is None:
+        await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER, reason="Too many live connections")
+        return
+
+    sender = asyncio.create_task(live_hub.pump(client, websocket.send_json))
+    try:
+        await websocket.send_json(_subscribed(subscription))
+        while True:
+            remaining = expires_at - time.time() if expires_at is not None else None
+            if remaining is not None and remaining <= 0:
+                await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Token expired")
+                break
+            try:
+                message = await _receive(websocket, remaining)
+            except asyncio.TimeoutError:
+                continue
+            except (ValueError, TypeError):
+                await websocket.send_json({"type": "error", "detail": "invalid message"})
+                continue
+            if message.get("type") == "subscribe":
+                try:
+                    client.subscription = Subscription.from_message(message, access)
+                except (ValueError, TypeError, KeyError):
+                    await websocket.send_json({"type": "error", "detail": "invalid subscription"})
+                    continue
+                await websocket.send_json(_subscribed(client.subscription))
+            elif message.get("type") == "ping":
+                await websocket.send_json({"type": "pong"})
+    except WebSocketDisconnect:
+        pass
+    finally:
+        sender.cancel()
+        await asyncio.gather(sender, return_exceptions=True)
+        live_hub.disconnect(client)
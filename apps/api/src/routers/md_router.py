@@ -10,9 +10,11 @@ Endpoints:
 - GET /md/drilldown/cluster/{id}       - Cluster to company drilldown
 - GET /md/pbt-trend                    - PBT trend 2020 → current
 - GET /md/performance-hierarchy        - Performance hierarchy with period selector
+- POST /md/bundle                      - Several of the above in one request, streamed as NDJSON
 """
+import asyncio
 from datetime import datetime
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Sequence, Tuple
 from enum import Enum
 
 from fastapi import APIRouter, Depends, HTTPException, Query
@@ -22,10 +24,22 @@ from sqlalchemy import select, and_, func
 
 from src.db.models import (
     Company, Cluster, Report, ReportStatus,
-    FinancialMonthly, Scenario, User
+    Scenario, User
 )
-from src.security.middleware import get_db, get_current_active_user
+from src.security.middleware import get_read_db, get_current_active_user
+from src.db.session import open_read_session
 from src.security.permissions import has_permission, Permission
+from src.db import statements
+from src.db.read_models import MonthlyRow
+from src.services.dashboard_data import DashboardData
+from src.services.data_version_service import DataVersionService
+from src.services.period_snapshot_service import PeriodSnapshotService
+from src.services.timeseries_service import EntityType, GROUP_ENTITY_ID, TimeSeriesService
+from src.services.fx_service import FxRateMissing, FxService, MetricMatrix, normalize_currency
+from src.utils.conditional import ConditionalRequest, years_around
+from src.utils.fanout import fan_out, scalar_of, scalars_of
+from src.utils.ndjson import ndjson_response, section_ids
+from src.utils.singleflight import SingleFlightTimeout, analytics_flight, make_key
 
 router = APIRouter(prefix="/md", tags=["MD Dashboard"])
 
@@ -68,7 +82,9 @@ class StrategicOverview(BaseModel):
     pbt: StrategicMetric
     pbt_achievement: StrategicMetric
     
-    # Exchange rate
+    # Reporting currency of the money metrics; effective (revenue-weighted)
+    # LKR per unit of it, or per USD when reporting in LKR
+    currency: str = "LKR"
     avg_exchange_rate: float
     
     # Reporting status
@@ -339,6 +355,35 @@ class PerformanceHierarchyResponse(BaseModel):
     clusters: List[HierarchyCluster]
 
 
+class BundleSection(str, Enum):
+    STRATEGIC_OVERVIEW = "strategic_overview"
+    PERFORMERS = "performers"
+    CLUSTER_CONTRIBUTION = "cluster_contribution"
+    RISK_RADAR = "risk_radar"
+    PBT_TREND = "pbt_trend"
+
+
+class BundleSectionRequest(BaseModel):
+    """One section of a bundle; parameters not used by the section are ignored"""
+    section: BundleSection
+    id: Optional[str] = None  # echoed on the section's line; defaults to the section name
+    mode: Optional[ViewMode] = None  # defaults to the bundle's mode
+    currency: str = Field(default="LKR", min_length=3, max_length=3)
+    top_n: int = Field(default=5, ge=1, le=20)
+    company_id: Optional[str] = None
+    cluster_id: Optional[str] = None
+    start_year: int = 2020
+    end_year: Optional[int] = None
+
+
+class DashboardBundleRequest(BaseModel):
+    """Sections for one page, sharing its period"""
+    mode: ViewMode = ViewMode.MONTH
+    year: Optional[int] = None
+    month: Optional[int] = Field(default=None, ge=1, le=12)
+    sections: List[BundleSectionRequest] = Field(min_length=1)
+
+
 # ============ HELPER FUNCTIONS ============
 
 def _f(v) -> float:
@@ -364,12 +409,12 @@ RISK_THRESHOLDS = {
 }
 
 
-def format_currency(value, in_millions: bool = True) -> str:
+def format_currency(value, in_millions: bool = True, currency: str = "LKR") -> str:
     """Format currency value"""
     v = float(value) if value is not None else 0.0
     if in_millions:
-        return f"LKR {v/1e6:.1f}M"
-    return f"LKR {v:,.0f}"
+        return f"{currency} {v/1e6:.1f}M"
+    return f"{currency} {v:,.0f}"
 
 
 def format_percentage(value) -> str:
@@ -415,18 +460,12 @@ async def get_approved_company_ids(
     months: Optional[List[int]] = None
 ) -> List[str]:
     """Get company IDs with approved reports"""
-    query = select(Report.company_id).where(
-        and_(
-            Report.year == year,
-            Report.status == ReportStatus.APPROVED
-        )
-    )
     if month:
-        query = query.where(Report.month == month)
+        result = await db.execute(statements.APPROVED_COMPANY_IDS_MONTH, {"year": year, "month": month})
     elif months:
-        query = query.where(Report.month.in_(months))
-    
-    result = await db.execute(query)
+        result = await db.execute(statements.APPROVED_COMPANY_IDS_MONTHS, {"year": year, "months": list(months)})
+    else:
+        result = await db.execute(statements.APPROVED_COMPANY_IDS, {"year": year})
     return list(set(row[0] for row in result.all()))
 
 
@@ -436,50 +475,32 @@ async def get_financials_for_period(
     months: List[int],
     scenario: Scenario,
     company_ids: Optional[List[str]] = None
-) -> List[FinancialMonthly]:
-    """Get financial records for a period"""
-    query = select(FinancialMonthly).where(
-        and_(
-            FinancialMonthly.year == year,
-            FinancialMonthly.month.in_(months),
-            FinancialMonthly.scenario == scenario
-        )
+) -> List[MonthlyRow]:
+    """Get financial records for a period (closed months come from snapshots)"""
+    if company_ids is not None and len(company_ids) == 0:
+        return []
+    return await PeriodSnapshotService.load_records(
+        db, scenario, year_from=year, year_to=year, months=months, company_ids=company_ids
     )
-    if company_ids is not None:
-        if len(company_ids) == 0:
-            return []
-        query = query.where(FinancialMonthly.company_id.in_(company_ids))
-    
-    result = await db.execute(query)
-    return result.scalars().all()
-
-
-def aggregate_financials(records: List[FinancialMonthly]) -> Dict[str, float]:
-    """Aggregate financial records"""
-    if not records:
-        return {
-            "revenue": 0, "gp": 0, "other_income": 0,
-            "personal_exp": 0, "admin_exp": 0, "selling_exp": 0,
-            "finance_exp": 0, "depreciation": 0, "provisions": 0,
-            "exchange_gl": 0, "non_ops_exp": 0, "non_ops_income": 0,
-            "total_overhead": 0, "pbt": 0, "exchange_rate": 1, "count": 0
-        }
-    
+
+
+def aggregate_totals(totals: Dict[str, float]) -> Dict[str, float]:
+    """Derived aggregates from FxService.totals() column sums"""
     agg = {
-        "revenue": float(sum(float(r.revenue_lkr or 0) for r in records)),
-        "gp": float(sum(float(r.gp or 0) for r in records)),
-        "other_income": float(sum(float(r.other_income or 0) for r in records)),
-        "personal_exp": float(sum(float(r.personal_exp or 0) for r in records)),
-        "admin_exp": float(sum(float(r.admin_exp or 0) for r in records)),
-        "selling_exp": float(sum(float(r.selling_exp or 0) for r in records)),
-        "finance_exp": float(sum(float(r.finance_exp or 0) for r in records)),
-        "depreciation": float(sum(float(r.depreciation or 0) for r in records)),
-        "provisions": float(sum(float(r.provisions or 0) for r in records)),
-        "exchange_gl": float(sum(float(r.exchange_gl or 0) for r in records)),
-        "non_ops_exp": float(sum(float(r.non_ops_exp or 0) for r in records)),
-        "non_ops_income": float(sum(float(r.non_ops_income or 0) for r in records)),
-        "exchange_rate": float(sum(float(r.exchange_rate or 1) for r in records)) / len(records),
-        "count": len(records)
+        "revenue": totals.get("revenue_lkr", 0.0),
+        "gp": totals.get("gp", 0.0),
+        "other_income": totals.get("other_income", 0.0),
+        "personal_exp": totals.get("personal_exp", 0.0),
+        "admin_exp": totals.get("admin_exp", 0.0),
+        "selling_exp": totals.get("selling_exp", 0.0),
+        "finance_exp": totals.get("finance_exp", 0.0),
+        "depreciation": totals.get("depreciation", 0.0),
+        "provisions": totals.get("provisions", 0.0),
+        "exchange_gl": totals.get("exchange_gl", 0.0),
+        "non_ops_exp": totals.get("non_ops_exp", 0.0),
+        "non_ops_income": totals.get("non_ops_income", 0.0),
+        "exchange_rate": totals.get("fx_rate", 1.0),
+        "count": int(totals.get("rows", 0))
     }
     
     agg["total_overhead"] = (
@@ -494,6 +515,13 @@ def aggregate_financials(records: List[FinancialMonthly]) -> Dict[str, float]:
     return agg
 
 
+def aggregate_financials(records: Sequence[MonthlyRow]) -> Dict[str, float]:
+    """Aggregate financial records (LKR)"""
+    return aggregate_totals(
+        FxService.totals(FxService.current(), MetricMatrix.from_records(records), "LKR")
+    )
+
+
 def get_ytd_months(year: int, current_month: int, fy_start_month: int = 1) -> List[int]:
     """Get YTD months based on fiscal year start"""
     if fy_start_month == 1:
@@ -516,8 +544,9 @@ async def get_strategic_overview(
     mode: ViewMode = Query(default=ViewMode.MONTH),
     year: Optional[int] = None,
     month: Optional[int] = Query(default=None, ge=1, le=12),
+    currency: str = Query(default="LKR", min_length=3, max_length=3, description="Reporting currency"),
     user: User = Depends(get_current_active_user),
-    db: AsyncSession = Depends(get_db),
+    conditional: ConditionalRequest = Depends(),
 ):
     """
     MD Group Strategic Overview.
@@ -525,7 +554,10 @@ async def get_strategic_overview(
     - Month mode: Single month actual vs budget
     - YTD mode: Fiscal year to date aggregates
     
-    Only includes approved actuals.
+    Only includes approved actuals. The overview is group-wide, so concurrent
+    requests for the same mode and period share one computation. Money metrics
+    are converted to `currency` row by row at each period's as-of rate; the
+    converted totals are cached, so switching currency is cheap.
     """
     if not has_permission(user, Permission.VIEW_ANALYTICS):
         raise HTTPException(status_code=403, detail="Not authorized")
@@ -533,6 +565,41 @@ async def get_strategic_overview(
     now = datetime.utcnow()
     year = year or now.year
     month = month or now.month
+    
+    currency = normalize_currency(currency)
+    
+    not_modified = await conditional.check(years=years_around(year), params=(year, month, currency))
+    if not_modified:
+        return not_modified
+    
+    return await _coalesced_strategic_overview(mode, year, month, currency, conditional.token)
+
+
+async def _coalesced_strategic_overview(
+    mode: ViewMode, year: int, month: int, currency: str, data_token: Optional[str]
+) -> StrategicOverview:
+    """The overview computed once for all concurrent requests (endpoint and bundle) for the same view"""
+    async def compute() -> StrategicOverview:
+        async with open_read_session() as db:
+            return await _build_strategic_overview(db, mode, year, month, currency, data_token)
+    
+    key = make_key("md.strategic_overview", {"mode": mode, "year": year, "month": month, "currency": currency})
+    try:
+        return await analytics_flight.do(key, compute)
+    except FxRateMissing as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except SingleFlightTimeout:
+        raise HTTPException(status_code=504, detail="Overview is taking too long to compute. Please retry.")
+
+
+async def _build_strategic_overview(
+    db: AsyncSession,
+    mode: ViewMode,
+    year: int,
+    month: int,
+    currency: str = "LKR",
+    data_token: Optional[str] = None,
+) -> StrategicOverview:
     fy_start_month = 1  # Could be made company-specific
     
     # Determine months to include
@@ -546,25 +613,26 @@ async def get_strategic_overview(
     # Get approved company IDs (for informational count only)
     approved_ids = await get_approved_company_ids(db, year, months=months)
     
-    # Get actual and budget data – MD sees ALL companies, not just approved
-    actual_records = await get_financials_for_period(
-        db, year, months, Scenario.ACTUAL, None
-    )
-    budget_records = await get_financials_for_period(
-        db, year, months, Scenario.BUDGET, None
-    )
+    # Actual, budget and prior-year totals in the reporting currency – MD sees
+    # ALL companies, not just approved. Keyed by the data-version token, so
+    # the record matrices and converted totals are reused until data changes.
+    async def converted(period_year: int, scenario: Scenario) -> Dict[str, float]:
+        async def load() -> MetricMatrix:
+            records = await get_financials_for_period(db, period_year, months, scenario, None)
+            return MetricMatrix.from_records(records)
+        
+        data_key = (
+            ("md.strategic_overview", period_year, tuple(months), scenario.value, data_token)
+            if data_token else None
+        )
+        return aggregate_totals(await FxService.cached_totals(db, currency, data_key, load))
     
-    # Get prior year data for comparison
-    prior_year = year - 1
-    prior_actual_records = await get_financials_for_period(
-        db, prior_year, months, Scenario.ACTUAL, None
-    )
-    prior_agg = aggregate_financials(prior_actual_records)
-    prior_gp_margin = (prior_agg["gp"] / prior_agg["revenue"] * 100) if prior_agg["revenue"] > 0 else 0
+    actual_agg = await converted(year, Scenario.ACTUAL)
+    budget_agg = await converted(year, Scenario.BUDGET)
     
-    # Aggregate
-    actual_agg = aggregate_financials(actual_records)
-    budget_agg = aggregate_financials(budget_records)
+    # Prior year data for comparison
+    prior_agg = await converted(year - 1, Scenario.ACTUAL)
+    prior_gp_margin = (prior_agg["gp"] / prior_agg["revenue"] * 100) if prior_agg["revenue"] > 0 else 0
     
     # Calculate metrics
     def make_metric(name: str, actual: float, budget: float, higher_is_better: bool = True,
@@ -577,8 +645,8 @@ async def get_strategic_overview(
             fmt_actual = format_percentage(actual)
             fmt_budget = format_percentage(budget) if budget else None
         else:
-            fmt_actual = format_currency(actual)
-            fmt_budget = format_currency(budget) if budget else None
+            fmt_actual = format_currency(actual, currency=currency)
+            fmt_budget = format_currency(budget, currency=currency) if budget else None
         
         # Prior year variance
         py_var_pct = None
@@ -607,21 +675,16 @@ async def get_strategic_overview(
     pbt_achievement = calculate_variance(actual_agg["pbt"], budget_agg["pbt"])
     
     # Company counts
-    companies_result = await db.execute(
-        select(func.count(Company.id)).where(Company.is_active == True)
-    )
+    companies_result = await db.execute(statements.ACTIVE_COMPANY_COUNT)
     companies_total = companies_result.scalar() or 0
     companies_approved = len(approved_ids)
     
-    reporting_result = await db.execute(
-        select(func.count(func.distinct(Report.company_id))).where(
-            and_(
-                Report.year == year,
-                Report.month.in_(months) if len(months) > 1 else Report.month == month,
-                Report.status.in_([ReportStatus.SUBMITTED, ReportStatus.APPROVED])
-            )
+    if len(months) > 1:
+        reporting_result = await db.execute(
+            statements.REPORTING_COMPANY_COUNT_MONTHS, {"year": year, "months": list(months)}
         )
-    )
+    else:
+        reporting_result = await db.execute(statements.REPORTING_COMPANY_COUNT, {"year": year, "month": month})
     companies_reporting = reporting_result.scalar() or 0
     
     return StrategicOverview(
@@ -645,6 +708,7 @@ async def get_strategic_overview(
             pbt_achievement["achievement_pct"],
             100.0  # Target is 100%
         ),
+        currency=currency,
         avg_exchange_rate=round(actual_agg["exchange_rate"], 2),
         companies_total=companies_total,
         companies_reporting=companies_reporting,
@@ -659,7 +723,8 @@ async def get_performers(
     month: Optional[int] = Query(default=None, ge=1, le=12),
     top_n: int = Query(default=5, ge=1, le=20),
     user: User = Depends(get_current_active_user),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
+    conditional: ConditionalRequest = Depends(),
 ):
     """
     Top and Bottom performers by PBT achievement.
@@ -674,19 +739,29 @@ async def get_performers(
     year = year or now.year
     month = month or now.month
     
+    not_modified = await conditional.check(db, years=years_around(year), params=(year, month))
+    if not_modified:
+        return not_modified
+    
+    return await _build_performers(DashboardData(db), mode, year, month, top_n)
+
+
+def _view_months(mode: ViewMode, year: int, month: int) -> Tuple[List[int], str]:
+    """Months covered by a month / calendar-YTD view, and its period label"""
     if mode == ViewMode.MONTH:
-        months = [month]
-        period = f"{MONTH_NAMES[month]} {year}"
-    else:
-        months = get_ytd_months(year, month, 1)
-        period = f"YTD {year}"
+        return [month], f"{MONTH_NAMES[month]} {year}"
+    return get_ytd_months(year, month, 1), f"YTD {year}"
+
+
+async def _build_performers(
+    data: DashboardData, mode: ViewMode, year: int, month: int, top_n: int
+) -> PerformersResponse:
+    months, period = _view_months(mode, year, month)
     
     # Get financials per company – MD sees ALL companies
-    actual_records = await get_financials_for_period(
-        db, year, months, Scenario.ACTUAL, None
-    )
-    budget_records = await get_financials_for_period(
-        db, year, months, Scenario.BUDGET, None
+    actual_records, budget_records = await asyncio.gather(
+        data.records(year, months, Scenario.ACTUAL),
+        data.records(year, months, Scenario.BUDGET),
     )
     
     if not actual_records:
@@ -727,34 +802,26 @@ async def get_performers(
     
     # Calculate achievement and build entries
     entries = []
-    for cid, data in company_data.items():
-        if data["budget_pbt"] == 0:
+    for cid, totals in company_data.items():
+        if totals["budget_pbt"] == 0:
             continue
         
-        achievement = (data["actual_pbt"] / data["budget_pbt"]) * 100
-        variance = data["actual_pbt"] - data["budget_pbt"]
+        achievement = (totals["actual_pbt"] / totals["budget_pbt"]) * 100
+        variance = totals["actual_pbt"] - totals["budget_pbt"]
         
-        # Get company info
-        company_result = await db.execute(
-            select(Company).where(Company.id == cid)
-        )
-        company = company_result.scalar_one_or_none()
+        # Company and cluster from the request's master data
+        company = await data.company(cid)
         if not company:
             continue
-        
-        # Get cluster
-        cluster_result = await db.execute(
-            select(Cluster).where(Cluster.id == company.cluster_id)
-        )
-        cluster = cluster_result.scalar_one_or_none()
+        cluster = await data.cluster(company.cluster_id)
         
         entries.append({
             "company_id": str(cid),
             "company_name": company.name,
             "company_code": company.code,
             "cluster_name": cluster.name if cluster else "Unknown",
-            "pbt_actual": data["actual_pbt"],
-            "pbt_budget": data["budget_pbt"],
+            "pbt_actual": totals["actual_pbt"],
+            "pbt_budget": totals["budget_pbt"],
             "achievement_pct": achievement,
             "variance": variance,
             "fiscal_cycle": "Jan-Dec" if (company.fin_year_start_month or 1) == 1 else "Apr-Mar"
@@ -796,7 +863,8 @@ async def get_cluster_contribution(
     year: Optional[int] = None,
     month: Optional[int] = Query(default=None, ge=1, le=12),
     user: User = Depends(get_current_active_user),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
+    conditional: ConditionalRequest = Depends(),
 ):
     """Cluster contribution analysis - revenue, GP, PBT contribution percentages"""
     if not has_permission(user, Permission.VIEW_ANALYTICS):
@@ -806,32 +874,25 @@ async def get_cluster_contribution(
     year = year or now.year
     month = month or now.month
     
-    if mode == ViewMode.MONTH:
-        months = [month]
-        period = f"{MONTH_NAMES[month]} {year}"
-    else:
-        months = get_ytd_months(year, month, 1)
-        period = f"YTD {year}"
-    
-    # Get actual records – MD sees ALL companies
-    actual_records = await get_financials_for_period(
-        db, year, months, Scenario.ACTUAL, None
-    )
-    budget_records = await get_financials_for_period(
-        db, year, months, Scenario.BUDGET, None
-    )
+    not_modified = await conditional.check(db, years=years_around(year), params=(year, month))
+    if not_modified:
+        return not_modified
     
-    # Get clusters
-    clusters_result = await db.execute(
-        select(Cluster).where(Cluster.is_active == True).order_by(Cluster.name)
-    )
-    clusters = clusters_result.scalars().all()
+    return await _build_cluster_contribution(DashboardData(db), mode, year, month)
+
+
+async def _build_cluster_contribution(
+    data: DashboardData, mode: ViewMode, year: int, month: int
+) -> ContributionResponse:
+    months, period = _view_months(mode, year, month)
     
-    # Get companies
-    companies_result = await db.execute(
-        select(Company).where(Company.is_active == True)
+    # Records – MD sees ALL companies – with active clusters (by name) and companies
+    actual_records, budget_records, clusters, companies = await asyncio.gather(
+        data.records(year, months, Scenario.ACTUAL),
+        data.records(year, months, Scenario.BUDGET),
+        data.clusters(),
+        data.companies(),
     )
-    companies = companies_result.scalars().all()
     company_cluster_map = {c.id: c.cluster_id for c in companies}
     
     # Aggregate by cluster
@@ -916,7 +977,8 @@ async def get_risk_radar(
     year: Optional[int] = None,
     month: Optional[int] = Query(default=None, ge=1, le=12),
     user: User = Depends(get_current_active_user),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
+    conditional: ConditionalRequest = Depends(),
 ):
     """Risk radar showing clusters by variance thresholds"""
     if not has_permission(user, Permission.VIEW_ANALYTICS):
@@ -926,31 +988,23 @@ async def get_risk_radar(
     year = year or now.year
     month = month or now.month
     
-    if mode == ViewMode.MONTH:
-        months = [month]
-        period = f"{MONTH_NAMES[month]} {year}"
-    else:
-        months = get_ytd_months(year, month, 1)
-        period = f"YTD {year}"
+    not_modified = await conditional.check(db, years=years_around(year), params=(year, month))
+    if not_modified:
+        return not_modified
     
-    # Get records – MD sees ALL companies
-    actual_records = await get_financials_for_period(
-        db, year, months, Scenario.ACTUAL, None
-    )
-    budget_records = await get_financials_for_period(
-        db, year, months, Scenario.BUDGET, None
-    )
-    
-    # Get clusters and companies
-    clusters_result = await db.execute(
-        select(Cluster).where(Cluster.is_active == True)
-    )
-    clusters = clusters_result.scalars().all()
+    return await _build_risk_radar(DashboardData(db), mode, year, month)
+
+
+async def _build_risk_radar(data: DashboardData, mode: ViewMode, year: int, month: int) -> RiskRadarResponse:
+    months, period = _view_months(mode, year, month)
     
-    companies_result = await db.execute(
-        select(Company).where(Company.is_active == True)
+    # Records – MD sees ALL companies – with active clusters and companies
+    actual_records, budget_records, clusters, companies = await asyncio.gather(
+        data.records(year, months, Scenario.ACTUAL),
+        data.records(year, months, Scenario.BUDGET),
+        data.clusters(),
+        data.companies(),
     )
-    companies = companies_result.scalars().all()
     company_cluster_map = {c.id: c.cluster_id for c in companies}
     
     # Group records by company
@@ -1069,7 +1123,8 @@ async def get_cluster_drilldown(
     year: Optional[int] = None,
     month: Optional[int] = Query(default=None, ge=1, le=12),
     user: User = Depends(get_current_active_user),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
+    conditional: ConditionalRequest = Depends(),
 ):
     """Cluster to company drilldown with full financials"""
     if not has_permission(user, Permission.VIEW_ANALYTICS):
@@ -1079,6 +1134,10 @@ async def get_cluster_drilldown(
     year = year or now.year
     month = month or now.month
     
+    not_modified = await conditional.check(db, years=years_around(year), params=(year, month))
+    if not_modified:
+        return not_modified
+    
     if mode == ViewMode.MONTH:
         months = [month]
         period = f"{MONTH_NAMES[month]} {year}"
@@ -1115,8 +1174,8 @@ async def get_cluster_drilldown(
     )
     
     # Group by company
-    actuals_by_company: Dict[str, List[FinancialMonthly]] = {}
-    budgets_by_company: Dict[str, List[FinancialMonthly]] = {}
+    actuals_by_company: Dict[str, List[MonthlyRow]] = {}
+    budgets_by_company: Dict[str, List[MonthlyRow]] = {}
     
     for r in actual_records:
         if r.company_id not in actuals_by_company:
@@ -1211,7 +1270,8 @@ async def get_pbt_trend(
     start_year: int = Query(default=2020),
     end_year: Optional[int] = None,
     user: User = Depends(get_current_active_user),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
+    conditional: ConditionalRequest = Depends(),
 ):
     """
     PBT trend from 2020 to current for horizontal scroll UI.
@@ -1223,88 +1283,55 @@ async def get_pbt_trend(
     now = datetime.utcnow()
     end_year = end_year or now.year
     
-    # Build query for actuals
-    query = select(FinancialMonthly).where(
-        and_(
-            FinancialMonthly.year >= start_year,
-            FinancialMonthly.year <= end_year,
-            FinancialMonthly.scenario == Scenario.ACTUAL
-        )
-    ).order_by(FinancialMonthly.year, FinancialMonthly.month)
-    
-    budget_query = select(FinancialMonthly).where(
-        and_(
-            FinancialMonthly.year >= start_year,
-            FinancialMonthly.year <= end_year,
-            FinancialMonthly.scenario == Scenario.BUDGET
-        )
+    not_modified = await conditional.check(
+        db,
+        years=range(start_year, end_year + 1),
+        company_ids=[company_id] if company_id else None,
+        params=(start_year, end_year),
     )
+    if not_modified:
+        return not_modified
     
+    return await _build_pbt_trend(DashboardData(db), company_id, cluster_id, start_year, end_year)
+
+
+async def _build_pbt_trend(
+    data: DashboardData,
+    company_id: Optional[str],
+    cluster_id: Optional[str],
+    start_year: int,
+    end_year: int,
+) -> PBTTrendResponse:
     company_name = None
     cluster_name = None
+    entity_type, entity_id = EntityType.GROUP, GROUP_ENTITY_ID
     
     if company_id:
-        query = query.where(FinancialMonthly.company_id == company_id)
-        budget_query = budget_query.where(FinancialMonthly.company_id == company_id)
-        company_result = await db.execute(select(Company).where(Company.id == company_id))
-        company = company_result.scalar_one_or_none()
+        entity_type, entity_id = EntityType.COMPANY, company_id
+        company = await data.company(company_id)
         company_name = company.name if company else None
     elif cluster_id:
-        # Get companies in cluster
-        companies_result = await db.execute(
-            select(Company.id).where(Company.cluster_id == cluster_id)
-        )
-        company_ids = [row[0] for row in companies_result.all()]
-        if company_ids:
-            query = query.where(FinancialMonthly.company_id.in_(company_ids))
-            budget_query = budget_query.where(FinancialMonthly.company_id.in_(company_ids))
-        
-        cluster_result = await db.execute(select(Cluster).where(Cluster.id == cluster_id))
-        cluster = cluster_result.scalar_one_or_none()
+        entity_type, entity_id = EntityType.CLUSTER, cluster_id
+        cluster = await data.cluster(cluster_id)
         cluster_name = cluster.name if cluster else None
     
-    actual_result = await db.execute(query)
-    actual_records = actual_result.scalars().all()
-    
-    budget_result = await db.execute(budget_query)
-    budget_records = budget_result.scalars().all()
-    
-    # Group by year-month
-    actuals_by_period: Dict[str, List[FinancialMonthly]] = {}
-    budgets_by_period: Dict[str, float] = {}
-    
-    for r in actual_records:
-        key = f"{r.year}-{r.month:02d}"
-        if key not in actuals_by_period:
-            actuals_by_period[key] = []
-        actuals_by_period[key].append(r)
-    
-    for r in budget_records:
-        key = f"{r.year}-{r.month:02d}"
-        overhead = _f(r.personal_exp) + _f(r.admin_exp) + _f(r.selling_exp) + \
-                   _f(r.finance_exp) + _f(r.depreciation)
-        pbt = _f(r.gp) + _f(r.other_income) - overhead + _f(r.provisions) + _f(r.exchange_gl)
-        
-        if key not in budgets_by_period:
-            budgets_by_period[key] = 0.0
-        budgets_by_period[key] += pbt
+    # Monthly PBT series, actual and budget, from the pre-aggregated store
+    async with data.session() as db:
+        actual = await TimeSeriesService.fetch(
+            db, ["pbt_before"], start_year, end_year,
+            entity_type=entity_type, entity_id=entity_id, scenario=Scenario.ACTUAL,
+        )
+        budget = await TimeSeriesService.fetch(
+            db, ["pbt_before"], start_year, end_year,
+            entity_type=entity_type, entity_id=entity_id, scenario=Scenario.BUDGET,
+        )
+    budget_pbt_by_month = dict(budget.points("pbt_before"))
     
     # Build data points
     data_points = []
-    for period_key in sorted(actuals_by_period.keys()):
-        records = actuals_by_period[period_key]
-        year_val = int(period_key.split("-")[0])
-        month_val = int(period_key.split("-")[1])
-        
-        # Calculate PBT
-        total_pbt = 0
-        for r in records:
-            overhead = _f(r.personal_exp) + _f(r.admin_exp) + _f(r.selling_exp) + \
-                       _f(r.finance_exp) + _f(r.depreciation)
-            pbt = _f(r.gp) + _f(r.other_income) - overhead + _f(r.provisions) + _f(r.exchange_gl)
-            total_pbt += pbt
-        
-        budget_pbt = budgets_by_period.get(period_key)
+    for index, total_pbt in actual.points("pbt_before"):
+        year_val, month_val = actual.buckets[index]
+        budget_pbt = budget_pbt_by_month.get(index)
         achievement = (total_pbt / budget_pbt * 100) if budget_pbt and budget_pbt > 0 else None
         
         data_points.append(TrendDataPoint(
@@ -1332,7 +1359,8 @@ async def get_performance_hierarchy(
     year: Optional[int] = None,
     month: Optional[int] = Query(default=None, ge=1, le=12),
     user: User = Depends(get_current_active_user),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
+    conditional: ConditionalRequest = Depends(),
 ):
     """
     Performance hierarchy with month/year selector.
@@ -1344,35 +1372,34 @@ async def get_performance_hierarchy(
     now = datetime.utcnow()
     year = year or now.year
     month = month or now.month
-    period = f"{MONTH_NAMES[month]} {year}"
     
-    # Get clusters
-    clusters_result = await db.execute(
-        select(Cluster).where(Cluster.is_active == True).order_by(Cluster.name)
-    )
-    clusters = clusters_result.scalars().all()
+    not_modified = await conditional.check(db, years=years_around(year), params=(year, month))
+    if not_modified:
+        return not_modified
     
-    # Get companies
-    companies_result = await db.execute(
-        select(Company).where(Company.is_active == True)
-    )
-    companies = companies_result.scalars().all()
-    
-    # Get MONTHLY financials – MD sees ALL companies
-    actual_records = await get_financials_for_period(
-        db, year, [month], Scenario.ACTUAL, None
-    )
-    budget_records = await get_financials_for_period(
-        db, year, [month], Scenario.BUDGET, None
-    )
+    period = f"{MONTH_NAMES[month]} {year}"
     
-    # Get YTD financials (Jan-current month for simplicity; per-company FY handled below)
+    # Independent reads, run concurrently on pooled sessions
     all_ytd_months = list(range(1, month + 1))
-    ytd_actual_records = await get_financials_for_period(
-        db, year, all_ytd_months, Scenario.ACTUAL, None
-    )
-    ytd_budget_records = await get_financials_for_period(
-        db, year, all_ytd_months, Scenario.BUDGET, None
+    (
+        clusters,
+        companies,
+        actual_records,
+        budget_records,
+        ytd_actual_records,
+        ytd_budget_records,
+        reports,
+    ) = await fan_out(
+        scalars_of(statements.ACTIVE_CLUSTERS),
+        scalars_of(statements.ACTIVE_COMPANIES),
+        # MONTHLY financials – MD sees ALL companies
+        lambda s: get_financials_for_period(s, year, [month], Scenario.ACTUAL, None),
+        lambda s: get_financials_for_period(s, year, [month], Scenario.BUDGET, None),
+        # YTD financials (Jan-current month for simplicity; per-company FY handled below)
+        lambda s: get_financials_for_period(s, year, all_ytd_months, Scenario.ACTUAL, None),
+        lambda s: get_financials_for_period(s, year, all_ytd_months, Scenario.BUDGET, None),
+        # Report statuses
+        scalars_of(statements.REPORTS_FOR_PERIOD, {"year": year, "month": month}),
     )
     
     # Group MONTHLY by company
@@ -1427,13 +1454,7 @@ async def get_performance_hierarchy(
                 total += pbt
         return total
     
-    # Get report statuses
-    reports_result = await db.execute(
-        select(Report).where(
-            and_(Report.year == year, Report.month == month)
-        )
-    )
-    report_statuses = {r.company_id: r.status.value for r in reports_result.scalars().all()}
+    report_statuses = {r.company_id: r.status.value for r in reports}
     
     # Build hierarchy
     hierarchy_clusters = []
@@ -1529,7 +1550,8 @@ async def get_company_detail(
     year: int = Query(...),
     month: int = Query(..., ge=1, le=12),
     user: User = Depends(get_current_active_user),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
+    conditional: ConditionalRequest = Depends(),
 ):
     """
     Full company financial detail for popup modal.
@@ -1538,32 +1560,30 @@ async def get_company_detail(
     if not has_permission(user, Permission.VIEW_ANALYTICS):
         raise HTTPException(status_code=403, detail="Not authorized")
     
-    from src.db.models import UserMaster, PeriodMaster, ReportComment
+    not_modified = await conditional.check(db, years=years_around(year), company_ids=[company_id])
+    if not_modified:
+        return not_modified
+    
+    from src.db.models import UserMaster, ReportComment
     
     # Get company
-    company_result = await db.execute(
-        select(Company).where(Company.id == company_id)
-    )
+    company_result = await db.execute(statements.COMPANY_BY_ID, {"company_id": company_id})
     company = company_result.scalar_one_or_none()
     if not company:
         raise HTTPException(status_code=404, detail="Company not found")
     
-    # Get cluster
-    cluster_result = await db.execute(
-        select(Cluster).where(Cluster.id == company.cluster_id)
-    )
-    cluster = cluster_result.scalar_one_or_none()
-    
     fy_start = company.fin_year_start_month or 1
-    
-    # Monthly financials
-    monthly_actual = await get_financials_for_period(db, year, [month], Scenario.ACTUAL, [company_id])
-    monthly_budget = await get_financials_for_period(db, year, [month], Scenario.BUDGET, [company_id])
-    
-    # YTD financials
     ytd_months = get_ytd_months(year, month, fy_start)
-    ytd_actual = await get_financials_for_period(db, year, ytd_months, Scenario.ACTUAL, [company_id])
-    ytd_budget = await get_financials_for_period(db, year, ytd_months, Scenario.BUDGET, [company_id])
+    
+    # Cluster, monthly and YTD financials and the period are independent reads
+    cluster, monthly_actual, monthly_budget, ytd_actual, ytd_budget, period_id = await fan_out(
+        scalar_of(statements.CLUSTER_BY_ID, {"cluster_id": company.cluster_id}),
+        lambda s: get_financials_for_period(s, year, [month], Scenario.ACTUAL, [company_id]),
+        lambda s: get_financials_for_period(s, year, [month], Scenario.BUDGET, [company_id]),
+        lambda s: get_financials_for_period(s, year, ytd_months, Scenario.ACTUAL, [company_id]),
+        lambda s: get_financials_for_period(s, year, ytd_months, Scenario.BUDGET, [company_id]),
+        scalar_of(statements.PERIOD_ID, {"year": year, "month": month}),
+    )
     
     def build_detail(records) -> CompanyDetailFinancials:
         agg = aggregate_financials(records)
@@ -1610,26 +1630,19 @@ async def get_company_detail(
     fy_month_names = [SHORT_MONTH_NAMES[m] for m in ytd_months]
     ytd_label = f"{fy_month_names[0]}–{fy_month_names[-1]} {year}" if fy_month_names else f"YTD {year}"
     
-    # Get report/workflow info
-    period_result = await db.execute(
-        select(PeriodMaster).where(
-            and_(PeriodMaster.year == year, PeriodMaster.month == month)
-        )
-    )
-    period_row = period_result.scalar_one_or_none()
-    
+    # Report/workflow info
     fd_comments_list = []
     uploaded_by = None
     uploaded_at = None
     report_status_str = None
     
-    if period_row:
+    if period_id is not None:
         from src.db.models import Report as ReportModel
         report_result = await db.execute(
             select(ReportModel).where(
                 and_(
                     ReportModel.company_id == company_id,
-                    ReportModel.period_id == period_row.period_id
+                    ReportModel.period_id == period_id
                 )
             )
         )
@@ -1676,7 +1689,7 @@ async def get_company_detail(
                 select(ReportComment).where(
                     and_(
                         ReportComment.report_company_id == company_id,
-                        ReportComment.report_period_id == period_row.period_id
+                        ReportComment.report_period_id == period_id
                     )
                 ).order_by(ReportComment.created_at.desc())
             )
@@ -1723,3 +1736,58 @@ async def get_company_detail(
         uploaded_at=uploaded_at,
         report_status=report_status_str
     )
+
+
+@router.post("/bundle")
+async def get_dashboard_bundle(
+    bundle: DashboardBundleRequest,
+    user: User = Depends(get_current_active_user),
+):
+    """
+    Several dashboard sections in one request, streamed as NDJSON.
+    
+    The caller is authenticated and authorized once. Sections are computed
+    concurrently and share one load of clusters, companies and the period's
+    financial rows, and each is written as a line as soon as it is ready
+    (see src/utils/ndjson.py for the line format). A failing section is
+    reported on its own line; the others are unaffected.
+    """
+    if not has_permission(user, Permission.VIEW_ANALYTICS):
+        raise HTTPException(status_code=403, detail="Not authorized")
+    
+    now = datetime.utcnow()
+    year = bundle.year or now.year
+    month = bundle.month or now.month
+    ids = section_ids(bundle.sections)
+    
+    data = DashboardData()
+    return ndjson_response([
+        (section_id, section.section.value, _bundle_section(data, section, section.mode or bundle.mode, year, month, now))
+        for section_id, section in zip(ids, bundle.sections)
+    ])
+
+
+def _bundle_section(
+    data: DashboardData,
+    section: BundleSectionRequest,
+    mode: ViewMode,
+    year: int,
+    month: int,
+    now: datetime,
+):
+    """The section's computation, as a no-argument coroutine function"""
+    if section.section == BundleSection.STRATEGIC_OVERVIEW:
+        async def overview() -> StrategicOverview:
+            async with data.session() as db:
+                token = await DataVersionService.token(db, years_around(year))
+            return await _coalesced_strategic_overview(mode, year, month, normalize_currency(section.currency), token)
+        return overview
+    if section.section == BundleSection.PERFORMERS:
+        return lambda: _build_performers(data, mode, year, month, section.top_n)
+    if section.section == BundleSection.CLUSTER_CONTRIBUTION:
+        return lambda: _build_cluster_contribution(data, mode, year, month)
+    if section.section == BundleSection.RISK_RADAR:
+        return lambda: _build_risk_radar(data, mode, year, month)
+    return lambda: _build_pbt_trend(
+        data, section.company_id, section.cluster_id, section.start_year, section.end_year or now.year
+    )
@@ -0,0 +1,124 @@
+"""
+Profiler Router
+Admin-only control of on-demand sampling sessions (see src/utils/profiler.py)
+and download of their flame graphs and hotspot summaries.
+"""
+import logging
+from typing import Any, Dict, Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import PlainTextResponse, Response
+from pydantic import BaseModel, Field
+
+from src.config.settings import settings
+from src.db.models import User
+from src.security.middleware import require_admin
+from src.utils.profiler import ProfileSession, ProfilerBusyError, profiler
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/admin/profiler", tags=["Admin Profiler"])
+
+
+class ProfileStartRequest(BaseModel):
+    # Glob on the request path, e.g. "/md/*" or "/ceo/dashboard"
+    route: str = Field(default="*", min_length=1, max_length=200)
+    sample_percent: float = Field(default=100.0, gt=0, le=100)
+    duration_seconds: float = Field(default=60.0, gt=0)
+    interval_ms: float = Field(default_factory=lambda: settings.profiler_interval_ms, ge=1, le=1000)
+    # cpu: only while a profiled request runs; wall: also while it awaits I/O or other tasks
+    mode: Literal["cpu", "wall"] = "cpu"
+    max_requests: int = Field(default_factory=lambda: settings.profiler_max_requests, ge=1)
+
+
+def _session(session_id: str) -> ProfileSession:
+    session = profiler.get(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Profile session not found")
+    if session.running and session is not profiler.session:
+        # Stacks stay in the worker sampling them until the session finishes.
+        raise HTTPException(
+            status_code=409,
+            detail=f"Session {session.id} is running in worker {session.pid}; its results are available once it finishes",
+        )
+    return session
+
+
+@router.get("")
+async def profiler_status(current_user: User = Depends(require_admin)) -> Dict[str, Any]:
+    """The running session, if any, and recently finished ones."""
+    return profiler.snapshot()
+
+
+@router.post("/start")
+async def start_profiling(
+    request: ProfileStartRequest,
+    current_user: User = Depends(require_admin),
+) -> Dict[str, Any]:
+    """
+    Sample matching requests until duration_seconds (capped at
+    profiler_max_seconds) passes, max_requests have been captured, or
+    /stop is called. One session at a time across the workers sharing
+    profiler_store_dir; it samples only the requests this worker serves.
+    """
+    if request.duration_seconds > settings.profiler_max_seconds:
+        raise HTTPException(
+            status_code=422,
+            detail=f"duration_seconds may be at most {settings.profiler_max_seconds}",
+        )
+    try:
+        session = profiler.start(
+            route=request.route,
+            sample_percent=request.sample_percent,
+            duration_seconds=request.duration_seconds,
+            interval_ms=request.interval_ms,
+            mode=request.mode,
+            max_requests=request.max_requests,
+            started_by=current_user.user_email,
+        )
+    except ProfilerBusyError as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
+    logger.info("Profiling %s started by %s", request.route, current_user.user_email)
+    return session.summary()
+
+
+@router.post("/stop")
+async def stop_profiling(
+    response: Response,
+    current_user: User = Depends(require_admin),
+) -> Dict[str, Any]:
+    """Stop the running session; one running in another worker is asked to stop (202)."""
+    session = profiler.stop()
+    if session is not None:
+        return session.summary()
+    session = profiler.running_elsewhere()
+    if session is None:
+        raise HTTPException(status_code=409, detail="No profile session is running")
+    profiler.request_stop(session)
+    response.status_code = 202
+    return {**session.summary(), "stop_requested": True}
+
+
+@router.get("/{session_id}/hotspots")
+async def profile_hotspots(
+    session_id: str,
+    top: int = Query(default=20, ge=1, le=200),
+    current_user: User = Depends(require_admin),
+) -> Dict[str, Any]:
+    """Top functions by self and inclusive samples, and samples by package and route."""
+    return _session(session_id).hotspots(top)
+
+
+@router.get("/{session_id}/flamegraph")
+async def profile_flamegraph(
+    session_id: str,
+    format: Literal["svg", "folded"] = Query(default="svg"),
+    current_user: User = Depends(require_admin),
+):
+    """Download as an SVG flame graph, or folded stacks for flamegraph.pl / speedscope."""
+    session = _session(session_id)
+    filename = f"profile-{session.id}.{'svg' if format == 'svg' else 'folded.txt'}"
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+    if format == "folded":
+        return PlainTextResponse(session.folded(), headers=headers)
+    return Response(session.flamegraph_svg(), media_type="image/svg+xml", headers=headers)
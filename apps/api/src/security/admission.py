@@ -0,0 +1,312 @@
+"""
+Admission Control
+Cost-aware concurrency limits and load shedding per route class.
+
+RateLimitMiddleware counts requests per client; it cannot tell a /fo/companies
+lookup from a two-year trend query or a PDF export, and ten of the latter are
+enough to exhaust the database pool. Here every request is classified:
+
+- WRITE            POST/PUT/PATCH/DELETE (FO saves, approvals, admin changes)
+- LIGHT_READ       ordinary lookups
+- HEAVY_ANALYTICS  executive dashboards, trends, GraphQL
+- EXPORT           PDF/Excel exports and bulk extracts
+
+Each class has its own in-flight cap and a bounded FIFO wait queue. All
+classes also share admission_total_limit, counted in database connections:
+a request takes as many as it may hold at once (connection_cost - one, plus
+the fan-out sessions of an analytics request), so the total is checked
+against the pool when settings load. admission_write_reserve of them only
+writes may use, and freed connections go to waiting writes first - so a
+burst of exports during month-end close delays other exports, not FO saves. Requests that find the queue full, or wait longer
+than admission_queue_timeout_seconds, get 503 with a Retry-After estimated from
+the class's recent service time.
+"""
+import asyncio
+import logging
+import time
+from collections import deque
+from enum import Enum
+from typing import Any, Deque, Dict, Optional, Tuple
+
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from src.config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+class RouteClass(str, Enum):
+    WRITE = "write"
+    LIGHT_READ = "light_read"
+    HEAVY_ANALYTICS = "heavy_analytics"
+    EXPORT = "export"
+
+
+# Order in which freed slots are offered to waiting requests.
+PRIORITY: Tuple[RouteClass, ...] = (
+    RouteClass.WRITE,
+    RouteClass.LIGHT_READ,
+    RouteClass.HEAVY_ANALYTICS,
+    RouteClass.EXPORT,
+)
+
+WRITE_METHODS = frozenset({"POST", "PUT", "PATCH", "DELETE"})
+
+# Never queued: probes, docs and CORS preflights.
+EXEMPT_PREFIXES: Tuple[str, ...] = ("/health", "/docs", "/redoc", "/openapi.json")
+
+# (path prefix, class), first match wins; checked before the method rule.
+ROUTE_RULES: Tuple[Tuple[str, RouteClass], ...] = (
+    ("/export/", RouteClass.EXPORT),
+    ("/admin/reports/export/", RouteClass.EXPORT),
+    ("/extract/", RouteClass.EXPORT),
+    # GraphQL is mostly dashboard queries; its own cost limits price each operation.
+    ("/graphql", RouteClass.HEAVY_ANALYTICS),
+    ("/ceo/", RouteClass.HEAVY_ANALYTICS),
+    ("/md/", RouteClass.HEAVY_ANALYTICS),
+    ("/fd/dashboard", RouteClass.HEAVY_ANALYTICS),
+    ("/fd/company-rank", RouteClass.HEAVY_ANALYTICS),
+    ("/fd/company-analytics", RouteClass.HEAVY_ANALYTICS),
+    ("/admin/reports/preview", RouteClass.HEAVY_ANALYTICS),
+    ("/admin/dashboard", RouteClass.HEAVY_ANALYTICS),
+)
+
+
+# Sections computed concurrently through one DashboardData (up to
+# fanout_max_concurrency sessions) next to the coalesced overview's own fan-out.
+BUNDLE_PATHS: Tuple[str, ...] = ("/ceo/bundle", "/md/bundle")
+
+
+def classify(method: str, path: str) -> Optional[RouteClass]:
+    """Route class for a request, or None if it bypasses admission control."""
+    if method == "OPTIONS" or path == "/" or path.startswith(EXEMPT_PREFIXES):
+        return None
+    for prefix, route_class in ROUTE_RULES:
+        if path.startswith(prefix):
+            return route_class
+    if method in WRITE_METHODS:
+        return RouteClass.WRITE
+    return RouteClass.LIGHT_READ
+
+
+def connection_cost(route_class: RouteClass, path: str) -> int:
+    """Pooled connections a request may hold at once: its own session, plus fan-out for analytics."""
+    if route_class is not RouteClass.HEAVY_ANALYTICS:
+        return 1
+    fanout = max(1, settings.fanout_max_concurrency)
+    return 1 + (2 * fanout if path.startswith(BUNDLE_PATHS) else fanout)
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request is shed; carries a retry hint in seconds."""
+
+    def __init__(self, route_class: RouteClass, reason: str, retry_after: int):
+        super().__init__(f"{route_class.value} requests are shed ({reason}), retry in {retry_after}s")
+        self.route_class = route_class
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class _ClassState:
+    __slots__ = ("limit", "max_queue", "in_flight", "waiters", "avg_seconds", "stats")
+
+    def __init__(self, limit: int, max_queue: int):
+        self.limit = limit
+        self.max_queue = max_queue
+        self.in_flight = 0
+        # (future, connection cost) in arrival order
+        self.waiters: Deque[Tuple[asyncio.Future, int]] = deque()
+        self.avg_seconds = 0.0
+        self.stats: Dict[str, int] = {
+            "admitted": 0,
+            "queued": 0,
+            "rejected_queue_full": 0,
+            "rejected_timeout": 0,
+            "max_queue_depth": 0,
+        }
+
+
+class AdmissionController:
+    """
+    Per-class in-flight caps (requests) with bounded queues, sharing one total
+    limit (connections, see connection_cost).
+    """
+
+    def __init__(
+        self,
+        limits: Dict[RouteClass, Tuple[int, int]],
+        total_limit: int,
+        write_reserve: int = 0,
+        queue_timeout_seconds: float = 10.0,
+    ):
+        self.total_limit = total_limit
+        self.write_reserve = min(write_reserve, total_limit)
+        self.queue_timeout_seconds = queue_timeout_seconds
+        # Connections held by admitted requests
+        self.total_in_flight = 0
+        self._classes: Dict[RouteClass, _ClassState] = {
+            route_class: _ClassState(*limits[route_class]) for route_class in PRIORITY
+        }
+
+    def _has_slot(self, route_class: RouteClass, cost: int) -> bool:
+        state = self._classes[route_class]
+        if state.in_flight >= state.limit:
+            return False
+        shared = self.total_limit - (0 if route_class is RouteClass.WRITE else self.write_reserve)
+        return self.total_in_flight + cost <= shared
+
+    def _take(self, route_class: RouteClass, cost: int) -> None:
+        state = self._classes[route_class]
+        state.in_flight += 1
+        state.stats["admitted"] += 1
+        self.total_in_flight += cost
+
+    def retry_after(self, route_class: RouteClass) -> int:
+        """Rough seconds until a queued request of this class would be served."""
+        state = self._classes[route_class]
+        per_slot = state.avg_seconds or 1.0
+        backlog = (len(state.waiters) + 1) / max(state.limit, 1)
+        return max(1, min(60, int(per_slot * backlog + 0.999)))
+
+    async def acquire(self, route_class: RouteClass, cost: int = 1) -> None:
+        """
+        Take a slot and cost connections, waiting in the class queue if needed;
+        raises AdmissionRejected when shed.
+        """
+        state = self._classes[route_class]
+        # A queue only forms when this class or the shared limit is full, and
+        # release() drains queues in priority order, so newcomers never jump it.
+        if not state.waiters and self._has_slot(route_class, cost):
+            self._take(route_class, cost)
+            return
+
+        if len(state.waiters) >= state.max_queue:
+            state.stats["rejected_queue_full"] += 1
+            raise AdmissionRejected(route_class, "queue full", self.retry_after(route_class))
+
+        waiter = asyncio.get_running_loop().create_future()
+        entry = (waiter, cost)
+        state.waiters.append(entry)
+        state.stats["queued"] += 1
+        state.stats["max_queue_depth"] = max(state.stats["max_queue_depth"], len(state.waiters))
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), self.queue_timeout_seconds)
+        except asyncio.TimeoutError:
+            if waiter.done() and not waiter.cancelled():
+                # Granted a slot just as the wait ran out: keep it.
+                return
+            waiter.cancel()
+            state.stats["rejected_timeout"] += 1
+            raise AdmissionRejected(route_class, "queue timeout", self.retry_after(route_class)) from None
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was ours; hand it on before going away.
+                self.release(route_class, cost=cost)
+            else:
+                waiter.cancel()
+            raise
+        finally:
+            try:
+                state.waiters.remove(entry)
+            except ValueError:
+                pass
+
+    def release(self, route_class: RouteClass, elapsed: Optional[float] = None, cost: int = 1) -> None:
+        state = self._classes[route_class]
+        state.in_flight -= 1
+        self.total_in_flight -= cost
+        if elapsed is not None:
+            # EWMA of service time, for Retry-After estimates.
+            state.avg_seconds = elapsed if not state.avg_seconds else 0.8 * state.avg_seconds + 0.2 * elapsed
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        """Hand free slots to queued requests, highest-priority class first."""
+        for route_class in PRIORITY:
+            state = self._classes[route_class]
+            while state.waiters and self._has_slot(route_class, state.waiters[0][1]):
+                waiter, cost = state.waiters.popleft()
+                if waiter.done():
+                    continue
+                self._take(route_class, cost)
+                waiter.set_result(True)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "total_in_flight": self.total_in_flight,
+            "total_limit": self.total_limit,
+            "write_reserve": self.write_reserve,
+            "classes": {
+                route_class.value: {
+                    "in_flight": state.in_flight,
+                    "limit": state.limit,
+                    "queue_depth": sum(1 for waiter, _ in state.waiters if not waiter.done()),
+                    "max_queue": state.max_queue,
+                    "avg_ms": round(state.avg_seconds * 1000, 1),
+                    **state.stats,
+                }
+                for route_class, state in self._classes.items()
+            },
+        }
+
+
+admission_controller = AdmissionController(
+    limits={
+        RouteClass.WRITE: (settings.admission_write_limit, settings.admission_write_queue),
+        RouteClass.LIGHT_READ: (settings.admission_light_limit, settings.admission_light_queue),
+        RouteClass.HEAVY_ANALYTICS: (settings.admission_heavy_limit, settings.admission_heavy_queue),
+        RouteClass.EXPORT: (settings.admission_export_limit, settings.admission_export_queue),
+    },
+    total_limit=settings.admission_total_limit,
+    write_reserve=settings.admission_write_reserve,
+    queue_timeout_seconds=settings.admission_queue_timeout_seconds,
+)
+
+
+class AdmissionMiddleware:
+    """
+    ASGI middleware applying an AdmissionController. Plain ASGI rather than
+    BaseHTTPMiddleware so a streamed export holds its slot until the last
+    chunk is sent.
+    """
+
+    def __init__(self, app: ASGIApp, controller: Optional[AdmissionController] = None):
+        self.app = app
+        self.controller = controller or admission_controller
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not settings.admission_enabled:
+            await self.app(scope, receive, send)
+            return
+
+        route_class = classify(scope["method"], scope["path"])
+        if route_class is None:
+            await self.app(scope, receive, send)
+            return
+
+        cost = connection_cost(route_class, scope["path"])
+        try:
+            await self.controller.acquire(route_class, cost)
+        except AdmissionRejected as exc:
+            logger.warning("Shed %s %s: %s", scope["method"], scope["path"], exc)
+            response = JSONResponse(
+                status_code=503,
+                content={
+                    "detail": {
+                        "error": "overloaded",
+                        "message": f"Server is busy. Retry after {exc.retry_after} seconds.",
+                        "route_class": route_class.value,
+                        "retry_after": exc.retry_after,
+                    }
+                },
+                headers={"Retry-After": str(exc.retry_after)},
+            )
+            await response(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release(route_class, time.perf_counter() - started, cost)
@@ -10,27 +10,29 @@ Architecture:
   3. require_portal    — Checks JWT portal claim matches the route's portal
   4. CompanyAccess     — Verifies user can access a specific company
 
-The JWT token contains: sub, email, role, role_id, portal, companies
-This middleware reads those claims and enforces access control.
+The JWT token contains: sub, email, role, role_id, portal and the company
+claims (cbm bitmap + acl_v, or a legacy companies list). This middleware
+reads those claims and enforces access control; company claims are turned
+into the user's CompanyAccess by AclService.
 """
 import logging
 from typing import Any, List, Optional
 
 from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
-from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.config.constants import RoleID
 from src.config.settings import settings
-from src.db.models import UserCompanyMap, UserCompanyRoleMap, UserMaster
-from src.db.session import get_db  # noqa: F401 — re-exported for routers
+from src.db.models import UserMaster
+from src.db.session import get_db, get_read_db  # noqa: F401 — re-exported for routers
 from src.security.permissions import (
     Permission,
     can_approve_reports,
     can_create_reports,
     has_permission,
 )
+from src.services.acl_service import AclService, CompanyAccess
 from src.services.auth_service import AuthService
 
 logger = logging.getLogger(__name__)
@@ -38,7 +40,7 @@ logger = logging.getLogger(__name__)
 security = HTTPBearer(auto_error=False)
 
 
-# get_db is imported from src.db.session and re-exported for routers
+# get_db / get_read_db are imported from src.db.session and re-exported for routers
 
 
 # ════════════════════════════════════════════════════════════════════
@@ -74,7 +76,12 @@ async def get_current_user_optional(
             user.current_role_id = payload.get("role_id")
             user.current_role = payload.get("role")
             user.current_portal = payload.get("portal")
-            user.accessible_companies = payload.get("companies", [])
+            AclService.attach(
+                user,
+                await AclService.access_from_token(
+                    db, user.user_id, payload, AuthService.PORTAL_ROLE_MAP.get(user.current_portal)
+                ),
+            )
 
             # Map string role to RoleID if role_id is missing
             if user.current_role_id is None and user.current_role:
@@ -93,7 +100,7 @@ async def get_current_user_optional(
                 user.current_role_id = user_context.get("role_id")
                 user.current_role = user_context.get("role")
                 user.current_portal = None  # No portal claim in raw Entra tokens
-                user.accessible_companies = user_context.get("accessible_companies", [])
+                AclService.attach(user, CompanyAccess(user_context.get("accessible_companies", [])))
                 return user
 
     return None
@@ -274,30 +281,8 @@ async def verify_company_access(
     if user.current_role_id in (RoleID.SYSTEM_ADMIN, RoleID.MANAGING_DIRECTOR):
         return user
 
-    # Check cached list from JWT
-    accessible = getattr(user, "accessible_companies", []) or []
-    if company_id in accessible:
-        return user
-
-    # Fallback: check DB directly
-    res = await db.execute(
-        select(UserCompanyMap).where(
-            UserCompanyMap.user_id == user.user_id,
-            UserCompanyMap.company_id == company_id,
-            UserCompanyMap.is_active == True,
-        )
-    )
-    if res.scalar_one_or_none():
-        return user
-
-    res2 = await db.execute(
-        select(UserCompanyRoleMap).where(
-            UserCompanyRoleMap.user_id == user.user_id,
-            UserCompanyRoleMap.company_id == company_id,
-            UserCompanyRoleMap.is_active == True,
-        )
-    )
-    if res2.scalar_one_or_none():
+    # Resolved from the token (or the ACL cache) when the user was loaded
+    if company_id in await AclService.company_ids(db, user):
         return user
 
     raise HTTPException(status_code=403, detail=f"Access denied to company {company_id}")
@@ -11,13 +11,11 @@ Roles (Mapped to RoleMaster):
 from enum import Enum
 from typing import List, Set, Optional
 
-from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.db.models import (
-    UserMaster, UserCompanyMap
-)
+from src.db.models import UserMaster
 from src.config.constants import RoleID
+from src.services.acl_service import AclService
 
 # ============ PERMISSIONS ============
 
@@ -144,7 +142,8 @@ async def get_accessible_company_ids(
     user: UserMaster
 ) -> Optional[List[str]]:
     """
-    Get list of company IDs the user can access.
+    Get list of company IDs the user can access: their active
+    user_company_role_map assignments for the portal's roles.
     Returns None if user can access ALL companies (Admin/MD).
     """
     if not user:
@@ -157,18 +156,9 @@ async def get_accessible_company_ids(
     if role_id in (RoleID.SYSTEM_ADMIN, RoleID.MANAGING_DIRECTOR):
         return None  # None means "all"
 
-    accessible = set()
-
-    # Get from UserCompanyMap (direct assignment table in analytics schema)
-    stmt2 = select(UserCompanyMap.company_id).where(
-        UserCompanyMap.user_id == user.user_id,
-        UserCompanyMap.is_active == True
-    )
-    result2 = await db.execute(stmt2)
-    for row in result2.all():
-        accessible.add(row[0])
-
-    return list(accessible)
+    # Decoded from the token's company bitmap by the auth dependency; the
+    # mapping tables are only consulted when the user's ACL changed since issue.
+    return await AclService.company_ids(db, user)
 
 
 async def can_access_company(
@@ -177,10 +167,11 @@ async def can_access_company(
     company_id: str
 ) -> bool:
     """Check if user can access a specific company."""
-    accessible = await get_accessible_company_ids(db, user)
-    if accessible is None:
+    if not user:
+        return False
+    if getattr(user, "current_role_id", None) in (RoleID.SYSTEM_ADMIN, RoleID.MANAGING_DIRECTOR):
         return True
-    return company_id in accessible
+    return company_id in await AclService.access_for(db, user)
 
 
 async def filter_companies_for_user(
@@ -188,11 +179,11 @@ async def filter_companies_for_user(
     user: UserMaster,
     company_ids: List[str]
 ) -> List[str]:
-    accessible = await get_accessible_company_ids(db, user)
-    if accessible is None:
+    if not user:
+        return []
+    if getattr(user, "current_role_id", None) in (RoleID.SYSTEM_ADMIN, RoleID.MANAGING_DIRECTOR):
         return company_ids
-    allowed = set(accessible)
-    return [company_id for company_id in company_ids if company_id in allowed]
+    return (await AclService.access_for(db, user)).filter(company_ids)
 
 
 def is_admin(user: UserMaster) -> bool:
@@ -0,0 +1,56 @@
+import hashlib
+import math
+import time
+from typing import Optional
+
+from fastapi import Request
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from src.db.session import ReadContext, read_context_var
+
+# Response: time of the write this request committed. Request: the latest one the client saw.
+LAST_WRITE_HEADER = "X-Last-Write"
+
+
+def session_key(request: Request) -> Optional[str]:
+    """Stable per-login key: a digest of the bearer token (the token itself is never stored)."""
+    auth_header = request.headers.get("Authorization")
+    if not auth_header or not auth_header.startswith("Bearer "):
+        return None
+    token = auth_header[7:].strip()
+    if not token:
+        return None
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()[:32]
+
+
+def last_write_marker(request: Request) -> Optional[float]:
+    """The client's X-Last-Write, as epoch seconds no later than now; None if absent or malformed."""
+    value = request.headers.get(LAST_WRITE_HEADER)
+    if not value:
+        return None
+    try:
+        marker = float(value)
+    except ValueError:
+        return None
+    if not math.isfinite(marker):
+        return None
+    return min(marker, time.time())
+
+
+class ReadConsistencyMiddleware(BaseHTTPMiddleware):
+    """
+    Tags the request with its ReadContext so writes it commits pin its later
+    reads to the primary: in this process by session key, and on every worker
+    through the X-Last-Write marker the client echoes back.
+    """
+
+    async def dispatch(self, request: Request, call_next):
+        context = ReadContext(key=session_key(request), last_write_at=last_write_marker(request))
+        token = read_context_var.set(context)
+        try:
+            response = await call_next(request)
+        finally:
+            read_context_var.reset(token)
+        if context.wrote_at is not None:
+            response.headers[LAST_WRITE_HEADER] = f"{context.wrote_at:.3f}"
+        return response
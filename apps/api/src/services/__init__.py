@@ -9,6 +9,7 @@ from src.services.financial_service import FinancialService
 from src.services.report_service import ReportService
 from src.services.export_service import ExportService
 from src.services.admin_report_service import AdminReportService
+from src.services.bulk_extract_service import BulkExtractService
 
 __all__ = [
     "AuthService",
@@ -19,5 +20,6 @@ __all__ = [
     "ReportService",
     "ExportService",
     "AdminReportService",
+    "BulkExtractService",
 ]
 
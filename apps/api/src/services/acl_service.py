@@ -0,0 +1,371 @@
+"""
+ACL Service
+Company access for authenticated users, resolved in memory.
+
+Tokens used to carry every accessible company ID in a `companies` claim,
+which for group-wide directors meant hundreds of IDs on every request, and
+every access check still went back to the mapping tables. Instead:
+
+- analytics.company_acl_index (migration 007) gives each company a dense,
+  append-only bit position; CompanyRegistry mirrors it in memory
+- a token carries its companies as a compressed bitmap over those positions
+  (`cbm`) plus the user's ACL version when it was issued (`acl_v`)
+- analytics.acl_version is bumped by triggers whenever a user's
+  user_company_role_map rows change. Each request reads the user's row (a
+  primary-key lookup), so an admin change, revocations included, applies to
+  the next request without forcing a new login
+- a token whose acl_v is behind is resolved from the database once per
+  (user, roles, version) and served from memory afterwards
+
+A user's companies are their active user_company_role_map rows, limited to
+the roles of the portal they signed in to (grant_conditions). Login uses the
+same rule to build the token, so a fresh token and a re-resolved one agree.
+
+Without the migration, tokens fall back to the plain `companies` claim and
+access is resolved from the database on each request, as before.
+"""
+import asyncio
+import base64
+import logging
+import time
+import zlib
+from collections import OrderedDict
+from typing import Any, Dict, FrozenSet, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+from sqlalchemy import column, select, table
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.config.settings import settings
+from src.db.models import UserCompanyRoleMap
+
+logger = logging.getLogger(__name__)
+
+company_acl_index = table(
+    "company_acl_index",
+    column("company_id"),
+    column("bit_index"),
+    schema="analytics",
+)
+
+acl_version = table(
+    "acl_version",
+    column("user_id"),
+    column("version"),
+    schema="analytics",
+)
+
+BITMAP_CLAIM = "cbm"
+VERSION_CLAIM = "acl_v"
+LEGACY_CLAIM = "companies"
+
+# First character of an encoded bitmap: raw little-endian bytes or zlib-deflated.
+_RAW = "r"
+_DEFLATED = "z"
+
+# Floor between forced registry reloads, so a token naming a deleted company
+# cannot turn every request into a reload.
+_MIN_FORCED_REFRESH_SECONDS = 1.0
+
+
+# ============ BITMAP ENCODING ============
+
+def encode_bitmap(indices: Iterable[int]) -> str:
+    """Bit positions -> compact URL-safe string (deflated when that is shorter)."""
+    mask = 0
+    for index in indices:
+        mask |= 1 << index
+    raw = mask.to_bytes((mask.bit_length() + 7) // 8, "little")
+    deflated = zlib.compress(raw, 9)
+    marker, payload = (_DEFLATED, deflated) if len(deflated) < len(raw) else (_RAW, raw)
+    return marker + base64.urlsafe_b64encode(payload).rstrip(b"=").decode("ascii")
+
+
+def decode_bitmap(encoded: str) -> int:
+    """Inverse of encode_bitmap; raises ValueError on malformed input."""
+    if not encoded or encoded[0] not in (_RAW, _DEFLATED):
+        raise ValueError("Unknown bitmap encoding")
+    body = encoded[1:]
+    try:
+        payload = base64.urlsafe_b64decode(body + "=" * (-len(body) % 4))
+        if encoded[0] == _DEFLATED:
+            payload = zlib.decompress(payload)
+    except (ValueError, zlib.error) as exc:
+        raise ValueError(f"Malformed bitmap: {exc}") from exc
+    return int.from_bytes(payload, "little")
+
+
+def bit_positions(mask: int) -> List[int]:
+    positions = []
+    while mask:
+        low = mask & -mask
+        positions.append(low.bit_length() - 1)
+        mask ^= low
+    return positions
+
+
+# ============ ACCESS SETS ============
+
+class CompanyAccess:
+    """Immutable set of company IDs a user may see."""
+
+    __slots__ = ("company_ids", "_sorted")
+
+    def __init__(self, company_ids: Iterable[str]):
+        self.company_ids: FrozenSet[str] = frozenset(company_ids)
+        self._sorted: Optional[List[str]] = None
+
+    def __contains__(self, company_id: object) -> bool:
+        return company_id in self.company_ids
+
+    def __len__(self) -> int:
+        return len(self.company_ids)
+
+    def as_list(self) -> List[str]:
+        """Sorted IDs, e.g. for company_id.in_(...) filters."""
+        if self._sorted is None:
+            self._sorted = sorted(self.company_ids)
+        return list(self._sorted)
+
+    def filter(self, company_ids: Iterable[str]) -> List[str]:
+        """Keep only the accessible IDs, preserving order."""
+        return [company_id for company_id in company_ids if company_id in self.company_ids]
+
+
+# ============ COMPANY REGISTRY ============
+
+class CompanyRegistry:
+    """In-memory copy of analytics.company_acl_index."""
+
+    def __init__(self, refresh_seconds: float = 300.0):
+        self.refresh_seconds = refresh_seconds
+        self._by_bit: Dict[int, str] = {}
+        self._by_company: Dict[str, int] = {}
+        self._loaded_at = float("-inf")
+        self._lock = asyncio.Lock()
+        self.available = False
+
+    def __len__(self) -> int:
+        return len(self._by_company)
+
+    def load(self, rows: Iterable[Tuple[str, int]]) -> None:
+        by_company = {str(company_id): int(bit) for company_id, bit in rows}
+        self._by_company = by_company
+        self._by_bit = {bit: company_id for company_id, bit in by_company.items()}
+        self._loaded_at = time.monotonic()
+        self.available = True
+
+    async def refresh(self, db: AsyncSession, force: bool = False) -> None:
+        interval = _MIN_FORCED_REFRESH_SECONDS if force else self.refresh_seconds
+        if time.monotonic() - self._loaded_at < interval:
+            return
+        async with self._lock:
+            if time.monotonic() - self._loaded_at < interval:
+                return
+            statement = select(company_acl_index.c.company_id, company_acl_index.c.bit_index)
+            try:
+                async with db.begin_nested():
+                    rows = (await db.execute(statement)).all()
+            except SQLAlchemyError as exc:
+                logger.debug("Company ACL index unavailable: %s", exc)
+                self.available = False
+                self._loaded_at = time.monotonic()
+                return
+            self.load((row[0], row[1]) for row in rows)
+
+    async def ensure(self, db: AsyncSession, company_ids: Iterable[str]) -> None:
+        """Refresh if any of the IDs (e.g. a company created since the last load) has no position."""
+        await self.refresh(db)
+        if self.available and any(company_id not in self._by_company for company_id in company_ids):
+            await self.refresh(db, force=True)
+
+    def encode(self, company_ids: Iterable[str]) -> Optional[str]:
+        """Bitmap for the IDs, or None if any of them has no bit position yet."""
+        if not self.available:
+            return None
+        positions = []
+        for company_id in company_ids:
+            position = self._by_company.get(company_id)
+            if position is None:
+                return None
+            positions.append(position)
+        return encode_bitmap(positions)
+
+    def decode(self, encoded: str) -> Tuple[List[str], bool]:
+        """(company IDs, complete); complete is False if some bits are unknown here."""
+        ids = []
+        complete = True
+        for position in bit_positions(decode_bitmap(encoded)):
+            company_id = self._by_bit.get(position)
+            if company_id is None:
+                complete = False
+            else:
+                ids.append(company_id)
+        return ids, complete
+
+
+# ============ VERSIONS ============
+
+class AclVersions:
+    """Reads a user's current ACL version from analytics.acl_version."""
+
+    def __init__(self):
+        # None until the first lookup; False while the table is missing.
+        self.available: Optional[bool] = None
+
+    async def current(self, db: AsyncSession, user_id: str) -> Optional[int]:
+        """The committed version (0 if the user has none yet); None when versions are not tracked."""
+        statement = select(acl_version.c.version).where(acl_version.c.user_id == user_id)
+        if self.available:
+            return int((await db.execute(statement)).scalar_one_or_none() or 0)
+        try:
+            # Savepoint: a missing table must not abort the caller's transaction.
+            async with db.begin_nested():
+                version = (await db.execute(statement)).scalar_one_or_none()
+        except SQLAlchemyError as exc:
+            logger.debug("ACL version unavailable: %s", exc)
+            self.available = False
+            return None
+        self.available = True
+        return int(version or 0)
+
+
+company_registry = CompanyRegistry(settings.acl_registry_refresh_seconds)
+acl_versions = AclVersions()
+
+_MAX_CACHED_ACCESS = 10_000
+_access_cache: "OrderedDict[Tuple, CompanyAccess]" = OrderedDict()
+
+
+class AclService:
+    """Company access resolution for users and tokens."""
+
+    @staticmethod
+    async def version_for(db: AsyncSession, user_id: str) -> Optional[int]:
+        """User's current ACL version; None when untracked."""
+        return await acl_versions.current(db, user_id)
+
+    @staticmethod
+    def grant_conditions(user_id: str, role_ids: Optional[Sequence[int]] = None) -> list:
+        """
+        The user_company_role_map rows that grant company access: active
+        assignments, limited to role_ids (the portal's roles) when given.
+        Both token issue and re-resolution select through this.
+        """
+        conditions = [
+            UserCompanyRoleMap.user_id == user_id,
+            UserCompanyRoleMap.is_active.is_(True),
+        ]
+        if role_ids is not None:
+            conditions.append(UserCompanyRoleMap.role_id.in_(list(role_ids)))
+        return conditions
+
+    @staticmethod
+    async def grants_from_db(
+        db: AsyncSession,
+        user_id: str,
+        role_ids: Optional[Sequence[int]] = None,
+    ) -> List[str]:
+        statement = select(UserCompanyRoleMap.company_id).where(
+            *AclService.grant_conditions(user_id, role_ids)
+        ).distinct()
+        result = await db.execute(statement)
+        return sorted({str(row[0]) for row in result.all()})
+
+    @staticmethod
+    async def current_access(
+        db: AsyncSession,
+        user_id: str,
+        role_ids: Optional[Sequence[int]] = None,
+    ) -> CompanyAccess:
+        """Access from the database, cached until the user's ACL version moves."""
+        version = await acl_versions.current(db, user_id)
+        return await AclService._resolve(db, user_id, role_ids, version)
+
+    @staticmethod
+    async def _resolve(
+        db: AsyncSession,
+        user_id: str,
+        role_ids: Optional[Sequence[int]],
+        version: Optional[int],
+    ) -> CompanyAccess:
+        # The version is read before the grants, so a change committing in
+        # between moves the version past this cache entry.
+        key = None
+        if version is not None:
+            roles = tuple(sorted(role_ids)) if role_ids is not None else None
+            key = (user_id, roles, version)
+            cached = _access_cache.get(key)
+            if cached is not None:
+                _access_cache.move_to_end(key)
+                return cached
+
+        access = CompanyAccess(await AclService.grants_from_db(db, user_id, role_ids))
+        if key is not None:
+            _access_cache[key] = access
+            while len(_access_cache) > _MAX_CACHED_ACCESS:
+                _access_cache.popitem(last=False)
+        return access
+
+    @staticmethod
+    async def access_from_token(
+        db: AsyncSession,
+        user_id: str,
+        payload: Mapping[str, Any],
+        role_ids: Optional[Sequence[int]] = None,
+    ) -> CompanyAccess:
+        """
+        Decode the token's company claims, or re-resolve them if the user's
+        ACL changed since issue. role_ids must be the portal roles the token
+        was issued for.
+        """
+        version = await acl_versions.current(db, user_id)
+        encoded = payload.get(BITMAP_CLAIM)
+        token_version = payload.get(VERSION_CLAIM)
+        if encoded and version is not None and isinstance(token_version, int) and version <= token_version:
+            await company_registry.refresh(db)
+            try:
+                ids, complete = company_registry.decode(encoded)
+                if not complete:
+                    # Issued after a company was added; pick up the new positions.
+                    await company_registry.refresh(db, force=True)
+                    ids, _ = company_registry.decode(encoded)
+                return CompanyAccess(ids)
+            except ValueError:
+                logger.warning("Ignoring malformed company bitmap for user %s", user_id)
+        return await AclService._resolve(db, user_id, role_ids, version)
+
+    @staticmethod
+    def token_claims(company_ids: Sequence[str], version: Optional[int]) -> Dict[str, Any]:
+        """Company claims for a new token: bitmap + version, else the plain ID list."""
+        encoded = company_registry.encode(company_ids)
+        if encoded is None or version is None:
+            return {LEGACY_CLAIM: list(company_ids)}
+        return {BITMAP_CLAIM: encoded, VERSION_CLAIM: version}
+
+    @staticmethod
+    def attach(user: Any, access: CompanyAccess) -> None:
+        user.company_access = access
+        user.accessible_companies = access.as_list()
+
+    @staticmethod
+    async def access_for(db: AsyncSession, user: Any) -> CompanyAccess:
+        """The user's granted companies, from the request's resolved access when present."""
+        access = getattr(user, "company_access", None)
+        if access is None:
+            access = await AclService.current_access(db, user.user_id)
+            user.company_access = access
+        return access
+
+    @staticmethod
+    async def company_ids(db: AsyncSession, user: Any) -> List[str]:
+        return (await AclService.access_for(db, user)).as_list()
+
+    @staticmethod
+    def snapshot() -> Dict[str, Any]:
+        return {
+            "registry_available": company_registry.available,
+            "registry_companies": len(company_registry),
+            "versions_available": acl_versions.available,
+            "cached_access_sets": len(_access_cache),
+        }
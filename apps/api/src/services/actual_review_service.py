@@ -0,0 +1,357 @@
+"""
+Actual Review Service
+Bulk Finance Director approve / reject of submitted actuals.
+
+An FD clearing a cluster's month-end queue used to make one
+/fd/approve-actual call per company, each with its own access check, lookup,
+notification and commit. bulk_review handles the whole batch in one
+transaction:
+
+1. access is checked in memory against the caller's companies (AclService)
+2. one SELECT ... FOR UPDATE loads and locks every requested workflow with
+   its company, period and submitter
+3. one multi-row UPDATE moves the eligible rows, guarded by status_id so a
+   row transitioned concurrently is reported as a conflict, not overwritten
+4. notifications and outbox emails are written with multi-row INSERTs and
+   audit events ride along with the transaction (AuditService)
+5. approved actuals are folded into the anomaly baselines (AnomalyService)
+
+Items are independent: a forbidden, missing or already-reviewed item is
+reported in its result and does not stop the rest.
+"""
+import logging
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from enum import Enum
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import insert, select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.config.constants import StatusID
+from src.config.settings import settings
+from src.db.models import (
+    CompanyMaster,
+    FinancialWorkflow,
+    Notification,
+    NotificationType,
+    PeriodMaster,
+    UserMaster,
+)
+from src.services.anomaly_service import AnomalyService
+from src.services.audit_service import AuditService
+from src.services.email_outbox_service import EmailOutboxService
+
+logger = logging.getLogger(__name__)
+
+
+class ReviewAction(str, Enum):
+    APPROVE = "approve"
+    REJECT = "reject"
+
+
+class ReviewOutcome(str, Enum):
+    APPROVED = "approved"
+    REJECTED = "rejected"
+    FORBIDDEN = "forbidden"
+    NOT_FOUND = "not_found"
+    INVALID_STATE = "invalid_state"
+    CONFLICT = "conflict"
+
+
+@dataclass
+class ReviewResult:
+    company_id: str
+    period_id: int
+    outcome: ReviewOutcome
+    detail: Optional[str] = None
+
+    @property
+    def succeeded(self) -> bool:
+        return self.outcome in (ReviewOutcome.APPROVED, ReviewOutcome.REJECTED)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {**asdict(self), "outcome": self.outcome.value}
+
+
+@dataclass
+class _Workflow:
+    company_id: str
+    period_id: int
+    status_id: int
+    submitted_by: Optional[str]
+    company_name: Optional[str]
+    year: Optional[int]
+    month: Optional[int]
+    submitter_id: Optional[str]
+    submitter_name: Optional[str]
+
+    @property
+    def period_label(self) -> str:
+        return f"{self.month}/{self.year}" if self.year else str(self.period_id)
+
+
+def _dedupe(items: Iterable[Tuple[str, int]]) -> List[Tuple[str, int]]:
+    seen = set()
+    ordered = []
+    for company_id, period_id in items:
+        key = (company_id, int(period_id))
+        if key not in seen:
+            seen.add(key)
+            ordered.append(key)
+    return ordered
+
+
+class ActualReviewService:
+    """Bulk workflow transitions for submitted actuals."""
+
+    MAX_ITEMS = 200
+
+    @staticmethod
+    async def _load_for_update(
+        db: AsyncSession, keys: Sequence[Tuple[str, int]]
+    ) -> Dict[Tuple[str, int], _Workflow]:
+        rows = (
+            await db.execute(
+                select(
+                    FinancialWorkflow.company_id,
+                    FinancialWorkflow.period_id,
+                    FinancialWorkflow.status_id,
+                    FinancialWorkflow.submitted_by,
+                    CompanyMaster.company_name,
+                    PeriodMaster.year,
+                    PeriodMaster.month,
+                    UserMaster.user_id,
+                    UserMaster.first_name,
+                    UserMaster.last_name,
+                )
+                .join(CompanyMaster, CompanyMaster.company_id == FinancialWorkflow.company_id)
+                .outerjoin(PeriodMaster, PeriodMaster.period_id == FinancialWorkflow.period_id)
+                .outerjoin(UserMaster, UserMaster.user_email == FinancialWorkflow.submitted_by)
+                .where(tuple_(FinancialWorkflow.company_id, FinancialWorkflow.period_id).in_(keys))
+                .with_for_update(of=FinancialWorkflow)
+            )
+        ).all()
+
+        workflows: Dict[Tuple[str, int], _Workflow] = {}
+        for row in rows:
+            key = (row.company_id, int(row.period_id))
+            if key in workflows:
+                continue
+            name = " ".join(part for part in (row.first_name, row.last_name) if part) or None
+            workflows[key] = _Workflow(
+                company_id=row.company_id,
+                period_id=int(row.period_id),
+                status_id=int(row.status_id),
+                submitted_by=row.submitted_by,
+                company_name=row.company_name,
+                year=row.year,
+                month=row.month,
+                submitter_id=row.user_id,
+                submitter_name=name,
+            )
+        return workflows
+
+    @staticmethod
+    async def bulk_review(
+        db: AsyncSession,
+        reviewer: UserMaster,
+        items: Iterable[Tuple[str, int]],
+        action: ReviewAction,
+        allowed_company_ids: Iterable[str],
+        reason: Optional[str] = None,
+        comment: Optional[str] = None,
+    ) -> List[ReviewResult]:
+        """Approve or reject many submitted actuals in one transaction; one result per distinct item."""
+        keys = _dedupe(items)
+        allowed = set(allowed_company_ids)
+        results: Dict[Tuple[str, int], ReviewResult] = {}
+
+        permitted = []
+        for key in keys:
+            if key[0] in allowed:
+                permitted.append(key)
+            else:
+                results[key] = ReviewResult(*key, ReviewOutcome.FORBIDDEN, "Access denied to this company")
+
+        workflows = await ActualReviewService._load_for_update(db, permitted) if permitted else {}
+
+        eligible = []
+        for key in permitted:
+            workflow = workflows.get(key)
+            if workflow is None:
+                results[key] = ReviewResult(*key, ReviewOutcome.NOT_FOUND, "Workflow not found")
+            elif workflow.status_id != int(StatusID.SUBMITTED):
+                results[key] = ReviewResult(
+                    *key,
+                    ReviewOutcome.INVALID_STATE,
+                    f"Current status is not Submitted (status_id={workflow.status_id})",
+                )
+            else:
+                eligible.append(key)
+
+        transitioned: List[Tuple[str, int]] = []
+        if eligible:
+            now = datetime.utcnow()
+            if action is ReviewAction.APPROVE:
+                values = {
+                    "status_id": int(StatusID.APPROVED),
+                    "approved_by": reviewer.user_email,
+                    "approved_date": now,
+                }
+            else:
+                values = {
+                    "status_id": int(StatusID.REJECTED),
+                    "rejected_by": reviewer.user_email,
+                    "rejected_date": now,
+                    "reject_reason": reason,
+                }
+            returned = await db.execute(
+                update(FinancialWorkflow)
+                .where(
+                    tuple_(FinancialWorkflow.company_id, FinancialWorkflow.period_id).in_(eligible),
+                    FinancialWorkflow.status_id == int(StatusID.SUBMITTED),
+                )
+                .values(**values)
+                .returning(FinancialWorkflow.company_id, FinancialWorkflow.period_id)
+                .execution_options(synchronize_session=False)
+            )
+            updated = {(company_id, int(period_id)) for company_id, period_id in returned.all()}
+            outcome = ReviewOutcome.APPROVED if action is ReviewAction.APPROVE else ReviewOutcome.REJECTED
+            for key in eligible:
+                if key in updated:
+                    transitioned.append(key)
+                    results[key] = ReviewResult(*key, outcome)
+                else:
+                    results[key] = ReviewResult(*key, ReviewOutcome.CONFLICT, "Changed by another request")
+
+            await ActualReviewService._fan_out(
+                db, reviewer, action, [workflows[key] for key in transitioned], now, reason, comment
+            )
+            if action is ReviewAction.APPROVE:
+                await AnomalyService.record_approved(db, transitioned)
+
+        await db.commit()
+        logger.info(
+            "Bulk %s by %s: %d of %d items transitioned",
+            action.value, reviewer.user_email, len(transitioned), len(keys),
+        )
+        return [results[key] for key in keys]
+
+    @staticmethod
+    def record_audit(
+        db: AsyncSession,
+        user_id: str,
+        user_email: str,
+        action: ReviewAction,
+        company_id: str,
+        period_id: int,
+        reason: Optional[str] = None,
+        comment: Optional[str] = None,
+        bulk: bool = False,
+    ) -> None:
+        """Record the ACTUAL_APPROVED/ACTUAL_REJECTED event for one reviewed workflow.
+
+        Shared by the bulk path and the single-item FD endpoints so the audit
+        trail does not depend on which one the reviewer used.
+        """
+        approving = action is ReviewAction.APPROVE
+        details = f"{'Approved' if approving else 'Rejected'}{' in bulk' if bulk else ''} by {user_email}"
+        if approving and comment:
+            details += f". Comment: {comment}"
+        elif not approving:
+            details += f". Reason: {reason}"
+        AuditService.record(
+            db,
+            "ACTUAL_APPROVED" if approving else "ACTUAL_REJECTED",
+            user_id=user_id,
+            entity_type="financial_workflow",
+            entity_id=f"{company_id}:{period_id}",
+            details=details,
+        )
+
+    @staticmethod
+    async def _fan_out(
+        db: AsyncSession,
+        reviewer: UserMaster,
+        action: ReviewAction,
+        workflows: List[_Workflow],
+        now: datetime,
+        reason: Optional[str],
+        comment: Optional[str],
+    ) -> None:
+        """Audit events, FO notifications and outbox emails for the transitioned workflows."""
+        if not workflows:
+            return
+        approving = action is ReviewAction.APPROVE
+        reviewer_name = " ".join(
+            part for part in (reviewer.first_name, reviewer.last_name) if part
+        ) or reviewer.user_email
+
+        notifications = []
+        emails = []
+        for workflow in workflows:
+            company_name = workflow.company_name or workflow.company_id
+            entity_id = f"{workflow.company_id}:{workflow.period_id}"
+            ActualReviewService.record_audit(
+                db,
+                reviewer.user_id,
+                reviewer.user_email,
+                action,
+                workflow.company_id,
+                workflow.period_id,
+                reason=reason,
+                comment=comment,
+                bulk=True,
+            )
+
+            if not workflow.submitter_id:
+                continue
+            if approving:
+                notifications.append({
+                    "user_id": workflow.submitter_id,
+                    "type": NotificationType.REPORT_APPROVED.value,
+                    "title": "Actual Report Approved",
+                    "message": f"Your actual report for {company_name} ({workflow.period_label}) has been approved by Finance Director.",
+                    "link": "/finance-officer/dashboard",
+                    "is_read": False,
+                    "created_at": now,
+                })
+                variables = {
+                    "company_name": company_name,
+                    "period": workflow.period_label,
+                    "approved_by": reviewer_name,
+                }
+            else:
+                notifications.append({
+                    "user_id": workflow.submitter_id,
+                    "type": NotificationType.REPORT_REJECTED.value,
+                    "title": "Actual Report Rejected",
+                    "message": f"Your actual report for {company_name} ({workflow.period_label}) has been sent back for correction. Reason: {reason}",
+                    "link": "/finance-officer/rejected-reports",
+                    "is_read": False,
+                    "created_at": now,
+                })
+                variables = {
+                    "company_name": company_name,
+                    "period": workflow.period_label,
+                    "rejected_by": reviewer_name,
+                    "rejection_reason": reason,
+                    "edit_url": f"{settings.app_url}/finance-officer/rejected-reports",
+                }
+            emails.append({
+                "to_email": workflow.submitted_by,
+                "to_name": workflow.submitter_name,
+                "variables": variables,
+                "related_id": entity_id,
+            })
+
+        if notifications:
+            await db.execute(insert(Notification), notifications)
+        if emails and settings.is_email_enabled:
+            await EmailOutboxService.queue_template_emails(
+                db,
+                "report_approved" if approving else "report_rejected",
+                emails,
+                related_type="financial_workflow",
+            )
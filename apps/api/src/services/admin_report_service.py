@@ -6,6 +6,7 @@ from __future__ import annotations
 
 import logging
 from datetime import datetime
+from functools import lru_cache
 from io import BytesIO
 from pathlib import Path
 from typing import Dict, List, Tuple, Any, Optional
@@ -17,6 +18,7 @@ from reportlab.lib import colors
 from reportlab.lib.pagesizes import A4
 from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
 from reportlab.lib.units import mm
+from reportlab.pdfbase import pdfmetrics
 from reportlab.platypus import Image as PdfImage
 from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
 from sqlalchemy import and_, func, or_, select
@@ -24,7 +26,6 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.config.constants import MetricID
 from src.db.models import (
-    AuditLog,
     ClusterMaster,
     CompanyMaster,
     FinancialFact,
@@ -32,6 +33,7 @@ from src.db.models import (
     ReportExportHistory,
     UserMaster,
 )
+from src.services.audit_service import AuditService
 
 logger = logging.getLogger(__name__)
 
@@ -39,6 +41,29 @@ _ASSETS_DIR = Path(__file__).resolve().parent.parent / "assets"
 _LOGO_PNG_PATH = _ASSETS_DIR / "blue-75-years-logo.png"
 
 
+@lru_cache(maxsize=1)
+def _logo_png_bytes() -> Optional[bytes]:
+    """Logo read once per process; render workers warm this at start-up."""
+    try:
+        return _LOGO_PNG_PATH.read_bytes()
+    except OSError:
+        logger.warning("Report logo not found at %s", _LOGO_PNG_PATH)
+        return None
+
+
+@lru_cache(maxsize=1)
+def _sample_styles():
+    return getSampleStyleSheet()
+
+
+def warm_render_assets() -> None:
+    """Preload the logo, paragraph styles and base font metrics used by the renderers."""
+    _logo_png_bytes()
+    _sample_styles()
+    for font_name in ("Helvetica", "Helvetica-Bold"):
+        pdfmetrics.getFont(font_name)
+
+
 class ReportValidationError(Exception):
     """Raised when report filters are invalid."""
 
@@ -515,13 +540,14 @@ class AdminReportService:
             bottomMargin=16 * mm,
         )
 
-        styles = getSampleStyleSheet()
+        styles = _sample_styles()
         story = []
 
         # --- Logo ---
         try:
-            if _LOGO_PNG_PATH.exists():
-                logo = PdfImage(str(_LOGO_PNG_PATH), width=50 * mm, height=25 * mm)
+            logo_bytes = _logo_png_bytes()
+            if logo_bytes:
+                logo = PdfImage(BytesIO(logo_bytes), width=50 * mm, height=25 * mm)
                 story.append(logo)
                 story.append(Spacer(1, 6))
         except Exception:
@@ -639,8 +665,9 @@ class AdminReportService:
         # --- Logo ---
         logo_row_offset = 0
         try:
-            if _LOGO_PNG_PATH.exists():
-                img = XlImage(str(_LOGO_PNG_PATH))
+            logo_bytes = _logo_png_bytes()
+            if logo_bytes:
+                img = XlImage(BytesIO(logo_bytes))
                 img.width = 150
                 img.height = 75
                 sheet.add_image(img, "A1")
@@ -779,14 +806,13 @@ class AdminReportService:
         db.add(history)
 
         action = "REPORT_EXPORT_PDF" if export_format.upper() == "PDF" else "REPORT_EXPORT_EXCEL"
-        db.add(
-            AuditLog(
-                user_id=exported_by,
-                action=action,
-                entity_type="report_export",
-                entity_id=f"{preview['company_id']}:{preview['year']}-{preview['month']:02d}",
-                details=f"{export_format.upper()} export for {preview['company_name']} ({preview['period_label']})",
-            )
+        AuditService.record(
+            db,
+            action,
+            user_id=exported_by,
+            entity_type="report_export",
+            entity_id=f"{preview['company_id']}:{preview['year']}-{preview['month']:02d}",
+            details=f"{export_format.upper()} export for {preview['company_name']} ({preview['period_label']})",
         )
 
         await db.flush()
@@ -0,0 +1,364 @@
+"""
+Anomaly Service
+Scores submitted actuals against each company's approved history.
+
+analytics.metric_baseline (migration 011) keeps, per company and metric, the
+count, mean and M2 (sum of squared deviations) of its approved actuals: over
+all months (month 0) and per calendar month (the seasonal baseline, month
+1..12). The baselines are maintained incrementally:
+
+- approving an actual folds its values in (Welford for the new values, Chan's
+  merge into the stored row, as one upsert); analytics.metric_baseline_period
+  records the folded (company, period) so a repeat is a no-op
+- scoring a submission reads one or two rows per metric and computes a
+  z-score: against the seasonal baseline once it has
+  anomaly_min_seasonal_samples months, otherwise against the overall one
+  once it has anomaly_min_samples
+- backfill() rebuilds both tables from financial_fact in one set-based
+  pass across all companies (python -m src.jobs.backfill_metric_baselines);
+  run it after deploying the migration, and again if approved figures are
+  ever corrected in place
+
+Without the migration scoring returns nothing and approvals are unaffected.
+"""
+import logging
+import math
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Mapping, NamedTuple, Optional, Sequence, Tuple
+
+from sqlalchemy import Float, and_, column, delete, func, literal, select, table, text, tuple_, union_all
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.config.constants import StatusID
+from src.config.settings import settings
+from src.db.models import FinancialFact, FinancialWorkflow, PeriodMaster
+
+logger = logging.getLogger(__name__)
+
+metric_baseline = table(
+    "metric_baseline",
+    column("company_id"),
+    column("metric_id"),
+    column("month"),
+    column("n"),
+    column("mean"),
+    column("m2"),
+    schema="analytics",
+)
+
+metric_baseline_period = table(
+    "metric_baseline_period",
+    column("company_id"),
+    column("period_id"),
+    schema="analytics",
+)
+
+# metric_baseline.month for the all-months baseline
+ALL_MONTHS = 0
+
+# A baseline that has never moved is compared against 1% of its mean.
+_STD_FLOOR_RATIO = 0.01
+
+_LOCK = "SELECT {}(hashtext('analytics.metric_baseline'))"
+
+_stats: Dict[str, int] = {"folded_periods": 0, "folded_values": 0, "scored": 0, "flagged": 0}
+
+
+# ============ RUNNING MOMENTS ============
+
+class Moments(NamedTuple):
+    """Count, mean and sum of squared deviations of a sample."""
+
+    n: int
+    mean: float
+    m2: float
+
+    @property
+    def std(self) -> float:
+        """Sample standard deviation (0 below two values)."""
+        return math.sqrt(self.m2 / (self.n - 1)) if self.n > 1 else 0.0
+
+
+def accumulate(values: Iterable[float], moments: Optional[Moments] = None) -> Moments:
+    """Welford's update of `moments` with each value in turn."""
+    n, mean, m2 = moments if moments is not None else (0, 0.0, 0.0)
+    for value in values:
+        n += 1
+        delta = value - mean
+        mean += delta / n
+        m2 += delta * (value - mean)
+    return Moments(n, mean, m2)
+
+
+def merge(a: Moments, b: Moments) -> Moments:
+    """Chan et al.'s combination of two samples' moments."""
+    if a.n == 0:
+        return b
+    if b.n == 0:
+        return a
+    n = a.n + b.n
+    delta = b.mean - a.mean
+    return Moments(n, a.mean + delta * b.n / n, a.m2 + b.m2 + delta * delta * a.n * b.n / n)
+
+
+# ============ SCORING ============
+
+@dataclass
+class MetricAnomaly:
+    metric_id: int
+    value: float
+    expected: float
+    std: float
+    z: float
+    seasonal: bool
+
+
+@dataclass
+class AnomalyScore:
+    # Largest |z| over the scored metrics; None when no metric has a baseline yet
+    score: Optional[float] = None
+    scored: int = 0
+    # Metrics at or above the threshold, largest |z| first
+    anomalies: List[MetricAnomaly] = field(default_factory=list)
+
+    @property
+    def flagged(self) -> bool:
+        return bool(self.anomalies)
+
+
+def score_values(
+    month: int,
+    values: Mapping[int, Optional[float]],
+    baselines: Mapping[Tuple[int, int], Moments],
+    threshold: Optional[float] = None,
+    min_samples: Optional[int] = None,
+    min_seasonal_samples: Optional[int] = None,
+) -> AnomalyScore:
+    """Score one submission's metric values against its company's (metric_id, month) baselines."""
+    threshold = settings.anomaly_z_threshold if threshold is None else threshold
+    min_samples = settings.anomaly_min_samples if min_samples is None else min_samples
+    if min_seasonal_samples is None:
+        min_seasonal_samples = settings.anomaly_min_seasonal_samples
+
+    result = AnomalyScore()
+    for metric_id, value in values.items():
+        if value is None:
+            continue
+        baseline = baselines.get((metric_id, month))
+        seasonal = baseline is not None and baseline.n >= min_seasonal_samples
+        if not seasonal:
+            baseline = baselines.get((metric_id, ALL_MONTHS))
+            if baseline is None or baseline.n < min_samples:
+                continue
+        std = max(baseline.std, _STD_FLOOR_RATIO * abs(baseline.mean), 1e-9)
+        z = (value - baseline.mean) / std
+        result.scored += 1
+        result.score = max(result.score or 0.0, abs(z))
+        if abs(z) >= threshold:
+            result.anomalies.append(MetricAnomaly(metric_id, value, baseline.mean, std, z, seasonal))
+    result.anomalies.sort(key=lambda anomaly: -abs(anomaly.z))
+    return result
+
+
+def _actual_values():
+    """(company_id, period_id, month, metric_id, value) of non-null actuals."""
+    return (
+        select(
+            FinancialFact.company_id,
+            FinancialFact.period_id,
+            PeriodMaster.month,
+            FinancialFact.metric_id,
+            FinancialFact.amount.cast(Float).label("value"),
+        )
+        .join(PeriodMaster, PeriodMaster.period_id == FinancialFact.period_id)
+        .where(
+            func.upper(FinancialFact.actual_budget) == "ACTUAL",
+            FinancialFact.amount.isnot(None),
+        )
+    )
+
+
+class AnomalyService:
+    """Incremental metric baselines and submission scoring."""
+
+    @staticmethod
+    async def _lock(db: AsyncSession, exclusive: bool) -> None:
+        # Folds share the lock; a backfill excludes them while it rebuilds.
+        if db.get_bind().dialect.name == "postgresql":
+            await db.execute(text(_LOCK.format("pg_advisory_xact_lock" if exclusive else "pg_advisory_xact_lock_shared")))
+
+    @staticmethod
+    async def record_approved(db: AsyncSession, keys: Sequence[Tuple[str, int]]) -> int:
+        """
+        Fold newly approved (company_id, period_id) actuals into the baselines,
+        in the caller's transaction. Returns the number of periods folded.
+        """
+        if not keys:
+            return 0
+        try:
+            async with db.begin_nested():
+                await AnomalyService._lock(db, exclusive=False)
+                claimed = (await db.execute(
+                    insert(metric_baseline_period)
+                    .values([{"company_id": company_id, "period_id": int(period_id)} for company_id, period_id in keys])
+                    .on_conflict_do_nothing()
+                    .returning(metric_baseline_period.c.company_id, metric_baseline_period.c.period_id)
+                )).all()
+                if not claimed:
+                    return 0
+                values = _actual_values().where(
+                    tuple_(FinancialFact.company_id, FinancialFact.period_id).in_([tuple(key) for key in claimed])
+                )
+                grouped: Dict[Tuple[str, int, int], List[float]] = {}
+                for company_id, _, month, metric_id, value in (await db.execute(values)).all():
+                    grouped.setdefault((company_id, metric_id, month), []).append(value)
+                    grouped.setdefault((company_id, metric_id, ALL_MONTHS), []).append(value)
+                if grouped:
+                    await AnomalyService._upsert(db, {key: accumulate(vals) for key, vals in grouped.items()})
+        except SQLAlchemyError as exc:
+            # Typically: not migrated yet. The approval itself goes ahead.
+            logger.warning("Metric baselines not updated: %s", exc)
+            return 0
+        _stats["folded_periods"] += len(claimed)
+        _stats["folded_values"] += sum(len(vals) for key, vals in grouped.items() if key[2] != ALL_MONTHS)
+        return len(claimed)
+
+    @staticmethod
+    async def _upsert(db: AsyncSession, partials: Mapping[Tuple[str, int, int], Moments]) -> None:
+        stmt = insert(metric_baseline).values([
+            {"company_id": company_id, "metric_id": metric_id, "month": month, "n": m.n, "mean": m.mean, "m2": m.m2}
+            for (company_id, metric_id, month), m in partials.items()
+        ])
+        old, new = metric_baseline.c, stmt.excluded
+        n = old.n + new.n
+        delta = new.mean - old.mean
+        await db.execute(stmt.on_conflict_do_update(
+            index_elements=[old.company_id, old.metric_id, old.month],
+            set_={
+                "n": n,
+                "mean": old.mean + delta * new.n / n,
+                "m2": old.m2 + new.m2 + delta * delta * old.n * new.n / n,
+            },
+        ))
+
+    @staticmethod
+    async def baselines(
+        db: AsyncSession, company_ids: Iterable[str], months: Iterable[int]
+    ) -> Dict[str, Dict[Tuple[int, int], Moments]]:
+        """company_id -> (metric_id, month) -> Moments for the months and the all-months rows."""
+        company_ids = sorted(set(company_ids))
+        if not company_ids:
+            return {}
+        rows = (await db.execute(
+            select(
+                metric_baseline.c.company_id, metric_baseline.c.metric_id, metric_baseline.c.month,
+                metric_baseline.c.n, metric_baseline.c.mean, metric_baseline.c.m2,
+            ).where(
+                metric_baseline.c.company_id.in_(company_ids),
+                metric_baseline.c.month.in_(sorted({ALL_MONTHS, *months})),
+            )
+        )).all()
+        found: Dict[str, Dict[Tuple[int, int], Moments]] = {}
+        for company_id, metric_id, month, n, mean, m2 in rows:
+            found.setdefault(company_id, {})[(int(metric_id), int(month))] = Moments(int(n), float(mean), float(m2))
+        return found
+
+    @staticmethod
+    async def score(
+        db: AsyncSession,
+        submissions: Mapping[Tuple[str, int], Tuple[int, Mapping[int, Optional[float]]]],
+    ) -> Dict[Tuple[str, int], AnomalyScore]:
+        """
+        Score submissions keyed (company_id, period_id) -> (month, {metric_id: value})
+        with one baseline read. Empty when the baselines are unavailable.
+        """
+        if not submissions:
+            return {}
+        try:
+            async with db.begin_nested():
+                baselines = await AnomalyService.baselines(
+                    db,
+                    (company_id for company_id, _ in submissions),
+                    (month for month, _ in submissions.values()),
+                )
+        except SQLAlchemyError as exc:
+            logger.debug("Metric baselines unavailable: %s", exc)
+            return {}
+        scores = {
+            key: score_values(month, values, baselines.get(key[0], {}))
+            for key, (month, values) in submissions.items()
+        }
+        _stats["scored"] += len(scores)
+        _stats["flagged"] += sum(1 for result in scores.values() if result.flagged)
+        return scores
+
+    @staticmethod
+    async def backfill(db: AsyncSession) -> Dict[str, int]:
+        """
+        Rebuild the baselines from every approved actual, for all companies at
+        once, in the caller's transaction (commit afterwards).
+
+        Two passes in SQL: per-bucket means, then the squared deviations from
+        them, which is as stable as the incremental updates it replaces.
+        """
+        await AnomalyService._lock(db, exclusive=True)
+        await db.execute(delete(metric_baseline))
+        await db.execute(delete(metric_baseline_period))
+
+        approved = (
+            _actual_values()
+            .join(
+                FinancialWorkflow,
+                and_(
+                    FinancialWorkflow.company_id == FinancialFact.company_id,
+                    FinancialWorkflow.period_id == FinancialFact.period_id,
+                ),
+            )
+            .where(FinancialWorkflow.status_id == int(StatusID.APPROVED))
+            .cte("approved")
+        )
+        await db.execute(
+            insert(metric_baseline_period).from_select(
+                ["company_id", "period_id"],
+                select(approved.c.company_id, approved.c.period_id).distinct(),
+            )
+        )
+
+        bucketed = union_all(
+            select(approved.c.company_id, approved.c.metric_id, approved.c.month, approved.c.value),
+            select(approved.c.company_id, approved.c.metric_id, literal(ALL_MONTHS).label("month"), approved.c.value),
+        ).cte("bucketed")
+        keys = (bucketed.c.company_id, bucketed.c.metric_id, bucketed.c.month)
+        means = (
+            select(*keys, func.count().label("n"), func.avg(bucketed.c.value).label("mean"))
+            .group_by(*keys)
+            .cte("means")
+        )
+        deviation = bucketed.c.value - means.c.mean
+        await db.execute(
+            insert(metric_baseline).from_select(
+                ["company_id", "metric_id", "month", "n", "mean", "m2"],
+                select(*keys, means.c.n, means.c.mean, func.sum(deviation * deviation))
+                .join(
+                    means,
+                    and_(
+                        means.c.company_id == bucketed.c.company_id,
+                        means.c.metric_id == bucketed.c.metric_id,
+                        means.c.month == bucketed.c.month,
+                    ),
+                )
+                .group_by(*keys, means.c.n, means.c.mean),
+            )
+        )
+        result = {
+            "periods": (await db.execute(select(func.count()).select_from(metric_baseline_period))).scalar(),
+            "baselines": (await db.execute(select(func.count()).select_from(metric_baseline))).scalar(),
+        }
+        logger.info("Rebuilt metric baselines: %(baselines)d baselines from %(periods)d approved periods", result)
+        return result
+
+    @staticmethod
+    def snapshot() -> Dict[str, int]:
+        return dict(_stats)
@@ -0,0 +1,322 @@
+"""
+Audit Service
+Buffered, batched audit-log writes plus partition-aware audit reads.
+
+Request handlers record audit events against their session. The events ride
+along with that session and are only handed to the background AuditWriter once
+the session commits (rolled-back work is never audited). The writer flushes
+them in multi-row INSERTs on its own connection, so audit writes stay off the
+request path; on shutdown it drains everything still buffered.
+
+analytics.audit_logs is range-partitioned by month on created_at (migration
+004). Reads are bounded to a recent created_at window first so Postgres prunes
+to the hot partitions, and only widen when the window does not hold enough rows.
+"""
+import asyncio
+import json
+import logging
+import uuid
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from sqlalchemy import event, func, insert, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from src.config.settings import settings
+from src.db.models import AuditLog, UserMaster
+from src.db.session import AsyncSessionLocal
+from src.security.audit_context import get_client_ip
+
+logger = logging.getLogger(__name__)
+
+# Session.info key holding events recorded in the current transaction.
+_PENDING_KEY = "pending_audit_events"
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+@dataclass
+class AuditEvent:
+    """One audit_logs row, captured at record time."""
+    action: str
+    user_id: Optional[str] = None
+    entity_type: Optional[str] = None
+    entity_id: Optional[str] = None
+    details: Optional[str] = None
+    ip_address: Optional[str] = None
+    id: str = field(default_factory=lambda: str(uuid.uuid4()))
+    created_at: datetime = field(default_factory=_utcnow)
+
+    def as_row(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class AuditWriter:
+    """
+    In-process audit buffer flushed by a single background task.
+
+    A flush is triggered when batch_size events are waiting or flush_interval
+    elapses, whichever comes first. Failed batches are put back at the head of
+    the buffer and retried; stop() keeps flushing until the buffer is empty or
+    the retry budget is spent, in which case the remaining events are written
+    to the error log so they can be replayed.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = 200,
+        flush_interval: float = 1.0,
+        max_retries: int = 5,
+        session_factory=AsyncSessionLocal,
+    ):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.session_factory = session_factory
+        self._buffer: Deque[AuditEvent] = deque()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self._partition_month: Optional[date] = None
+        self.stats: Dict[str, int] = {
+            "enqueued": 0,
+            "written": 0,
+            "batches": 0,
+            "failed_batches": 0,
+            "dropped": 0,
+        }
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done() and not self._stopping
+
+    @property
+    def pending(self) -> int:
+        return len(self._buffer)
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._stopping = False
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run(), name="audit-writer")
+        logger.info(
+            "Audit writer started (batch_size=%s, flush_interval=%ss)",
+            self.batch_size, self.flush_interval,
+        )
+
+    async def stop(self) -> None:
+        """Stop the background task and drain the buffer."""
+        if self._task is None:
+            return
+        self._stopping = True
+        self._wakeup.set()
+        try:
+            await self._task
+        finally:
+            self._task = None
+
+        retries = 0
+        while self._buffer and retries <= self.max_retries:
+            if not await self._flush_once():
+                retries += 1
+                await asyncio.sleep(min(0.1 * 2 ** retries, 2.0))
+        if self._buffer:
+            self._dump_unwritten()
+        logger.info("Audit writer stopped (written=%s)", self.stats["written"])
+
+    def enqueue(self, events: List[AuditEvent]) -> None:
+        if not events:
+            return
+        self._buffer.extend(events)
+        self.stats["enqueued"] += len(events)
+        if self._wakeup is not None and len(self._buffer) >= self.batch_size:
+            self._wakeup.set()
+
+    async def flush(self) -> None:
+        """Write everything currently buffered (used by tests and shutdown paths)."""
+        while self._buffer:
+            if not await self._flush_once():
+                break
+
+    async def _run(self) -> None:
+        failures = 0
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            if self._stopping:
+                break
+            while self._buffer and not self._stopping:
+                if await self._flush_once():
+                    failures = 0
+                    continue
+                failures += 1
+                await asyncio.sleep(min(self.flush_interval * 2 ** failures, 30.0))
+                break
+
+    async def _flush_once(self) -> bool:
+        batch = [self._buffer.popleft() for _ in range(min(self.batch_size, len(self._buffer)))]
+        if not batch:
+            return True
+        try:
+            async with self.session_factory() as db:
+                await self._ensure_partitions(db)
+                await db.execute(insert(AuditLog.__table__), [e.as_row() for e in batch])
+                await db.commit()
+        except Exception as exc:
+            self._buffer.extendleft(reversed(batch))
+            self.stats["failed_batches"] += 1
+            logger.warning("Audit flush of %s events failed: %s", len(batch), exc)
+            return False
+        self.stats["written"] += len(batch)
+        self.stats["batches"] += 1
+        return True
+
+    async def _ensure_partitions(self, db: AsyncSession) -> None:
+        """Create this and next month's partitions once per calendar month."""
+        month = _utcnow().date().replace(day=1)
+        if self._partition_month == month:
+            return
+        try:
+            async with db.begin_nested():
+                await db.execute(
+                    text("SELECT analytics.ensure_audit_log_partitions(:month, 2)"),
+                    {"month": month},
+                )
+        except Exception as exc:
+            # Not migrated yet (or not Postgres); rows land in the default partition.
+            logger.debug("Audit partition maintenance skipped: %s", exc)
+        self._partition_month = month
+
+    def _dump_unwritten(self) -> None:
+        self.stats["dropped"] += len(self._buffer)
+        while self._buffer:
+            event_row = self._buffer.popleft().as_row()
+            event_row["created_at"] = event_row["created_at"].isoformat()
+            logger.error("UNWRITTEN_AUDIT_EVENT %s", json.dumps(event_row))
+
+
+audit_writer = AuditWriter(
+    batch_size=settings.audit_batch_size,
+    flush_interval=settings.audit_flush_interval_seconds,
+)
+
+
+@event.listens_for(Session, "after_commit")
+def _hand_off_committed_events(session: Session) -> None:
+    events = session.info.pop(_PENDING_KEY, None)
+    if not events:
+        return
+    audit_writer.enqueue(events)
+    if not audit_writer.running:
+        # Writer stopped between record() and commit; held until the next flush.
+        logger.warning("Audit writer not running; %s events buffered", len(events))
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back_events(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
+
+
+class AuditService:
+    """Entry point for recording and reading audit events."""
+
+    # Window used to keep reads on the hot partitions.
+    HOT_WINDOW_DAYS = 31
+
+    @staticmethod
+    def record(
+        db: AsyncSession,
+        action: str,
+        *,
+        user_id: Optional[str] = None,
+        entity_type: Optional[str] = None,
+        entity_id: Optional[str] = None,
+        details: Optional[str] = None,
+        ip_address: Optional[str] = None,
+    ) -> str:
+        """
+        Record an audit event for the current transaction and return its id.
+
+        With the buffered writer running the event is written after `db`
+        commits; otherwise (scripts, tests) it is added to the session inline.
+        """
+        audit_event = AuditEvent(
+            action=action,
+            user_id=str(user_id) if user_id is not None else None,
+            entity_type=entity_type,
+            entity_id=str(entity_id) if entity_id is not None else None,
+            details=details,
+            ip_address=ip_address if ip_address is not None else get_client_ip(),
+        )
+        if audit_writer.running:
+            db.sync_session.info.setdefault(_PENDING_KEY, []).append(audit_event)
+        else:
+            db.add(AuditLog(**audit_event.as_row()))
+        return audit_event.id
+
+    @staticmethod
+    async def _bounded_rows(db: AsyncSession, query, limit: int) -> List[Tuple[AuditLog, Optional[UserMaster]]]:
+        cutoff = _utcnow() - timedelta(days=AuditService.HOT_WINDOW_DAYS)
+        rows = (
+            await db.execute(query.where(AuditLog.created_at >= cutoff).limit(limit))
+        ).all()
+        if len(rows) < limit:
+            rows = (await db.execute(query.limit(limit))).all()
+        return rows
+
+    @staticmethod
+    async def recent(db: AsyncSession, limit: int = 10) -> List[Tuple[AuditLog, Optional[UserMaster]]]:
+        """Most recent events with their actor, newest first."""
+        query = (
+            select(AuditLog, UserMaster)
+            .outerjoin(UserMaster, UserMaster.user_id == AuditLog.user_id)
+            .order_by(AuditLog.created_at.desc())
+        )
+        return await AuditService._bounded_rows(db, query, limit)
+
+    @staticmethod
+    async def for_entity(
+        db: AsyncSession,
+        entity_type: str,
+        entity_id: str,
+        limit: int = 50,
+    ) -> List[Tuple[AuditLog, Optional[UserMaster]]]:
+        """Audit trail of a single entity, newest first."""
+        query = (
+            select(AuditLog, UserMaster)
+            .outerjoin(UserMaster, UserMaster.user_id == AuditLog.user_id)
+            .where(AuditLog.entity_type == entity_type, AuditLog.entity_id == entity_id)
+            .order_by(AuditLog.created_at.desc())
+        )
+        return await AuditService._bounded_rows(db, query, limit)
+
+    @staticmethod
+    async def estimate_total(db: AsyncSession) -> int:
+        """
+        Row count from partition statistics; avoids scanning every partition.
+        Falls back to an exact count when the table is not partitioned.
+        """
+        estimate = (
+            await db.execute(
+                text(
+                    """
+                    SELECT SUM(GREATEST(c.reltuples, 0))::bigint
+                    FROM pg_inherits i
+                    JOIN pg_class c ON c.oid = i.inhrelid
+                    WHERE i.inhparent = to_regclass('analytics.audit_logs')
+                    """
+                )
+            )
+        ).scalar()
+        if estimate:
+            return int(estimate)
+        return (await db.execute(select(func.count(AuditLog.id)))).scalar() or 0
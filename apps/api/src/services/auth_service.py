@@ -34,6 +34,8 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from src.config.constants import RoleID
 from src.config.settings import settings
 from src.db.models import RoleMaster, UserCompanyRoleMap, UserMaster
+from src.services.acl_service import AclService, company_registry
+from src.utils.executors import run_hash
 
 logger = logging.getLogger(__name__)
 
@@ -97,6 +99,11 @@ class AuthService:
     def verify_password(plain: str, hashed: str) -> bool:
         return pwd_context.verify(plain, hashed)
 
+    @staticmethod
+    async def hash_password_async(password: str) -> str:
+        """bcrypt in the hash thread pool so request handlers don't block the loop."""
+        return await run_hash(pwd_context.hash, password)
+
     # ================================================================
     #  JWT TOKEN CREATION & DECODING
     # ================================================================
@@ -110,6 +117,7 @@ class AuthService:
         portal: Optional[str] = None,
         companies: Optional[list[str]] = None,
         expires_delta: Optional[timedelta] = None,
+        acl_version: Optional[int] = None,
     ) -> str:
         """
         Create a portal-aware JWT token.
@@ -120,7 +128,10 @@ class AuthService:
           role      – human-readable role name
           role_id   – integer role ID from role_master
           portal    – which portal this session is for
-          companies – list of accessible company IDs
+          cbm       – accessible companies as a bitmap over the company ACL
+                      index, with acl_v the user's ACL version at issue
+                      (falls back to a plain `companies` list when the
+                      index or version is unavailable; see AclService)
         """
         expire_delta = expires_delta or timedelta(hours=settings.jwt_expiration_hours)
         expires_at = datetime.now(timezone.utc) + expire_delta
@@ -131,7 +142,7 @@ class AuthService:
             "role": role,
             "role_id": role_id,
             "portal": portal,
-            "companies": companies or [],
+            **AclService.token_claims(companies or [], acl_version),
             "iat": int(datetime.now(timezone.utc).timestamp()),
             "exp": int(expires_at.timestamp()),
             "type": "access",
@@ -175,6 +186,16 @@ class AuthService:
                 logger.error("Failed to fetch JWKS: %s", e)
                 return None
 
+    @classmethod
+    async def warm_jwks(cls) -> Optional[int]:
+        """Fetch the tenant's JWKS ahead of the first Entra login. Returns the key count, None if not configured."""
+        if not settings.azure_ad_tenant_id:
+            return None
+        jwks = await cls._fetch_jwks(str(settings.azure_ad_tenant_id))
+        if jwks is None:
+            raise RuntimeError("JWKS fetch failed")
+        return len(jwks.get("keys", []))
+
     @classmethod
     async def verify_entra_token(cls, token: str) -> Optional[dict[str, Any]]:
         """
@@ -290,7 +311,7 @@ class AuthService:
               AND ucrm.role_id = ANY(:allowed_role_ids)    -- if provided
 
         Returns:
-            dict(user, role, role_id, accessible_companies) or None
+            dict(user, role, role_id, accessible_companies, acl_version) or None
         """
         normalized_email = email.strip().lower()
 
@@ -306,7 +327,12 @@ class AuthService:
             logger.info("User not found or inactive: %s", normalized_email)
             return None
 
-        # Step 2: Get active role mappings
+        # Read the ACL version before the mappings, so a change racing this
+        # login leaves the token's acl_v behind and it is re-resolved.
+        acl_version = await AclService.version_for(db, user.user_id)
+
+        # Steps 2-3: Active role mappings, filtered by allowed roles (portal-specific).
+        # The same rows AclService re-resolves a stale token from.
         role_query = (
             select(
                 UserCompanyRoleMap.company_id,
@@ -314,18 +340,9 @@ class AuthService:
                 RoleMaster.role_name,
             )
             .join(RoleMaster, RoleMaster.role_id == UserCompanyRoleMap.role_id)
-            .where(
-                UserCompanyRoleMap.user_id == user.user_id,
-                UserCompanyRoleMap.is_active.is_(True),
-            )
+            .where(*AclService.grant_conditions(user.user_id, allowed_role_ids))
         )
 
-        # Step 3: Filter by allowed roles (portal-specific)
-        if allowed_role_ids is not None:
-            role_query = role_query.where(
-                UserCompanyRoleMap.role_id.in_(allowed_role_ids)
-            )
-
         role_rows_result = await db.execute(role_query)
         role_rows = role_rows_result.all()
 
@@ -335,6 +352,7 @@ class AuthService:
 
         # Step 4: Pick highest-priority role, collect companies
         accessible_companies = sorted({str(row.company_id) for row in role_rows})
+        await company_registry.ensure(db, accessible_companies)
 
         selected = min(
             role_rows,
@@ -353,6 +371,7 @@ class AuthService:
             "role": role_name,
             "role_id": role_id,
             "accessible_companies": accessible_companies,
+            "acl_version": acl_version,
         }
 
     @classmethod
@@ -0,0 +1,686 @@
+"""
+Bulk Extract Service
+Streams raw company x period x metric rows out of analytics.financial_fact.
+
+Unlike ExportService / AdminReportService, nothing here builds a full workbook
+in memory: rows are pulled from a server-side cursor in batches and encoded
+chunk by chunk, so worker memory stays flat regardless of extract size.
+openpyxl work runs in a thread, batch by batch, so a large XLSX extract does
+not stall the event loop.
+
+The columnar (Parquet / Arrow IPC) mode pivots the same cursor into one row per
+company x period x scenario with derived P&L metrics precomputed, writes a
+year-partitioned dataset and ships it as a zip. Pivoting, Arrow writes and
+zipping run in a thread, and each year's file is sent as soon as it is
+complete rather than after the whole cube.
+"""
+import asyncio
+import csv
+import io
+import json
+import logging
+import os
+import tempfile
+import zipfile
+from contextlib import aclosing
+from dataclasses import dataclass
+from datetime import datetime
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from openpyxl import Workbook
+from sqlalchemy import and_, exists, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.db.models import (
+    ClusterMaster,
+    CompanyMaster,
+    FinancialFact,
+    MetricMaster,
+    PeriodMaster,
+    Report,
+)
+from src.db.session import open_read_session
+from src.services.admin_report_service import _ROW_ORDER, AdminReportService
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - optional dependency
+    pa = None
+    pq = None
+
+logger = logging.getLogger(__name__)
+
+
+class ExtractValidationError(Exception):
+    """Raised when extract filters are invalid."""
+
+
+class ExtractUnavailableError(Exception):
+    """Raised when an extract format needs an optional dependency that is missing."""
+
+
+EXTRACT_COLUMNS: List[str] = [
+    "cluster_id",
+    "cluster_name",
+    "company_id",
+    "company_name",
+    "period_id",
+    "year",
+    "month",
+    "scenario",
+    "metric_id",
+    "metric_name",
+    "amount",
+]
+
+SUPPORTED_SCENARIOS = ("ACTUAL", "BUDGET")
+
+# Rows fetched per server-side cursor round trip.
+CURSOR_BATCH_SIZE = 2000
+# Approximate number of encoded bytes buffered before a CSV chunk is yielded.
+CSV_CHUNK_BYTES = 64 * 1024
+# Chunk size used when streaming a spooled XLSX / zip file back to the client.
+READ_CHUNK_BYTES = 256 * 1024
+# Spooled files stay in memory until they grow past this size, then go to disk.
+SPOOL_MAX_BYTES = 8 * 1024 * 1024
+# Rows per worksheet, header included (Excel's limit); longer extracts continue on another sheet.
+XLSX_MAX_SHEET_ROWS = 1_048_576
+# Pivoted cube rows buffered per Arrow record batch.
+COLUMNAR_BATCH_ROWS = 5000
+
+COLUMNAR_FORMATS = ("parquet", "arrow")
+# Cube metric columns, in P&L order; derived ones come from _compute_metric_map.
+CUBE_METRIC_COLUMNS: List[str] = [key for key, _label, _is_pct in _ROW_ORDER]
+
+
+@dataclass(frozen=True)
+class ExtractFilters:
+    """Normalized filters for a bulk extract."""
+    cluster_id: Optional[str] = None
+    company_id: Optional[str] = None
+    year_from: Optional[int] = None
+    year_to: Optional[int] = None
+    scenario: Optional[str] = None
+    # None means "all companies" (Admin/MD); otherwise the caller's ACL.
+    company_ids: Optional[Sequence[str]] = None
+    # Only company/periods whose workflow changed after this instant.
+    since: Optional[datetime] = None
+
+
+class BulkExtractService:
+    """Streaming CSV / XLSX extracts of the financial fact table."""
+
+    @staticmethod
+    def normalize_filters(
+        cluster_id: Optional[str] = None,
+        company_id: Optional[str] = None,
+        year_from: Optional[int] = None,
+        year_to: Optional[int] = None,
+        scenario: Optional[str] = None,
+        company_ids: Optional[Sequence[str]] = None,
+        since: Optional[datetime] = None,
+    ) -> ExtractFilters:
+        if year_from is not None and year_to is not None and year_from > year_to:
+            raise ExtractValidationError("year_from must be less than or equal to year_to")
+
+        normalized_scenario = None
+        if scenario:
+            normalized_scenario = scenario.strip().upper()
+            if normalized_scenario not in SUPPORTED_SCENARIOS:
+                raise ExtractValidationError(
+                    f"Invalid scenario. Use one of: {list(SUPPORTED_SCENARIOS)}"
+                )
+
+        return ExtractFilters(
+            cluster_id=cluster_id or None,
+            company_id=company_id or None,
+            year_from=year_from,
+            year_to=year_to,
+            scenario=normalized_scenario,
+            company_ids=list(company_ids) if company_ids is not None else None,
+            since=since,
+        )
+
+    @staticmethod
+    def _filter_conditions(filters: ExtractFilters, scenario_expr) -> list:
+        conditions = []
+
+        if filters.cluster_id:
+            conditions.append(CompanyMaster.cluster_id == filters.cluster_id)
+        if filters.company_id:
+            conditions.append(FinancialFact.company_id == filters.company_id)
+        if filters.company_ids is not None:
+            conditions.append(FinancialFact.company_id.in_(filters.company_ids))
+        if filters.year_from is not None:
+            conditions.append(PeriodMaster.year >= filters.year_from)
+        if filters.year_to is not None:
+            conditions.append(PeriodMaster.year <= filters.year_to)
+        if filters.scenario:
+            conditions.append(scenario_expr == filters.scenario)
+        if filters.since is not None:
+            conditions.append(
+                exists().where(
+                    Report.company_id == FinancialFact.company_id,
+                    Report.period_id == FinancialFact.period_id,
+                    Report.updated_at > filters.since,
+                )
+            )
+        return conditions
+
+    @staticmethod
+    def build_query(filters: ExtractFilters):
+        """Column-projected fact query; ordered so related rows stay adjacent."""
+        scenario_expr = func.upper(func.trim(FinancialFact.actual_budget))
+        conditions = BulkExtractService._filter_conditions(filters, scenario_expr)
+
+        query = (
+            select(
+                CompanyMaster.cluster_id,
+                ClusterMaster.cluster_name,
+                FinancialFact.company_id,
+                CompanyMaster.company_name,
+                FinancialFact.period_id,
+                PeriodMaster.year,
+                PeriodMaster.month,
+                scenario_expr.label("scenario"),
+                FinancialFact.metric_id,
+                MetricMaster.metric_name,
+                FinancialFact.amount,
+            )
+            .join(CompanyMaster, CompanyMaster.company_id == FinancialFact.company_id)
+            .join(ClusterMaster, ClusterMaster.cluster_id == CompanyMaster.cluster_id)
+            .join(PeriodMaster, PeriodMaster.period_id == FinancialFact.period_id)
+            .outerjoin(MetricMaster, MetricMaster.metric_id == FinancialFact.metric_id)
+            .order_by(
+                CompanyMaster.cluster_id,
+                FinancialFact.company_id,
+                PeriodMaster.year,
+                PeriodMaster.month,
+                scenario_expr,
+                FinancialFact.metric_id,
+            )
+        )
+        if conditions:
+            query = query.where(and_(*conditions))
+        return query
+
+    @staticmethod
+    async def iter_rows(
+        db: AsyncSession,
+        filters: ExtractFilters,
+        batch_size: int = CURSOR_BATCH_SIZE,
+    ) -> AsyncIterator[tuple]:
+        """Yield plain row tuples from a server-side cursor, batch by batch."""
+        if filters.company_ids is not None and len(filters.company_ids) == 0:
+            return
+
+        query = BulkExtractService.build_query(filters).execution_options(yield_per=batch_size)
+        result = await db.stream(query)
+        async for partition in result.partitions(batch_size):
+            for row in partition:
+                yield tuple(row)
+
+    @staticmethod
+    def _format_row(row: Sequence) -> list:
+        values = list(row)
+        amount = values[-1]
+        values[-1] = float(amount) if amount is not None else None
+        return values
+
+    @staticmethod
+    async def stream_csv(
+        filters: ExtractFilters,
+        session_factory=open_read_session,
+    ) -> AsyncIterator[bytes]:
+        """
+        Encode the extract as CSV.
+        Opens its own session because the response body outlives request dependencies.
+        """
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(EXTRACT_COLUMNS)
+
+        async with session_factory() as db:
+            async for row in BulkExtractService.iter_rows(db, filters):
+                writer.writerow(BulkExtractService._format_row(row))
+                if buffer.tell() >= CSV_CHUNK_BYTES:
+                    yield buffer.getvalue().encode("utf-8")
+                    buffer.seek(0)
+                    buffer.truncate(0)
+
+        if buffer.tell():
+            yield buffer.getvalue().encode("utf-8")
+
+    @staticmethod
+    async def stream_xlsx(
+        filters: ExtractFilters,
+        session_factory=open_read_session,
+    ) -> AsyncIterator[bytes]:
+        """
+        Encode the extract as XLSX using openpyxl's write_only mode.
+
+        write_only worksheets stream cells to a temp file as they are appended,
+        and the finished workbook is spooled to disk once it outgrows memory,
+        then read back in fixed-size chunks. Appends (one cursor batch at a
+        time) and the save run in a thread. The zip container is only complete
+        once saved, so the first byte goes out after the save.
+        """
+        writer = XlsxExtractWriter()
+        batch: List[tuple] = []
+
+        async with session_factory() as db:
+            async for row in BulkExtractService.iter_rows(db, filters):
+                batch.append(row)
+                if len(batch) >= CURSOR_BATCH_SIZE:
+                    await asyncio.to_thread(writer.append_rows, batch)
+                    batch = []
+        if batch:
+            await asyncio.to_thread(writer.append_rows, batch)
+
+        with tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES) as spool:
+            await asyncio.to_thread(writer.workbook.save, spool)
+            spool.seek(0)
+            while True:
+                chunk = await asyncio.to_thread(spool.read, READ_CHUNK_BYTES)
+                if not chunk:
+                    break
+                yield chunk
+
+    # ============ COLUMNAR (PARQUET / ARROW) ============
+
+    @staticmethod
+    def columnar_available() -> bool:
+        return pa is not None
+
+    @staticmethod
+    def cube_schema():
+        """Arrow schema of the pivoted cube (year is the partition key, not a column)."""
+        labels = pa.dictionary(pa.int32(), pa.string())
+        fields = [
+            pa.field("cluster_id", labels),
+            pa.field("cluster_name", labels),
+            pa.field("company_id", labels),
+            pa.field("company_name", labels),
+            pa.field("period_id", pa.int32()),
+            pa.field("month", pa.int8()),
+            pa.field("scenario", labels),
+        ]
+        fields.extend(pa.field(name, pa.float64()) for name in CUBE_METRIC_COLUMNS)
+        return pa.schema(fields)
+
+    @staticmethod
+    def build_cube_query(filters: ExtractFilters):
+        """Fact rows ordered year-first so each year partition is written in one pass."""
+        scenario_expr = func.upper(func.trim(FinancialFact.actual_budget))
+        conditions = BulkExtractService._filter_conditions(filters, scenario_expr)
+
+        query = (
+            select(
+                CompanyMaster.cluster_id,
+                FinancialFact.company_id,
+                FinancialFact.period_id,
+                PeriodMaster.year,
+                PeriodMaster.month,
+                scenario_expr.label("scenario"),
+                FinancialFact.metric_id,
+                FinancialFact.amount,
+            )
+            .join(CompanyMaster, CompanyMaster.company_id == FinancialFact.company_id)
+            .join(PeriodMaster, PeriodMaster.period_id == FinancialFact.period_id)
+            .order_by(
+                PeriodMaster.year,
+                FinancialFact.company_id,
+                PeriodMaster.month,
+                FinancialFact.period_id,
+                scenario_expr,
+            )
+        )
+        if conditions:
+            query = query.where(and_(*conditions))
+        return query
+
+    @staticmethod
+    def pivot_cube_rows(rows: Iterable[Sequence]) -> List[dict]:
+        """Pivot an in-memory iterable of fact rows (see CubePivot)."""
+        pivot = CubePivot()
+        records = []
+        for row in rows:
+            record = pivot.add(row)
+            if record is not None:
+                records.append(record)
+        tail = pivot.flush()
+        if tail is not None:
+            records.append(tail)
+        return records
+
+    @staticmethod
+    async def _load_dictionaries(db: AsyncSession, filters: ExtractFilters) -> "CubeDictionaries":
+        """
+        Company / cluster labels are small master data, so the full dictionaries are
+        loaded up front. Every record batch then shares one dictionary, which the
+        Arrow IPC file format requires.
+        """
+        query = (
+            select(
+                CompanyMaster.company_id,
+                CompanyMaster.company_name,
+                CompanyMaster.cluster_id,
+                ClusterMaster.cluster_name,
+            )
+            .join(ClusterMaster, ClusterMaster.cluster_id == CompanyMaster.cluster_id)
+            .order_by(CompanyMaster.company_id)
+        )
+        if filters.company_ids is not None:
+            query = query.where(CompanyMaster.company_id.in_(filters.company_ids))
+        result = await db.execute(query)
+        return CubeDictionaries(result.all())
+
+    @staticmethod
+    async def stream_columnar(
+        filters: ExtractFilters,
+        fmt: str = "parquet",
+        session_factory=open_read_session,
+    ) -> AsyncIterator[bytes]:
+        """
+        Write the cube as a hive-style dataset (year=YYYY/part-0.<ext>) and stream it
+        as a zip. Parquet is for BI tools; Arrow IPC files can be memory-mapped.
+        A _manifest.json records row counts and the generated_at watermark to pass
+        back as `since` on the next incremental pull.
+        """
+        if pa is None:
+            raise ExtractUnavailableError("pyarrow is not installed")
+        if fmt not in COLUMNAR_FORMATS:
+            raise ExtractValidationError(f"Invalid columnar format. Use one of: {list(COLUMNAR_FORMATS)}")
+
+        generated_at = datetime.utcnow()
+
+        with tempfile.TemporaryDirectory(prefix="cube_extract_") as workdir:
+            # Parquet pages are already compressed and Arrow files must stay
+            # mappable once extracted, so entries are stored uncompressed.
+            archive = CubeArchive()
+            row_counts: Dict[int, int] = {}
+            if filters.company_ids is None or len(filters.company_ids) > 0:
+                async with session_factory() as db:
+                    dictionaries = await BulkExtractService._load_dictionaries(db, filters)
+                    writer = PartitionedCubeWriter(workdir, fmt, dictionaries)
+                    pivot = CubePivot()
+                    try:
+                        query = BulkExtractService.build_cube_query(filters).execution_options(
+                            yield_per=CURSOR_BATCH_SIZE
+                        )
+                        result = await db.stream(query)
+                        async for partition in result.partitions(CURSOR_BATCH_SIZE):
+                            await asyncio.to_thread(writer.append_rows, pivot, partition)
+                            for path, name in writer.take_completed():
+                                async with aclosing(archive.add_file(path, name)) as chunks:
+                                    async for chunk in chunks:
+                                        yield chunk
+                        await asyncio.to_thread(writer.finish, pivot)
+                    finally:
+                        await asyncio.to_thread(writer.close)
+                    for path, name in writer.take_completed():
+                        async with aclosing(archive.add_file(path, name)) as chunks:
+                            async for chunk in chunks:
+                                yield chunk
+                    row_counts = writer.row_counts
+
+            manifest = {
+                "format": fmt,
+                "generated_at": generated_at.isoformat() + "Z",
+                "since": filters.since.isoformat() if filters.since else None,
+                "partitioning": "hive",
+                "partition_key": "year",
+                "metrics": CUBE_METRIC_COLUMNS,
+                "row_counts": {str(year): count for year, count in sorted(row_counts.items())},
+            }
+
+            yield archive.finish("_manifest.json", json.dumps(manifest, indent=2))
+
+
+class XlsxExtractWriter:
+    """
+    write_only workbook for the flat extract. A sheet that reaches
+    XLSX_MAX_SHEET_ROWS is continued on a new one ("Financial Extract (2)", ...)
+    with the header repeated, so the workbook always opens in Excel.
+    """
+
+    TITLE = "Financial Extract"
+
+    def __init__(self, max_rows: Optional[int] = None):
+        self.workbook = Workbook(write_only=True)
+        self.max_rows = max_rows or XLSX_MAX_SHEET_ROWS
+        self.sheet_count = 0
+        self._sheet = None
+        self._rows = 0
+        self._new_sheet()
+
+    def _new_sheet(self) -> None:
+        self.sheet_count += 1
+        title = self.TITLE if self.sheet_count == 1 else f"{self.TITLE} ({self.sheet_count})"
+        self._sheet = self.workbook.create_sheet(title=title)
+        self._sheet.append(EXTRACT_COLUMNS)
+        self._rows = 1
+
+    def append_rows(self, rows: Iterable[Sequence]) -> None:
+        for row in rows:
+            if self._rows >= self.max_rows:
+                self._new_sheet()
+            self._sheet.append(BulkExtractService._format_row(row))
+            self._rows += 1
+
+
+class CubePivot:
+    """
+    Folds long-format fact rows (cluster_id, company_id, period_id, year, month,
+    scenario, metric_id, amount) into one record per company x period x scenario.
+    Rows must arrive grouped by that key, which build_cube_query guarantees.
+    """
+
+    __slots__ = ("_key", "_head", "_sums")
+
+    def __init__(self):
+        self._key: Optional[Tuple[str, int, str]] = None
+        self._head: Optional[tuple] = None
+        self._sums: Dict[int, float] = {}
+
+    def add(self, row: Sequence) -> Optional[dict]:
+        cluster_id, company_id, period_id, year, month, scenario, metric_id, amount = row
+        key = (company_id, period_id, scenario)
+        completed = None
+        if key != self._key:
+            completed = self.flush()
+            self._key = key
+            self._head = (cluster_id, company_id, period_id, year, month, scenario)
+        if metric_id is not None:
+            self._sums[int(metric_id)] = self._sums.get(int(metric_id), 0.0) + float(amount or 0)
+        return completed
+
+    def flush(self) -> Optional[dict]:
+        if self._head is None:
+            return None
+        cluster_id, company_id, period_id, year, month, scenario = self._head
+        record = {
+            "cluster_id": cluster_id,
+            "company_id": company_id,
+            "period_id": int(period_id),
+            "year": int(year),
+            "month": int(month),
+            "scenario": scenario,
+            **AdminReportService._compute_metric_map(self._sums),
+        }
+        self._key = None
+        self._head = None
+        self._sums = {}
+        return record
+
+
+class PartitionedCubeWriter:
+    """
+    Writes year=YYYY/part-0.<ext> files from records that arrive year-ordered,
+    keeping at most COLUMNAR_BATCH_ROWS records in memory.
+    """
+
+    def __init__(self, root: str, fmt: str, dictionaries: "CubeDictionaries"):
+        self.root = root
+        self.fmt = fmt
+        self.extension = "parquet" if fmt == "parquet" else "arrow"
+        self.dictionaries = dictionaries
+        self.schema = BulkExtractService.cube_schema()
+        self.row_counts: Dict[int, int] = {}
+        self._year: Optional[int] = None
+        self._writer = None
+        self._buffer: List[dict] = []
+        self._completed: List[Tuple[str, str]] = []
+
+    def append(self, record: dict) -> None:
+        if record["year"] != self._year:
+            self._close_partition()
+            self._open_partition(record["year"])
+        self._buffer.append(record)
+        if len(self._buffer) >= COLUMNAR_BATCH_ROWS:
+            self._flush()
+
+    def append_rows(self, pivot: "CubePivot", rows: Iterable[Sequence]) -> None:
+        """Pivot a cursor batch of fact rows and append the completed records."""
+        for row in rows:
+            record = pivot.add(tuple(row))
+            if record is not None:
+                self.append(record)
+
+    def finish(self, pivot: "CubePivot") -> None:
+        tail = pivot.flush()
+        if tail is not None:
+            self.append(tail)
+        self.close()
+
+    def close(self) -> None:
+        self._close_partition()
+
+    def take_completed(self) -> List[Tuple[str, str]]:
+        """(path, archive name) of partition files closed since the last call."""
+        completed, self._completed = self._completed, []
+        return completed
+
+    def _open_partition(self, year: int) -> None:
+        partition_dir = os.path.join(self.root, f"year={year}")
+        os.makedirs(partition_dir, exist_ok=True)
+        path = os.path.join(partition_dir, f"part-0.{self.extension}")
+        if self.fmt == "parquet":
+            self._writer = pq.ParquetWriter(path, self.schema, compression="snappy")
+        else:
+            self._writer = pa.ipc.new_file(path, self.schema)
+        self._year = year
+
+    def _flush(self) -> None:
+        if self._buffer:
+            self._writer.write(self.dictionaries.to_record_batch(self._buffer, self.schema))
+            self.row_counts[self._year] = self.row_counts.get(self._year, 0) + len(self._buffer)
+            self._buffer = []
+
+    def _close_partition(self) -> None:
+        if self._writer is not None:
+            self._flush()
+            self._writer.close()
+            self._writer = None
+            name = f"year={self._year}/part-0.{self.extension}"
+            self._completed.append((os.path.join(self.root, name), name))
+
+
+class _ZipSink:
+    """Write-only, unseekable target for zipfile; bytes are taken out as they are written."""
+
+    def __init__(self):
+        self._buffer = bytearray()
+
+    def write(self, data) -> int:
+        self._buffer += data
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = bytes(self._buffer)
+        self._buffer.clear()
+        return data
+
+
+class CubeArchive:
+    """
+    Uncompressed zip streamed entry by entry. The target is unseekable, so
+    zipfile writes data descriptors after each entry instead of patching
+    headers, and at most READ_CHUNK_BYTES of an entry is held at a time.
+    """
+
+    def __init__(self):
+        self._sink = _ZipSink()
+        self._zip = zipfile.ZipFile(self._sink, "w", compression=zipfile.ZIP_STORED, allowZip64=True)
+
+    async def add_file(self, path: str, name: str) -> AsyncIterator[bytes]:
+        """Copy a finished file into the archive, yielding zip bytes as they are produced."""
+        with open(path, "rb") as source, self._zip.open(name, "w", force_zip64=True) as entry:
+            while await asyncio.to_thread(self._copy_chunk, source, entry):
+                yield self._sink.drain()
+        tail = self._sink.drain()
+        if tail:
+            yield tail
+        os.remove(path)
+
+    @staticmethod
+    def _copy_chunk(source, entry) -> int:
+        chunk = source.read(READ_CHUNK_BYTES)
+        entry.write(chunk)
+        return len(chunk)
+
+    def finish(self, name: str, text: str) -> bytes:
+        """Add a last small entry, close the archive and return the remaining bytes."""
+        self._zip.writestr(name, text)
+        self._zip.close()
+        return self._sink.drain()
+
+
+class CubeDictionaries:
+    """Fixed Arrow dictionaries for the label columns of one extract."""
+
+    SCENARIOS = list(SUPPORTED_SCENARIOS)
+
+    def __init__(self, company_rows: Sequence[Sequence]):
+        self.company_ids: List[str] = []
+        self.company_names: List[str] = []
+        self.cluster_ids: List[str] = []
+        self.cluster_names: List[str] = []
+        self._company_index: Dict[str, int] = {}
+        self._cluster_index: Dict[str, int] = {}
+        for company_id, company_name, cluster_id, cluster_name in company_rows:
+            self._company_index[company_id] = len(self.company_ids)
+            self.company_ids.append(company_id)
+            self.company_names.append(company_name or company_id)
+            if cluster_id not in self._cluster_index:
+                self._cluster_index[cluster_id] = len(self.cluster_ids)
+                self.cluster_ids.append(cluster_id)
+                self.cluster_names.append(cluster_name or cluster_id)
+
+    def _encode(self, indices: List[Optional[int]], values: List[str]):
+        return pa.DictionaryArray.from_arrays(pa.array(indices, type=pa.int32()), pa.array(values, type=pa.string()))
+
+    def to_record_batch(self, records: List[dict], schema):
+        company_idx = [self._company_index.get(r["company_id"]) for r in records]
+        cluster_idx = [self._cluster_index.get(r["cluster_id"]) for r in records]
+        scenario_idx = [
+            self.SCENARIOS.index(r["scenario"]) if r["scenario"] in self.SCENARIOS else None
+            for r in records
+        ]
+        columns = [
+            self._encode(cluster_idx, self.cluster_ids),
+            self._encode(cluster_idx, self.cluster_names),
+            self._encode(company_idx, self.company_ids),
+            self._encode(company_idx, self.company_names),
+            pa.array([r["period_id"] for r in records], type=pa.int32()),
+            pa.array([r["month"] for r in records], type=pa.int8()),
+            self._encode(scenario_idx, self.SCENARIOS),
+        ]
+        columns.extend(
+            pa.array([r[name] for r in records], type=pa.float64()) for name in CUBE_METRIC_COLUMNS
+        )
+        return pa.record_batch(columns, schema=schema)
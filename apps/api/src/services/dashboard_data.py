@@ -0,0 +1,124 @@
+"""
+Request-scoped data shared by dashboard sections.
+
+The executive dashboard sections (overview, performers, contribution, risk
+radar, trend) each used to load the same clusters, companies and
+financial_monthly_view rows for the period. A DashboardData is created once
+per request and handed to every section it computes: each distinct load runs
+once and concurrent sections awaiting the same load share it.
+
+With a session (a single-section endpoint using its request db) loads run one
+at a time on that session. Without one (the bundle endpoints) each load opens
+its own read session, at most fanout_max_concurrency at once, so sections
+computed concurrently also fetch concurrently.
+
+Entities returned are detached once their session closes; read their loaded
+columns only.
+"""
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Hashable, List, Optional, Sequence
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.config.settings import settings
+from src.db import statements
+from src.db.models import Cluster, Company, Scenario
+from src.db.read_models import MonthlyRow
+from src.db.session import open_read_session
+from src.services.period_snapshot_service import PeriodSnapshotService
+
+logger = logging.getLogger(__name__)
+
+
+class DashboardData:
+    """Memoized loads for one request; see the module docstring."""
+
+    def __init__(self, db: Optional[AsyncSession] = None, limit: Optional[int] = None):
+        self._db = db
+        self._db_lock = asyncio.Lock()
+        self._gate = asyncio.Semaphore(max(1, limit or settings.fanout_max_concurrency))
+        self._loads: Dict[Hashable, asyncio.Future] = {}
+        self.stats: Dict[str, int] = {"loads": 0, "shared": 0}
+
+    @asynccontextmanager
+    async def session(self) -> AsyncIterator[AsyncSession]:
+        """
+        A session for work the memoized loads do not cover. Do not await a
+        load while holding it: on a shared session that load waits for it.
+        """
+        if self._db is not None:
+            async with self._db_lock:
+                yield self._db
+        else:
+            async with self._gate, open_read_session() as db:
+                yield db
+
+    async def _load(self, key: Hashable, load: Callable[[AsyncSession], Awaitable[Any]]) -> Any:
+        future = self._loads.get(key)
+        if future is None:
+            async def run():
+                async with self.session() as db:
+                    return await load(db)
+            future = asyncio.ensure_future(run())
+            self._loads[key] = future
+            self.stats["loads"] += 1
+        else:
+            self.stats["shared"] += 1
+        # One section being cancelled must not cancel a load others are waiting on.
+        return await asyncio.shield(future)
+
+    # ============ MASTER DATA ============
+
+    async def all_clusters(self) -> List[Cluster]:
+        """Every cluster, active or not, by name."""
+        return await self._load("clusters", lambda db: _scalars(db, statements.ALL_CLUSTERS))
+
+    async def all_companies(self) -> List[Company]:
+        """Every company, active or not."""
+        return await self._load("companies", lambda db: _scalars(db, statements.ALL_COMPANIES))
+
+    async def clusters(self) -> List[Cluster]:
+        return [cluster for cluster in await self.all_clusters() if cluster.is_active]
+
+    async def companies(self) -> List[Company]:
+        return [company for company in await self.all_companies() if company.is_active]
+
+    async def company(self, company_id: str) -> Optional[Company]:
+        return next((c for c in await self.all_companies() if c.id == company_id), None)
+
+    async def cluster(self, cluster_id: str) -> Optional[Cluster]:
+        return next((c for c in await self.all_clusters() if c.id == cluster_id), None)
+
+    # ============ PERIOD DATA ============
+
+    async def records(
+        self,
+        year: int,
+        months: Sequence[int],
+        scenario: Scenario,
+        company_ids: Optional[Sequence[str]] = None,
+    ) -> List[MonthlyRow]:
+        """View rows for the months (closed months from snapshots), optionally for some companies."""
+        if company_ids is not None and len(company_ids) == 0:
+            return []
+        key = ("records", year, tuple(months), scenario.value, tuple(company_ids) if company_ids is not None else None)
+        return await self._load(key, lambda db: PeriodSnapshotService.load_records(
+            db, scenario, year_from=year, year_to=year, months=list(months),
+            company_ids=list(company_ids) if company_ids is not None else None,
+        ))
+
+    async def approved_company_ids(self, year: int, months: Sequence[int]) -> List[str]:
+        """Companies with an approved report in any of the months."""
+        async def load(db: AsyncSession) -> List[str]:
+            if len(months) == 1:
+                result = await db.execute(statements.APPROVED_COMPANY_IDS_MONTH, {"year": year, "month": months[0]})
+            else:
+                result = await db.execute(statements.APPROVED_COMPANY_IDS_MONTHS, {"year": year, "months": list(months)})
+            return list(set(row[0] for row in result.all()))
+        return await self._load(("approved", year, tuple(months)), load)
+
+
+async def _scalars(db: AsyncSession, statement) -> List[Any]:
+    return list((await db.execute(statement)).scalars().all())
@@ -0,0 +1,97 @@
+"""
+Data Version Service
+Cheap change tokens for analytics responses.
+
+analytics.data_version (migration 006) holds, per (company, period), the
+sequence number of the last write to its facts or workflow; triggers keep it
+current. A digest of the (company, period, version) rows an endpoint reads
+changes whenever any of its inputs change, so it can stand in for the response
+body when computing an ETag. max(version) alone would not do: versions are
+taken when a statement runs, not when it commits, so a write that commits
+late can leave the maximum (and the row count) where they were.
+
+The table is deliberately not mapped on Base: without the migration (and its
+triggers) no token is produced and responses are simply not conditional.
+"""
+import logging
+from typing import Iterable, Optional
+
+from sqlalchemy import String, and_, cast, column, func, or_, select, table, true
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.db.models import PeriodMaster
+
+logger = logging.getLogger(__name__)
+
+data_version = table(
+    "data_version",
+    column("company_id"),
+    column("period_id"),
+    column("version"),
+    schema="analytics",
+)
+
+# Row bumped by company_master / cluster_master changes.
+MASTER_COMPANY_ID = "*"
+MASTER_PERIOD_ID = 0
+
+
+class DataVersionService:
+    """Change tokens over analytics.data_version."""
+
+    @staticmethod
+    def token_query(
+        years: Optional[Iterable[int]] = None,
+        company_ids: Optional[Iterable[str]] = None,
+    ):
+        """max(version), row count and an md5 of the rows over the scope, always including master data."""
+        scoped = []
+        if years is not None:
+            scoped.append(
+                data_version.c.period_id.in_(
+                    select(PeriodMaster.period_id).where(PeriodMaster.year.in_(sorted(set(years))))
+                )
+            )
+        if company_ids is not None:
+            scoped.append(data_version.c.company_id.in_(sorted(set(company_ids))))
+
+        master = and_(
+            data_version.c.company_id == MASTER_COMPANY_ID,
+            data_version.c.period_id == MASTER_PERIOD_ID,
+        )
+        row = func.concat_ws(
+            ":", data_version.c.company_id, cast(data_version.c.period_id, String), cast(data_version.c.version, String)
+        )
+        digest = func.md5(
+            func.coalesce(
+                func.string_agg(row, aggregate_order_by(",", data_version.c.company_id, data_version.c.period_id)),
+                "",
+            )
+        )
+        return select(
+            func.coalesce(func.max(data_version.c.version), 0),
+            func.count(),
+            digest,
+        ).where(or_(master, and_(*scoped) if scoped else true()))
+
+    @staticmethod
+    async def token(
+        db: AsyncSession,
+        years: Optional[Iterable[int]] = None,
+        company_ids: Optional[Iterable[str]] = None,
+    ) -> Optional[str]:
+        """
+        Token that changes whenever data in scope changes; None when version
+        tracking is unavailable. years / company_ids of None mean "all".
+        """
+        statement = DataVersionService.token_query(years, company_ids)
+        try:
+            # Savepoint: a missing table must not abort the caller's transaction.
+            async with db.begin_nested():
+                version, rows, digest = (await db.execute(statement)).one()
+        except SQLAlchemyError as exc:
+            logger.debug("Data version unavailable: %s", exc)
+            return None
+        return f"{version}.{rows}.{digest}"
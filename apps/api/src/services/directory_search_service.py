@@ -0,0 +1,251 @@
+"""
+Directory Search Service
+Indexed search, keyset pagination and count estimates for the admin consoles.
+
+user_master.search_text and company_master.search_text are stored generated
+columns (migration 005) with pg_trgm GIN indexes, so substring matching of
+terms of 3+ characters uses the index instead of ILIKE scans over several
+columns. Lists page with opaque keyset cursors rather than OFFSET, and totals
+come from a capped exact count that falls back to the planner's row estimate
+for large result sets.
+"""
+import base64
+import json
+import logging
+import re
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import and_, false, func, literal, or_, select, union_all
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.db.models import ClusterMaster, CompanyMaster, UserMaster
+
+logger = logging.getLogger(__name__)
+
+
+class SearchValidationError(Exception):
+    """Raised when a search term or cursor is invalid."""
+
+
+MAX_TERMS = 5
+# Below this many matches the exact count is cheap enough to run.
+EXACT_COUNT_LIMIT = 2000
+
+_LIKE_ESCAPE = "/"
+_LIKE_SPECIAL = re.compile(r"([%_/])")
+
+
+def _escape_like(term: str) -> str:
+    return _LIKE_SPECIAL.sub(r"/\1", term)
+
+
+def _nullable(column) -> bool:
+    return getattr(getattr(column, "expression", column), "nullable", True) is not False
+
+
+def _key_equals(column, value):
+    return column.is_(None) if value is None else column == value
+
+
+def _key_after(column, descending: bool, value):
+    """Condition for `column` sorting after `value`, or None if nothing can."""
+    nullable = _nullable(column)
+    if value is None:
+        # NULL is the highest value: nothing follows it ascending, every value does descending.
+        return column.is_not(None) if descending else None
+    if descending:
+        return column < value
+    return or_(column > value, column.is_(None)) if nullable else column > value
+
+
+class DirectorySearchService:
+    """Search helpers shared by the admin user, company and assignment lists."""
+
+    # ============ SEARCH TERMS ============
+
+    @staticmethod
+    def normalize_terms(search: Optional[str]) -> List[str]:
+        if not search:
+            return []
+        terms = [t for t in search.strip().lower().split() if t]
+        return terms[:MAX_TERMS]
+
+    @staticmethod
+    def match_conditions(search_column, search: Optional[str]) -> list:
+        """
+        One substring condition per term, all of which must match.
+        The trigram index serves terms of 3+ characters; shorter terms still
+        match anywhere in the text, via a scan of the search_text column.
+        """
+        return [
+            search_column.like(f"%{_escape_like(term)}%", escape=_LIKE_ESCAPE)
+            for term in DirectorySearchService.normalize_terms(search)
+        ]
+
+    # ============ KEYSET CURSORS ============
+
+    @staticmethod
+    def encode_cursor(values: Sequence[Any]) -> str:
+        payload = []
+        for value in values:
+            if isinstance(value, datetime):
+                payload.append(["dt", value.isoformat()])
+            else:
+                payload.append(["v", value])
+        raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+        return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+    @staticmethod
+    def decode_cursor(cursor: str, size: int) -> List[Any]:
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+            values = [
+                datetime.fromisoformat(value) if kind == "dt" else value
+                for kind, value in payload
+            ]
+        except (ValueError, TypeError) as exc:
+            raise SearchValidationError("Invalid cursor") from exc
+        if len(values) != size:
+            raise SearchValidationError("Invalid cursor")
+        return values
+
+    @staticmethod
+    def after_condition(keys: Sequence[Tuple[Any, bool]], values: Sequence[Any]):
+        """
+        Rows strictly after `values` in the ordering given by `keys`
+        ((column, descending) pairs), i.e. the expanded row-value comparison
+        (k1 > v1) OR (k1 = v1 AND k2 > v2) OR ...
+
+        NULLs in nullable keys sort after every value, as order_by() places
+        them, and a NULL in `values` only equals a NULL key.
+        """
+        clauses = []
+        for i, (column, descending) in enumerate(keys):
+            equal_prefix = [_key_equals(keys[j][0], values[j]) for j in range(i)]
+            step = _key_after(column, descending, values[i])
+            if step is not None:
+                clauses.append(and_(*equal_prefix, step))
+        return or_(*clauses) if clauses else false()
+
+    @staticmethod
+    def order_by(keys: Sequence[Tuple[Any, bool]]) -> list:
+        """ORDER BY for `keys`, with NULLs of nullable keys sorting as the highest value."""
+        ordering = []
+        for column, descending in keys:
+            if not _nullable(column):
+                ordering.append(column.desc() if descending else column.asc())
+            elif descending:
+                ordering.append(column.desc().nulls_first())
+            else:
+                ordering.append(column.asc().nulls_last())
+        return ordering
+
+    # ============ COUNTS ============
+
+    @staticmethod
+    async def count(db: AsyncSession, statement) -> Tuple[int, bool]:
+        """
+        (total, is_estimate) for a filtered select.
+
+        Counts exactly up to EXACT_COUNT_LIMIT rows; past that, returns the
+        planner's estimate instead of walking every matching row.
+        """
+        capped = select(func.count()).select_from(
+            statement.order_by(None).limit(EXACT_COUNT_LIMIT + 1).subquery()
+        )
+        exact = (await db.execute(capped)).scalar() or 0
+        if exact <= EXACT_COUNT_LIMIT:
+            return exact, False
+
+        connection = await db.connection()
+        # Bound parameters, not literals: search terms never become SQL text.
+        compiled = statement.order_by(None).compile(
+            dialect=connection.dialect,
+            compile_kwargs={"render_postcompile": True},
+        )
+        params = (
+            tuple(compiled.params[name] for name in compiled.positiontup)
+            if compiled.positional else compiled.params
+        )
+        try:
+            # Savepoint: a failed EXPLAIN must not abort the caller's transaction.
+            async with db.begin_nested():
+                plan = (await connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}", params)).scalar()
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            estimate = int(plan[0]["Plan"]["Plan Rows"])
+        except (SQLAlchemyError, LookupError, TypeError, ValueError) as exc:
+            logger.debug("Count estimate unavailable: %s", exc)
+            return exact, True
+        return max(estimate, exact), True
+
+    # ============ TYPEAHEAD ============
+
+    @staticmethod
+    async def typeahead(
+        db: AsyncSession,
+        search: str,
+        limit: int = 10,
+        include_users: bool = True,
+        include_companies: bool = True,
+    ) -> List[Dict[str, Any]]:
+        """Best matches across users and companies, ranked by trigram similarity."""
+        term = " ".join(DirectorySearchService.normalize_terms(search))
+        if not term:
+            return []
+
+        branches = []
+        if include_users:
+            user_conditions = DirectorySearchService.match_conditions(UserMaster.search_text, term)
+            branches.append(
+                select(
+                    literal("user").label("kind"),
+                    UserMaster.user_id.label("id"),
+                    UserMaster.user_email.label("label"),
+                    func.concat_ws(" ", UserMaster.first_name, UserMaster.last_name).label("detail"),
+                    UserMaster.is_active.label("is_active"),
+                    func.similarity(UserMaster.search_text, term).label("score"),
+                )
+                .where(*user_conditions)
+                .order_by(func.similarity(UserMaster.search_text, term).desc())
+                .limit(limit)
+            )
+        if include_companies:
+            company_conditions = DirectorySearchService.match_conditions(CompanyMaster.search_text, term)
+            branches.append(
+                select(
+                    literal("company").label("kind"),
+                    CompanyMaster.company_id.label("id"),
+                    CompanyMaster.company_name.label("label"),
+                    ClusterMaster.cluster_name.label("detail"),
+                    CompanyMaster.is_active.label("is_active"),
+                    func.similarity(CompanyMaster.search_text, term).label("score"),
+                )
+                .join(ClusterMaster, ClusterMaster.cluster_id == CompanyMaster.cluster_id)
+                .where(*company_conditions)
+                .order_by(func.similarity(CompanyMaster.search_text, term).desc())
+                .limit(limit)
+            )
+        if not branches:
+            return []
+
+        combined = union_all(*[branch.subquery().select() for branch in branches]).subquery()
+        rows = (
+            await db.execute(
+                select(combined).order_by(combined.c.score.desc(), combined.c.label).limit(limit)
+            )
+        ).all()
+        return [
+            {
+                "type": row.kind,
+                "id": row.id,
+                "label": row.label,
+                "detail": row.detail or None,
+                "is_active": bool(row.is_active),
+                "score": round(float(row.score or 0), 4),
+            }
+            for row in rows
+        ]
@@ -7,16 +7,30 @@ This pattern ensures:
 2. Automatic retry logic if email sending fails
 3. Full audit trail of all emails
 4. Can be integrated with any email provider
+
+Digests: per-event workflow emails (DIGEST_TEMPLATES) are held in
+analytics.email_digest_item rather than queued one by one. release_digests()
+(run by the outbox worker before sending) takes every recipient whose oldest
+held item has waited email_digest_window_minutes and queues one email for
+them: the original email when there is only one item, otherwise a digest
+listing all of them. An FD covering 40 companies gets one month-end email
+instead of 40.
+
+Templates are parsed once at import (CompiledTemplate); rendering only joins
+the pre-split pieces.
 """
-from datetime import datetime
-from typing import Optional, List, Dict, Any
-from uuid import UUID
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from string import Formatter
+from typing import Optional, List, Dict, Any, Iterable, Tuple
+from uuid import UUID, uuid4
 import logging
 
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import delete, func, insert, select
 
-from src.db.models import EmailOutbox, EmailStatus
+from src.config.settings import settings
+from src.db.models import EmailDigestItem, EmailOutbox, EmailStatus
 
 logger = logging.getLogger(__name__)
 
@@ -299,6 +313,193 @@ McLarens Analytics
 }
 
 
+# ============ DIGESTS ============
+
+# Per-event templates held for digests; anything else is queued at once.
+DIGEST_TEMPLATES = ("report_submitted", "report_rejected", "overdue_reminder", "report_approved")
+
+# One digest section per template: heading, item line and the item's link variable.
+DIGEST_SECTIONS = {
+    "report_submitted": {
+        "heading": "Submitted for your review",
+        "line": "{company_name} ({period}) - submitted by {submitted_by}",
+        "link": "review_url",
+    },
+    "report_rejected": {
+        "heading": "Returned for revision",
+        "line": "{company_name} ({period}) - {rejected_by}: {rejection_reason}",
+        "link": "edit_url",
+    },
+    "overdue_reminder": {
+        "heading": "Overdue reports",
+        "line": "{company_name} ({period}) - {days_overdue} days overdue",
+        "link": "submit_url",
+    },
+    "report_approved": {
+        "heading": "Approved",
+        "line": "{company_name} ({period}) - approved by {approved_by}",
+        "link": None,
+    },
+}
+
+DIGEST_TEMPLATE = {
+    "subject": "[McLarens] {count} report updates",
+    "html": """
+<!DOCTYPE html>
+<html>
+<head>
+    <style>
+        body {{ font-family: Arial, sans-serif; line-height: 1.6; color: #333; }}
+        .container {{ max-width: 600px; margin: 0 auto; padding: 20px; }}
+        .header {{ background: linear-gradient(135deg, #1a365d, #2563eb); color: white; padding: 20px; border-radius: 8px 8px 0 0; }}
+        .content {{ background: #f8fafc; padding: 20px; border: 1px solid #e2e8f0; }}
+        .content h3 {{ margin: 20px 0 5px; color: #1a365d; }}
+        .footer {{ background: #1e293b; color: #94a3b8; padding: 15px; font-size: 12px; border-radius: 0 0 8px 8px; }}
+    </style>
+</head>
+<body>
+    <div class="container">
+        <div class="header">
+            <h2>📬 {count} Report Updates</h2>
+        </div>
+        <div class="content">
+            <p>Hello,</p>
+            <p>Here is what happened since your last update:</p>
+{sections}
+        </div>
+        <div class="footer">
+            <p>McLarens Analytics</p>
+            <p>This is an automated notification. Please do not reply.</p>
+        </div>
+    </div>
+</body>
+</html>
+    """,
+    "text": """
+{count} Report Updates
+
+Here is what happened since your last update:
+{sections}
+McLarens Analytics
+    """,
+}
+
+_DIGEST_HTML_SECTION = """            <h3>{heading}</h3>
+            <ul>
+{items}
+            </ul>"""
+_DIGEST_HTML_ITEM = """                <li>{line}</li>"""
+_DIGEST_HTML_LINKED_ITEM = """                <li><a href="{link}">{line}</a></li>"""
+_DIGEST_TEXT_SECTION = """
+{heading}
+{items}
+"""
+_DIGEST_TEXT_ITEM = """- {line}"""
+_DIGEST_TEXT_LINKED_ITEM = """- {line}
+  {link}"""
+
+
+# ============ COMPILED TEMPLATES ============
+
+_FORMATTER = Formatter()
+
+
+class CompiledTemplate:
+    """A str.format template parsed once; render() fills the pre-split pieces."""
+
+    __slots__ = ("source", "fields", "_pieces")
+
+    def __init__(self, source: str):
+        self.source = source
+        pieces = []
+        for literal, field, spec, conversion in _FORMATTER.parse(source):
+            if literal:
+                pieces.append((literal, None, None, None))
+            if field is not None:
+                if not field.isidentifier():
+                    raise ValueError(f"Unsupported template field {{{field}}}")
+                pieces.append((None, field, spec, conversion))
+        self._pieces = tuple(pieces)
+        self.fields = frozenset(piece[1] for piece in pieces if piece[1] is not None)
+
+    def render(self, variables: Dict[str, Any]) -> str:
+        """Same output as source.format(**variables); KeyError for a missing variable."""
+        out = []
+        for literal, field, spec, conversion in self._pieces:
+            if field is None:
+                out.append(literal)
+                continue
+            value = variables[field]
+            if conversion:
+                value = _FORMATTER.convert_field(value, conversion)
+            out.append(format(value, spec))
+        return "".join(out)
+
+
+def _compile(templates: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    return {
+        name: {
+            part: CompiledTemplate(source) if isinstance(source, str) else source
+            for part, source in template.items()
+        }
+        for name, template in templates.items()
+    }
+
+
+_COMPILED = _compile(EMAIL_TEMPLATES)
+_COMPILED_LINES = {name: CompiledTemplate(section["line"]) for name, section in DIGEST_SECTIONS.items()}
+_COMPILED_DIGEST = _compile({"digest": DIGEST_TEMPLATE})["digest"]
+_COMPILED_DIGEST_PARTS = {
+    name: CompiledTemplate(source)
+    for name, source in (
+        ("html_section", _DIGEST_HTML_SECTION),
+        ("html_item", _DIGEST_HTML_ITEM),
+        ("html_linked_item", _DIGEST_HTML_LINKED_ITEM),
+        ("text_section", _DIGEST_TEXT_SECTION),
+        ("text_item", _DIGEST_TEXT_ITEM),
+        ("text_linked_item", _DIGEST_TEXT_LINKED_ITEM),
+    )
+}
+
+
+def _digestable(template_name: str, variables: Dict[str, Any]) -> bool:
+    """Whether render_digest can list this item (it skips unknown templates)."""
+    line = _COMPILED_LINES.get(template_name)
+    return line is not None and line.fields <= variables.keys()
+
+
+def render_digest(items: Iterable[Tuple[str, Dict[str, Any]]]) -> Tuple[str, str, str]:
+    """(subject, html, text) of one digest for (template_name, variables) items, in section order."""
+    grouped: Dict[str, List[Dict[str, Any]]] = OrderedDict((name, []) for name in DIGEST_TEMPLATES)
+    count = 0
+    for template_name, variables in items:
+        grouped.setdefault(template_name, []).append(variables)
+        count += 1
+
+    parts = _COMPILED_DIGEST_PARTS
+    html_sections, text_sections = [], []
+    for template_name, entries in grouped.items():
+        section = DIGEST_SECTIONS.get(template_name)
+        if not entries or section is None:
+            continue
+        html_items, text_items = [], []
+        for variables in entries:
+            line = _COMPILED_LINES[template_name].render(variables)
+            link = variables.get(section["link"]) if section["link"] else None
+            item = {"line": line, "link": link}
+            html_items.append(parts["html_linked_item" if link else "html_item"].render(item))
+            text_items.append(parts["text_linked_item" if link else "text_item"].render(item))
+        heading = f"{section['heading']} ({len(entries)})"
+        html_sections.append(parts["html_section"].render({"heading": heading, "items": "\n".join(html_items)}))
+        text_sections.append(parts["text_section"].render({"heading": heading, "items": "\n".join(text_items)}))
+
+    variables = {"count": count, "sections": "\n".join(html_sections)}
+    subject = _COMPILED_DIGEST["subject"].render(variables)
+    html_content = _COMPILED_DIGEST["html"].render(variables)
+    text_content = _COMPILED_DIGEST["text"].render({"count": count, "sections": "".join(text_sections)})
+    return subject, html_content, text_content
+
+
 class EmailOutboxService:
     """Service for queueing emails to the database outbox"""
     
@@ -346,31 +547,221 @@ class EmailOutboxService:
         related_id: Optional[str] = None,
     ) -> Optional[EmailOutbox]:
         """
-        Queue a templated email.
+        Queue a templated email. Per-event templates are held for the
+        recipient's next digest instead (returns None then).
         """
-        template = EMAIL_TEMPLATES.get(template_name)
+        if EmailOutboxService.held_for_digest(template_name):
+            await EmailOutboxService.hold_for_digest(db, template_name, [{
+                "to_email": to_email,
+                "to_name": to_name,
+                "variables": variables,
+                "related_id": related_id,
+            }], related_type)
+            return None
+        rendered = EmailOutboxService.render_template(template_name, variables)
+        if rendered is None:
+            return None
+        subject, html_content, text_content = rendered
+        return await EmailOutboxService.queue_email(
+            db=db,
+            to_email=to_email,
+            to_name=to_name,
+            subject=subject,
+            html_content=html_content,
+            text_content=text_content,
+            related_type=related_type,
+            related_id=related_id
+        )
+    
+    @staticmethod
+    def render_template(
+        template_name: str,
+        variables: Dict[str, Any],
+    ) -> Optional[Tuple[str, str, Optional[str]]]:
+        """(subject, html, text) for a template, or None if it is unknown or a variable is missing."""
+        template = _COMPILED.get(template_name)
         if not template:
             logger.error(f"[OUTBOX] Unknown template: {template_name}")
             return None
         
         try:
-            subject = template["subject"].format(**variables)
-            html_content = template["html"].format(**variables)
-            text_content = template.get("text", "").format(**variables) if template.get("text") else None
-            
-            return await EmailOutboxService.queue_email(
-                db=db,
-                to_email=to_email,
-                to_name=to_name,
-                subject=subject,
-                html_content=html_content,
-                text_content=text_content,
-                related_type=related_type,
-                related_id=related_id
-            )
+            subject = template["subject"].render(variables)
+            html_content = template["html"].render(variables)
+            text_content = template["text"].render(variables) if template.get("text") else None
         except KeyError as e:
             logger.error(f"[OUTBOX] Missing template variable: {e} for template {template_name}")
             return None
+        return subject, html_content, text_content
+    
+    @staticmethod
+    async def queue_template_emails(
+        db: AsyncSession,
+        template_name: str,
+        messages: List[Dict[str, Any]],
+        related_type: Optional[str] = None,
+    ) -> int:
+        """
+        Queue many templated emails with one multi-row INSERT (held for
+        digests, for per-event templates).
+        Each message has to_email, to_name, variables and optionally related_id.
+        Returns the number queued.
+        """
+        if EmailOutboxService.held_for_digest(template_name):
+            return await EmailOutboxService.hold_for_digest(db, template_name, messages, related_type)
+        now = datetime.utcnow()
+        rows = []
+        for message in messages:
+            rendered = EmailOutboxService.render_template(template_name, message["variables"])
+            if rendered is None:
+                continue
+            subject, html_content, text_content = rendered
+            rows.append({
+                "id": str(uuid4()),
+                "to_email": message["to_email"],
+                "to_name": message.get("to_name"),
+                "subject": subject,
+                "body_html": html_content,
+                "body_text": text_content,
+                "status": EmailStatus.PENDING.value,
+                "attempts": 0,
+                "related_type": related_type,
+                "related_id": message.get("related_id"),
+                "created_at": now,
+            })
+        if rows:
+            await db.execute(insert(EmailOutbox), rows)
+            logger.info(f"[OUTBOX] Queued {len(rows)} '{template_name}' emails")
+        return len(rows)
+    
+    # ============ DIGESTS ============
+    
+    @staticmethod
+    def held_for_digest(template_name: str) -> bool:
+        return settings.email_digest_window_minutes > 0 and template_name in DIGEST_TEMPLATES
+    
+    @staticmethod
+    async def hold_for_digest(
+        db: AsyncSession,
+        template_name: str,
+        messages: List[Dict[str, Any]],
+        related_type: Optional[str] = None,
+    ) -> int:
+        """Hold per-event emails for their recipients' digests with one multi-row INSERT."""
+        fields = _COMPILED[template_name]["html"].fields | _COMPILED_LINES[template_name].fields
+        now = datetime.now(timezone.utc)
+        rows = []
+        for message in messages:
+            missing = fields - message["variables"].keys()
+            if missing:
+                logger.error(f"[OUTBOX] Missing template variable: {sorted(missing)} for template {template_name}")
+                continue
+            rows.append({
+                "id": str(uuid4()),
+                "to_email": message["to_email"],
+                "to_name": message.get("to_name"),
+                "template_name": template_name,
+                "variables": message["variables"],
+                "related_type": related_type,
+                "related_id": message.get("related_id"),
+                "created_at": now,
+            })
+        if rows:
+            await db.execute(insert(EmailDigestItem), rows)
+            logger.info(f"[OUTBOX] Held {len(rows)} '{template_name}' emails for digests")
+        return len(rows)
+    
+    @staticmethod
+    async def release_digests(
+        db: AsyncSession,
+        now: Optional[datetime] = None,
+        max_recipients: int = 500,
+    ) -> Dict[str, int]:
+        """
+        Queue one email per recipient whose oldest held item has waited the
+        digest window, and drop the items. Set-based: one grouped SELECT picks
+        the recipients, one DELETE ... RETURNING claims their items (a
+        concurrent worker gets none of them) and one INSERT queues the emails.
+        A lone item whose own template no longer renders goes out as a
+        one-item digest; items neither can render are put back and logged.
+        Commit afterwards.
+        """
+        now = now or datetime.now(timezone.utc)
+        cutoff = now - timedelta(minutes=settings.email_digest_window_minutes)
+        ripe = (
+            select(EmailDigestItem.to_email)
+            .group_by(EmailDigestItem.to_email)
+            .having(func.min(EmailDigestItem.created_at) <= cutoff)
+            .order_by(func.min(EmailDigestItem.created_at))
+            .limit(max_recipients)
+        )
+        claimed = (await db.execute(
+            delete(EmailDigestItem)
+            .where(EmailDigestItem.to_email.in_(ripe))
+            .returning(
+                EmailDigestItem.id,
+                EmailDigestItem.to_email,
+                EmailDigestItem.to_name,
+                EmailDigestItem.template_name,
+                EmailDigestItem.variables,
+                EmailDigestItem.related_type,
+                EmailDigestItem.related_id,
+                EmailDigestItem.created_at,
+            )
+            .execution_options(synchronize_session=False)
+        )).all()
+
+        by_recipient: Dict[str, List[Any]] = {}
+        for item in sorted(claimed, key=lambda row: row.created_at):
+            by_recipient.setdefault(item.to_email, []).append(item)
+
+        stats = {"recipients": len(by_recipient), "items": len(claimed), "digests": 0, "singles": 0, "kept": 0}
+        rows, kept = [], []
+        for to_email, items in by_recipient.items():
+            rendered = None
+            if len(items) == 1:
+                item = items[0]
+                rendered = EmailOutboxService.render_template(item.template_name, item.variables)
+                related_type, related_id = item.related_type, item.related_id
+            if rendered is not None:
+                stats["singles"] += 1
+            else:
+                unrenderable = [item for item in items if not _digestable(item.template_name, item.variables)]
+                if unrenderable:
+                    logger.error(
+                        f"[OUTBOX] Keeping {len(unrenderable)} held emails for {to_email}: "
+                        f"cannot render {sorted({item.template_name for item in unrenderable})}"
+                    )
+                    kept.extend(unrenderable)
+                    items = [item for item in items if _digestable(item.template_name, item.variables)]
+                    if not items:
+                        continue
+                rendered = render_digest((item.template_name, item.variables) for item in items)
+                related_type, related_id = "digest", str(len(items))
+                stats["digests"] += 1
+            subject, html_content, text_content = rendered
+            rows.append({
+                "id": str(uuid4()),
+                "to_email": to_email,
+                "to_name": next((item.to_name for item in items if item.to_name), None),
+                "subject": subject,
+                "body_html": html_content,
+                "body_text": text_content,
+                "status": EmailStatus.PENDING.value,
+                "attempts": 0,
+                "related_type": related_type,
+                "related_id": related_id,
+                "created_at": now,
+            })
+        if kept:
+            await db.execute(insert(EmailDigestItem), [dict(item._mapping) for item in kept])
+            stats["kept"] = len(kept)
+        if rows:
+            await db.execute(insert(EmailOutbox), rows)
+            logger.info(
+                f"[OUTBOX] Released {stats['items'] - stats['kept']} held emails as {len(rows)} "
+                f"({stats['digests']} digests) for {stats['recipients']} recipients"
+            )
+        return stats
     
     @staticmethod
     async def get_pending_emails(
@@ -6,7 +6,7 @@ Generates Excel exports from database data
 import io
 from datetime import datetime
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import Any, List, Dict, Optional
 import openpyxl
 from openpyxl.styles import Font, Alignment, Border, Side, PatternFill
 from openpyxl.utils import get_column_letter
@@ -15,6 +15,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
 from src.db.models import Cluster, Company, FinancialPnL
+from src.utils.executors import run_render
 
 
 class ExportService:
@@ -130,6 +131,12 @@ class ExportService:
         # Get data
         summary = await ExportService.get_group_financial_summary(db, year, month)
         
+        # Build the workbook in the render pool, off the event loop
+        return await run_render(ExportService.render_excel_report, summary)
+    
+    @staticmethod
+    def render_excel_report(summary: Dict[str, Any]) -> bytes:
+        """Build the Group Financial Summary workbook (CPU-bound; runs in the render pool)."""
         # Create workbook
         wb = openpyxl.Workbook()
         ws = wb.active
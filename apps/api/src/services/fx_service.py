@@ -0,0 +1,368 @@
+"""
+FX Service
+Multi-currency conversion over analytics.fx_rates.
+
+Figures are stored in LKR; each actual row also carries the exchange rate its
+finance officer entered (LKR per USD). Dashboards used to average that rate
+across rows and divide group revenue by the mean, which weights a small
+company's rate the same as the largest one's and mixes periods. Here:
+
+- FxRateTable loads fx_rates once into per-currency sorted arrays (date
+  ordinals, LKR per unit) and resolves the as-of rate for a period's last day
+  with a binary search; the table is reloaded only when its version (row
+  count, latest insert, rate checksum) changes, polled every
+  fx_refresh_seconds
+- MetricMatrix holds a set of records as columns; converting to a reporting
+  currency is one factor per row applied to every column at once (pyarrow
+  compute when installed)
+- converted totals are cached per (currency, rate version, data key), and the
+  currency-neutral matrices per data key, so toggling a dashboard between LKR
+  and USD does not reload or re-aggregate anything
+
+fx_rates.rate is LKR per unit of fx_rates.currency. USD rows in periods with
+no published rate fall back to their own entered exchange rate, as before.
+"""
+import asyncio
+import calendar
+import logging
+import time
+from bisect import bisect_right
+from collections import OrderedDict
+from datetime import date
+from typing import (
+    Any, Awaitable, Callable, Dict, Hashable, Iterable, List, Optional, Sequence, Tuple,
+)
+
+from sqlalchemy import func, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.config.settings import settings
+from src.db.models import FxRate
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:  # pragma: no cover - optional dependency
+    pa = None
+    pc = None
+
+logger = logging.getLogger(__name__)
+
+BASE_CURRENCY = "LKR"
+ENTERED_RATE_CURRENCY = "USD"  # currency of the per-row exchange_rate column
+
+# FinancialMonthly columns converted with the rest of a record.
+MONEY_FIELDS: Tuple[str, ...] = (
+    "revenue_lkr", "gp", "other_income", "personal_exp", "admin_exp", "selling_exp",
+    "finance_exp", "depreciation", "provisions", "exchange_gl", "non_ops_exp", "non_ops_income",
+)
+
+
+class FxRateMissing(ValueError):
+    """The requested reporting currency has no published rates."""
+
+
+def period_end(year: int, month: int) -> date:
+    return date(year, month, calendar.monthrange(year, month)[1])
+
+
+def normalize_currency(currency: Optional[str]) -> str:
+    return (currency or BASE_CURRENCY).strip().upper()
+
+
+def _float(value: Any) -> float:
+    return float(value) if value is not None else 0.0
+
+
+# ============ RATE TABLE ============
+
+class FxRateTable:
+    """Immutable as-of rate lookup: currency -> sorted (date ordinal, LKR per unit)."""
+
+    __slots__ = ("version", "_ordinals", "_rates")
+
+    def __init__(self, rows: Iterable[Tuple[str, date, Any]] = (), version: str = "empty"):
+        series: Dict[str, List[Tuple[int, float]]] = {}
+        for currency, on, rate in rows:
+            rate = _float(rate)
+            if rate > 0:
+                series.setdefault(normalize_currency(currency), []).append((on.toordinal(), rate))
+        self._ordinals: Dict[str, List[int]] = {}
+        self._rates: Dict[str, List[float]] = {}
+        for currency, points in series.items():
+            points.sort()
+            self._ordinals[currency] = [ordinal for ordinal, _ in points]
+            self._rates[currency] = [rate for _, rate in points]
+        self.version = version
+
+    @property
+    def currencies(self) -> List[str]:
+        return sorted(self._ordinals)
+
+    def supports(self, currency: str) -> bool:
+        currency = normalize_currency(currency)
+        return currency in (BASE_CURRENCY, ENTERED_RATE_CURRENCY) or currency in self._ordinals
+
+    def rate_as_of(self, currency: str, on: date) -> Optional[float]:
+        """LKR per unit of currency on the latest rate date <= on."""
+        currency = normalize_currency(currency)
+        if currency == BASE_CURRENCY:
+            return 1.0
+        ordinals = self._ordinals.get(currency)
+        if not ordinals:
+            return None
+        index = bisect_right(ordinals, on.toordinal()) - 1
+        return self._rates[currency][index] if index >= 0 else None
+
+    def earliest(self, currency: str) -> Optional[float]:
+        rates = self._rates.get(normalize_currency(currency))
+        return rates[0] if rates else None
+
+    def period_rates(self, currency: str, periods: Sequence[Tuple[int, int]]) -> List[Optional[float]]:
+        """As-of rate for each (year, month); one search per distinct period."""
+        resolved: Dict[Tuple[int, int], Optional[float]] = {}
+        rates = []
+        for period in periods:
+            if period not in resolved:
+                resolved[period] = self.rate_as_of(currency, period_end(*period))
+            rates.append(resolved[period])
+        return rates
+
+
+# ============ METRIC MATRIX ============
+
+class MetricMatrix:
+    """Columnar copy of a record set: periods, entered rates and money columns."""
+
+    __slots__ = ("periods", "entered_rates", "columns")
+
+    def __init__(
+        self,
+        periods: List[Tuple[int, int]],
+        entered_rates: List[Optional[float]],
+        columns: Dict[str, List[float]],
+    ):
+        self.periods = periods
+        self.entered_rates = entered_rates
+        self.columns = columns
+
+    def __len__(self) -> int:
+        return len(self.periods)
+
+    @classmethod
+    def from_records(cls, records: Iterable[Any], fields: Sequence[str] = MONEY_FIELDS) -> "MetricMatrix":
+        periods: List[Tuple[int, int]] = []
+        entered: List[Optional[float]] = []
+        columns: Dict[str, List[float]] = {field: [] for field in fields}
+        for record in records:
+            periods.append((int(record.year), int(record.month)))
+            rate = _float(getattr(record, "exchange_rate", None))
+            entered.append(rate if rate > 0 else None)
+            for field in fields:
+                columns[field].append(_float(getattr(record, field, None)))
+        return cls(periods, entered, columns)
+
+
+def scale_columns(columns: Dict[str, Sequence[float]], factors: Sequence[float]) -> Dict[str, List[float]]:
+    """Multiply every column element-wise by the same per-row factors."""
+    if pc is not None and factors:
+        factor_array = pa.array(factors, type=pa.float64())
+        return {
+            name: pc.multiply(pa.array(values, type=pa.float64()), factor_array).to_pylist()
+            for name, values in columns.items()
+        }
+    return {name: [value * factor for value, factor in zip(values, factors)] for name, values in columns.items()}
+
+
+def scaled_sums(columns: Dict[str, Sequence[float]], factors: Sequence[float]) -> Dict[str, float]:
+    """sum(column * factors) for every column, without materialising the products."""
+    if pc is not None and factors:
+        factor_array = pa.array(factors, type=pa.float64())
+        return {
+            name: pc.sum(pc.multiply(pa.array(values, type=pa.float64()), factor_array)).as_py() or 0.0
+            for name, values in columns.items()
+        }
+    return {name: float(sum(value * factor for value, factor in zip(values, factors))) for name, values in columns.items()}
+
+
+# ============ CACHES ============
+
+class _Lru:
+    __slots__ = ("maxsize", "_items")
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._items: "OrderedDict[Hashable, Any]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def get(self, key: Hashable) -> Any:
+        value = self._items.get(key)
+        if value is not None:
+            self._items.move_to_end(key)
+        return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        self._items[key] = value
+        self._items.move_to_end(key)
+        while len(self._items) > self.maxsize:
+            self._items.popitem(last=False)
+
+    def clear(self) -> None:
+        self._items.clear()
+
+
+class _RateState:
+    def __init__(self):
+        self.table = FxRateTable()
+        self.checked_at = float("-inf")
+        self.lock = asyncio.Lock()
+        self.available = False
+
+
+_state = _RateState()
+_matrices = _Lru(settings.fx_cache_size)
+_totals = _Lru(settings.fx_cache_size)
+_stats = {"totals_hits": 0, "totals_misses": 0, "matrix_hits": 0, "matrix_misses": 0, "reloads": 0}
+
+
+class FxService:
+    """As-of FX rates and cached currency conversion of metric matrices."""
+
+    @staticmethod
+    def current() -> FxRateTable:
+        """The last loaded rate table (empty until rates() has run once)."""
+        return _state.table
+
+    @staticmethod
+    async def rates(db: AsyncSession, force: bool = False) -> FxRateTable:
+        """Rate table, reloaded when fx_rates has changed since the last check."""
+        if not force and time.monotonic() - _state.checked_at < settings.fx_refresh_seconds:
+            return _state.table
+        async with _state.lock:
+            if not force and time.monotonic() - _state.checked_at < settings.fx_refresh_seconds:
+                return _state.table
+            try:
+                async with db.begin_nested():
+                    count, latest, checksum = (await db.execute(
+                        select(func.count(), func.max(FxRate.created_at), func.sum(FxRate.rate))
+                    )).one()
+                    version = f"{count}:{latest.isoformat() if latest else '-'}:{checksum or 0}"
+                    if version != _state.table.version:
+                        rows = (await db.execute(
+                            select(FxRate.currency, FxRate.date, FxRate.rate)
+                        )).all()
+                        _state.table = FxRateTable(rows, version)
+                        _stats["reloads"] += 1
+                        logger.info("Loaded %d FX rates (%s)", count, ", ".join(_state.table.currencies) or "none")
+                _state.available = True
+            except SQLAlchemyError as exc:
+                logger.warning("FX rates unavailable, using entered exchange rates: %s", exc)
+                _state.available = False
+            _state.checked_at = time.monotonic()
+        return _state.table
+
+    @staticmethod
+    def factors(table: FxRateTable, matrix: MetricMatrix, currency: str) -> List[float]:
+        """
+        Per-row multiplier from LKR into currency, at the published rate as of
+        the row's period. Without one, a USD row falls back to its entered
+        exchange_rate, then any row to the earliest published rate, and a row
+        with none of these counts at par as it always has.
+        """
+        currency = normalize_currency(currency)
+        if currency == BASE_CURRENCY:
+            return [1.0] * len(matrix)
+        if not table.supports(currency):
+            raise FxRateMissing(f"No exchange rates are published for {currency}")
+        earliest = table.earliest(currency)
+        usd = currency == ENTERED_RATE_CURRENCY
+        factors = []
+        for rate, entered in zip(table.period_rates(currency, matrix.periods), matrix.entered_rates):
+            rate = rate or (entered if usd else None) or earliest or 1.0
+            factors.append(1.0 / rate)
+        return factors
+
+    @staticmethod
+    def convert(table: FxRateTable, matrix: MetricMatrix, currency: str) -> Dict[str, List[float]]:
+        """Every money column of the matrix, converted to currency row by row."""
+        return scale_columns(matrix.columns, FxService.factors(table, matrix, currency))
+
+    @staticmethod
+    def totals(table: FxRateTable, matrix: MetricMatrix, currency: str) -> Dict[str, float]:
+        """
+        Column sums in currency, plus `rows` and `fx_rate`: the effective LKR
+        per USD (per unit of currency, for other currencies) over the set,
+        i.e. revenue-weighted; 1.0 when there is no revenue.
+        """
+        currency = normalize_currency(currency)
+        revenue = matrix.columns.get("revenue_lkr", ())
+        lkr_revenue = float(sum(revenue))
+        if currency == BASE_CURRENCY:
+            totals = {name: float(sum(values)) for name, values in matrix.columns.items()}
+            usd_factors = FxService.factors(table, matrix, ENTERED_RATE_CURRENCY)
+            usd_revenue = scaled_sums({"revenue_lkr": revenue}, usd_factors)["revenue_lkr"]
+            totals["fx_rate"] = FxService.effective_rate(lkr_revenue, usd_revenue)
+        else:
+            totals = scaled_sums(matrix.columns, FxService.factors(table, matrix, currency))
+            totals["fx_rate"] = FxService.effective_rate(lkr_revenue, totals.get("revenue_lkr", 0.0))
+        totals["rows"] = len(matrix)
+        return totals
+
+    @staticmethod
+    def effective_rate(base_amount: float, converted_amount: float) -> float:
+        return base_amount / converted_amount if converted_amount else 1.0
+
+    @staticmethod
+    async def cached_totals(
+        db: AsyncSession,
+        currency: str,
+        data_key: Optional[Hashable],
+        load: Callable[[], Awaitable[MetricMatrix]],
+    ) -> Dict[str, float]:
+        """
+        totals() for the matrix load() would return. data_key must change
+        whenever the underlying rows do (e.g. include a data-version token);
+        None disables caching.
+        """
+        table = await FxService.rates(db)
+        currency = normalize_currency(currency)
+        if data_key is None:
+            return FxService.totals(table, await load(), currency)
+
+        key = (currency, table.version, data_key)
+        cached = _totals.get(key)
+        if cached is not None:
+            _stats["totals_hits"] += 1
+            return dict(cached)
+        _stats["totals_misses"] += 1
+
+        matrix = _matrices.get(data_key)
+        if matrix is None:
+            _stats["matrix_misses"] += 1
+            matrix = await load()
+            _matrices.put(data_key, matrix)
+        else:
+            _stats["matrix_hits"] += 1
+        totals = FxService.totals(table, matrix, currency)
+        _totals.put(key, totals)
+        return dict(totals)
+
+    @staticmethod
+    def clear_cache() -> None:
+        _matrices.clear()
+        _totals.clear()
+
+    @staticmethod
+    def snapshot() -> Dict[str, Any]:
+        return {
+            "available": _state.available,
+            "rate_version": _state.table.version,
+            "currencies": _state.table.currencies,
+            "vectorized": pc is not None,
+            "cached_matrices": len(_matrices),
+            "cached_totals": len(_totals),
+            **_stats,
+        }
@@ -0,0 +1,384 @@
+"""
+Live dashboard updates.
+
+Migration 010 makes every committed write to financial_fact or
+financial_workflow NOTIFY the analytics_changes channel with the
+(company, period, status) rows it touched. Each API worker runs one
+ChangeListener: a dedicated asyncpg connection LISTENing on the channel,
+resolving period IDs to (year, month) and handing each change to the
+worker's LiveHub. The hub forwards it to the WebSocket clients (/ws/live)
+whose subscription covers the period and whose company access covers the
+company, so a dashboard refetches the affected section only when something
+it shows has changed.
+
+Delivery is best-effort and at most once:
+
+- each client has a bounded queue drained by its own sender; a client that
+  falls behind has its queue replaced by a single "resync" message rather
+  than slowing the fan-out for everyone else
+- after the listener reconnects (changes may have been missed meanwhile)
+  every client is told to resync
+- without migration 010, or on a non-PostgreSQL database, nothing is sent
+  and dashboards behave as before
+"""
+import asyncio
+import json
+import logging
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.engine import make_url
+
+from src.config.settings import settings
+from src.db.models import PeriodMaster, ReportStatus
+from src.db.session import AsyncSessionLocal
+from src.services.acl_service import CompanyAccess
+
+try:
+    import asyncpg
+except ImportError:  # pragma: no cover - asyncpg ships with the API image
+    asyncpg = None
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "analytics_changes"
+
+# financial_workflow.status_id values (see Report.status)
+_STATUS_NAMES = {
+    1: ReportStatus.DRAFT.value,
+    2: ReportStatus.SUBMITTED.value,
+    3: ReportStatus.APPROVED.value,
+    4: ReportStatus.REJECTED.value,
+}
+
+_KINDS = {"financial_fact": "facts", "financial_workflow": "workflow"}
+
+# (company_id, year, month, status name or None)
+ChangedRow = Tuple[str, int, int, Optional[str]]
+
+
+# ============ CHANGES & SUBSCRIPTIONS ============
+
+class DataChange:
+    """One NOTIFY payload with periods resolved to (year, month)."""
+
+    __slots__ = ("kind", "op", "rows", "periods", "received_at")
+
+    def __init__(
+        self,
+        kind: str,
+        op: str,
+        rows: Optional[List[ChangedRow]],
+        periods: List[Tuple[int, int]],
+        received_at: Optional[float] = None,
+    ):
+        self.kind = kind
+        self.op = op
+        # None when the statement touched too many companies to list them
+        self.rows = rows
+        self.periods = periods
+        self.received_at = received_at if received_at is not None else time.monotonic()
+
+    @classmethod
+    def from_payload(cls, payload: str, period_of: Callable[[int], Optional[Tuple[int, int]]]) -> "DataChange":
+        data = json.loads(payload)
+        rows = None
+        if data.get("rows") is not None:
+            rows = []
+            for company_id, period_id, status_id in data["rows"]:
+                period = period_of(period_id)
+                if period is not None:
+                    rows.append((company_id, period[0], period[1], _STATUS_NAMES.get(status_id)))
+        periods = sorted({p for p in (period_of(pid) for pid in data.get("periods") or []) if p is not None})
+        return cls(_KINDS.get(data.get("t"), data.get("t")), data.get("op"), rows, periods)
+
+
+class Subscription:
+    """Periods and companies one client wants to hear about, within its access."""
+
+    def __init__(
+        self,
+        periods: Iterable[Tuple[int, Optional[int]]] = (),
+        company_ids: Optional[Iterable[str]] = None,
+        access: Optional[CompanyAccess] = None,
+    ):
+        periods = list(periods)
+        # No periods = every period
+        self.years: Set[int] = {year for year, month in periods if month is None}
+        self.months: Set[Tuple[int, int]] = {(year, month) for year, month in periods if month is not None}
+        self.company_ids = frozenset(company_ids) if company_ids else None
+        # None = every company (analytics viewers)
+        self.access = access
+
+    @classmethod
+    def from_message(cls, message: Dict[str, Any], access: Optional[CompanyAccess]) -> "Subscription":
+        """From a client's subscribe message: {"periods": [{"year": 2025, "month": 3}, {"year": 2024}], "company_ids": [...]}"""
+        periods = []
+        for period in message.get("periods") or []:
+            month = period.get("month")
+            periods.append((int(period["year"]), int(month) if month is not None else None))
+        return cls(periods, message.get("company_ids"), access)
+
+    def wants_period(self, year: int, month: int) -> bool:
+        if not self.years and not self.months:
+            return True
+        return year in self.years or (year, month) in self.months
+
+    def wants_company(self, company_id: str) -> bool:
+        if self.access is not None and company_id not in self.access:
+            return False
+        return self.company_ids is None or company_id in self.company_ids
+
+    def message_for(self, change: DataChange) -> Optional[Dict[str, Any]]:
+        """The client message for a change, or None if nothing in it concerns this client."""
+        if change.rows is None:
+            # Companies unknown: report the periods only; the client refetches what it shows for them.
+            periods = [p for p in change.periods if self.wants_period(*p)]
+            changes = None
+        else:
+            changes = [
+                row for row in change.rows
+                if self.wants_period(row[1], row[2]) and self.wants_company(row[0])
+            ]
+            periods = sorted({(row[1], row[2]) for row in changes})
+        if not periods:
+            return None
+        message: Dict[str, Any] = {
+            "type": "change",
+            "kind": change.kind,
+            "op": change.op,
+            "periods": [{"year": year, "month": month} for year, month in periods],
+            "complete": changes is not None,
+        }
+        if changes is not None:
+            message["changes"] = [
+                {"company_id": company_id, "year": year, "month": month, "status": status}
+                for company_id, year, month, status in changes
+            ]
+        return message
+
+
+# ============ HUB ============
+
+RESYNC = {"type": "resync"}
+
+
+class LiveClient:
+    """One connected WebSocket: its subscription and outgoing queue."""
+
+    def __init__(self, subscription: Subscription, queue_size: int):
+        self.subscription = subscription
+        # (received_at, message)
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, queue_size))
+
+    def offer(self, received_at: float, message: Dict[str, Any]) -> bool:
+        """Queue a message; False if the client was behind and now gets a resync instead."""
+        try:
+            self.queue.put_nowait((received_at, message))
+            return True
+        except asyncio.QueueFull:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait((received_at, RESYNC))
+            return False
+
+
+class LiveHub:
+    """Per-worker registry of live clients and fan-out of changes to them."""
+
+    def __init__(self, max_connections: int = 1000, queue_size: int = 100):
+        self.max_connections = max_connections
+        self.queue_size = queue_size
+        self._clients: Set[LiveClient] = set()
+        self._latency_ms: Deque[float] = deque(maxlen=1000)
+        self.stats: Dict[str, int] = {
+            "peak_connections": 0,
+            "rejected_connections": 0,
+            "events": 0,
+            "deliveries": 0,
+            "resyncs": 0,
+        }
+
+    def __len__(self) -> int:
+        return len(self._clients)
+
+    def connect(self, subscription: Subscription) -> Optional[LiveClient]:
+        """Register a client; None when the worker is at max_connections."""
+        if len(self._clients) >= self.max_connections:
+            self.stats["rejected_connections"] += 1
+            return None
+        client = LiveClient(subscription, self.queue_size)
+        self._clients.add(client)
+        self.stats["peak_connections"] = max(self.stats["peak_connections"], len(self._clients))
+        return client
+
+    def disconnect(self, client: LiveClient) -> None:
+        self._clients.discard(client)
+
+    def publish(self, change: DataChange) -> int:
+        """Queue the change for every client it concerns; returns how many."""
+        self.stats["events"] += 1
+        queued = 0
+        for client in list(self._clients):
+            message = client.subscription.message_for(change)
+            if message is None:
+                continue
+            queued += 1
+            if not client.offer(change.received_at, message):
+                self.stats["resyncs"] += 1
+        return queued
+
+    def resync_all(self) -> None:
+        now = time.monotonic()
+        for client in list(self._clients):
+            client.offer(now, RESYNC)
+        self.stats["resyncs"] += len(self._clients)
+
+    async def pump(self, client: LiveClient, send: Callable[[Dict[str, Any]], Awaitable[None]]) -> None:
+        """Send the client's queued messages until cancelled or the send fails."""
+        while True:
+            received_at, message = await client.queue.get()
+            await send(message)
+            self.stats["deliveries"] += 1
+            self._latency_ms.append((time.monotonic() - received_at) * 1000)
+
+    def snapshot(self) -> Dict[str, Any]:
+        latencies = sorted(self._latency_ms)
+
+        def percentile(p: float) -> Optional[float]:
+            if not latencies:
+                return None
+            return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))], 2)
+
+        return {
+            "connections": len(self._clients),
+            "max_connections": self.max_connections,
+            **self.stats,
+            "fanout_ms": {"p50": percentile(0.5), "p95": percentile(0.95), "max": percentile(1.0)},
+        }
+
+
+# ============ LISTENER ============
+
+class ChangeListener:
+    """LISTENs on the change channel over a dedicated connection and feeds the hub."""
+
+    def __init__(self, hub: LiveHub, reconnect_seconds: float = 5.0):
+        self.hub = hub
+        self.reconnect_seconds = reconnect_seconds
+        self.connected = False
+        self._periods: Dict[int, Tuple[int, int]] = {}
+        self._payloads: asyncio.Queue = asyncio.Queue()
+        self._task: Optional[asyncio.Task] = None
+        self._last_error: Optional[str] = None
+        self.stats: Dict[str, int] = {"notifications": 0, "reconnects": 0, "bad_payloads": 0}
+
+    @staticmethod
+    def dsn(url: str) -> Optional[str]:
+        """Plain asyncpg DSN for a SQLAlchemy asyncpg URL; None for other databases."""
+        parsed = make_url(url)
+        if parsed.drivername != "postgresql+asyncpg":
+            return None
+        return parsed.set(drivername="postgresql").render_as_string(hide_password=False)
+
+    async def _load_periods(self) -> None:
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(select(PeriodMaster.period_id, PeriodMaster.year, PeriodMaster.month))
+            self._periods = {row[0]: (row[1], row[2]) for row in result.all()}
+
+    def _on_notify(self, connection, pid, channel, payload) -> None:
+        self._payloads.put_nowait((time.monotonic(), payload))
+
+    async def _dispatch(self, received_at: float, payload: str) -> None:
+        self.stats["notifications"] += 1
+        try:
+            ids = json.loads(payload).get("periods") or []
+            if any(period_id not in self._periods for period_id in ids):
+                # A period created since the last load
+                await self._load_periods()
+            change = DataChange.from_payload(payload, self._periods.get)
+        except (ValueError, TypeError, KeyError) as exc:
+            self.stats["bad_payloads"] += 1
+            logger.warning("Ignoring malformed change notification: %s", exc)
+            return
+        change.received_at = received_at
+        self.hub.publish(change)
+
+    async def _consume(self) -> None:
+        while True:
+            received_at, payload = await self._payloads.get()
+            try:
+                await self._dispatch(received_at, payload)
+            except Exception:
+                logger.exception("Failed to dispatch change notification")
+
+    async def _listen(self, dsn: str) -> None:
+        lost = asyncio.Event()
+        conn = await asyncpg.connect(dsn)
+        try:
+            conn.add_termination_listener(lambda _conn: lost.set())
+            await self._load_periods()
+            await conn.add_listener(CHANNEL, self._on_notify)
+            self.connected = True
+            self._last_error = None
+            logger.info("Listening for analytics changes")
+            await lost.wait()
+        finally:
+            self.connected = False
+            if not conn.is_closed():
+                await conn.close()
+
+    async def _run(self, dsn: str) -> None:
+        consumer = asyncio.create_task(self._consume())
+        first = True
+        try:
+            while True:
+                if not first:
+                    self.stats["reconnects"] += 1
+                    # Changes committed while disconnected were not heard.
+                    self.hub.resync_all()
+                first = False
+                try:
+                    await self._listen(dsn)
+                    self._last_error = "connection lost"
+                except asyncio.CancelledError:
+                    raise
+                except Exception as exc:
+                    self._last_error = f"{type(exc).__name__}: {exc}"
+                    logger.warning("Change listener disconnected, retrying in %ss: %s", self.reconnect_seconds, exc)
+                await asyncio.sleep(self.reconnect_seconds)
+        finally:
+            consumer.cancel()
+            await asyncio.gather(consumer, return_exceptions=True)
+
+    def start(self) -> bool:
+        if self._task is not None:
+            return True
+        dsn = self.dsn(settings.database_url)
+        if dsn is None or asyncpg is None:
+            logger.info("Live updates need PostgreSQL via asyncpg; listener not started")
+            return False
+        self._task = asyncio.create_task(self._run(dsn))
+        return True
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "running": self._task is not None,
+            "connected": self.connected,
+            "last_error": self._last_error,
+            "known_periods": len(self._periods),
+            **self.stats,
+            **self.hub.snapshot(),
+        }
+
+
+live_hub = LiveHub(settings.live_max_connections, settings.live_client_queue_size)
+change_listener = ChangeListener(live_hub, settings.live_reconnect_seconds)
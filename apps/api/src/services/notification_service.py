@@ -3,7 +3,8 @@ Notification Service - Unified Business Logic
 
 Handles:
 1. In-app notifications (DB persistence)
-2. Email notifications (via configurable provider)
+2. Email notifications (via configurable provider; workflow emails go through
+   the outbox and its per-recipient digests)
 3. Background task support
 """
 from typing import Optional, List, Dict, Any
@@ -15,6 +16,7 @@ import logging
 
 from src.config.settings import settings
 from src.db.models import Notification, User, Report, Company
+from src.services.email_outbox_service import EmailOutboxService
 from src.services.email_provider import get_email_provider_instance
 
 logger = logging.getLogger(__name__)
@@ -275,9 +277,9 @@ class NotificationService:
         """
         Notify directors when a report is submitted.
         1. Create in-app notification for each director
-        2. Send email to each director
+        2. Queue email to each director (outbox digest)
         """
-        results = {"notifications_created": 0, "emails_sent": 0, "errors": []}
+        results = {"notifications_created": 0, "emails_queued": 0, "errors": []}
         
         company_name = report.company.name if report.company else "Unknown"
         period = f"{report.month}/{report.year}"
@@ -295,22 +297,23 @@ class NotificationService:
                 )
                 results["notifications_created"] += 1
                 
-                # 2. Send email (async - won't block)
+                # 2. Queue email (held for the director's digest)
                 if settings.is_email_enabled and director.email:
-                    email_result = await NotificationService.send_template_email(
-                        to=director.email,
+                    await EmailOutboxService.queue_template_email(
+                        db=db,
+                        to_email=director.email,
+                        to_name=director.name,
                         template_name="report_submitted",
                         variables={
                             "company_name": company_name,
                             "period": period,
                             "submitted_by": submitter.name,
                             "review_url": review_url
-                        }
+                        },
+                        related_type="report",
+                        related_id=str(report.id),
                     )
-                    if email_result.get("success"):
-                        results["emails_sent"] += 1
-                    else:
-                        results["errors"].append(f"Email to {director.email}: {email_result.get('error')}")
+                    results["emails_queued"] += 1
                         
             except Exception as e:
                 results["errors"].append(f"Director {director.id}: {str(e)}")
@@ -326,7 +329,7 @@ class NotificationService:
         author: User
     ) -> Dict[str, Any]:
         """Notify author when their report is approved"""
-        results = {"notifications_created": 0, "emails_sent": 0, "errors": []}
+        results = {"notifications_created": 0, "emails_queued": 0, "errors": []}
         
         company_name = report.company.name if report.company else "Unknown"
         period = f"{report.month}/{report.year}"
@@ -342,21 +345,22 @@ class NotificationService:
             )
             results["notifications_created"] += 1
             
-            # 2. Send email
+            # 2. Queue email (held for the author's digest)
             if settings.is_email_enabled and author.email:
-                email_result = await NotificationService.send_template_email(
-                    to=author.email,
+                await EmailOutboxService.queue_template_email(
+                    db=db,
+                    to_email=author.email,
+                    to_name=author.name,
                     template_name="report_approved",
                     variables={
                         "company_name": company_name,
                         "period": period,
                         "approved_by": approver.name
-                    }
+                    },
+                    related_type="report",
+                    related_id=str(report.id),
                 )
-                if email_result.get("success"):
-                    results["emails_sent"] += 1
-                else:
-                    results["errors"].append(f"Email: {email_result.get('error')}")
+                results["emails_queued"] += 1
                     
         except Exception as e:
             results["errors"].append(str(e))
@@ -373,7 +377,7 @@ class NotificationService:
         reason: str
     ) -> Dict[str, Any]:
         """Notify author when their report is rejected"""
-        results = {"notifications_created": 0, "emails_sent": 0, "errors": []}
+        results = {"notifications_created": 0, "emails_queued": 0, "errors": []}
         
         company_name = report.company.name if report.company else "Unknown"
         period = f"{report.month}/{report.year}"
@@ -390,10 +394,12 @@ class NotificationService:
             )
             results["notifications_created"] += 1
             
-            # 2. Send email
+            # 2. Queue email (held for the author's digest)
             if settings.is_email_enabled and author.email:
-                email_result = await NotificationService.send_template_email(
-                    to=author.email,
+                await EmailOutboxService.queue_template_email(
+                    db=db,
+                    to_email=author.email,
+                    to_name=author.name,
                     template_name="report_rejected",
                     variables={
                         "company_name": company_name,
@@ -401,12 +407,11 @@ class NotificationService:
                         "rejected_by": rejector.name,
                         "rejection_reason": reason,
                         "edit_url": edit_url
-                    }
+                    },
+                    related_type="report",
+                    related_id=str(report.id),
                 )
-                if email_result.get("success"):
-                    results["emails_sent"] += 1
-                else:
-                    results["errors"].append(f"Email: {email_result.get('error')}")
+                results["emails_queued"] += 1
                     
         except Exception as e:
             results["errors"].append(str(e))
@@ -0,0 +1,351 @@
+"""
+Period Snapshot Service
+Immutable snapshots of closed months for historical reads.
+
+A month whose workflows are all approved can be closed: every company x
+scenario row of financial_monthly_view for it is frozen into one
+analytics.period_snapshot row (migration 008) as a packed float64 array plus a
+small header, zlib-compressed. Trend and YTD endpoints then read closed months
+from snapshots - decoded once per process and kept in an LRU, since a snapshot
+never changes - and run live view queries only for the months still open.
+
+Reopening a period deletes its snapshot; while it exists, the migration's
+trigger rejects writes to that period's financial_fact rows. Without the
+migration every read is live, as before.
+"""
+import hashlib
+import json
+import logging
+import math
+import struct
+import sys
+import zlib
+from array import array
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import and_, column, delete, func, insert, select, table
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.config.constants import StatusID
+from src.config.settings import settings
+from src.db.models import CompanyMaster, FinancialMonthly, FinancialWorkflow, PeriodMaster
+from src.db.read_models import MONTHLY_FIELDS, MonthlyRow, fetch_monthly, monthly_select
+from src.services.audit_service import AuditService
+
+logger = logging.getLogger(__name__)
+
+period_snapshot = table(
+    "period_snapshot",
+    column("period_id"),
+    column("year"),
+    column("month"),
+    column("row_count"),
+    column("checksum"),
+    column("payload"),
+    column("closed_by"),
+    column("closed_at"),
+    schema="analytics",
+)
+
+# Packed fields of a snapshot row, and the record type rows decode into.
+SNAPSHOT_FIELDS: Tuple[str, ...] = MONTHLY_FIELDS
+SnapshotRow = MonthlyRow
+
+_MAGIC = b"PS1"
+_HEADER_LENGTH = struct.Struct("<I")
+
+
+class PeriodCloseError(ValueError):
+    """The period cannot be closed or reopened in its current state."""
+
+
+# ============ ENCODING ============
+
+def pack_rows(rows: Iterable[Any]) -> Tuple[bytes, int]:
+    """(payload, row count) for view rows; NULLs are stored as NaN."""
+    companies: List[str] = []
+    scenarios: List[str] = []
+    values = array("d")
+    for row in rows:
+        companies.append(row.company_id)
+        scenarios.append(str(getattr(row.scenario, "value", row.scenario)))
+        for field in SNAPSHOT_FIELDS:
+            value = getattr(row, field)
+            values.append(math.nan if value is None else float(value))
+    header = json.dumps(
+        {"fields": SNAPSHOT_FIELDS, "companies": companies, "scenarios": scenarios},
+        separators=(",", ":"),
+    ).encode("utf-8")
+    if sys.byteorder == "big":  # payloads are little-endian
+        values.byteswap()
+    body = _HEADER_LENGTH.pack(len(header)) + header + values.tobytes()
+    return _MAGIC + zlib.compress(body, 6), len(companies)
+
+
+def unpack_rows(payload: bytes, period_id: int, year: int, month: int) -> List[SnapshotRow]:
+    if not payload.startswith(_MAGIC):
+        raise ValueError("Not a period snapshot payload")
+    body = zlib.decompress(payload[len(_MAGIC):])
+    (header_length,) = _HEADER_LENGTH.unpack_from(body)
+    offset = _HEADER_LENGTH.size
+    header = json.loads(body[offset:offset + header_length])
+    values = array("d")
+    values.frombytes(body[offset + header_length:])
+    if sys.byteorder == "big":
+        values.byteswap()
+
+    fields = header["fields"]
+    width = len(fields)
+    positions = [fields.index(field) if field in fields else None for field in SNAPSHOT_FIELDS]
+    rows = []
+    for index, (company_id, scenario) in enumerate(zip(header["companies"], header["scenarios"])):
+        block = values[index * width:(index + 1) * width]
+        rows.append(SnapshotRow(
+            company_id, period_id, scenario, year, month,
+            [None if p is None or math.isnan(block[p]) else block[p] for p in positions],
+        ))
+    return rows
+
+
+def checksum(payload: bytes) -> str:
+    return hashlib.sha256(payload).hexdigest()[:32]
+
+
+# ============ CACHE ============
+
+_decoded: "OrderedDict[Tuple[int, str], List[SnapshotRow]]" = OrderedDict()
+_stats = {"snapshot_periods_read": 0, "live_periods_read": 0, "decoded": 0}
+
+
+def _remember(key: Tuple[int, str], rows: List[SnapshotRow]) -> None:
+    _decoded[key] = rows
+    _decoded.move_to_end(key)
+    while len(_decoded) > settings.period_snapshot_cache_size:
+        _decoded.popitem(last=False)
+
+
+class PeriodSnapshotService:
+    """Close / reopen periods and read history through their snapshots."""
+
+    @staticmethod
+    async def _period(db: AsyncSession, period_id: int) -> PeriodMaster:
+        period = (
+            await db.execute(select(PeriodMaster).where(PeriodMaster.period_id == period_id))
+        ).scalar_one_or_none()
+        if period is None:
+            raise LookupError(f"Period {period_id} not found")
+        return period
+
+    @staticmethod
+    async def close_period(db: AsyncSession, period_id: int, user_id: Optional[str]) -> Dict[str, Any]:
+        """
+        Freeze a fully approved period. Raises PeriodCloseError if it is already
+        closed, has no workflows, or any workflow is not approved.
+        """
+        period = await PeriodSnapshotService._period(db, period_id)
+
+        existing = (
+            await db.execute(select(period_snapshot.c.period_id).where(period_snapshot.c.period_id == period_id))
+        ).first()
+        if existing:
+            raise PeriodCloseError(f"{period.month}/{period.year} is already closed")
+
+        statuses = (
+            await db.execute(
+                select(FinancialWorkflow.company_id, CompanyMaster.company_name, FinancialWorkflow.status_id)
+                .join(CompanyMaster, CompanyMaster.company_id == FinancialWorkflow.company_id)
+                .where(FinancialWorkflow.period_id == period_id)
+                # Lock the workflows so none is reopened while the snapshot is taken.
+                .with_for_update(of=FinancialWorkflow)
+            )
+        ).all()
+        if not statuses:
+            raise PeriodCloseError(f"{period.month}/{period.year} has no submissions to close")
+        pending = sorted(
+            row.company_name or row.company_id for row in statuses if row.status_id != int(StatusID.APPROVED)
+        )
+        if pending:
+            raise PeriodCloseError(
+                f"{period.month}/{period.year} has {len(pending)} unapproved submissions: "
+                + ", ".join(pending[:10]) + (" ..." if len(pending) > 10 else "")
+            )
+
+        rows = await fetch_monthly(
+            db,
+            FinancialMonthly.period_id == period_id,
+            query=monthly_select().order_by(FinancialMonthly.company_id, FinancialMonthly.scenario),
+        )
+        payload, row_count = pack_rows(rows)
+        digest = checksum(payload)
+        await db.execute(
+            insert(period_snapshot).values(
+                period_id=period_id,
+                year=period.year,
+                month=period.month,
+                row_count=row_count,
+                checksum=digest,
+                payload=payload,
+                closed_by=user_id,
+            )
+        )
+        AuditService.record(
+            db,
+            "PERIOD_CLOSED",
+            user_id=user_id,
+            entity_type="period",
+            entity_id=str(period_id),
+            details=f"Closed {period.month}/{period.year}: {row_count} rows, {len(payload)} bytes",
+        )
+        await db.commit()
+        logger.info("Closed period %s (%d rows, %d bytes)", period_id, row_count, len(payload))
+        return {
+            "period_id": period_id,
+            "year": period.year,
+            "month": period.month,
+            "row_count": row_count,
+            "size_bytes": len(payload),
+            "checksum": digest,
+        }
+
+    @staticmethod
+    async def reopen_period(db: AsyncSession, period_id: int, user_id: Optional[str], reason: str) -> None:
+        """Drop a period's snapshot so its figures can change again."""
+        period = await PeriodSnapshotService._period(db, period_id)
+        deleted = await db.execute(
+            delete(period_snapshot)
+            .where(period_snapshot.c.period_id == period_id)
+            .returning(period_snapshot.c.checksum)
+        )
+        digest = deleted.scalar_one_or_none()
+        if digest is None:
+            raise PeriodCloseError(f"{period.month}/{period.year} is not closed")
+        AuditService.record(
+            db,
+            "PERIOD_REOPENED",
+            user_id=user_id,
+            entity_type="period",
+            entity_id=str(period_id),
+            details=f"Reopened {period.month}/{period.year}. Reason: {reason}",
+        )
+        await db.commit()
+        _decoded.pop((period_id, digest), None)
+        logger.info("Reopened period %s", period_id)
+
+    @staticmethod
+    async def closed_periods(db: AsyncSession, year_from: int, year_to: int) -> List[Dict[str, Any]]:
+        rows = (
+            await db.execute(
+                select(
+                    period_snapshot.c.period_id,
+                    period_snapshot.c.year,
+                    period_snapshot.c.month,
+                    period_snapshot.c.row_count,
+                    func.octet_length(period_snapshot.c.payload).label("size_bytes"),
+                    period_snapshot.c.closed_by,
+                    period_snapshot.c.closed_at,
+                )
+                .where(period_snapshot.c.year.between(year_from, year_to))
+                .order_by(period_snapshot.c.year, period_snapshot.c.month)
+            )
+        ).all()
+        return [dict(row._mapping) for row in rows]
+
+    @staticmethod
+    async def _snapshot_rows(
+        db: AsyncSession, year_from: int, year_to: int, months: Optional[Sequence[int]]
+    ) -> Optional[Dict[int, List[SnapshotRow]]]:
+        """Decoded rows per closed period in range; None if snapshots are unavailable."""
+        conditions = [period_snapshot.c.year.between(year_from, year_to)]
+        if months is not None:
+            conditions.append(period_snapshot.c.month.in_(list(months)))
+        try:
+            async with db.begin_nested():
+                index = (
+                    await db.execute(
+                        select(
+                            period_snapshot.c.period_id,
+                            period_snapshot.c.year,
+                            period_snapshot.c.month,
+                            period_snapshot.c.checksum,
+                        ).where(and_(*conditions))
+                    )
+                ).all()
+                missing = [row.period_id for row in index if (row.period_id, row.checksum) not in _decoded]
+                payloads = {}
+                if missing:
+                    payloads = {
+                        row.period_id: row.payload
+                        for row in (
+                            await db.execute(
+                                select(period_snapshot.c.period_id, period_snapshot.c.payload)
+                                .where(period_snapshot.c.period_id.in_(missing))
+                            )
+                        ).all()
+                    }
+        except SQLAlchemyError as exc:
+            logger.debug("Period snapshots unavailable: %s", exc)
+            return None
+
+        periods: Dict[int, List[SnapshotRow]] = {}
+        for row in index:
+            key = (row.period_id, row.checksum)
+            rows = _decoded.get(key)
+            if rows is None:
+                payload = payloads.get(row.period_id)
+                if payload is None:
+                    continue  # reopened between the two queries: read it live
+                rows = unpack_rows(bytes(payload), row.period_id, row.year, row.month)
+                _stats["decoded"] += 1
+                _remember(key, rows)
+            else:
+                _decoded.move_to_end(key)
+            periods[row.period_id] = rows
+        return periods
+
+    @staticmethod
+    async def load_records(
+        db: AsyncSession,
+        scenario: str,
+        *,
+        year_from: int,
+        year_to: int,
+        months: Optional[Sequence[int]] = None,
+        company_ids: Optional[Iterable[str]] = None,
+    ) -> List[MonthlyRow]:
+        """
+        financial_monthly_view rows for the scenario over the years (and
+        months), ordered by period: closed periods from snapshots, the rest live.
+        """
+        scenario = str(getattr(scenario, "value", scenario))
+        companies = set(company_ids) if company_ids is not None else None
+        closed = await PeriodSnapshotService._snapshot_rows(db, year_from, year_to, months)
+
+        criteria = [
+            FinancialMonthly.year >= year_from,
+            FinancialMonthly.year <= year_to,
+            FinancialMonthly.scenario == scenario,
+        ]
+        if months is not None:
+            criteria.append(FinancialMonthly.month.in_(list(months)))
+        if companies is not None:
+            criteria.append(FinancialMonthly.company_id.in_(sorted(companies)))
+        if closed:
+            criteria.append(FinancialMonthly.period_id.notin_(list(closed)))
+        live = await fetch_monthly(db, *criteria)
+
+        records: List[MonthlyRow] = live
+        for rows in (closed or {}).values():
+            records.extend(
+                row for row in rows
+                if row.scenario == scenario and (companies is None or row.company_id in companies)
+            )
+        _stats["snapshot_periods_read"] += len(closed or ())
+        _stats["live_periods_read"] += len({r.period_id for r in live})
+        records.sort(key=lambda r: (r.year, r.month))
+        return records
+
+    @staticmethod
+    def snapshot() -> Dict[str, Any]:
+        return {"cached_periods": len(_decoded), **_stats}
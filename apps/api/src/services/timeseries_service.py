@@ -0,0 +1,525 @@
+"""
+Time Series Service
+Monthly metric series per company, cluster and group for trend endpoints.
+
+analytics.metric_series (migration 009) keeps, per (entity, scenario, metric,
+year), the twelve monthly totals of each additive metric. A trend over N years
+and M metrics is one range read of N x M rows, laid out here as contiguous
+month arrays, optionally summed to quarters or years, with ratios (margins)
+and subtotals (PBT, EBITDA...) derived from the summed components.
+
+Maintenance follows the writes: SeriesMaintainer polls analytics.data_version
+every timeseries_refresh_seconds and rebuilds the years it reports changed
+(one worker at a time, under an advisory lock). Until a changed year has been
+rebuilt, reads compute that year live from the view, so a trend never lags
+the data-version ETag it is served under. Without the migration every read is
+live.
+"""
+import asyncio
+import logging
+from enum import Enum
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from sqlalchemy import String, and_, cast, column, func, select, table, text
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.config.settings import settings
+from src.db.models import Company, PeriodMaster
+from src.db.session import AsyncSessionLocal
+from src.services.data_version_service import MASTER_COMPANY_ID, MASTER_PERIOD_ID, data_version
+from src.services.fx_service import FxRateTable, period_end
+from src.services.period_snapshot_service import PeriodSnapshotService
+
+logger = logging.getLogger(__name__)
+
+metric_series = table(
+    "metric_series",
+    column("entity_type"),
+    column("entity_id"),
+    column("scenario"),
+    column("metric"),
+    column("year"),
+    column("vals"),
+    schema="analytics",
+)
+
+metric_series_year = table(
+    "metric_series_year",
+    column("year"),
+    column("source_token"),
+    schema="analytics",
+)
+
+GROUP_ENTITY_ID = "*"
+
+# Additive metrics stored per month; `rows` counts reporting companies.
+STORED_METRICS: Tuple[str, ...] = (
+    "revenue_lkr", "gp", "other_income", "personal_exp", "admin_exp", "selling_exp",
+    "finance_exp", "depreciation", "provisions", "exchange_gl", "non_ops_exp", "non_ops_income",
+    "revenue_usd", "rows",
+)
+
+_OVERHEADS = ("personal_exp", "admin_exp", "selling_exp", "finance_exp", "depreciation")
+_PBT = ("gp", "other_income", "provisions", "exchange_gl") + _OVERHEADS
+
+# Derived metric -> stored components it needs.
+DERIVED_METRICS: Dict[str, Tuple[str, ...]] = {
+    "total_overheads": _OVERHEADS,
+    "pbt_before": _PBT,
+    "pbt_after": _PBT + ("non_ops_exp", "non_ops_income"),
+    "ebit": _PBT,
+    "ebitda": _PBT,
+    "gp_margin_pct": ("gp", "revenue_lkr"),
+    "np_margin_pct": _PBT + ("revenue_lkr",),
+}
+
+METRIC_ALIASES = {
+    "gp_margin": "gp_margin_pct",
+    "np_margin": "np_margin_pct",
+    "total_overhead": "total_overheads",
+    "pbt": "pbt_before",
+}
+
+SUPPORTED_METRICS = frozenset(STORED_METRICS) | frozenset(DERIVED_METRICS) | frozenset(METRIC_ALIASES)
+
+MONTH_ABBR = ("", "Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec")
+
+
+class Grain(str, Enum):
+    MONTH = "month"
+    QUARTER = "quarter"
+    YEAR = "year"
+
+
+class EntityType(str, Enum):
+    COMPANY = "company"
+    CLUSTER = "cluster"
+    GROUP = "group"
+
+
+def canonical_metric(metric: str) -> str:
+    return METRIC_ALIASES.get(metric, metric)
+
+
+def components_for(metrics: Iterable[str]) -> List[str]:
+    """Stored metrics needed to produce the requested ones (always with `rows`)."""
+    needed = {"rows"}
+    for metric in metrics:
+        metric = canonical_metric(metric)
+        if metric in DERIVED_METRICS:
+            needed.update(DERIVED_METRICS[metric])
+        elif metric in STORED_METRICS:
+            needed.add(metric)
+            if metric == "revenue_usd":
+                needed.add("revenue_lkr")
+    return sorted(needed)
+
+
+# ============ FRAME ============
+
+class SeriesFrame:
+    """
+    Aligned series over contiguous buckets. buckets are (year, n) with n the
+    month, the quarter, or 0 for whole years; present marks buckets with data.
+    """
+
+    __slots__ = ("grain", "buckets", "present", "values")
+
+    def __init__(
+        self,
+        grain: Grain,
+        buckets: List[Tuple[int, int]],
+        present: List[bool],
+        values: Dict[str, List[Optional[float]]],
+    ):
+        self.grain = grain
+        self.buckets = buckets
+        self.present = present
+        self.values = values
+
+    def label(self, index: int) -> str:
+        year, n = self.buckets[index]
+        if self.grain is Grain.MONTH:
+            return f"{MONTH_ABBR[n]} {year}"
+        if self.grain is Grain.QUARTER:
+            return f"Q{n} {year}"
+        return str(year)
+
+    def last_month(self, index: int) -> int:
+        """Last calendar month covered by a bucket."""
+        _, n = self.buckets[index]
+        return n if self.grain is Grain.MONTH else (n * 3 if self.grain is Grain.QUARTER else 12)
+
+    def points(self, metric: str) -> List[Tuple[int, Optional[float]]]:
+        """(bucket index, value) for buckets with data."""
+        series = self.values.get(canonical_metric(metric))
+        if series is None:
+            return []
+        return [(i, series[i]) for i, present in enumerate(self.present) if present]
+
+
+def assemble(
+    rows: Iterable[Tuple[str, int, Sequence[Optional[float]]]],
+    year_from: int,
+    year_to: int,
+    metrics: Iterable[str],
+) -> Dict[str, List[Optional[float]]]:
+    """Place (metric, year, 12 values) rows into one contiguous month array per metric."""
+    length = 12 * (year_to - year_from + 1)
+    series: Dict[str, List[Optional[float]]] = {metric: [None] * length for metric in metrics}
+    for metric, year, vals in rows:
+        target = series.get(metric)
+        if target is None or not year_from <= year <= year_to:
+            continue
+        offset = 12 * (year - year_from)
+        target[offset:offset + 12] = [None if v is None else float(v) for v in vals]
+    return series
+
+
+def apply_usd_rates(series: Dict[str, List[Optional[float]]], rates: FxRateTable, year_from: int) -> None:
+    """Replace entered-rate USD revenue with revenue at the published as-of rate where there is one."""
+    usd = series.get("revenue_usd")
+    lkr = series.get("revenue_lkr")
+    if usd is None or lkr is None:
+        return
+    for index, revenue in enumerate(lkr):
+        if revenue is None:
+            continue
+        year, month = year_from + index // 12, index % 12 + 1
+        rate = rates.rate_as_of("USD", period_end(year, month))
+        if rate:
+            usd[index] = revenue / rate
+
+
+def downsample(
+    series: Dict[str, List[Optional[float]]], year_from: int, grain: Grain
+) -> Tuple[List[Tuple[int, int]], Dict[str, List[Optional[float]]]]:
+    """Sum month arrays into quarter or year buckets; a bucket with no data stays None."""
+    length = len(next(iter(series.values()), []))
+    width = {Grain.MONTH: 1, Grain.QUARTER: 3, Grain.YEAR: 12}[grain]
+    buckets = []
+    for start in range(0, length, width):
+        year = year_from + start // 12
+        n = (start % 12) // width + 1 if grain is not Grain.YEAR else 0
+        buckets.append((year, n))
+    if width == 1:
+        return buckets, series
+
+    summed: Dict[str, List[Optional[float]]] = {}
+    for metric, values in series.items():
+        out = []
+        for start in range(0, length, width):
+            chunk = [v for v in values[start:start + width] if v is not None]
+            out.append(sum(chunk) if chunk else None)
+        summed[metric] = out
+    return buckets, summed
+
+
+def derive(series: Dict[str, List[Optional[float]]], metrics: Iterable[str]) -> Dict[str, List[Optional[float]]]:
+    """Requested metrics (canonical names) from summed components."""
+    length = len(series["rows"])
+    zeros = [0.0] * length
+
+    def col(name: str) -> List[float]:
+        values = series.get(name)
+        return zeros if values is None else [v or 0.0 for v in values]
+
+    cache: Dict[str, List[float]] = {}
+
+    def overheads() -> List[float]:
+        if "total_overheads" not in cache:
+            cache["total_overheads"] = [sum(parts) for parts in zip(*(col(m) for m in _OVERHEADS))]
+        return cache["total_overheads"]
+
+    def pbt_before() -> List[float]:
+        if "pbt_before" not in cache:
+            cache["pbt_before"] = [
+                gp + oi - oh + pr + fx
+                for gp, oi, oh, pr, fx in zip(
+                    col("gp"), col("other_income"), overheads(), col("provisions"), col("exchange_gl")
+                )
+            ]
+        return cache["pbt_before"]
+
+    def margin(numerator: List[float]) -> List[float]:
+        return [round(n / r * 100, 2) if r > 0 else 0.0 for n, r in zip(numerator, col("revenue_lkr"))]
+
+    out: Dict[str, List[Optional[float]]] = {}
+    for metric in metrics:
+        name = canonical_metric(metric)
+        if name in out:
+            continue
+        if name == "total_overheads":
+            out[name] = overheads()
+        elif name == "pbt_before":
+            out[name] = pbt_before()
+        elif name == "pbt_after":
+            out[name] = [p - e + i for p, e, i in zip(pbt_before(), col("non_ops_exp"), col("non_ops_income"))]
+        elif name == "ebit":
+            out[name] = [p + f for p, f in zip(pbt_before(), col("finance_exp"))]
+        elif name == "ebitda":
+            out[name] = [p + f + d for p, f, d in zip(pbt_before(), col("finance_exp"), col("depreciation"))]
+        elif name == "gp_margin_pct":
+            out[name] = margin(col("gp"))
+        elif name == "np_margin_pct":
+            out[name] = margin(pbt_before())
+        elif name in STORED_METRICS:
+            out[name] = col(name)
+    return out
+
+
+# ============ SERVICE ============
+
+_stats = {"store_years_read": 0, "live_years_read": 0, "refreshes": 0, "years_refreshed": 0}
+
+
+def _record_value(record: Any, metric: str) -> float:
+    if metric == "rows":
+        return 1.0
+    if metric == "revenue_usd":
+        revenue = float(record.revenue_lkr or 0)
+        rate = float(record.exchange_rate or 0)
+        return revenue / (rate if rate > 0 else 1.0)
+    value = getattr(record, metric, None)
+    return float(value) if value is not None else 0.0
+
+
+class TimeSeriesService:
+    """Range reads, downsampling and maintenance of analytics.metric_series."""
+
+    @staticmethod
+    def _year_digests_query(years: Optional[Sequence[int]] = None):
+        """md5 of each year's (company, period, version) data_version rows."""
+        row = func.concat_ws(
+            ":", data_version.c.company_id, cast(data_version.c.period_id, String), cast(data_version.c.version, String)
+        )
+        statement = (
+            select(
+                PeriodMaster.year,
+                func.md5(func.string_agg(row, aggregate_order_by(",", data_version.c.company_id, data_version.c.period_id))),
+            )
+            .select_from(data_version)
+            .join(PeriodMaster, PeriodMaster.period_id == data_version.c.period_id)
+            .group_by(PeriodMaster.year)
+        )
+        if years is not None:
+            statement = statement.where(PeriodMaster.year.in_(list(years)))
+        return statement
+
+    @staticmethod
+    async def _year_sources(db: AsyncSession, years: Optional[Sequence[int]] = None) -> Tuple[int, Dict[int, str]]:
+        """The master-data version and the per-year digests a source token is made of."""
+        digests = dict((await db.execute(TimeSeriesService._year_digests_query(years))).all())
+        master = (await db.execute(
+            select(func.coalesce(func.max(data_version.c.version), 0)).where(
+                and_(
+                    data_version.c.company_id == MASTER_COMPANY_ID,
+                    data_version.c.period_id == MASTER_PERIOD_ID,
+                )
+            )
+        )).scalar()
+        return master or 0, digests
+
+    @staticmethod
+    def source_token(master: int, digest: Optional[str]) -> str:
+        """
+        What a year was built from. Compared for equality, never ordered: a
+        write that commits late can carry a lower version than one already
+        built, but it still changes the year's digest.
+        """
+        return f"{master}.{digest or ''}"
+
+    @staticmethod
+    async def stale_years(db: AsyncSession, years: Sequence[int]) -> Set[int]:
+        """Years the store cannot serve yet (all of them if it is unavailable)."""
+        try:
+            async with db.begin_nested():
+                covered = dict(
+                    (await db.execute(
+                        select(metric_series_year.c.year, metric_series_year.c.source_token)
+                        .where(metric_series_year.c.year.in_(list(years)))
+                    )).all()
+                )
+                if not covered:
+                    return set(years)
+                master, digests = await TimeSeriesService._year_sources(db, years)
+        except SQLAlchemyError as exc:
+            logger.debug("Metric series unavailable: %s", exc)
+            return set(years)
+
+        return {
+            year for year in years
+            if covered.get(year) != TimeSeriesService.source_token(master, digests.get(year))
+        }
+
+    @staticmethod
+    async def _scope_company_ids(db: AsyncSession, entity_type: EntityType, entity_id: str) -> Optional[List[str]]:
+        if entity_type is EntityType.COMPANY:
+            return [entity_id]
+        if entity_type is EntityType.CLUSTER:
+            rows = await db.execute(select(Company.id).where(Company.cluster_id == entity_id))
+            return [row[0] for row in rows.all()]
+        return None
+
+    @staticmethod
+    async def _live_rows(
+        db: AsyncSession,
+        years: Sequence[int],
+        entity_type: EntityType,
+        entity_id: str,
+        scenario: str,
+        metrics: Sequence[str],
+    ) -> List[Tuple[str, int, List[Optional[float]]]]:
+        """The same (metric, year, months) rows as the store, computed from the view."""
+        company_ids = await TimeSeriesService._scope_company_ids(db, entity_type, entity_id)
+        if company_ids is not None and not company_ids:
+            return []
+        sums: Dict[Tuple[str, int], List[Optional[float]]] = {}
+        years = sorted(years)
+        for record in await PeriodSnapshotService.load_records(
+            db, scenario, year_from=years[0], year_to=years[-1], company_ids=company_ids
+        ):
+            if record.year not in years:
+                continue
+            for metric in metrics:
+                months = sums.setdefault((metric, record.year), [None] * 12)
+                months[record.month - 1] = (months[record.month - 1] or 0.0) + _record_value(record, metric)
+        return [(metric, year, months) for (metric, year), months in sums.items()]
+
+    @staticmethod
+    async def fetch(
+        db: AsyncSession,
+        metrics: Sequence[str],
+        year_from: int,
+        year_to: int,
+        *,
+        entity_type: EntityType = EntityType.GROUP,
+        entity_id: str = GROUP_ENTITY_ID,
+        scenario: str = "ACTUAL",
+        grain: Grain = Grain.MONTH,
+        rates: Optional[FxRateTable] = None,
+    ) -> SeriesFrame:
+        """
+        Series for every metric over [year_from, year_to] in one read. Unknown
+        metrics are ignored; pass rates to convert revenue_usd at published rates.
+        """
+        scenario = str(getattr(scenario, "value", scenario))
+        years = list(range(year_from, year_to + 1))
+        components = components_for(metrics)
+
+        stale = await TimeSeriesService.stale_years(db, years)
+        fresh = [year for year in years if year not in stale]
+        rows: List[Tuple[str, int, Sequence[Optional[float]]]] = []
+        if fresh:
+            stored = await db.execute(
+                select(metric_series.c.metric, metric_series.c.year, metric_series.c.vals).where(
+                    and_(
+                        metric_series.c.entity_type == entity_type.value,
+                        metric_series.c.entity_id == entity_id,
+                        metric_series.c.scenario == scenario,
+                        metric_series.c.metric.in_(components),
+                        metric_series.c.year.between(fresh[0], fresh[-1]),
+                    )
+                )
+            )
+            rows.extend(row for row in stored.all() if row[1] not in stale)
+        if stale:
+            rows.extend(await TimeSeriesService._live_rows(db, sorted(stale), entity_type, entity_id, scenario, components))
+        _stats["store_years_read"] += len(fresh)
+        _stats["live_years_read"] += len(stale)
+
+        monthly = assemble(rows, year_from, year_to, components)
+        if rates is not None:
+            apply_usd_rates(monthly, rates, year_from)
+        buckets, summed = downsample(monthly, year_from, grain)
+        present = [bool(count) for count in summed["rows"]]
+        return SeriesFrame(grain, buckets, present, derive(summed, metrics))
+
+    @staticmethod
+    async def refresh(db: AsyncSession) -> List[int]:
+        """
+        Rebuild every year whose data changed since it was last built. Returns
+        the refreshed years ([] if another worker holds the lock).
+        """
+        locked = (await db.execute(
+            text("SELECT pg_try_advisory_xact_lock(hashtext('analytics.metric_series'))")
+        )).scalar()
+        if not locked:
+            return []
+        covered = dict((await db.execute(
+            select(metric_series_year.c.year, metric_series_year.c.source_token)
+        )).all())
+        master, digests = await TimeSeriesService._year_sources(db)
+        sources = {
+            year: TimeSeriesService.source_token(master, digests.get(year))
+            for year in set(digests) | set(covered)
+        }
+
+        years = sorted(year for year, source in sources.items() if covered.get(year) != source)
+        if years:
+            await db.execute(
+                text("SELECT analytics.refresh_metric_series(CAST(:years AS integer[]), CAST(:sources AS text[]))"),
+                {"years": years, "sources": [sources[year] for year in years]},
+            )
+        await db.commit()
+        if years:
+            _stats["refreshes"] += 1
+            _stats["years_refreshed"] += len(years)
+            logger.info("Refreshed metric series for %s", years)
+        return years
+
+    @staticmethod
+    def snapshot() -> Dict[str, Any]:
+        return {"maintainer_running": series_maintainer.running, **_stats}
+
+
+class SeriesMaintainer:
+    """Background task calling TimeSeriesService.refresh on the primary."""
+
+    def __init__(self, interval: float = 5.0, session_factory=AsyncSessionLocal):
+        self.interval = interval
+        self.session_factory = session_factory
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self.last_error: Optional[str] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done() and not self._stopping
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._stopping = False
+        self._task = asyncio.create_task(self._run(), name="metric-series-maintainer")
+        logger.info("Metric series maintainer started (interval=%ss)", self.interval)
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._stopping = True
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self._task = None
+
+    async def _run(self) -> None:
+        while not self._stopping:
+            try:
+                async with self.session_factory() as db:
+                    await TimeSeriesService.refresh(db)
+                self.last_error = None
+            except SQLAlchemyError as exc:
+                # Typically: not migrated yet. Reads stay live meanwhile.
+                if self.last_error is None:
+                    logger.warning("Metric series refresh failed: %s", exc)
+                self.last_error = str(exc)
+            await asyncio.sleep(self.interval)
+
+
+series_maintainer = SeriesMaintainer(interval=settings.timeseries_refresh_seconds)
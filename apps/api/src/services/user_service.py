@@ -46,7 +46,7 @@ class UserService:
     ) -> User:
         user = User(
             email=email,
-            password_hash=AuthService.hash_password(password),
+            password_hash=await AuthService.hash_password_async(password),
             name=name,
             role=role,
             company_id=UUID(company_id) if company_id else None,
@@ -18,10 +18,12 @@ from fastapi import BackgroundTasks
 import logging
 
 from src.db.models import (
-    Report, ReportStatus, ReportComment, AuditLog,
+    Report, ReportStatus, ReportComment,
     User, UserRole, Company, Notification
 )
 from src.config.settings import settings
+from src.services.anomaly_service import AnomalyService
+from src.services.audit_service import AuditService
 from src.services.notification_service import NotificationService
 from src.services.email_outbox_service import EmailOutboxService
 
@@ -88,17 +90,16 @@ class WorkflowService:
         entity_type: str,
         entity_id: str,
         details: Optional[str] = None
-    ) -> AuditLog:
-        """Create an audit log entry"""
-        audit = AuditLog(
-            user_id=UUID(user_id) if user_id != "system" else None,
-            action=action,
+    ) -> str:
+        """Record an audit log entry; written once the workflow transaction commits"""
+        return AuditService.record(
+            db,
+            action,
+            user_id=user_id if user_id != "system" else None,
             entity_type=entity_type,
             entity_id=entity_id,
-            details=details
+            details=details,
         )
-        db.add(audit)
-        return audit
     
     # ============ WORKFLOW ACTIONS ============
     
@@ -238,6 +239,7 @@ class WorkflowService:
         2. Create audit log
         3. Create notification for author
         4. Send email to author (async)
+        5. Fold the actuals into the anomaly baselines
         """
         report = await WorkflowService.get_report_with_relations(db, report_id)
         if not report:
@@ -298,7 +300,10 @@ class WorkflowService:
                 )
                 logger.info(f"Queued approval email for {author.email}")
         
-        # 4. Commit all DB changes
+        # 4. Fold the approved actuals into the anomaly baselines
+        await AnomalyService.record_approved(db, [(report.company_id, report.period_id)])
+        
+        # 5. Commit all DB changes
         await db.commit()
         await db.refresh(report)
         
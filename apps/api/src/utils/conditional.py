@@ -0,0 +1,121 @@
+"""
+Conditional GET support for analytics endpoints.
+
+Handlers take a ConditionalRequest dependency and call check() once they have
+resolved their parameters and passed their permission checks. check() derives a
+strong ETag from the request (path, query, resolved params, caller scope) and a
+data-version token, sets it on the response, and returns a 304 response when
+If-None-Match already matches, so the handler can return before running its
+aggregation:
+
+    not_modified = await conditional.check(db, years=[year - 1, year], params=(year, month))
+    if not_modified:
+        return not_modified
+"""
+import hashlib
+from typing import Any, Iterable, Optional, Sequence, Tuple
+
+from fastapi import Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.db.session import open_read_session
+from src.services.data_version_service import DataVersionService
+from src.services.fx_service import FxService
+
+# Bump when response shapes change so clients do not keep pre-deploy bodies.
+ETAG_SCHEMA_VERSION = "1"
+
+CACHE_CONTROL = "private, no-cache"
+
+
+def make_etag(*parts: Any) -> str:
+    digest = hashlib.sha256("\x1f".join(str(p) for p in parts).encode("utf-8")).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match uses weak comparison: W/ prefixes are ignored."""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def years_around(year: int) -> Sequence[int]:
+    """Years a single-period endpoint may read: the year itself plus the prior
+    year (fiscal years spanning January, prior-year comparisons)."""
+    return (year - 1, year)
+
+
+class ConditionalRequest:
+    """Request-scoped ETag / If-None-Match helper (use as a FastAPI dependency)."""
+
+    def __init__(self, request: Request, response: Response):
+        self.request = request
+        self.response = response
+        self.etag: Optional[str] = None
+        # Data-version token behind the ETag; None until check() finds one.
+        self.token: Optional[str] = None
+
+    def _headers(self) -> dict:
+        return {
+            "ETag": self.etag,
+            "Cache-Control": CACHE_CONTROL,
+            "Vary": "Authorization",
+        }
+
+    async def check(
+        self,
+        db: Optional[AsyncSession] = None,
+        *,
+        years: Optional[Iterable[int]] = None,
+        company_ids: Optional[Iterable[str]] = None,
+        scope: str = "all",
+        params: Sequence[Any] = (),
+    ) -> Optional[Response]:
+        """
+        Compute the ETag; return a 304 Response if the client already has it.
+
+        scope must capture anything caller-specific the body depends on (e.g.
+        a company-access fingerprint); params the handler's resolved values
+        such as a defaulted "current" period.
+        """
+        if db is None:
+            async with open_read_session() as session:
+                token, fx_version = await self._versions(session, years, company_ids)
+        else:
+            token, fx_version = await self._versions(db, years, company_ids)
+        if token is None:
+            return None
+        self.token = token
+
+        query = sorted(self.request.query_params.multi_items())
+        self.etag = make_etag(
+            ETAG_SCHEMA_VERSION, self.request.url.path, query, tuple(params), scope, token, fx_version,
+        )
+        headers = self._headers()
+        if etag_matches(self.request.headers.get("if-none-match"), self.etag):
+            return Response(status_code=304, headers=headers)
+        self.response.headers.update(headers)
+        return None
+
+    @staticmethod
+    async def _versions(
+        db: AsyncSession,
+        years: Optional[Iterable[int]],
+        company_ids: Optional[Iterable[str]],
+    ) -> Tuple[Optional[str], Optional[str]]:
+        """Data-version token and FX rate version behind the ETag."""
+        token = await DataVersionService.token(db, years, company_ids)
+        if token is None:
+            return None, None
+        # FX rates are not covered by data_version but feed converted figures. Refresh
+        # them here too: a worker answering only 304s never reaches FxService.rates().
+        return token, (await FxService.rates(db)).version
@@ -0,0 +1,223 @@
+"""
+Managed executors for work that must not run on the event loop.
+
+- render pool: a process pool for CPU-bound report rendering (ReportLab,
+  openpyxl). Workers preload fonts and logo assets once at start-up.
+- hash pool: a thread pool for bcrypt, which releases the GIL.
+
+Each pool caps how many jobs may be in flight or queued. Past that cap,
+submissions fail fast with ExecutorSaturatedError, which routers turn into
+503 + Retry-After, so a burst of exports cannot build an unbounded backlog.
+Queue depth and timing counters are exposed via stats() for /health.
+"""
+import asyncio
+import functools
+import logging
+import multiprocessing
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from src.config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+class ExecutorSaturatedError(Exception):
+    """Raised when a pool's queue is full; carries a retry hint in seconds."""
+
+    def __init__(self, pool: str, retry_after: int):
+        super().__init__(f"{pool} executor is busy, retry in {retry_after}s")
+        self.pool = pool
+        self.retry_after = retry_after
+
+
+class ManagedExecutor:
+    """
+    Bounded wrapper around a concurrent.futures executor.
+
+    max_pending counts running plus queued jobs. Stats track wait time
+    (submit -> start) separately from run time so saturation is visible.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        factory: Callable[[], Executor],
+        workers: int,
+        max_pending: int,
+        kind: str = "thread",
+    ):
+        self.name = name
+        self.workers = workers
+        self.max_pending = max_pending
+        self.kind = kind
+        self._factory = factory
+        self._executor: Optional[Executor] = None
+        self._pending = 0
+        self._stats: Dict[str, float] = {
+            "submitted": 0,
+            "completed": 0,
+            "failed": 0,
+            "rejected": 0,
+            "wait_seconds_total": 0.0,
+            "run_seconds_total": 0.0,
+            "max_wait_seconds": 0.0,
+            "max_run_seconds": 0.0,
+        }
+
+    def start(self) -> None:
+        if self._executor is None:
+            self._executor = self._factory()
+            logger.info("%s executor started (workers=%s, max_pending=%s)", self.name, self.workers, self.max_pending)
+
+    def shutdown(self, wait: bool = True) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=not wait)
+            self._executor = None
+            logger.info("%s executor stopped", self.name)
+
+    @property
+    def queue_depth(self) -> int:
+        """Jobs submitted but not yet picked up by a worker."""
+        return max(self._pending - self.workers, 0)
+
+    def retry_after(self) -> int:
+        mean_run = (
+            self._stats["run_seconds_total"] / self._stats["completed"]
+            if self._stats["completed"] else 1.0
+        )
+        return max(1, int(mean_run * (self.queue_depth + 1) / max(self.workers, 1)) + 1)
+
+    async def run(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Run fn(*args, **kwargs) in the pool, or raise ExecutorSaturatedError."""
+        if self._pending >= self.max_pending:
+            self._stats["rejected"] += 1
+            raise ExecutorSaturatedError(self.name, self.retry_after())
+
+        self.start()
+        self._pending += 1
+        self._stats["submitted"] += 1
+        submitted_at = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        try:
+            call = functools.partial(_timed_call, fn, *args, **kwargs)
+            result, started_at, finished_at = await loop.run_in_executor(self._executor, call)
+        except Exception:
+            self._stats["failed"] += 1
+            raise
+        finally:
+            self._pending -= 1
+
+        # perf_counter is system-wide on the platforms we deploy to, so the
+        # worker's timestamps are comparable with the loop's.
+        wait = max(started_at - submitted_at, 0.0)
+        run = max(finished_at - started_at, 0.0)
+        self._stats["completed"] += 1
+        self._stats["wait_seconds_total"] += wait
+        self._stats["run_seconds_total"] += run
+        self._stats["max_wait_seconds"] = max(self._stats["max_wait_seconds"], wait)
+        self._stats["max_run_seconds"] = max(self._stats["max_run_seconds"], run)
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        completed = self._stats["completed"] or 1
+        return {
+            "name": self.name,
+            "kind": self.kind,
+            "started": self._executor is not None,
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "in_flight": self._pending,
+            "queue_depth": self.queue_depth,
+            "submitted": int(self._stats["submitted"]),
+            "completed": int(self._stats["completed"]),
+            "failed": int(self._stats["failed"]),
+            "rejected": int(self._stats["rejected"]),
+            "avg_wait_ms": round(self._stats["wait_seconds_total"] / completed * 1000, 2),
+            "avg_run_ms": round(self._stats["run_seconds_total"] / completed * 1000, 2),
+            "max_wait_ms": round(self._stats["max_wait_seconds"] * 1000, 2),
+            "max_run_ms": round(self._stats["max_run_seconds"] * 1000, 2),
+        }
+
+
+def _timed_call(fn: Callable[..., Any], *args: Any, **kwargs: Any):
+    started_at = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, started_at, time.perf_counter()
+
+
+def _init_render_worker() -> None:
+    """Process-pool initializer: pay font / logo / stylesheet loading once per worker."""
+    from src.services.admin_report_service import warm_render_assets
+
+    warm_render_assets()
+
+
+def _render_executor_factory() -> Executor:
+    workers = settings.render_pool_workers
+    if workers <= 0:
+        # Process pool disabled (e.g. constrained containers): fall back to one thread.
+        return ThreadPoolExecutor(max_workers=1, thread_name_prefix="render", initializer=_init_render_worker)
+    # spawn: never fork an interpreter that is running an event loop and DB pool.
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_render_worker,
+    )
+
+
+render_executor = ManagedExecutor(
+    name="render",
+    factory=_render_executor_factory,
+    workers=max(settings.render_pool_workers, 1),
+    max_pending=settings.render_pool_max_pending,
+    kind="process" if settings.render_pool_workers > 0 else "thread",
+)
+
+hash_executor = ManagedExecutor(
+    name="hash",
+    factory=lambda: ThreadPoolExecutor(
+        max_workers=settings.hash_pool_workers, thread_name_prefix="bcrypt"
+    ),
+    workers=settings.hash_pool_workers,
+    max_pending=settings.hash_pool_max_pending,
+)
+
+
+async def run_render(fn: Callable[..., Any], *args: Any) -> Any:
+    """Render in the process pool. fn and args must be picklable."""
+    return await render_executor.run(fn, *args)
+
+
+async def run_hash(fn: Callable[..., Any], *args: Any) -> Any:
+    return await hash_executor.run(fn, *args)
+
+
+def _ping() -> bool:
+    return True
+
+
+def start_executors() -> None:
+    render_executor.start()
+    hash_executor.start()
+
+
+async def warm_executors() -> None:
+    """Spawn the render workers now (running their initializer) rather than on the first export."""
+    await asyncio.gather(
+        *(render_executor.run(_ping) for _ in range(render_executor.workers)),
+        return_exceptions=True,
+    )
+
+
+def shutdown_executors() -> None:
+    render_executor.shutdown(wait=True)
+    hash_executor.shutdown(wait=True)
+
+
+def executor_stats() -> Dict[str, Any]:
+    return {
+        "render": render_executor.stats(),
+        "hash": hash_executor.stats(),
+    }
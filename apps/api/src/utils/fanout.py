@@ -0,0 +1,121 @@
+"""
+Concurrent fan-out of independent read queries within one request.
+
+A composite dashboard issues several queries that do not depend on each
+other (clusters, companies, actuals, budgets, YTD, reporting counts). On one
+AsyncSession they can only run one after another, so the handler takes the
+sum of their latencies. fan_out runs each on its own pooled session instead,
+so the handler takes roughly as long as the slowest one.
+
+- at most `limit` queries of one fan-out run at once (fanout_max_concurrency),
+  so a single request cannot drain the connection pool
+- the first failure cancels the queries still running or waiting, and is
+  re-raised as is (an HTTPException stays an HTTPException)
+- results come back in argument order
+
+Each query gets a fresh session from session_factory (open_read_session by
+default, so replica routing and read-your-writes still apply). Objects it
+returns are detached once its session closes: read their loaded columns, do
+not rely on lazy-loaded relationships.
+"""
+import asyncio
+import logging
+from typing import Any, AsyncContextManager, Awaitable, Callable, Dict, List, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.config.settings import settings
+from src.db.session import open_read_session
+
+logger = logging.getLogger(__name__)
+
+Query = Callable[[AsyncSession], Awaitable[Any]]
+
+_stats: Dict[str, int] = {
+    "fanouts": 0,
+    "queries": 0,
+    "failed": 0,
+    "cancelled": 0,
+    "max_concurrent": 0,
+}
+
+
+def scalars_of(statement, params: Optional[Dict[str, Any]] = None) -> Query:
+    """Query returning every scalar of a statement (result.scalars().all())."""
+    async def run(db: AsyncSession):
+        return (await db.execute(statement, params)).scalars().all()
+    return run
+
+
+def scalar_of(statement, params: Optional[Dict[str, Any]] = None) -> Query:
+    """Query returning a statement's single scalar (or None)."""
+    async def run(db: AsyncSession):
+        return (await db.execute(statement, params)).scalar()
+    return run
+
+
+def rows_of(statement, params: Optional[Dict[str, Any]] = None) -> Query:
+    """Query returning every row of a statement."""
+    async def run(db: AsyncSession):
+        return (await db.execute(statement, params)).all()
+    return run
+
+
+async def fan_out(
+    *queries: Query,
+    limit: Optional[int] = None,
+    session_factory: Optional[Callable[[], AsyncContextManager[AsyncSession]]] = None,
+) -> List[Any]:
+    """
+    Run each query(session) concurrently on its own session and return their
+    results in order. Raises the first failure after cancelling the rest.
+    """
+    if not queries:
+        return []
+    factory = session_factory or open_read_session
+    gate = asyncio.Semaphore(max(1, limit or settings.fanout_max_concurrency))
+    failures: List[BaseException] = []
+    active = 0
+
+    async def run(query: Query) -> Any:
+        nonlocal active
+        async with gate:
+            if failures:
+                # A sibling already failed; do not start queued work.
+                raise asyncio.CancelledError
+            active += 1
+            _stats["max_concurrent"] = max(_stats["max_concurrent"], active)
+            try:
+                async with factory() as session:
+                    return await query(session)
+            except asyncio.CancelledError:
+                raise
+            except BaseException as exc:
+                failures.append(exc)
+                raise
+            finally:
+                active -= 1
+
+    _stats["fanouts"] += 1
+    _stats["queries"] += len(queries)
+    tasks = [asyncio.create_task(run(query)) for query in queries]
+    try:
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+    finally:
+        # Reached on the first failure, or when the caller itself is cancelled.
+        pending = [task for task in tasks if not task.done()]
+        for task in pending:
+            task.cancel()
+        if pending:
+            _stats["cancelled"] += len(pending)
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    if failures:
+        _stats["failed"] += 1
+        logger.debug("Fan-out of %d queries failed: %r", len(queries), failures[0])
+        raise failures[0]
+    return [task.result() for task in tasks]
+
+
+def snapshot() -> Dict[str, Any]:
+    return {"max_concurrency": settings.fanout_max_concurrency, **_stats}
@@ -0,0 +1,94 @@
+"""
+NDJSON streaming of independently computed sections.
+
+A bundle endpoint computes several sections concurrently and writes each one
+as a line as soon as it is done, so the client renders the fast sections
+while the slow ones are still running:
+
+    {"id": "risk", "section": "risk_radar", "status": 200, "data": {...}}
+    {"id": "trend", "section": "pbt_trend", "status": 404, "error": "Company not found"}
+    {"done": true, "sections": 2, "failed": 1, "ms": 84.2}
+
+A failing section is reported on its own line (HTTPException status and
+detail, or 500) and does not affect the others. The final line tells the
+client the stream is complete. If the client disconnects, sections still
+running are cancelled.
+"""
+import asyncio
+import json
+import logging
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Sequence, Tuple
+
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+
+from src.config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+# (id, section name, compute)
+Section = Tuple[str, str, Callable[[], Awaitable[Any]]]
+
+
+def section_ids(requests: Sequence[Any]) -> List[str]:
+    """
+    Line IDs for a bundle's section requests (their id, else their section
+    name). Raises 400 for too many sections or duplicate IDs.
+    """
+    if len(requests) > settings.bundle_max_sections:
+        raise HTTPException(
+            status_code=400, detail=f"A bundle may request at most {settings.bundle_max_sections} sections"
+        )
+    ids = [request.id or request.section.value for request in requests]
+    duplicates = sorted({section_id for section_id in ids if ids.count(section_id) > 1})
+    if duplicates:
+        raise HTTPException(status_code=400, detail=f"Duplicate section ids: {', '.join(duplicates)}; set a distinct id")
+    return ids
+
+
+async def _run(section_id: str, name: str, compute: Callable[[], Awaitable[Any]]) -> Dict[str, Any]:
+    line: Dict[str, Any] = {"id": section_id, "section": name}
+    try:
+        line["data"] = jsonable_encoder(await compute())
+        line["status"] = 200
+    except HTTPException as exc:
+        line["status"] = exc.status_code
+        line["error"] = exc.detail
+    except Exception:
+        logger.exception("Bundle section %s (%s) failed", section_id, name)
+        line["status"] = 500
+        line["error"] = "Internal error"
+    return line
+
+
+async def stream_sections(sections: Sequence[Section]) -> AsyncIterator[bytes]:
+    """Run the sections concurrently and yield one NDJSON line per section, in completion order."""
+    started = time.monotonic()
+    tasks = [asyncio.create_task(_run(section_id, name, compute)) for section_id, name, compute in sections]
+    failed = 0
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            line = await next_done
+            failed += line["status"] != 200
+            yield (json.dumps(line, separators=(",", ":")) + "\n").encode()
+    finally:
+        pending = [task for task in tasks if not task.done()]
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+    summary = {"done": True, "sections": len(tasks), "failed": failed, "ms": round((time.monotonic() - started) * 1000, 1)}
+    yield (json.dumps(summary, separators=(",", ":")) + "\n").encode()
+
+
+def ndjson_response(sections: Sequence[Section]) -> StreamingResponse:
+    return StreamingResponse(
+        stream_sections(sections),
+        media_type=NDJSON_MEDIA_TYPE,
+        # Proxies must not buffer the stream, or the client sees every section at once.
+        headers={"Cache-Control": "no-store", "X-Accel-Buffering": "no"},
+    )
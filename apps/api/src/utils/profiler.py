@@ -0,0 +1,655 @@
+"""
+On-demand sampling profiler for live requests.
+
+An admin starts a session (/admin/profiler) for a route pattern and a
+percentage of matching requests, for a bounded time. While it runs:
+
+- ProfilerMiddleware registers each selected request's task
+- a task factory links tasks created on behalf of a profiled request
+  (gather, fan-out, task groups) to their parent task
+- a sampler thread wakes every interval and reads the event loop thread's
+  stack. If the running task belongs to a profiled request, the stack is
+  recorded with the suspended await chains of its parent tasks in front,
+  separated by "[task <name>]" frames. In wall mode, profiled tasks that are
+  waiting (on the database, a lock, a child task) are sampled as well, with
+  an "[await <what>]" leaf, so I/O time shows up next to CPU time.
+
+Stacks are aggregated per function and root-labelled with the request's
+route. Finished sessions render as folded stacks (flamegraph.pl, speedscope,
+inferno), a self-contained SVG flame graph, or top-N hotspot tables.
+
+With no session running the middleware costs one attribute check per request
+and nothing else is installed. C code (Decimal arithmetic, pydantic-core
+validation) is attributed to the Python function that called it; work sent
+to the render process pool (ReportLab, openpyxl) appears as the await on the
+executor.
+
+A session runs in the worker that received /start and samples only the
+requests that worker serves; its summary carries that worker's pid. With a
+store directory (profiler_store_dir, shared by the workers of one host) a
+session is saved when it starts and when it finishes, so any worker can
+list it, refuse a second session while it runs, pass on a /stop to its
+owner and serve its results once finished.
+"""
+import asyncio
+import fnmatch
+import html
+import json
+import logging
+import os
+import random
+import sys
+import threading
+import time
+import tempfile
+import uuid
+import zlib
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from src.config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+Stack = Tuple[str, ...]
+
+MODES = ("cpu", "wall")
+
+
+class ProfilerBusyError(Exception):
+    """Raised when a session is started while another is running."""
+
+
+# ============ STACK CAPTURE ============
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    module = frame.f_globals.get("__name__", "?")
+    return f"{getattr(code, 'co_qualname', code.co_name)} ({module}:{code.co_firstlineno})".replace(";", ",")
+
+
+def _frame_stack(leaf, stop, max_depth: int) -> Optional[List[str]]:
+    """Labels from `stop` (outermost) to `leaf`, or None if `stop` is not below leaf."""
+    labels = []
+    frame = leaf
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        if frame is stop:
+            labels.reverse()
+            return labels[-max_depth:]
+        frame = frame.f_back
+    return None
+
+
+def _await_chain(coro) -> Tuple[List[str], Any]:
+    """Frames of a suspended coroutine chain, outermost first, and the object it finally waits on."""
+    labels = []
+    while coro is not None:
+        frame = getattr(coro, "cr_frame", None) or getattr(coro, "gi_frame", None) or getattr(coro, "ag_frame", None)
+        if frame is None:
+            break
+        labels.append(_frame_label(frame))
+        coro = getattr(coro, "cr_await", None) or getattr(coro, "gi_yieldfrom", None) or getattr(coro, "ag_await", None)
+    return labels, coro
+
+
+def _awaiting_label(awaited: Any) -> str:
+    if awaited is None:
+        return "[await]"
+    if isinstance(awaited, asyncio.Task):
+        return f"[await task {awaited.get_name()}]"
+    return f"[await {type(awaited).__name__}]"
+
+
+def _below_middleware(stack: Stack) -> Stack:
+    """Drop the server frames outside ProfilerMiddleware; they are the same for every request."""
+    for i, label in enumerate(stack):
+        if label.startswith("ProfilerMiddleware.__call__ "):
+            return stack[i + 1:]
+    return stack
+
+
+# ============ SESSIONS ============
+
+@dataclass
+class RequestCapture:
+    """Samples for one profiled request; root-labelled with its route when it ends."""
+    label: str
+    root: asyncio.Task
+    counts: Counter = field(default_factory=Counter)
+
+
+@dataclass
+class ProfileSession:
+    route: str
+    sample_percent: float
+    duration_seconds: float
+    interval_ms: float
+    mode: str
+    max_requests: int
+    started_by: Optional[str] = None
+    id: str = field(default_factory=lambda: uuid.uuid4().hex[:12])
+    # Worker running the session
+    pid: int = field(default_factory=os.getpid)
+    started_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    expires_at: float = 0.0
+    finished_at: Optional[datetime] = None
+    stop_reason: Optional[str] = None
+    matched: int = 0
+    profiled: int = 0
+    samples: int = 0
+    ticks: int = 0
+    # Ticks that fired later than twice the interval (GIL held by a long C call, busy host).
+    late_ticks: int = 0
+    counts: Counter = field(default_factory=Counter)
+
+    @property
+    def running(self) -> bool:
+        return self.finished_at is None
+
+    @property
+    def ends_at(self) -> float:
+        """Epoch seconds at which the session expires (comparable across workers)."""
+        return self.started_at.timestamp() + self.duration_seconds
+
+    def wants(self, path: str) -> bool:
+        if not fnmatch.fnmatchcase(path, self.route):
+            return False
+        self.matched += 1
+        if self.profiled >= self.max_requests:
+            return False
+        return self.sample_percent >= 100 or random.random() * 100 < self.sample_percent
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "pid": self.pid,
+            "route": self.route,
+            "sample_percent": self.sample_percent,
+            "mode": self.mode,
+            "interval_ms": self.interval_ms,
+            "duration_seconds": self.duration_seconds,
+            "max_requests": self.max_requests,
+            "started_by": self.started_by,
+            "started_at": self.started_at.isoformat(),
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "running": self.running,
+            "stop_reason": self.stop_reason,
+            "matched_requests": self.matched,
+            "profiled_requests": self.profiled,
+            "samples": self.samples,
+            "ticks": self.ticks,
+            "late_ticks": self.late_ticks,
+            "distinct_stacks": len(self.counts),
+        }
+
+    def record(self) -> Dict[str, Any]:
+        """What the store keeps: the summary, plus the stacks once finished."""
+        record: Dict[str, Any] = {"summary": self.summary()}
+        if not self.running:
+            record["counts"] = [[list(stack), count] for stack, count in self.counts.items()]
+        return record
+
+    @classmethod
+    def from_record(cls, record: Dict[str, Any]) -> "ProfileSession":
+        summary = record["summary"]
+        finished_at = summary["finished_at"]
+        return cls(
+            route=summary["route"],
+            sample_percent=summary["sample_percent"],
+            duration_seconds=summary["duration_seconds"],
+            interval_ms=summary["interval_ms"],
+            mode=summary["mode"],
+            max_requests=summary["max_requests"],
+            started_by=summary["started_by"],
+            id=summary["id"],
+            pid=summary["pid"],
+            started_at=datetime.fromisoformat(summary["started_at"]),
+            finished_at=datetime.fromisoformat(finished_at) if finished_at else None,
+            stop_reason=summary["stop_reason"],
+            matched=summary["matched_requests"],
+            profiled=summary["profiled_requests"],
+            samples=summary["samples"],
+            ticks=summary["ticks"],
+            late_ticks=summary["late_ticks"],
+            counts=Counter({tuple(stack): count for stack, count in record.get("counts", [])}),
+        )
+
+    # ============ OUTPUT ============
+
+    def folded(self) -> str:
+        """One "frame;frame;frame count" line per distinct stack (Brendan Gregg's folded format)."""
+        return "".join(f"{';'.join(stack)} {count}\n" for stack, count in sorted(self.counts.items()))
+
+    def hotspots(self, top: int = 20) -> Dict[str, Any]:
+        """Top functions by self and inclusive samples, and samples per leaf package and per route."""
+        total = sum(self.counts.values())
+        own: Counter = Counter()
+        inclusive: Counter = Counter()
+        packages: Counter = Counter()
+        routes: Counter = Counter()
+        for stack, count in self.counts.items():
+            routes[stack[0]] += count
+            leaf = stack[-1]
+            own[leaf] += count
+            packages[_package(leaf)] += count
+            for label in set(stack[1:]):
+                inclusive[label] += count
+
+        def rows(counter: Counter, key: str) -> List[Dict[str, Any]]:
+            return [
+                {key: label, "samples": n, "percent": round(100 * n / total, 2) if total else 0.0}
+                for label, n in counter.most_common(top)
+            ]
+
+        return {
+            "session": self.summary(),
+            "total_samples": total,
+            "self": rows(own, "function"),
+            "inclusive": rows(inclusive, "function"),
+            "packages": rows(packages, "package"),
+            "routes": rows(routes, "route"),
+        }
+
+    def flamegraph_svg(self, width: int = 1200, frame_height: int = 16) -> str:
+        return render_flamegraph(self.counts, title=f"{self.route} ({self.mode}, {self.samples} samples)",
+                                 width=width, frame_height=frame_height)
+
+
+def _package(label: str) -> str:
+    """Leaf frame's top-level package; application code is split by its second level (src.routers, ...)."""
+    if label.startswith("[await"):
+        return "(awaiting)"
+    if label.startswith("["):
+        return label
+    module = label.rsplit("(", 1)[-1].split(":", 1)[0]
+    parts = module.split(".")
+    return ".".join(parts[:2]) if parts[0] == "src" and len(parts) > 1 else parts[0]
+
+
+# ============ FLAME GRAPH ============
+
+def render_flamegraph(counts: Counter, title: str = "", width: int = 1200, frame_height: int = 16) -> str:
+    """Self-contained SVG flame graph (root at the bottom); hover a frame for its samples."""
+    tree: Dict[str, Any] = {"n": 0, "children": {}}
+    for stack, count in counts.items():
+        node = tree
+        node["n"] += count
+        for label in stack:
+            node = node["children"].setdefault(label, {"n": 0, "children": {}})
+            node["n"] += count
+
+    def depth(node) -> int:
+        return 1 + max((depth(child) for child in node["children"].values()), default=0)
+
+    total = tree["n"] or 1
+    levels = depth(tree) - 1
+    header = 24
+    height = header + max(1, levels) * frame_height + 4
+    scale = (width - 20) / total
+    rects: List[str] = []
+
+    def draw(node, label: str, x: float, level: int) -> None:
+        w = node["n"] * scale
+        if w < 0.3:
+            return
+        y = height - 4 - (level + 1) * frame_height
+        hue = zlib.crc32(_package(label).encode()) % 60
+        text = html.escape(label)
+        percent = 100 * node["n"] / total
+        rects.append(
+            f'<g><title>{text} - {node["n"]} samples ({percent:.2f}%)</title>'
+            f'<rect x="{x:.2f}" y="{y}" width="{w:.2f}" height="{frame_height - 1}" '
+            f'fill="hsl({hue},85%,{55 + hue % 15}%)" rx="2"/>'
+            + (f'<text x="{x + 3:.2f}" y="{y + frame_height - 5}">{html.escape(label[: int(w / 7)])}</text>'
+               if w > 35 else "")
+            + "</g>"
+        )
+        child_x = x
+        for child_label, child in sorted(node["children"].items()):
+            draw(child, child_label, child_x, level + 1)
+            child_x += child["n"] * scale
+
+    x = 10.0
+    for label, child in sorted(tree["children"].items()):
+        draw(child, label, x, 0)
+        x += child["n"] * scale
+
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+        f'font-family="Verdana,sans-serif" font-size="11">'
+        f'<rect width="100%" height="100%" fill="#fafafa"/>'
+        f'<text x="{width / 2}" y="16" text-anchor="middle" font-size="14">{html.escape(title)}</text>'
+        + "".join(rects)
+        + "</svg>"
+    )
+
+
+# ============ PROFILER ============
+
+# A saved session still marked running this long after it should have ended lost its worker.
+_ABANDONED_AFTER_SECONDS = 10.0
+# How often the sampler thread looks for a /stop passed on by another worker.
+_STOP_CHECK_SECONDS = 0.5
+
+
+class SamplingProfiler:
+    """
+    Runs at most one session at a time (per store, or per process without
+    one) and keeps the last few finished ones. start/stop/begin/end run on the
+    event loop; _sample runs on the sampler thread and only reads loop state
+    (under the GIL) apart from the counters it updates under _lock.
+    """
+
+    def __init__(self, keep_sessions: int = 5, max_stack_depth: int = 128, store_dir: Optional[str] = None):
+        self.keep_sessions = keep_sessions
+        self.max_stack_depth = max_stack_depth
+        self.store_dir = Path(store_dir) if store_dir else None
+        self.session: Optional[ProfileSession] = None
+        self.finished: Deque[ProfileSession] = deque(maxlen=keep_sessions)
+        self._captures: Dict[asyncio.Task, RequestCapture] = {}
+        self._parents: Dict[asyncio.Task, asyncio.Task] = {}
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[int] = None
+        self._previous_factory = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # ============ SESSION CONTROL ============
+
+    def start(
+        self,
+        route: str = "*",
+        sample_percent: float = 100.0,
+        duration_seconds: float = 60.0,
+        interval_ms: Optional[float] = None,
+        mode: str = "cpu",
+        max_requests: Optional[int] = None,
+        started_by: Optional[str] = None,
+    ) -> ProfileSession:
+        if self.session is not None:
+            raise ProfilerBusyError(f"Session {self.session.id} is running until it expires or is stopped")
+        elsewhere = self.running_elsewhere()
+        if elsewhere is not None:
+            raise ProfilerBusyError(
+                f"Session {elsewhere.id} is running in worker {elsewhere.pid} until it expires or is stopped"
+            )
+        if mode not in MODES:
+            raise ValueError(f"mode must be one of {', '.join(MODES)}")
+        session = ProfileSession(
+            route=route,
+            sample_percent=sample_percent,
+            duration_seconds=min(duration_seconds, settings.profiler_max_seconds),
+            interval_ms=max(1.0, interval_ms or settings.profiler_interval_ms),
+            mode=mode,
+            max_requests=max_requests or settings.profiler_max_requests,
+            started_by=started_by,
+        )
+        session.expires_at = time.monotonic() + session.duration_seconds
+
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        self._previous_factory = self._loop.get_task_factory()
+        self._loop.set_task_factory(self._task_factory)
+        self._stop.clear()
+        self.session = session
+        self._thread = threading.Thread(target=self._run, args=(session,), name="profiler-sampler", daemon=True)
+        self._thread.start()
+        self._save(session)
+        logger.info("Profiler session %s started: %s %s%% %s for %ss",
+                    session.id, route, sample_percent, mode, session.duration_seconds)
+        return session
+
+    def stop(self, reason: str = "stopped") -> Optional[ProfileSession]:
+        """End the running session (if any) and return it."""
+        session = self.session
+        if session is None:
+            return None
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=1.0)
+        self._thread = None
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.set_task_factory(self._previous_factory)
+        self._previous_factory = None
+        for capture in {id(c): c for c in self._captures.values()}.values():
+            self._merge(session, capture)
+        self._captures.clear()
+        self._parents.clear()
+        self.session = None
+        session.finished_at = datetime.now(timezone.utc)
+        session.stop_reason = reason
+        self.finished.appendleft(session)
+        self._save(session)
+        if self.store_dir is not None:
+            self._stop_request_path(session).unlink(missing_ok=True)
+        logger.info("Profiler session %s %s: %d requests, %d samples", session.id, reason, session.profiled, session.samples)
+        return session
+
+    def get(self, session_id: str) -> Optional[ProfileSession]:
+        if self.session is not None and self.session.id == session_id:
+            return self.session
+        local = next((s for s in self.finished if s.id == session_id), None)
+        if local is not None or self.store_dir is None or not session_id.isalnum():
+            return local
+        return self._load(self.store_dir / f"{session_id}.json")
+
+    def running_elsewhere(self) -> Optional[ProfileSession]:
+        """A session another worker is running, from the store."""
+        return next((s for s in self._saved() if s.running and s.pid != os.getpid()), None)
+
+    def request_stop(self, session: ProfileSession) -> None:
+        """Ask the worker running session to stop it; its sampler notices within _STOP_CHECK_SECONDS."""
+        if self.store_dir is not None:
+            self._stop_request_path(session).touch()
+
+    def snapshot(self) -> Dict[str, Any]:
+        saved = self._saved()
+        active = self.session or next((s for s in saved if s.running), None)
+        finished = {s.id: s for s in self.finished}
+        for s in saved:
+            if not s.running:
+                finished.setdefault(s.id, s)
+        newest = sorted(finished.values(), key=lambda s: s.started_at, reverse=True)[:self.keep_sessions]
+        return {
+            "pid": os.getpid(),
+            "active": active.summary() if active else None,
+            "finished": [s.summary() for s in newest],
+        }
+
+    # ============ STORE ============
+
+    def _stop_request_path(self, session: ProfileSession) -> Path:
+        return self.store_dir / f"{session.id}.stop"
+
+    def _save(self, session: ProfileSession) -> None:
+        if self.store_dir is None:
+            return
+        try:
+            self.store_dir.mkdir(parents=True, exist_ok=True)
+            partial = self.store_dir / f".{session.id}.{os.getpid()}.tmp"
+            partial.write_text(json.dumps(session.record()))
+            os.replace(partial, self.store_dir / f"{session.id}.json")
+            if not session.running:
+                for stale in self._saved()[self.keep_sessions:]:
+                    (self.store_dir / f"{stale.id}.json").unlink(missing_ok=True)
+        except OSError as exc:
+            logger.warning("Profiler session %s not saved: %s", session.id, exc)
+
+    def _load(self, path: Path) -> Optional[ProfileSession]:
+        try:
+            session = ProfileSession.from_record(json.loads(path.read_text()))
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+        if session.running and time.time() > session.ends_at + _ABANDONED_AFTER_SECONDS:
+            # Its worker exited before saving the result.
+            session.finished_at = datetime.fromtimestamp(session.ends_at, timezone.utc)
+            session.stop_reason = "abandoned"
+        return session
+
+    def _saved(self) -> List[ProfileSession]:
+        """Sessions in the store, newest first."""
+        if self.store_dir is None or not self.store_dir.is_dir():
+            return []
+        sessions = [s for s in map(self._load, self.store_dir.glob("*.json")) if s is not None]
+        return sorted(sessions, key=lambda s: s.started_at, reverse=True)
+
+    # ============ REQUESTS ============
+
+    def begin(self, scope: Scope) -> Optional[RequestCapture]:
+        """Called by the middleware; returns a capture when this request is sampled."""
+        session = self.session
+        if session is None or not session.wants(scope["path"]):
+            return None
+        task = asyncio.current_task()
+        if task is None or task in self._captures:
+            return None
+        session.profiled += 1
+        capture = RequestCapture(label=f"{scope['method']} {scope['path']}", root=task)
+        self._captures[task] = capture
+        return capture
+
+    def end(self, capture: RequestCapture, scope: Scope) -> None:
+        route = scope.get("route")
+        if getattr(route, "path", None):
+            # Template rather than the concrete path, so /reports/1 and /reports/2 aggregate.
+            capture.label = f"{scope['method']} {route.path}"
+        for task in [t for t, c in self._captures.items() if c is capture]:
+            self._captures.pop(task, None)
+            self._parents.pop(task, None)
+        if self.session is not None:
+            self._merge(self.session, capture)
+
+    def _merge(self, session: ProfileSession, capture: RequestCapture) -> None:
+        with self._lock:
+            for stack, count in capture.counts.items():
+                session.counts[(capture.label,) + stack] += count
+            capture.counts.clear()
+
+    def _task_factory(self, loop, coro, **kwargs):
+        if self._previous_factory is not None:
+            task = self._previous_factory(loop, coro, **kwargs)
+        else:
+            task = asyncio.Task(coro, loop=loop, **kwargs)
+        parent = asyncio.current_task(loop)
+        capture = self._captures.get(parent) if parent is not None else None
+        if capture is not None:
+            self._captures[task] = capture
+            self._parents[task] = parent
+            task.add_done_callback(self._forget)
+        return task
+
+    def _forget(self, task: asyncio.Task) -> None:
+        self._captures.pop(task, None)
+        self._parents.pop(task, None)
+
+    # ============ SAMPLING ============
+
+    def _run(self, session: ProfileSession) -> None:
+        interval = session.interval_ms / 1000
+        expected = time.monotonic() + interval
+        next_stop_check = expected + _STOP_CHECK_SECONDS
+        while not self._stop.wait(max(0.0, expected - time.monotonic())):
+            now = time.monotonic()
+            if now >= session.expires_at:
+                if self._loop is not None and not self._loop.is_closed():
+                    self._loop.call_soon_threadsafe(self._expire, session, "expired")
+                return
+            if self.store_dir is not None and now >= next_stop_check:
+                next_stop_check = now + _STOP_CHECK_SECONDS
+                if self._stop_request_path(session).exists():
+                    if self._loop is not None and not self._loop.is_closed():
+                        self._loop.call_soon_threadsafe(self._expire, session, "stopped")
+                    return
+            session.ticks += 1
+            if now - expected > interval:
+                session.late_ticks += 1
+            try:
+                self._sample(session)
+            except Exception:
+                # Racing a loop that is mid-switch; skip the tick.
+                logger.debug("Profiler sample skipped", exc_info=True)
+            expected = max(expected + interval, now)
+
+    def _expire(self, session: ProfileSession, reason: str) -> None:
+        if self.session is session:
+            self.stop(reason)
+
+    def _ancestry(self, task: asyncio.Task) -> List[str]:
+        """Suspended await chains of the task's profiled ancestors, outermost first."""
+        chain: List[str] = []
+        parent = self._parents.get(task)
+        child = task
+        while parent is not None:
+            labels, _ = _await_chain(parent.get_coro())
+            chain[:0] = labels + [f"[task {child.get_name()}]"]
+            child, parent = parent, self._parents.get(parent)
+        return chain
+
+    def _sample(self, session: ProfileSession) -> None:
+        current_tasks = getattr(asyncio.tasks, "_current_tasks", {})
+        running = current_tasks.get(self._loop)
+        captures = dict(self._captures)
+        recorded: List[Tuple[RequestCapture, Stack]] = []
+
+        capture = captures.get(running) if running is not None else None
+        if capture is not None:
+            leaf = sys._current_frames().get(self._loop_thread)
+            coro = running.get_coro()
+            root = getattr(coro, "cr_frame", None)
+            stack = _frame_stack(leaf, root, self.max_stack_depth) if leaf is not None and root is not None else None
+            if stack:
+                recorded.append((capture, tuple(self._ancestry(running) + stack)))
+
+        if session.mode == "wall":
+            waiting_parents = set(self._parents.values())
+            for task, task_capture in captures.items():
+                if task is running or task in waiting_parents or task.done():
+                    continue
+                labels, awaited = _await_chain(task.get_coro())
+                if labels:
+                    stack = self._ancestry(task) + labels[-self.max_stack_depth:] + [_awaiting_label(awaited)]
+                    recorded.append((task_capture, tuple(stack)))
+
+        if recorded:
+            with self._lock:
+                for task_capture, stack in recorded:
+                    task_capture.counts[_below_middleware(stack)] += 1
+                session.samples += len(recorded)
+
+
+profiler = SamplingProfiler(
+    keep_sessions=settings.profiler_keep_sessions,
+    max_stack_depth=settings.profiler_max_stack_depth,
+    store_dir=(
+        settings.profiler_store_dir if settings.profiler_store_dir is not None
+        else os.path.join(tempfile.gettempdir(), "mclarens-profiler")
+    ),
+)
+
+
+class ProfilerMiddleware:
+    """Registers sampled requests with the profiler; a plain pass-through when no session runs."""
+
+    def __init__(self, app: ASGIApp, sampler: Optional[SamplingProfiler] = None):
+        self.app = app
+        self.profiler = sampler or profiler
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if self.profiler.session is None or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        capture = self.profiler.begin(scope)
+        if capture is None:
+            await self.app(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.profiler.end(capture, scope)
@@ -0,0 +1,143 @@
+"""
+Request coalescing ("singleflight") for identical concurrent computations.
+
+When many callers ask for the same thing at once - e.g. every executive
+opening /ceo/dashboard for the same period at 9 a.m. - the first caller starts
+the computation and the rest await that same in-flight task. Nothing is cached:
+once the task finishes the key is released and the next call runs afresh.
+
+- the computation runs as its own task, so one caller disconnecting does not
+  cancel it for the others; it is cancelled only when every waiter has gone
+- an exception raised by the computation is re-raised to every waiter
+- each waiter's wait is bounded by a timeout (SingleFlightTimeout)
+
+Computations should open their own database session (open_read_session)
+rather than borrow the leader's request session, which is closed when the
+leader's request ends.
+"""
+import asyncio
+import hashlib
+import logging
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, Mapping, Optional, Tuple, TypeVar
+
+from src.config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class SingleFlightTimeout(Exception):
+    """Raised to a waiter whose coalesced computation did not finish in time."""
+
+    def __init__(self, key: Hashable, timeout: float):
+        super().__init__(f"Computation for {key!r} did not finish within {timeout}s")
+        self.key = key
+        self.timeout = timeout
+
+
+def company_fingerprint(company_ids: Optional[Iterable[str]]) -> str:
+    """Order-independent digest of a caller's visible companies; None (all companies) -> "all"."""
+    if company_ids is None:
+        return "all"
+    joined = "\x1f".join(sorted(set(company_ids)))
+    return hashlib.sha1(joined.encode("utf-8")).hexdigest()[:16]
+
+
+def make_key(endpoint: str, params: Mapping[str, Any], scope: str = "all") -> Tuple:
+    """Normalized key: params are sorted, enums reduced to their values."""
+    normalized = tuple(
+        sorted((name, getattr(value, "value", value)) for name, value in params.items())
+    )
+    return (endpoint, normalized, scope)
+
+
+class _Call:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: "asyncio.Task"):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Coalesces concurrent calls that share a key onto one in-flight task."""
+
+    def __init__(self, name: str, timeout_seconds: float = 30.0):
+        self.name = name
+        self.timeout_seconds = timeout_seconds
+        self._calls: Dict[Hashable, _Call] = {}
+        self.stats: Dict[str, int] = {
+            "executed": 0,
+            "coalesced": 0,
+            "failed": 0,
+            "timeouts": 0,
+            "abandoned": 0,
+            "max_waiters": 0,
+        }
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+    async def do(
+        self,
+        key: Hashable,
+        fn: Callable[[], Awaitable[T]],
+        timeout: Optional[float] = None,
+    ) -> T:
+        """Return fn()'s result, sharing one execution among concurrent callers with the same key."""
+        call = self._calls.get(key)
+        if call is None:
+            call = _Call(asyncio.ensure_future(self._execute(key, fn)))
+            self._calls[key] = call
+            self.stats["executed"] += 1
+        else:
+            self.stats["coalesced"] += 1
+
+        call.waiters += 1
+        self.stats["max_waiters"] = max(self.stats["max_waiters"], call.waiters)
+        limit = self.timeout_seconds if timeout is None else timeout
+        try:
+            return await asyncio.wait_for(asyncio.shield(call.task), limit)
+        except asyncio.TimeoutError:
+            if call.task.done() and not call.task.cancelled():
+                # The computation itself raised TimeoutError.
+                raise
+            self.stats["timeouts"] += 1
+            raise SingleFlightTimeout(key, limit) from None
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                # Nobody is left to receive the result.
+                self.stats["abandoned"] += 1
+                call.task.cancel()
+                if self._calls.get(key) is call:
+                    del self._calls[key]
+
+    async def _execute(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        try:
+            return await fn()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            self.stats["failed"] += 1
+            logger.exception("%s: coalesced computation for %r failed", self.name, key)
+            raise
+        finally:
+            call = self._calls.get(key)
+            if call is not None and call.task is asyncio.current_task():
+                del self._calls[key]
+
+    def snapshot(self) -> Dict[str, Any]:
+        total = self.stats["executed"] + self.stats["coalesced"]
+        return {
+            "name": self.name,
+            "in_flight": self.in_flight,
+            **self.stats,
+            "coalesced_ratio": round(self.stats["coalesced"] / total, 4) if total else 0.0,
+        }
+
+
+# Shared by the executive dashboard endpoints.
+analytics_flight = SingleFlight("analytics", timeout_seconds=settings.analytics_coalesce_timeout_seconds)
@@ -0,0 +1,139 @@
+"""
+Startup warm-up and readiness.
+
+A freshly started worker used to serve its first requests cold: pool
+connections were opened on demand, every hot statement was compiled and
+prepared on first use, the GraphQL schema did its first-execution work and
+an Entra login fetched the JWKS inline. During a rolling deploy those
+requests were the latency spikes.
+
+The lifespan hands a StartupPipeline its steps and starts it in the
+background, so the process answers /health (liveness) at once while
+/health/ready stays 503 until the pipeline has finished:
+
+- required steps (schema check, pool prefill) run first, in order; one that
+  fails is retried with exponential backoff (startup_retry_initial_seconds
+  doubling up to startup_retry_max_seconds), so a database that comes up
+  after the API, or a migration that lands mid-deploy, only delays readiness
+- warm steps then run concurrently; each is bounded by
+  startup_step_timeout_seconds, and one that fails or overruns is logged but
+  does not hold readiness back (a JWKS endpoint being down must not keep
+  every worker out of rotation)
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Sequence, Tuple
+
+from src.config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+Step = Tuple[str, Callable[[], Awaitable[Any]]]
+
+
+class StartupPipeline:
+    """Runs the startup steps once and reports readiness."""
+
+    def __init__(
+        self,
+        step_timeout_seconds: float = 20.0,
+        retry_initial_seconds: float = 1.0,
+        retry_max_seconds: float = 30.0,
+    ):
+        self.step_timeout_seconds = step_timeout_seconds
+        self.retry_initial_seconds = retry_initial_seconds
+        self.retry_max_seconds = retry_max_seconds
+        self.ready = False
+        self.failed = False
+        self._steps: Dict[str, Dict[str, Any]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._started_at: Optional[float] = None
+        self._finished_at: Optional[float] = None
+
+    async def _run_step(self, name: str, step: Callable[[], Awaitable[Any]]) -> bool:
+        state = self._steps[name]
+        state["status"] = "running"
+        state["attempts"] = state.get("attempts", 0) + 1
+        started = time.monotonic()
+        try:
+            detail = await asyncio.wait_for(step(), self.step_timeout_seconds)
+        except asyncio.CancelledError:
+            state["status"] = "cancelled"
+            raise
+        except asyncio.TimeoutError:
+            state["status"] = "failed"
+            state["error"] = f"timed out after {self.step_timeout_seconds}s"
+            logger.warning("Startup step %s timed out", name)
+            return False
+        except Exception as exc:
+            state["status"] = "failed"
+            state["error"] = f"{type(exc).__name__}: {exc}"
+            logger.warning("Startup step %s failed: %s", name, exc)
+            return False
+        finally:
+            state["ms"] = round((time.monotonic() - started) * 1000, 1)
+        state["status"] = "ok"
+        state.pop("error", None)
+        if detail is not None:
+            state["detail"] = detail
+        return True
+
+    async def run(self, required: Sequence[Step], warm: Sequence[Step]) -> bool:
+        """Run required steps in order (retrying each until it succeeds), then warm steps concurrently."""
+        self._started_at = time.monotonic()
+        required_names = {name for name, _ in required}
+        self._steps = {
+            name: {"status": "pending", "required": name in required_names}
+            for name, _ in (*required, *warm)
+        }
+        try:
+            for name, step in required:
+                delay = self.retry_initial_seconds
+                while not await self._run_step(name, step):
+                    # Reported by /health/ready while the step is retried; cleared once it succeeds.
+                    self.failed = True
+                    self._steps[name]["status"] = "retrying"
+                    logger.error(
+                        "Startup step %s failed (attempt %d); retrying in %.1fs",
+                        name, self._steps[name]["attempts"], delay,
+                    )
+                    await asyncio.sleep(delay)
+                    delay = min(delay * 2, self.retry_max_seconds)
+                self.failed = False
+            await asyncio.gather(*(self._run_step(name, step) for name, step in warm))
+            self.ready = True
+            logger.info("Warm-up finished in %.0f ms", (time.monotonic() - self._started_at) * 1000)
+            return True
+        finally:
+            self._finished_at = time.monotonic()
+
+    def start(self, required: Sequence[Step], warm: Sequence[Step]) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self.run(required, warm))
+
+    async def stop(self) -> None:
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    def snapshot(self) -> Dict[str, Any]:
+        if self._started_at is None:
+            elapsed = None
+        else:
+            end = self._finished_at if self._finished_at is not None else time.monotonic()
+            elapsed = round((end - self._started_at) * 1000, 1)
+        return {
+            "ready": self.ready,
+            "failed": self.failed,
+            "elapsed_ms": elapsed,
+            "steps": {name: dict(state) for name, state in self._steps.items()},
+        }
+
+
+startup = StartupPipeline(
+    settings.startup_step_timeout_seconds,
+    settings.startup_retry_initial_seconds,
+    settings.startup_retry_max_seconds,
+)
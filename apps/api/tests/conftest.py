@@ -0,0 +1,53 @@
+"""
+Shared Test Fixtures
+In-memory SQLite databases with the analytics schema attached, for tests that
+run real SQL against the models.
+
+A module picks the tables by overriding analytics_tables:
+
+    @pytest.fixture
+    def analytics_tables():
+        return [EmailDigestItem.__table__, EmailOutbox.__table__]
+"""
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from src.db.models import Base
+
+
+def attach_analytics(dbapi_connection, _record):
+    dbapi_connection.execute("ATTACH DATABASE ':memory:' AS analytics")
+
+
+@pytest.fixture
+def analytics_tables():
+    """Tables the SQLite fixtures create (none unless a module overrides this)."""
+    return []
+
+
+@pytest.fixture
+async def sqlite_engine(analytics_tables):
+    """Async engine on one in-memory connection (StaticPool), so every session sees the same data."""
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    event.listen(engine.sync_engine, "connect", attach_analytics)
+    async with engine.begin() as conn:
+        await conn.run_sync(lambda sync_conn: Base.metadata.create_all(sync_conn, tables=analytics_tables))
+    yield engine
+    await engine.dispose()
+
+
+@pytest.fixture
+def sqlite_sync_engine(analytics_tables):
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    event.listen(engine, "connect", attach_analytics)
+    Base.metadata.create_all(engine, tables=analytics_tables)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+async def db(sqlite_engine):
+    async with AsyncSession(sqlite_engine) as session:
+        yield session
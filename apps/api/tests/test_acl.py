@@ -0,0 +1,193 @@
+"""
+Test Company ACL
+Bitmap token claims, in-memory access sets, per-request ACL version checks
+and the shared grant rule.
+"""
+import json
+
+import pytest
+from sqlalchemy import text
+
+from src.services import acl_service
+from src.db.models import UserCompanyMap, UserCompanyRoleMap
+from src.services.acl_service import (
+    AclService,
+    AclVersions,
+    CompanyAccess,
+    CompanyRegistry,
+    bit_positions,
+    decode_bitmap,
+    encode_bitmap,
+)
+from src.services.auth_service import AuthService
+
+
+COMPANIES = [f"CC{n:04d}" for n in range(1, 401)]
+
+
+class _User:
+    def __init__(self, user_id):
+        self.user_id = user_id
+
+
+class _Versions:
+    """Committed ACL versions by user, as acl_versions.current() would read them."""
+
+    def __init__(self, versions):
+        self.versions = dict(versions)
+        self.available = True
+        self.reads = 0
+
+    async def current(self, db, user_id):
+        self.reads += 1
+        return self.versions.get(user_id, 0) if self.available else None
+
+
+@pytest.fixture
+def acl(monkeypatch):
+    """Fresh, fully loaded registry and versions; no database needed."""
+    registry = CompanyRegistry(refresh_seconds=3600)
+    registry.load((company_id, bit) for bit, company_id in enumerate(COMPANIES))
+    tracker = _Versions({"fd-1": 5})
+    monkeypatch.setattr(acl_service, "company_registry", registry)
+    monkeypatch.setattr(acl_service, "acl_versions", tracker)
+    monkeypatch.setattr(acl_service, "_access_cache", acl_service.OrderedDict())
+
+    calls = []
+
+    async def fake_grants(db, user_id, role_ids=None):
+        calls.append((user_id, role_ids))
+        return ["CC0001", "CC0002"]
+
+    monkeypatch.setattr(AclService, "grants_from_db", staticmethod(fake_grants))
+    return registry, tracker, calls
+
+
+class TestBitmap:
+    def test_round_trip(self):
+        positions = [0, 3, 64, 65, 399]
+        assert bit_positions(decode_bitmap(encode_bitmap(positions))) == positions
+
+    def test_empty(self):
+        assert bit_positions(decode_bitmap(encode_bitmap([]))) == []
+
+    def test_dense_ranges_compress(self):
+        encoded = encode_bitmap(range(400))
+        assert encoded.startswith("z")
+        assert len(encoded) < len(json.dumps(COMPANIES)) // 20
+
+    def test_malformed_raises_value_error(self):
+        with pytest.raises(ValueError):
+            decode_bitmap("x123")
+        with pytest.raises(ValueError):
+            decode_bitmap("z" + "A" * 8)
+
+
+class TestCompanyAccess:
+    def test_membership_and_filter(self):
+        access = CompanyAccess(["CC0003", "CC0001"])
+        assert "CC0001" in access and "CC0002" not in access
+        assert access.as_list() == ["CC0001", "CC0003"]
+        assert access.filter(["CC0003", "CC0002", "CC0001"]) == ["CC0003", "CC0001"]
+
+
+class TestRegistry:
+    def test_unknown_company_cannot_be_encoded(self, acl):
+        registry, _, _ = acl
+        assert registry.encode(["CC0001", "NEW01"]) is None
+
+    def test_unknown_bits_are_reported(self, acl):
+        registry, _, _ = acl
+        ids, complete = registry.decode(encode_bitmap([0, 1000]))
+        assert ids == ["CC0001"]
+        assert complete is False
+
+
+class TestTokenAccess:
+    async def test_fresh_token_resolves_without_database(self, acl):
+        _, _, calls = acl
+        token = AuthService.create_access_token(
+            "fd-1", "fd@example.com", "Finance Director", 2,
+            portal="finance-director", companies=COMPANIES, acl_version=5,
+        )
+        payload = AuthService.decode_token(token)
+        assert "companies" not in payload
+        assert len(payload["cbm"]) < 64
+
+        access = await AclService.access_from_token(None, "fd-1", payload)
+        assert access.as_list() == COMPANIES
+        assert calls == []
+        # Only the user's own version row is read, on every request.
+        assert acl_service.acl_versions.reads == 1
+
+    async def test_stale_token_is_re_resolved_once(self, acl):
+        _, tracker, calls = acl
+        payload = AuthService.decode_token(AuthService.create_access_token(
+            "fd-1", "fd@example.com", "Finance Director", 2,
+            companies=COMPANIES, acl_version=5,
+        ))
+        # An admin revoked companies after issue. The version is read per
+        # request, so it applies even if a higher version was seen elsewhere first.
+        tracker.versions["fd-1"] = 6
+
+        first = await AclService.access_from_token(None, "fd-1", payload, [2, 4])
+        second = await AclService.access_from_token(None, "fd-1", payload, [2, 4])
+        assert first.as_list() == ["CC0001", "CC0002"]
+        assert second is first
+        assert calls == [("fd-1", [2, 4])]
+
+        tracker.versions["fd-1"] = 7
+        await AclService.access_from_token(None, "fd-1", payload, [2, 4])
+        assert len(calls) == 2
+
+    async def test_without_version_tracking_falls_back_to_list_claim(self, acl):
+        _, tracker, calls = acl
+        payload = AuthService.decode_token(AuthService.create_access_token(
+            "fo-1", "fo@example.com", "Finance Officer", 1,
+            companies=["CC0001"], acl_version=None,
+        ))
+        assert payload["companies"] == ["CC0001"]
+
+        tracker.available = False
+        await AclService.access_from_token(None, "fo-1", payload)
+        await AclService.access_from_token(None, "fo-1", payload)
+        assert calls == [("fo-1", None), ("fo-1", None)]
+
+    async def test_company_ids_uses_attached_access(self, acl):
+        _, _, calls = acl
+        user = _User("fd-1")
+        AclService.attach(user, CompanyAccess(["CC0009"]))
+        assert await AclService.company_ids(None, user) == ["CC0009"]
+        assert user.accessible_companies == ["CC0009"]
+        assert calls == []
+
+
+@pytest.fixture
+def analytics_tables():
+    return [UserCompanyRoleMap.__table__, UserCompanyMap.__table__]
+
+
+class TestDatabase:
+    async def test_version_lookup_and_missing_table(self, db):
+        versions = AclVersions()
+        assert await versions.current(db, "fd-1") is None
+        assert versions.available is False
+
+        await db.execute(text("CREATE TABLE analytics.acl_version (user_id text PRIMARY KEY, version integer)"))
+        await db.execute(text("INSERT INTO analytics.acl_version VALUES ('fd-1', 9)"))
+        assert await versions.current(db, "fd-1") == 9
+        assert await versions.current(db, "nobody") == 0
+        assert versions.available is True
+
+    async def test_grants_are_active_role_assignments_for_the_portal(self, db):
+        for company_id, role_id, active in (("CC0001", 2, 1), ("CC0002", 1, 1), ("CC0003", 2, 0)):
+            await db.execute(text(
+                "INSERT INTO analytics.user_company_role_map (user_id, company_id, role_id, is_active) "
+                f"VALUES ('fd-1', '{company_id}', {role_id}, {active})"
+            ))
+        # Direct user_company_map rows do not grant access.
+        await db.execute(text(
+            "INSERT INTO analytics.user_company_map (user_id, company_id, is_active) VALUES ('fd-1', 'CC0009', 1)"
+        ))
+        assert await AclService.grants_from_db(db, "fd-1", [2, 4]) == ["CC0001"]
+        assert await AclService.grants_from_db(db, "fd-1") == ["CC0001", "CC0002"]
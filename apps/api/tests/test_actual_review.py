@@ -0,0 +1,174 @@
+"""
+Test Actual Review
+Per-item outcomes and single-transaction fan-out of bulk FD approve / reject.
+"""
+from types import SimpleNamespace
+
+import pytest
+
+from src.config.constants import StatusID
+from src.services import actual_review_service
+from src.services.actual_review_service import (
+    ActualReviewService,
+    ReviewAction,
+    ReviewOutcome,
+    _Workflow,
+)
+
+
+def _workflow(company_id, period_id, status_id=int(StatusID.SUBMITTED), submitter="fo-1"):
+    return _Workflow(
+        company_id=company_id, period_id=period_id, status_id=status_id,
+        submitted_by=f"{submitter}@example.com", company_name=f"{company_id} Ltd",
+        year=2025, month=3, submitter_id=submitter, submitter_name="Finance Officer",
+    )
+
+
+class _Result:
+    def __init__(self, rows):
+        self._rows = rows
+
+    def all(self):
+        return self._rows
+
+
+class _FakeDb:
+    """Records statements; the UPDATE ... RETURNING reports `updated` rows."""
+
+    def __init__(self, updated):
+        self.updated = updated
+        self.statements = []
+        self.commits = 0
+
+    async def execute(self, statement, params=None):
+        self.statements.append((statement.__visit_name__, statement.table.name, params))
+        return _Result(self.updated)
+
+    async def commit(self):
+        self.commits += 1
+
+
+@pytest.fixture
+def review(monkeypatch):
+    workflows = {
+        ("CC0001", 10): _workflow("CC0001", 10),
+        ("CC0002", 10): _workflow("CC0002", 10),
+        ("CC0003", 10): _workflow("CC0003", 10),
+        ("CC0004", 10): _workflow("CC0004", 10, status_id=int(StatusID.APPROVED)),
+    }
+    loaded = []
+
+    async def load_for_update(db, keys):
+        loaded.append(list(keys))
+        return {key: workflows[key] for key in keys if key in workflows}
+
+    audits = []
+    folded = []
+
+    async def record_approved(db, keys):
+        folded.append(list(keys))
+        return len(keys)
+
+    monkeypatch.setattr(ActualReviewService, "_load_for_update", staticmethod(load_for_update))
+    monkeypatch.setattr(actual_review_service.AnomalyService, "record_approved", staticmethod(record_approved))
+    monkeypatch.setattr(
+        actual_review_service.AuditService, "record",
+        staticmethod(lambda db, action, **kw: audits.append((action, kw["entity_id"]))),
+    )
+    monkeypatch.setattr(type(actual_review_service.settings), "is_email_enabled", property(lambda self: True))
+    reviewer = SimpleNamespace(user_id="fd-1", user_email="fd@example.com", first_name="Fin", last_name="Director")
+    return reviewer, loaded, audits, folded
+
+
+class TestBulkReview:
+    async def test_per_item_outcomes(self, review):
+        reviewer, loaded, audits, folded = review
+        # CC0003 was approved by someone else between the SELECT and the UPDATE.
+        db = _FakeDb(updated=[("CC0001", 10), ("CC0002", 10)])
+        items = [("CC0001", 10), ("CC0002", 10), ("CC0003", 10), ("CC0004", 10),
+                 ("CC0005", 10), ("CC0009", 10), ("CC0001", 10)]
+
+        results = await ActualReviewService.bulk_review(
+            db, reviewer, items, ReviewAction.APPROVE,
+            allowed_company_ids=["CC0001", "CC0002", "CC0003", "CC0004", "CC0005"],
+        )
+
+        assert [(r.company_id, r.outcome) for r in results] == [
+            ("CC0001", ReviewOutcome.APPROVED),
+            ("CC0002", ReviewOutcome.APPROVED),
+            ("CC0003", ReviewOutcome.CONFLICT),
+            ("CC0004", ReviewOutcome.INVALID_STATE),
+            ("CC0005", ReviewOutcome.NOT_FOUND),
+            ("CC0009", ReviewOutcome.FORBIDDEN),
+        ]
+        # Forbidden items are never loaded; duplicates are collapsed.
+        assert loaded == [[("CC0001", 10), ("CC0002", 10), ("CC0003", 10), ("CC0004", 10), ("CC0005", 10)]]
+        assert audits == [("ACTUAL_APPROVED", "CC0001:10"), ("ACTUAL_APPROVED", "CC0002:10")]
+        # Only the transitioned items are folded into the anomaly baselines.
+        assert folded == [[("CC0001", 10), ("CC0002", 10)]]
+
+    async def test_one_update_and_batched_inserts_in_one_commit(self, review):
+        reviewer, _, _, folded = review
+        db = _FakeDb(updated=[("CC0001", 10), ("CC0002", 10)])
+
+        await ActualReviewService.bulk_review(
+            db, reviewer, [("CC0001", 10), ("CC0002", 10)], ReviewAction.REJECT,
+            allowed_company_ids=["CC0001", "CC0002"], reason="Revenue does not tie to TB",
+        )
+
+        kinds = [(visit, table) for visit, table, _ in db.statements]
+        assert kinds == [
+            ("update", "financial_workflow"),
+            ("insert", "notifications"),
+            # Held for the FOs' digests rather than queued one by one
+            ("insert", "email_digest_item"),
+        ]
+        notifications = db.statements[1][2]
+        emails = db.statements[2][2]
+        assert len(notifications) == 2 and len(emails) == 2
+        assert "Revenue does not tie to TB" in notifications[0]["message"]
+        assert emails[0]["to_email"] == "fo-1@example.com"
+        assert db.commits == 1
+        assert folded == []
+
+    async def test_nothing_eligible_still_commits_without_writes(self, review):
+        reviewer, _, _, folded = review
+        db = _FakeDb(updated=[])
+        results = await ActualReviewService.bulk_review(
+            db, reviewer, [("CC0004", 10)], ReviewAction.APPROVE, allowed_company_ids=["CC0004"],
+        )
+        assert results[0].outcome is ReviewOutcome.INVALID_STATE
+        assert db.statements == []
+
+
+class TestRecordAudit:
+    """The single-item FD endpoints and the bulk path write the same audit event."""
+
+    @pytest.fixture
+    def recorded(self, monkeypatch):
+        events = []
+        monkeypatch.setattr(
+            actual_review_service.AuditService, "record",
+            staticmethod(lambda db, action, **kw: events.append((action, kw))),
+        )
+        return events
+
+    def test_single_approve_with_comment(self, recorded):
+        ActualReviewService.record_audit(
+            None, "fd-1", "fd@example.com", ReviewAction.APPROVE, "CC0001", 10, comment="Looks right",
+        )
+        action, kw = recorded[0]
+        assert action == "ACTUAL_APPROVED"
+        assert kw["entity_type"] == "financial_workflow"
+        assert kw["entity_id"] == "CC0001:10"
+        assert kw["user_id"] == "fd-1"
+        assert kw["details"] == "Approved by fd@example.com. Comment: Looks right"
+
+    def test_bulk_reject_keeps_reason(self, recorded):
+        ActualReviewService.record_audit(
+            None, "fd-1", "fd@example.com", ReviewAction.REJECT, "CC0002", 10,
+            reason="Missing accruals", bulk=True,
+        )
+        action, kw = recorded[0]
+        assert action == "ACTUAL_REJECTED"
+        assert kw["details"] == "Rejected in bulk by fd@example.com. Reason: Missing accruals"
@@ -0,0 +1,158 @@
+"""
+Test Admission Control
+Route classification, per-class caps, write priority and load shedding.
+"""
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.config.settings import Settings, settings
+from src.security.admission import (
+    AdmissionController,
+    AdmissionMiddleware,
+    AdmissionRejected,
+    RouteClass,
+    classify,
+    connection_cost,
+)
+
+
+def _controller(total=4, reserve=1, timeout=1.0, overrides=None):
+    limits = {
+        RouteClass.WRITE: (4, 10),
+        RouteClass.LIGHT_READ: (4, 10),
+        RouteClass.HEAVY_ANALYTICS: (2, 2),
+        RouteClass.EXPORT: (1, 1),
+    }
+    limits.update(overrides or {})
+    return AdmissionController(limits, total_limit=total, write_reserve=reserve, queue_timeout_seconds=timeout)
+
+
+class TestClassify:
+    @pytest.mark.parametrize("method,path,expected", [
+        ("GET", "/fo/companies", RouteClass.LIGHT_READ),
+        ("POST", "/fo/save-actuals", RouteClass.WRITE),
+        ("POST", "/fd/approve-actual/CC0001/12", RouteClass.WRITE),
+        ("GET", "/ceo/trends", RouteClass.HEAVY_ANALYTICS),
+        ("GET", "/md/pbt-trend", RouteClass.HEAVY_ANALYTICS),
+        ("POST", "/graphql", RouteClass.HEAVY_ANALYTICS),
+        ("GET", "/admin/reports/export/pdf", RouteClass.EXPORT),
+        ("GET", "/extract/financials", RouteClass.EXPORT),
+        ("GET", "/health/db", None),
+        ("OPTIONS", "/fo/save-actuals", None),
+    ])
+    def test_route_classes(self, method, path, expected):
+        assert classify(method, path) is expected
+
+    def test_connection_cost(self, monkeypatch):
+        monkeypatch.setattr(settings, "fanout_max_concurrency", 4)
+        assert connection_cost(RouteClass.LIGHT_READ, "/fo/companies") == 1
+        assert connection_cost(RouteClass.EXPORT, "/extract/financials") == 1
+        assert connection_cost(RouteClass.HEAVY_ANALYTICS, "/ceo/trends") == 5
+        assert connection_cost(RouteClass.HEAVY_ANALYTICS, "/md/bundle") == 9
+
+    def test_settings_reject_totals_beyond_the_pool(self):
+        with pytest.raises(ValueError, match="must not exceed the pool"):
+            Settings(db_pool_size=10, db_max_overflow=5, admission_total_limit=28)
+        with pytest.raises(ValueError, match="bundle"):
+            Settings(admission_total_limit=12, admission_write_reserve=6, fanout_max_concurrency=4)
+        Settings(admission_total_limit=15, admission_write_reserve=6, fanout_max_concurrency=4)
+
+
+class TestController:
+    async def test_class_cap_queues_then_admits_fifo(self):
+        controller = _controller()
+        await controller.acquire(RouteClass.EXPORT)
+        waiting = asyncio.create_task(controller.acquire(RouteClass.EXPORT))
+        await asyncio.sleep(0)
+        assert controller.snapshot()["classes"]["export"]["queue_depth"] == 1
+
+        controller.release(RouteClass.EXPORT, 0.5)
+        await waiting
+        export = controller.snapshot()["classes"]["export"]
+        assert export["in_flight"] == 1 and export["queued"] == 1 and export["queue_depth"] == 0
+
+    async def test_full_queue_is_shed_with_retry_hint(self):
+        controller = _controller()
+        await controller.acquire(RouteClass.EXPORT)
+        waiting = asyncio.create_task(controller.acquire(RouteClass.EXPORT))
+        await asyncio.sleep(0)
+        with pytest.raises(AdmissionRejected) as excinfo:
+            await controller.acquire(RouteClass.EXPORT)
+        assert excinfo.value.retry_after >= 1
+        assert controller.snapshot()["classes"]["export"]["rejected_queue_full"] == 1
+        waiting.cancel()
+        await asyncio.gather(waiting, return_exceptions=True)
+
+    async def test_queue_timeout_is_shed(self):
+        controller = _controller(timeout=0.05)
+        await controller.acquire(RouteClass.EXPORT)
+        with pytest.raises(AdmissionRejected):
+            await controller.acquire(RouteClass.EXPORT)
+        snapshot = controller.snapshot()["classes"]["export"]
+        assert snapshot["rejected_timeout"] == 1 and snapshot["queue_depth"] == 0
+
+    async def test_write_reserve_and_priority(self):
+        controller = _controller(total=3, reserve=1)
+        await controller.acquire(RouteClass.HEAVY_ANALYTICS)
+        await controller.acquire(RouteClass.LIGHT_READ)
+        # Shared slots are used up; the reserved one is only for writes.
+        heavy = asyncio.create_task(controller.acquire(RouteClass.HEAVY_ANALYTICS))
+        await controller.acquire(RouteClass.WRITE)
+        write = asyncio.create_task(controller.acquire(RouteClass.WRITE))
+        await asyncio.sleep(0)
+
+        controller.release(RouteClass.LIGHT_READ)
+        await asyncio.wait_for(write, 1)
+        assert not heavy.done()
+
+        controller.release(RouteClass.WRITE)
+        controller.release(RouteClass.WRITE)
+        await asyncio.wait_for(heavy, 1)
+        assert controller.total_in_flight == 2
+
+    async def test_total_counts_connections(self):
+        controller = _controller(total=10, reserve=2)
+        await controller.acquire(RouteClass.HEAVY_ANALYTICS, 5)
+        # 5 + 5 would go past the 8 shared connections.
+        heavy = asyncio.create_task(controller.acquire(RouteClass.HEAVY_ANALYTICS, 5))
+        await asyncio.sleep(0)
+        assert not heavy.done() and controller.total_in_flight == 5
+
+        await controller.acquire(RouteClass.WRITE)
+        controller.release(RouteClass.HEAVY_ANALYTICS, cost=5)
+        await asyncio.wait_for(heavy, 1)
+        assert controller.total_in_flight == 6
+
+    async def test_cancelled_waiter_does_not_leak_slot(self):
+        controller = _controller()
+        await controller.acquire(RouteClass.EXPORT)
+        waiting = asyncio.create_task(controller.acquire(RouteClass.EXPORT))
+        await asyncio.sleep(0)
+        waiting.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+        controller.release(RouteClass.EXPORT)
+        assert controller.total_in_flight == 0
+
+
+class TestMiddleware:
+    def test_shed_request_gets_503_with_retry_after(self):
+        controller = _controller(overrides={RouteClass.EXPORT: (1, 0)})
+        app = FastAPI()
+        app.add_middleware(AdmissionMiddleware, controller=controller)
+
+        @app.get("/extract/financials")
+        async def extract():
+            return {"ok": True}
+
+        client = TestClient(app)
+        assert client.get("/extract/financials").status_code == 200
+
+        controller._classes[RouteClass.EXPORT].in_flight = 1  # an export is running
+        response = client.get("/extract/financials")
+        assert response.status_code == 503
+        assert int(response.headers["retry-after"]) >= 1
+        assert response.json()["detail"]["route_class"] == "export"
@@ -0,0 +1,203 @@
+"""
+Test Anomaly Scoring
+Running moments, z-scoring against seasonal / overall baselines, and
+incremental folding agreeing with the set-based backfill.
+"""
+import random
+import statistics
+from datetime import date
+
+import pytest
+from sqlalchemy import insert, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.config.constants import StatusID
+from src.db.models import FinancialFact, PeriodMaster, Report
+from src.services.anomaly_service import (
+    ALL_MONTHS,
+    AnomalyService,
+    Moments,
+    accumulate,
+    merge,
+    metric_baseline,
+    score_values,
+)
+
+_BASELINE_DDL = (
+    """
+    CREATE TABLE analytics.metric_baseline (
+        company_id text NOT NULL, metric_id integer NOT NULL, month smallint NOT NULL,
+        n bigint NOT NULL, mean double precision NOT NULL, m2 double precision NOT NULL,
+        PRIMARY KEY (company_id, metric_id, month)
+    )
+    """,
+    """
+    CREATE TABLE analytics.metric_baseline_period (
+        company_id text NOT NULL, period_id integer NOT NULL,
+        folded_at timestamp NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (company_id, period_id)
+    )
+    """,
+)
+
+_COMPANIES = ("CC0001", "CC0002")
+_METRICS = (1, 2)
+
+
+def _period_id(year, month):
+    return (year - 2020) * 12 + month
+
+
+def _value(rng, company_id, metric_id, month):
+    # Revenue-like with a December peak, so seasonal and overall baselines differ.
+    level = 1000.0 * metric_id + (300.0 if month == 12 else 0.0) + (50.0 if company_id == "CC0002" else 0.0)
+    return round(level + rng.gauss(0, 20), 2)
+
+
+@pytest.fixture
+def analytics_tables():
+    return [m.__table__ for m in (PeriodMaster, Report, FinancialFact)]
+
+
+@pytest.fixture
+async def db(sqlite_engine):
+    async with sqlite_engine.begin() as conn:
+        for ddl in _BASELINE_DDL:
+            await conn.execute(text(ddl))
+
+    rng = random.Random(7)
+    periods, workflows, facts = [], [], []
+    for year in (2022, 2023, 2024):
+        for month in range(1, 13):
+            pid = _period_id(year, month)
+            periods.append({"period_id": pid, "year": year, "month": month,
+                            "start_date": date(year, month, 1), "end_date": date(year, month, 28)})
+            for company_id in _COMPANIES:
+                workflows.append({"company_id": company_id, "period_id": pid, "status_id": int(StatusID.APPROVED)})
+                for metric_id in _METRICS:
+                    facts.append({"company_id": company_id, "period_id": pid, "metric_id": metric_id,
+                                  "actual_budget": "Actual", "amount": _value(rng, company_id, metric_id, month)})
+                    # Budgets never enter the baselines.
+                    facts.append({"company_id": company_id, "period_id": pid, "metric_id": metric_id,
+                                  "actual_budget": "Budget", "amount": 1.0})
+    async with AsyncSession(sqlite_engine) as session:
+        await session.execute(insert(PeriodMaster), periods)
+        await session.execute(insert(Report), workflows)
+        await session.execute(insert(FinancialFact), facts)
+        await session.commit()
+        yield session
+
+
+async def _stored(db):
+    rows = (await db.execute(select(
+        metric_baseline.c.company_id, metric_baseline.c.metric_id, metric_baseline.c.month,
+        metric_baseline.c.n, metric_baseline.c.mean, metric_baseline.c.m2,
+    ))).all()
+    return {(c, m, mo): Moments(n, mean, m2) for c, m, mo, n, mean, m2 in rows}
+
+
+def _close(a: Moments, b: Moments):
+    return a.n == b.n and a.mean == pytest.approx(b.mean) and a.m2 == pytest.approx(b.m2, rel=1e-9, abs=1e-6)
+
+
+class TestMoments:
+    def test_accumulate_matches_statistics(self):
+        values = [random.Random(1).uniform(-50, 500) for _ in range(40)]
+        moments = accumulate(values)
+        assert moments.n == 40
+        assert moments.mean == pytest.approx(statistics.fmean(values))
+        assert moments.std == pytest.approx(statistics.stdev(values))
+
+    def test_merge_equals_whole(self):
+        values = [float(v) for v in range(1, 30)] + [1e6 + 0.5, 1e6 - 0.5]
+        whole = accumulate(values)
+        merged = merge(accumulate(values[:7]), accumulate(values[7:]))
+        assert _close(merged, whole)
+        assert merge(Moments(0, 0.0, 0.0), whole) == whole
+
+
+class TestScoreValues:
+    baselines = {
+        (1, ALL_MONTHS): accumulate([100, 110, 90, 105, 95, 100]),
+        (1, 12): accumulate([200, 210, 190]),
+        (2, ALL_MONTHS): accumulate([50, 50, 50, 50, 50, 50]),
+    }
+
+    def test_seasonal_baseline_preferred(self):
+        december = score_values(12, {1: 205.0}, self.baselines, threshold=3.0)
+        assert december.scored == 1 and not december.flagged
+        # The same value in a month without a seasonal baseline is far off the overall mean.
+        june = score_values(6, {1: 205.0}, self.baselines, threshold=3.0)
+        assert june.flagged
+        assert june.anomalies[0].seasonal is False
+        assert june.anomalies[0].expected == pytest.approx(100.0)
+
+    def test_thin_baselines_are_skipped(self):
+        result = score_values(3, {1: 1000.0}, self.baselines, min_samples=7, min_seasonal_samples=3)
+        assert result.score is None and result.scored == 0
+
+    def test_constant_history_uses_std_floor(self):
+        result = score_values(3, {2: 50.2, 1: None}, self.baselines, threshold=3.0)
+        assert result.scored == 1 and not result.flagged
+        assert score_values(3, {2: 60.0}, self.baselines, threshold=3.0).flagged
+
+    def test_anomalies_ordered_by_magnitude(self):
+        result = score_values(6, {1: 50.0, 2: 100.0}, self.baselines, threshold=3.0)
+        assert [a.metric_id for a in result.anomalies] == [2, 1]
+        assert result.score == pytest.approx(abs(result.anomalies[0].z))
+
+
+class TestBaselines:
+    async def test_backfill_matches_history(self, db):
+        stats = await AnomalyService.backfill(db)
+        await db.commit()
+        stored = await _stored(db)
+        assert stats["periods"] == 72
+        assert len(stored) == len(_COMPANIES) * len(_METRICS) * 13
+
+        history = (await db.execute(
+            select(FinancialFact.amount, PeriodMaster.month)
+            .join(PeriodMaster, PeriodMaster.period_id == FinancialFact.period_id)
+            .where(FinancialFact.company_id == "CC0001", FinancialFact.metric_id == 1,
+                   FinancialFact.actual_budget == "Actual")
+        )).all()
+        assert _close(stored[("CC0001", 1, ALL_MONTHS)], accumulate(float(v) for v, _ in history))
+        assert _close(stored[("CC0001", 1, 12)], accumulate(float(v) for v, m in history if m == 12))
+
+    async def test_incremental_folds_agree_with_backfill(self, db):
+        keys = [(c, _period_id(y, m)) for y in (2022, 2023, 2024) for m in range(1, 13) for c in _COMPANIES]
+        # Folded in several approvals, one repeated; the repeat must not double count.
+        assert await AnomalyService.record_approved(db, keys[:5]) == 5
+        assert await AnomalyService.record_approved(db, keys[3:30]) == 25
+        assert await AnomalyService.record_approved(db, keys[30:]) == 42
+        assert await AnomalyService.record_approved(db, keys[:2]) == 0
+        await db.commit()
+        incremental = await _stored(db)
+
+        await AnomalyService.backfill(db)
+        await db.commit()
+        rebuilt = await _stored(db)
+        assert incremental.keys() == rebuilt.keys()
+        for key, moments in rebuilt.items():
+            assert _close(incremental[key], moments), key
+
+    async def test_score_flags_outlier(self, db):
+        await AnomalyService.backfill(db)
+        await db.commit()
+        period = _period_id(2025, 12)
+        scores = await AnomalyService.score(db, {
+            ("CC0001", period): (12, {1: 1300.0, 2: 2300.0}),
+            ("CC0002", period): (12, {1: 5000.0, 2: 2350.0}),
+            ("CC0009", period): (12, {1: 5000.0}),
+        })
+        assert not scores[("CC0001", period)].flagged
+        flagged = scores[("CC0002", period)]
+        assert [a.metric_id for a in flagged.anomalies] == [1]
+        assert flagged.anomalies[0].seasonal is True
+        assert scores[("CC0009", period)].score is None
+
+    async def test_unavailable_without_migration(self, db):
+        await db.execute(text("DROP TABLE analytics.metric_baseline"))
+        assert await AnomalyService.score(db, {("CC0001", 1): (1, {1: 1.0})}) == {}
+        await db.execute(text("DROP TABLE analytics.metric_baseline_period"))
+        assert await AnomalyService.record_approved(db, [("CC0001", 1)]) == 0
@@ -0,0 +1,98 @@
+"""
+Test Audit Writer
+Batching, retry and shutdown drain of the buffered audit-log writer.
+"""
+import asyncio
+
+import pytest
+
+from src.services.audit_service import AuditEvent, AuditWriter
+
+
+class _RecordingSessionFactory:
+    """Stands in for AsyncSessionLocal; records each batch insert."""
+
+    def __init__(self, fail_times: int = 0):
+        self.batches = []
+        self.fail_times = fail_times
+
+    def __call__(self):
+        return _RecordingSession(self)
+
+
+class _RecordingSession:
+    def __init__(self, factory):
+        self.factory = factory
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def begin_nested(self):
+        raise RuntimeError("no partitions here")
+
+    async def execute(self, statement, params=None):
+        if self.factory.fail_times:
+            self.factory.fail_times -= 1
+            raise ConnectionError("database unavailable")
+        self.factory.batches.append(list(params))
+
+    async def commit(self):
+        pass
+
+
+def _events(n):
+    return [AuditEvent(action="TEST", entity_id=str(i)) for i in range(n)]
+
+
+class TestAuditWriter:
+    async def test_flushes_in_batches(self):
+        factory = _RecordingSessionFactory()
+        writer = AuditWriter(batch_size=10, flush_interval=60, session_factory=factory)
+        writer.enqueue(_events(25))
+        await writer.flush()
+        assert [len(b) for b in factory.batches] == [10, 10, 5]
+        assert writer.stats["written"] == 25
+
+    async def test_batch_size_wakes_background_task(self):
+        factory = _RecordingSessionFactory()
+        writer = AuditWriter(batch_size=5, flush_interval=60, session_factory=factory)
+        writer.start()
+        try:
+            writer.enqueue(_events(5))
+            for _ in range(50):
+                if factory.batches:
+                    break
+                await asyncio.sleep(0.01)
+            assert len(factory.batches) == 1
+        finally:
+            await writer.stop()
+
+    async def test_failed_batch_is_retried_in_order(self):
+        factory = _RecordingSessionFactory(fail_times=1)
+        writer = AuditWriter(batch_size=3, flush_interval=60, session_factory=factory)
+        writer.enqueue(_events(3))
+        await writer.flush()
+        assert writer.pending == 3
+        await writer.flush()
+        assert [row["entity_id"] for row in factory.batches[0]] == ["0", "1", "2"]
+
+    async def test_stop_drains_buffer(self):
+        factory = _RecordingSessionFactory()
+        writer = AuditWriter(batch_size=100, flush_interval=60, session_factory=factory)
+        writer.start()
+        writer.enqueue(_events(7))
+        await writer.stop()
+        assert writer.pending == 0
+        assert sum(len(b) for b in factory.batches) == 7
+
+    async def test_stop_logs_events_it_cannot_write(self, caplog):
+        factory = _RecordingSessionFactory(fail_times=1000)
+        writer = AuditWriter(batch_size=10, flush_interval=60, max_retries=1, session_factory=factory)
+        writer.start()
+        writer.enqueue(_events(2))
+        await writer.stop()
+        assert writer.stats["dropped"] == 2
+        assert caplog.text.count("UNWRITTEN_AUDIT_EVENT") == 2
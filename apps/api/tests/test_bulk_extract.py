@@ -0,0 +1,209 @@
+"""
+Test Bulk Extract
+Filter validation, chunked CSV / XLSX encoding of the streaming extract (sheets
+split at the Excel row limit) and the year-partitioned columnar cube.
+"""
+import io
+import json
+import zipfile
+from decimal import Decimal
+
+import pytest
+from openpyxl import load_workbook
+
+from src.services import bulk_extract_service
+from src.services.bulk_extract_service import (
+    EXTRACT_COLUMNS,
+    BulkExtractService,
+    ExtractFilters,
+    ExtractValidationError,
+)
+
+
+def _row(i: int) -> tuple:
+    return ("C1", "Cluster One", f"CO{i % 3}", f"Company {i % 3}", i, 2025, (i % 12) + 1,
+            "ACTUAL", 1, "Revenue", Decimal("1000.50"))
+
+
+class _FakeSession:
+    """Async context manager standing in for AsyncSessionLocal()."""
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+async def _collect(agen) -> bytes:
+    return b"".join([chunk async for chunk in agen])
+
+
+@pytest.fixture
+def fake_rows(monkeypatch):
+    rows = [_row(i) for i in range(5000)]
+
+    async def iter_rows(db, filters, batch_size=bulk_extract_service.CURSOR_BATCH_SIZE):
+        for row in rows:
+            yield row
+
+    monkeypatch.setattr(BulkExtractService, "iter_rows", staticmethod(iter_rows))
+    return rows
+
+
+class TestFilters:
+    def test_scenario_normalized(self):
+        filters = BulkExtractService.normalize_filters(scenario=" actual ")
+        assert filters.scenario == "ACTUAL"
+
+    def test_invalid_scenario_rejected(self):
+        with pytest.raises(ExtractValidationError):
+            BulkExtractService.normalize_filters(scenario="forecast")
+
+    def test_inverted_year_range_rejected(self):
+        with pytest.raises(ExtractValidationError):
+            BulkExtractService.normalize_filters(year_from=2026, year_to=2024)
+
+    def test_query_applies_filters(self):
+        filters = ExtractFilters(cluster_id="C1", year_from=2024, year_to=2025,
+                                 scenario="BUDGET", company_ids=["CO1"])
+        sql = str(BulkExtractService.build_query(filters))
+        assert "period_master.year >=" in sql
+        assert "period_master.year <=" in sql
+        assert "company_master.cluster_id =" in sql
+        assert "financial_fact.company_id IN" in sql
+
+
+class TestCsvStream:
+    async def test_csv_is_chunked(self, fake_rows, monkeypatch):
+        monkeypatch.setattr(bulk_extract_service, "CSV_CHUNK_BYTES", 4096)
+        chunks = [c async for c in BulkExtractService.stream_csv(ExtractFilters(), session_factory=_FakeSession)]
+        assert len(chunks) > 1
+        assert all(len(c) < 4096 * 2 for c in chunks)
+
+        lines = b"".join(chunks).decode("utf-8").splitlines()
+        assert lines[0] == ",".join(EXTRACT_COLUMNS)
+        assert len(lines) == len(fake_rows) + 1
+        assert lines[1].endswith(",1000.5")
+
+    async def test_empty_acl_yields_header_only(self):
+        body = await _collect(
+            BulkExtractService.stream_csv(ExtractFilters(company_ids=[]), session_factory=_FakeSession)
+        )
+        assert body.decode("utf-8").strip() == ",".join(EXTRACT_COLUMNS)
+
+
+class TestXlsxStream:
+    async def test_xlsx_round_trip(self, fake_rows):
+        body = await _collect(BulkExtractService.stream_xlsx(ExtractFilters(), session_factory=_FakeSession))
+        sheet = load_workbook(io.BytesIO(body), read_only=True).active
+        rows = list(sheet.iter_rows(values_only=True))
+        assert list(rows[0]) == EXTRACT_COLUMNS
+        assert len(rows) == len(fake_rows) + 1
+        assert rows[1][-1] == 1000.5
+
+    async def test_rows_past_the_sheet_limit_continue_on_a_new_sheet(self, fake_rows, monkeypatch):
+        monkeypatch.setattr(bulk_extract_service, "XLSX_MAX_SHEET_ROWS", 2001)
+        body = await _collect(BulkExtractService.stream_xlsx(ExtractFilters(), session_factory=_FakeSession))
+        workbook = load_workbook(io.BytesIO(body), read_only=True)
+        assert workbook.sheetnames == ["Financial Extract", "Financial Extract (2)", "Financial Extract (3)"]
+        sheets = [list(sheet.iter_rows(values_only=True)) for sheet in workbook.worksheets]
+        assert [len(rows) for rows in sheets] == [2001, 2001, 1001]
+        assert all(list(rows[0]) == EXTRACT_COLUMNS for rows in sheets)
+        assert sum(len(rows) - 1 for rows in sheets) == len(fake_rows)
+
+
+# ============ COLUMNAR CUBE ============
+
+def _fact(company_id, period_id, year, month, scenario, metric_id, amount):
+    return ("C1", company_id, period_id, year, month, scenario, metric_id, amount)
+
+
+CUBE_FACTS = [
+    _fact("CO1", 12, 2024, 12, "ACTUAL", 1, 1000),
+    _fact("CO1", 12, 2024, 12, "ACTUAL", 2, 400),
+    _fact("CO1", 12, 2024, 12, "ACTUAL", 5, 100),
+    _fact("CO1", 12, 2024, 12, "ACTUAL", 9, 50),
+    _fact("CO1", 12, 2024, 12, "BUDGET", 1, 800),
+    _fact("CO2", 13, 2025, 1, "ACTUAL", 1, 500),
+    _fact("CO2", 13, 2025, 1, "ACTUAL", 2, 100),
+]
+
+
+class _FakeStreamResult:
+    def __init__(self, rows):
+        self._rows = rows
+        self.exhausted = False
+
+    async def partitions(self, size):
+        for i in range(0, len(self._rows), size):
+            yield self._rows[i:i + size]
+        self.exhausted = True
+
+
+class _FakeCubeSession(_FakeSession):
+    facts = CUBE_FACTS
+    result = None
+
+    async def stream(self, query):
+        _FakeCubeSession.result = _FakeStreamResult(self.facts)
+        return _FakeCubeSession.result
+
+    async def execute(self, query):
+        class _Result:
+            def all(self_inner):
+                return [("CO1", "Company One", "C1", "Cluster One"),
+                        ("CO2", "Company Two", "C1", "Cluster One")]
+        return _Result()
+
+
+class TestCubePivot:
+    def test_one_record_per_company_period_scenario(self):
+        records = BulkExtractService.pivot_cube_rows(CUBE_FACTS)
+        assert [(r["company_id"], r["period_id"], r["scenario"]) for r in records] == [
+            ("CO1", 12, "ACTUAL"), ("CO1", 12, "BUDGET"), ("CO2", 13, "ACTUAL"),
+        ]
+
+    def test_derived_metrics(self):
+        actual = BulkExtractService.pivot_cube_rows(CUBE_FACTS)[0]
+        assert actual["total_overhead"] == 150
+        assert actual["pbt_before_non_ops"] == 250
+        assert actual["gp_margin"] == pytest.approx(40.0)
+        assert actual["ebitda"] == 300
+
+
+class TestColumnarStream:
+    @pytest.mark.parametrize("fmt", ["parquet", "arrow"])
+    async def test_partitioned_by_year(self, fmt, tmp_path):
+        pa = pytest.importorskip("pyarrow")
+        import pyarrow.dataset as ds
+
+        body = await _collect(
+            BulkExtractService.stream_columnar(ExtractFilters(), fmt=fmt, session_factory=_FakeCubeSession)
+        )
+        with zipfile.ZipFile(io.BytesIO(body)) as archive:
+            manifest = json.loads(archive.read("_manifest.json"))
+            archive.extractall(tmp_path)
+
+        assert manifest["row_counts"] == {"2024": 2, "2025": 1}
+        dataset = ds.dataset(str(tmp_path), format="parquet" if fmt == "parquet" else "ipc",
+                             partitioning="hive", exclude_invalid_files=True)
+        table = dataset.to_table()
+        assert table.num_rows == 3
+        assert pa.types.is_dictionary(table.schema.field("company_id").type)
+        assert sorted(table.column("year").to_pylist()) == [2024, 2024, 2025]
+
+    async def test_finished_years_are_sent_before_the_cursor_ends(self, monkeypatch):
+        pytest.importorskip("pyarrow")
+        # 2024 is complete once the second batch yields a 2025 record (CO2's, ended by CO3).
+        monkeypatch.setattr(_FakeCubeSession, "facts", CUBE_FACTS + [_fact("CO3", 13, 2025, 1, "ACTUAL", 1, 300)])
+        monkeypatch.setattr(bulk_extract_service, "CURSOR_BATCH_SIZE", 6)
+        stream = BulkExtractService.stream_columnar(ExtractFilters(), session_factory=_FakeCubeSession)
+        first = await stream.__anext__()
+        assert first.startswith(b"PK\x03\x04") and b"year=2024/part-0.parquet" in first
+        assert not _FakeCubeSession.result.exhausted
+
+        body = first + await _collect(stream)
+        with zipfile.ZipFile(io.BytesIO(body)) as archive:
+            assert archive.namelist() == ["year=2024/part-0.parquet", "year=2025/part-0.parquet", "_manifest.json"]
+            assert archive.testzip() is None
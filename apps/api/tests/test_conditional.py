@@ -0,0 +1,103 @@
+"""
+Test Conditional GET
+ETag derivation from data-version tokens and If-None-Match handling.
+"""
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.dialects import postgresql
+
+from src.services.data_version_service import DataVersionService
+from src.services.fx_service import FxRateTable, FxService
+from src.utils.conditional import ConditionalRequest, etag_matches, make_etag
+
+
+def _app(monkeypatch, tokens):
+    """Tiny app whose data-version token and FX rate version are controlled by the test."""
+    state = {"token": tokens, "fx": "1:-:0", "computed": 0}
+
+    async def fake_token(db, years=None, company_ids=None):
+        return state["token"]
+
+    async def fake_rates(db, force=False):
+        return FxRateTable(version=state["fx"])
+
+    monkeypatch.setattr(DataVersionService, "token", staticmethod(fake_token))
+    monkeypatch.setattr(FxService, "rates", staticmethod(fake_rates))
+
+    app = FastAPI()
+
+    @app.get("/report")
+    async def report(year: int, conditional: ConditionalRequest = Depends()):
+        not_modified = await conditional.check(db=object(), years=[year])
+        if not_modified:
+            return not_modified
+        state["computed"] += 1
+        return {"year": year, "pbt": 100}
+
+    return TestClient(app), state
+
+
+class TestConditionalGet:
+    def test_matching_etag_returns_304_without_computing(self, monkeypatch):
+        client, state = _app(monkeypatch, "42.10")
+        first = client.get("/report", params={"year": 2025})
+        assert first.status_code == 200
+        etag = first.headers["etag"]
+        assert first.headers["cache-control"] == "private, no-cache"
+
+        second = client.get("/report", params={"year": 2025}, headers={"If-None-Match": etag})
+        assert second.status_code == 304
+        assert second.headers["etag"] == etag
+        assert state["computed"] == 1
+
+    def test_data_change_invalidates_etag(self, monkeypatch):
+        client, state = _app(monkeypatch, "42.10")
+        etag = client.get("/report", params={"year": 2025}).headers["etag"]
+        state["token"] = "43.10"
+        response = client.get("/report", params={"year": 2025}, headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["etag"] != etag
+
+    def test_fx_change_invalidates_etag(self, monkeypatch):
+        client, state = _app(monkeypatch, "42.10")
+        etag = client.get("/report", params={"year": 2025}).headers["etag"]
+        assert client.get("/report", params={"year": 2025}, headers={"If-None-Match": etag}).status_code == 304
+        # Rates are refreshed by check() itself, before any 304.
+        state["fx"] = "2:2026-10-01:1.5"
+        response = client.get("/report", params={"year": 2025}, headers={"If-None-Match": etag})
+        assert response.status_code == 200 and response.headers["etag"] != etag
+
+    def test_query_is_part_of_etag(self, monkeypatch):
+        client, _ = _app(monkeypatch, "42.10")
+        a = client.get("/report", params={"year": 2025}).headers["etag"]
+        b = client.get("/report", params={"year": 2024}).headers["etag"]
+        assert a != b
+
+    def test_no_token_means_no_etag(self, monkeypatch):
+        client, state = _app(monkeypatch, None)
+        response = client.get("/report", params={"year": 2025}, headers={"If-None-Match": "*"})
+        assert response.status_code == 200
+        assert "etag" not in response.headers
+
+
+class TestEtagHelpers:
+    def test_weak_comparison_and_lists(self):
+        etag = make_etag("a", 1)
+        assert etag.startswith('"') and etag.endswith('"')
+        assert etag_matches(f'"other", W/{etag}', etag)
+        assert etag_matches("*", etag)
+        assert not etag_matches('"other"', etag)
+        assert not etag_matches(None, etag)
+
+    def test_token_query_always_includes_master_row(self):
+        sql = str(
+            DataVersionService.token_query(years=[2024, 2025], company_ids=["C1"]).compile(
+                dialect=postgresql.dialect()
+            )
+        )
+        assert "analytics.data_version" in sql
+        assert "period_master" in sql
+        assert " OR " in sql
+        # Rows are digested, not just max(version): late commits of lower versions must change the token.
+        assert "md5(coalesce(string_agg(" in sql
+        assert "ORDER BY analytics.data_version.company_id, analytics.data_version.period_id" in sql
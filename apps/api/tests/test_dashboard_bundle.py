@@ -0,0 +1,162 @@
+"""
+Test Dashboard Bundles
+NDJSON section streaming and request-scoped data shared between sections.
+"""
+import asyncio
+import importlib
+import json
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+from src.db.models import Scenario
+from src.db.read_models import MONTHLY_FIELDS, MonthlyRow
+from src.services.dashboard_data import DashboardData
+from src.utils.ndjson import section_ids, stream_sections
+
+# src.routers re-exports each module's APIRouter under the module's name
+md_router = importlib.import_module("src.routers.md_router")
+
+
+async def _lines(sections):
+    return [json.loads(chunk) async for chunk in stream_sections(sections)]
+
+
+def _after(delay, value=None, error=None):
+    async def compute():
+        await asyncio.sleep(delay)
+        if error is not None:
+            raise error
+        return value
+    return compute
+
+
+class TestStreamSections:
+    async def test_sections_arrive_in_completion_order_then_summary(self):
+        lines = await _lines([
+            ("slow", "risk_radar", _after(0.03, {"overall": "low"})),
+            ("fast", "performers", _after(0, {"top": []})),
+        ])
+
+        assert [line.get("id") for line in lines[:2]] == ["fast", "slow"]
+        assert lines[0] == {"id": "fast", "section": "performers", "data": {"top": []}, "status": 200}
+        assert lines[-1]["done"] is True and lines[-1]["sections"] == 2 and lines[-1]["failed"] == 0
+
+    async def test_failures_are_reported_per_section(self):
+        lines = await _lines([
+            ("trend", "pbt_trend", _after(0, error=HTTPException(status_code=404, detail="Company not found"))),
+            ("boom", "performers", _after(0, error=ZeroDivisionError("x"))),
+            ("ok", "risk_radar", _after(0.01, 1)),
+        ])
+
+        by_id = {line["id"]: line for line in lines[:-1]}
+        assert by_id["trend"]["status"] == 404 and by_id["trend"]["error"] == "Company not found"
+        assert by_id["boom"]["status"] == 500 and "x" not in by_id["boom"]["error"]
+        assert by_id["ok"]["data"] == 1
+        assert lines[-1]["failed"] == 2
+
+    async def test_closing_the_stream_cancels_running_sections(self):
+        cancelled = asyncio.Event()
+
+        async def slow():
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        stream = stream_sections([("fast", "a", _after(0, 1)), ("slow", "b", slow)])
+        await stream.__anext__()
+        await stream.aclose()
+        assert cancelled.is_set()
+
+    def test_section_ids_default_to_the_section_name_and_must_be_unique(self):
+        def request(section, id=None):
+            return SimpleNamespace(section=md_router.BundleSection(section), id=id)
+
+        assert section_ids([request("performers"), request("pbt_trend", "trend-a")]) == ["performers", "trend-a"]
+        with pytest.raises(HTTPException) as excinfo:
+            section_ids([request("pbt_trend"), request("pbt_trend")])
+        assert excinfo.value.status_code == 400
+
+
+class _CountingDb:
+    """AsyncSession stand-in returning master data and counting queries."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.executed = 0
+
+    async def execute(self, statement, params=None):
+        self.executed += 1
+        await asyncio.sleep(0.01)
+        rows = self.rows
+        return SimpleNamespace(scalars=lambda: SimpleNamespace(all=lambda: list(rows)))
+
+
+def _company(company_id, cluster_id, active=True):
+    return SimpleNamespace(id=company_id, cluster_id=cluster_id, is_active=active, name=company_id, code=company_id)
+
+
+class TestDashboardData:
+    async def test_concurrent_sections_share_one_load(self):
+        db = _CountingDb([_company("C1", "K1"), _company("C2", "K1", active=False)])
+        data = DashboardData(db)
+
+        active, everyone, c2 = await asyncio.gather(data.companies(), data.all_companies(), data.company("C2"))
+
+        assert db.executed == 1
+        assert [c.id for c in active] == ["C1"]
+        assert len(everyone) == 2 and c2.is_active is False
+        assert data.stats == {"loads": 1, "shared": 2}
+
+    async def test_cancelled_waiter_does_not_cancel_the_shared_load(self):
+        data = DashboardData(_CountingDb([_company("C1", "K1")]))
+        first = asyncio.create_task(data.companies())
+        second = asyncio.create_task(data.companies())
+        await asyncio.sleep(0)
+        first.cancel()
+
+        assert [c.id for c in await second] == ["C1"]
+
+
+class _StubData:
+    """Minimal DashboardData for builder tests."""
+
+    def __init__(self, clusters, companies, records):
+        self._clusters = clusters
+        self._companies = companies
+        self._records = records
+
+    async def clusters(self):
+        return self._clusters
+
+    async def companies(self):
+        return self._companies
+
+    async def records(self, year, months, scenario, company_ids=None):
+        return self._records[scenario]
+
+
+def _row(company_id, gp):
+    values = [0.0] * len(MONTHLY_FIELDS)
+    values[MONTHLY_FIELDS.index("gp")] = gp
+    values[MONTHLY_FIELDS.index("revenue_lkr")] = gp * 4
+    return MonthlyRow(company_id, 1, "ACTUAL", 2025, 3, values)
+
+
+class TestSectionBuilders:
+    async def test_cluster_contribution_from_shared_data(self):
+        data = _StubData(
+            clusters=[SimpleNamespace(id="K1", name="Alpha", code="A"), SimpleNamespace(id="K2", name="Beta", code="B")],
+            companies=[_company("C1", "K1"), _company("C2", "K2")],
+            records={Scenario.ACTUAL: [_row("C1", 30.0), _row("C2", 10.0)], Scenario.BUDGET: [_row("C1", 20.0)]},
+        )
+
+        response = await md_router._build_cluster_contribution(data, md_router.ViewMode.MONTH, 2025, 3)
+
+        assert response.total_gp == 40.0
+        alpha, beta = response.clusters
+        assert (alpha.gp_contribution_pct, beta.gp_contribution_pct) == (75.0, 25.0)
+        assert alpha.pbt_achievement_pct == 150.0
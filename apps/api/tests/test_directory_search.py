@@ -0,0 +1,217 @@
+"""
+Test Directory Search
+Cursor encoding, keyset paging (including NULL sort keys), substring terms,
+capped counts and the user/company typeahead.
+"""
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import Column, Integer, MetaData, Table, Text, event, insert, select, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from src.services import directory_search_service
+from src.services.directory_search_service import DirectorySearchService, SearchValidationError
+from tests.conftest import attach_analytics
+
+_metadata = MetaData()
+_items = Table(
+    "items", _metadata,
+    Column("id", Integer, primary_key=True),
+    Column("name", Text, nullable=True),
+    Column("search_text", Text, nullable=True),
+)
+
+_NAMES = ["beta", None, "alpha", "beta", None, "gamma", "alpha", None, "delta"]
+
+
+def _trigrams(value):
+    padded = f"  {value.lower()} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _similarity(a, b):
+    """pg_trgm similarity(): shared trigrams over all trigrams."""
+    left, right = _trigrams(a or ""), _trigrams(b or "")
+    return len(left & right) / len(left | right) if left | right else 0.0
+
+
+def _on_connect(dbapi_connection, record):
+    attach_analytics(dbapi_connection, record)
+    dbapi_connection.create_function("similarity", 2, _similarity)
+    dbapi_connection.create_function("concat_ws", 3, lambda sep, *parts: sep.join(p for p in parts if p))
+
+
+@pytest.fixture
+async def db():
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    event.listen(engine.sync_engine, "connect", _on_connect)
+    async with engine.begin() as conn:
+        await conn.run_sync(_metadata.create_all)
+        await conn.execute(insert(_items), [
+            {"id": i, "name": name, "search_text": f"{name or ''} item{i}"} for i, name in enumerate(_NAMES, 1)
+        ])
+    async with AsyncSession(engine) as session:
+        yield session
+    await engine.dispose()
+
+
+async def _directory(db):
+    """user_master / company_master / cluster_master with plain search_text columns."""
+    for ddl in (
+        "CREATE TABLE analytics.cluster_master (cluster_id text PRIMARY KEY, cluster_name text, "
+        "is_active boolean, created_date timestamp, modified_date timestamp)",
+        "CREATE TABLE analytics.user_master (user_id text PRIMARY KEY, user_email text, first_name text, "
+        "last_name text, is_active boolean, created_date timestamp, modified_date timestamp, search_text text)",
+        "CREATE TABLE analytics.company_master (company_id text PRIMARY KEY, cluster_id text, company_name text, "
+        "fin_year_start_month integer, is_active boolean, created_date timestamp, modified_date timestamp, "
+        "search_text text)",
+        "INSERT INTO analytics.cluster_master VALUES ('CL01', 'Shipping', 1, NULL, NULL)",
+        "INSERT INTO analytics.user_master VALUES ('U1', 'nimal@mclarens.lk', 'Nimal', 'Perera', 1, NULL, NULL, "
+        "'nimal@mclarens.lk nimal perera')",
+        "INSERT INTO analytics.user_master VALUES ('U2', 'kamal@mclarens.lk', 'Kamal', NULL, 0, NULL, NULL, "
+        "'kamal@mclarens.lk kamal ')",
+        "INSERT INTO analytics.company_master VALUES ('CC0001', 'CL01', 'McLarens Shipping', 4, 1, NULL, NULL, "
+        "'cc0001 mclarens shipping')",
+        "INSERT INTO analytics.company_master VALUES ('CC0002', 'CL01', 'Nimal Freight', 4, 1, NULL, NULL, "
+        "'cc0002 nimal freight')",
+    ):
+        await db.execute(text(ddl))
+
+
+class _PlannerDb:
+    """Answers the capped count, then EXPLAIN with a PostgreSQL-shaped plan."""
+
+    def __init__(self, exact, plan_rows):
+        self.exact = exact
+        self.plan_rows = plan_rows
+        self.sql = []
+        self.params = []
+
+    async def execute(self, statement):
+        self.sql.append(str(statement))
+        return SimpleNamespace(scalar=lambda: self.exact)
+
+    async def connection(self):
+        return self
+
+    @property
+    def dialect(self):
+        return postgresql.dialect()
+
+    @asynccontextmanager
+    async def begin_nested(self):
+        yield
+
+    async def exec_driver_sql(self, sql, params):
+        self.sql.append(sql)
+        self.params.append(params)
+        return SimpleNamespace(scalar=lambda: [{"Plan": {"Plan Rows": self.plan_rows}}])
+
+
+async def _page_through(db, keys, page_size):
+    seen, after = [], None
+    for _ in range(len(_NAMES) + 1):
+        statement = select(_items.c.id, _items.c.name).order_by(*DirectorySearchService.order_by(keys))
+        if after is not None:
+            statement = statement.where(DirectorySearchService.after_condition(keys, after))
+        rows = (await db.execute(statement.limit(page_size))).all()
+        seen.extend(row.id for row in rows)
+        if len(rows) < page_size:
+            return seen
+        cursor = DirectorySearchService.encode_cursor([rows[-1].name, rows[-1].id])
+        after = DirectorySearchService.decode_cursor(cursor, len(keys))
+    raise AssertionError("paging did not terminate")
+
+
+class TestCursor:
+    def test_round_trip(self):
+        created = datetime(2025, 3, 1, 8, 30, tzinfo=timezone.utc)
+        cursor = DirectorySearchService.encode_cursor([created, "a@b.lk", None, 7])
+        assert "=" not in cursor
+        assert DirectorySearchService.decode_cursor(cursor, 4) == [created, "a@b.lk", None, 7]
+
+    def test_invalid(self):
+        cursor = DirectorySearchService.encode_cursor(["x", 1])
+        for bad, size in (("!!not-base64", 2), ("e30", 2), (cursor, 3)):
+            with pytest.raises(SearchValidationError):
+                DirectorySearchService.decode_cursor(bad, size)
+
+
+class TestKeyset:
+    @pytest.mark.parametrize("descending", [False, True])
+    @pytest.mark.parametrize("page_size", [1, 2, 4])
+    async def test_pages_cover_every_row_once_with_null_keys(self, db, descending, page_size):
+        keys = [(_items.c.name, descending), (_items.c.id, False)]
+        everything = (await db.execute(
+            select(_items.c.id).order_by(*DirectorySearchService.order_by(keys))
+        )).scalars().all()
+        assert sorted(everything) == list(range(1, len(_NAMES) + 1))
+        # NULL names sort as the highest value.
+        null_ids = [i for i, name in enumerate(_NAMES, 1) if name is None]
+        assert (everything[:3] if descending else everything[-3:]) == null_ids
+
+        assert await _page_through(db, keys, page_size) == everything
+
+    def test_not_null_keys_have_no_null_branches(self):
+        from src.db.models import User
+
+        keys = [(User.created_date, True), (User.user_email, False)]
+        sql = str(DirectorySearchService.after_condition(keys, [datetime(2025, 1, 1), "a"]))
+        assert "IS NULL" not in sql
+        assert "NULLS" not in " ".join(str(o) for o in DirectorySearchService.order_by(keys))
+
+
+class TestMatching:
+    async def test_short_terms_match_anywhere(self, db):
+        async def ids(search):
+            conditions = DirectorySearchService.match_conditions(_items.c.search_text, search)
+            return (await db.execute(select(_items.c.id).where(*conditions).order_by(_items.c.id))).scalars().all()
+
+        assert await ids("ta") == [1, 4, 9]
+        assert await ids("ph item3") == [3]
+        assert await ids("%") == []
+        assert await ids("  ") == list(range(1, len(_NAMES) + 1))
+
+
+class TestCount:
+    async def test_exact_below_limit(self, db):
+        assert await DirectorySearchService.count(db, select(_items.c.id)) == (len(_NAMES), False)
+
+    async def test_estimate_past_limit(self, db, monkeypatch):
+        monkeypatch.setattr(directory_search_service, "EXACT_COUNT_LIMIT", 3)
+        # SQLite has no EXPLAIN (FORMAT JSON): the capped count stands in, flagged as an estimate.
+        assert await DirectorySearchService.count(db, select(_items.c.id)) == (4, True)
+
+    async def test_planner_estimate(self, monkeypatch):
+        monkeypatch.setattr(directory_search_service, "EXACT_COUNT_LIMIT", 3)
+        db = _PlannerDb(exact=4, plan_rows=125000)
+        assert await DirectorySearchService.count(db, select(_items.c.id).where(_items.c.name == "x")) \
+            == (125000, True)
+        assert db.sql[1].startswith("EXPLAIN (FORMAT JSON) SELECT items.id")
+        assert "'x'" not in db.sql[1] and db.params[0] == {"name_1": "x"}
+
+    async def test_search_terms_stay_bound(self, db, monkeypatch):
+        monkeypatch.setattr(directory_search_service, "EXACT_COUNT_LIMIT", 3)
+        # A ":word" in the term used to be read as a bind parameter once rendered into text().
+        statement = select(_items.c.id).where(_items.c.name != "a:b 'c'")
+        assert await DirectorySearchService.count(db, statement) == (4, True)
+        # The failed EXPLAIN was rolled back to its savepoint; the session still works.
+        assert await DirectorySearchService.count(db, select(_items.c.id).where(_items.c.id == 1)) == (1, False)
+
+
+class TestTypeahead:
+    async def test_ranks_users_and_companies(self, db):
+        await _directory(db)
+        results = await DirectorySearchService.typeahead(db, "Nimal", limit=5)
+        assert {(r["type"], r["id"]) for r in results} == {("user", "U1"), ("company", "CC0002")}
+        assert results[0]["score"] >= results[1]["score"] > 0
+        company = next(r for r in results if r["type"] == "company")
+        assert company["label"] == "Nimal Freight" and company["detail"] == "Shipping"
+
+        users = await DirectorySearchService.typeahead(db, "ka", include_companies=False)
+        assert [(r["id"], r["detail"], r["is_active"]) for r in users] == [("U2", "Kamal", False)]
+        assert await DirectorySearchService.typeahead(db, "   ") == []
@@ -0,0 +1,147 @@
+"""
+Test Email Digests
+Precompiled templates render like str.format; held workflow emails are
+released as one outbox email per recipient.
+"""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import select
+
+from src.db.models import EmailDigestItem, EmailOutbox
+from src.services import email_outbox_service
+from src.services.email_outbox_service import (
+    EMAIL_TEMPLATES,
+    CompiledTemplate,
+    EmailOutboxService,
+    render_digest,
+)
+
+_VARIABLES = {
+    "company_name": "Acme Ltd", "period": "3/2025", "submitted_by": "Finance Officer",
+    "review_url": "https://app/review", "approved_by": "Director", "rejected_by": "Director",
+    "rejection_reason": "Revenue does not tie", "edit_url": "https://app/edit", "days_overdue": "4",
+    "submit_url": "https://app/submit", "pending_count": 3, "oldest_days": 5,
+}
+
+
+@pytest.fixture
+def analytics_tables():
+    return [EmailDigestItem.__table__, EmailOutbox.__table__]
+
+
+def _message(to_email, company_name="Acme Ltd"):
+    return {"to_email": to_email, "to_name": to_email.split("@")[0],
+            "variables": {**_VARIABLES, "company_name": company_name}}
+
+
+async def _age(db, to_email, minutes):
+    items = (await db.execute(select(EmailDigestItem).where(EmailDigestItem.to_email == to_email))).scalars()
+    for item in items:
+        item.created_at = datetime.now(timezone.utc) - timedelta(minutes=minutes)
+    await db.flush()
+
+
+class TestCompiledTemplate:
+    def test_matches_str_format(self):
+        for name, template in EMAIL_TEMPLATES.items():
+            compiled = email_outbox_service._COMPILED[name]
+            for part in ("subject", "html", "text"):
+                assert compiled[part].render(_VARIABLES) == template[part].format(**_VARIABLES), (name, part)
+
+    def test_specs_and_missing_variables(self):
+        template = CompiledTemplate("{{literal}} {count:>3} {name!r}")
+        assert template.fields == {"count", "name"}
+        assert template.render({"count": 7, "name": "x"}) == "{literal}   7 'x'"
+        with pytest.raises(KeyError):
+            template.render({"count": 7})
+        with pytest.raises(ValueError):
+            CompiledTemplate("{user.name}")
+
+
+class TestRenderDigest:
+    def test_sections_in_order_with_links(self):
+        subject, html, text = render_digest([
+            ("report_approved", _VARIABLES),
+            ("report_submitted", {**_VARIABLES, "company_name": "Beta Ltd"}),
+            ("report_submitted", _VARIABLES),
+        ])
+        assert subject == "[McLarens] 3 report updates"
+        assert html.index("Submitted for your review (2)") < html.index("Approved (1)")
+        assert '<a href="https://app/review">Beta Ltd (3/2025) - submitted by Finance Officer</a>' in html
+        assert "- Acme Ltd (3/2025) - approved by Director" in text
+
+
+class TestDigestRelease:
+    async def test_one_email_per_ripe_recipient(self, db, monkeypatch):
+        monkeypatch.setattr(email_outbox_service.settings, "email_digest_window_minutes", 15)
+        held = await EmailOutboxService.queue_template_emails(
+            db, "report_submitted",
+            [_message("fd@example.com", f"Company {i}") for i in range(40)] + [_message("fo@example.com")],
+            related_type="financial_workflow",
+        )
+        await EmailOutboxService.queue_template_email(
+            db, "late@example.com", None, "overdue_reminder", _VARIABLES,
+        )
+        assert held == 41
+        assert (await db.execute(select(EmailOutbox))).scalars().all() == []
+
+        await _age(db, "fd@example.com", 20)
+        await _age(db, "fo@example.com", 20)
+        stats = await EmailOutboxService.release_digests(db)
+        await db.commit()
+        assert stats == {"recipients": 2, "items": 41, "digests": 1, "singles": 1, "kept": 0}
+
+        emails = {e.to_email: e for e in (await db.execute(select(EmailOutbox))).scalars()}
+        assert set(emails) == {"fd@example.com", "fo@example.com"}
+        assert emails["fd@example.com"].subject == "[McLarens] 40 report updates"
+        assert emails["fd@example.com"].body_html.count("<li>") == 40
+        # A lone item goes out as the original email.
+        assert emails["fo@example.com"].subject.startswith("[McLarens] Report Submitted for Review")
+        assert emails["fo@example.com"].related_type == "financial_workflow"
+
+        # The recipient still inside the window keeps waiting; released items are gone.
+        remaining = (await db.execute(select(EmailDigestItem.to_email))).scalars().all()
+        assert remaining == ["late@example.com"]
+        assert (await EmailOutboxService.release_digests(db))["items"] == 0
+
+    async def test_window_zero_queues_immediately(self, db, monkeypatch):
+        monkeypatch.setattr(email_outbox_service.settings, "email_digest_window_minutes", 0)
+        await EmailOutboxService.queue_template_emails(db, "report_approved", [_message("fo@example.com")])
+        await db.flush()
+        assert len((await db.execute(select(EmailOutbox))).scalars().all()) == 1
+        assert (await db.execute(select(EmailDigestItem))).scalars().all() == []
+
+    async def test_hold_skips_messages_missing_variables(self, db, monkeypatch):
+        monkeypatch.setattr(email_outbox_service.settings, "email_digest_window_minutes", 15)
+        incomplete = {"to_email": "fo@example.com", "variables": {"company_name": "Acme Ltd"}}
+        assert await EmailOutboxService.queue_template_emails(db, "report_rejected", [incomplete]) == 0
+
+    async def test_lone_item_that_no_longer_renders_is_not_lost(self, db, monkeypatch):
+        monkeypatch.setattr(email_outbox_service.settings, "email_digest_window_minutes", 15)
+        await EmailOutboxService.queue_template_emails(
+            db, "report_submitted", [_message("fd@example.com"), _message("fo@example.com")],
+        )
+        await EmailOutboxService.queue_template_emails(db, "report_approved", [_message("fo@example.com")])
+        # Held before a deploy: the subject now needs a variable the items lack, and one
+        # item's template has since been dropped from the digest.
+        monkeypatch.setitem(
+            email_outbox_service._COMPILED["report_submitted"], "subject", CompiledTemplate("{pending_count} {missing}"),
+        )
+        items = (await db.execute(select(EmailDigestItem).where(EmailDigestItem.to_email == "fo@example.com"))).scalars()
+        for item in items:
+            if item.template_name == "report_approved":
+                item.template_name = "retired_template"
+        await _age(db, "fd@example.com", 20)
+        await _age(db, "fo@example.com", 20)
+
+        stats = await EmailOutboxService.release_digests(db)
+        await db.commit()
+        assert stats == {"recipients": 2, "items": 3, "digests": 2, "singles": 0, "kept": 1}
+
+        emails = {e.to_email: e for e in (await db.execute(select(EmailOutbox))).scalars()}
+        assert emails["fd@example.com"].subject == "[McLarens] 1 report updates"
+        assert "Acme Ltd (3/2025) - submitted by Finance Officer" in emails["fd@example.com"].body_text
+        assert emails["fo@example.com"].body_html.count("<li>") == 1
+        remaining = (await db.execute(select(EmailDigestItem.template_name))).scalars().all()
+        assert remaining == ["retired_template"]
@@ -0,0 +1,89 @@
+"""
+Test Managed Executors
+Backpressure, stats and off-loop report rendering.
+"""
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import pytest
+
+from src.services.admin_report_service import AdminReportService
+from src.utils.executors import ExecutorSaturatedError, ManagedExecutor, _init_render_worker
+
+
+def _preview():
+    metrics = {key: 0.0 for key in ("revenue", "gp")}
+    rows = AdminReportService._build_rows(metrics, metrics, metrics, metrics)
+    return {
+        "cluster_id": "C1", "cluster_name": "Cluster", "company_id": "CO1", "company_name": "Company",
+        "year": 2025, "month": 3, "period_label": "March 2025", "fin_year_start_month": 4,
+        "matrix": {"month_label": "Mar 2025", "ytd_label": "Apr 2024 - Mar 2025"},
+        "rows": rows,
+        "month_actual_values": metrics, "month_budget_values": metrics,
+        "ytd_actual_values": metrics, "ytd_budget_values": metrics,
+    }
+
+
+class TestBackpressure:
+    async def test_rejects_past_max_pending(self):
+        release = threading.Event()
+        pool = ManagedExecutor(
+            "test", lambda: ThreadPoolExecutor(max_workers=1), workers=1, max_pending=2
+        )
+        try:
+            first = asyncio.create_task(pool.run(release.wait, 5))
+            second = asyncio.create_task(pool.run(release.wait, 5))
+            await asyncio.sleep(0.05)
+            assert pool.stats()["in_flight"] == 2
+            assert pool.queue_depth == 1
+
+            with pytest.raises(ExecutorSaturatedError) as excinfo:
+                await pool.run(release.wait, 5)
+            assert excinfo.value.retry_after >= 1
+
+            release.set()
+            await asyncio.gather(first, second)
+            stats = pool.stats()
+            assert stats["completed"] == 2
+            assert stats["rejected"] == 1
+            assert stats["in_flight"] == 0
+        finally:
+            release.set()
+            pool.shutdown()
+
+    async def test_failures_are_counted_and_raised(self):
+        pool = ManagedExecutor("test", lambda: ThreadPoolExecutor(max_workers=1), workers=1, max_pending=4)
+        try:
+            with pytest.raises(ZeroDivisionError):
+                await pool.run(divmod, 1, 0)
+            assert pool.stats()["failed"] == 1
+            assert pool.stats()["in_flight"] == 0
+        finally:
+            pool.shutdown()
+
+
+class TestRenderPool:
+    async def test_renders_in_worker_process(self):
+        pool = ManagedExecutor(
+            "render",
+            lambda: ProcessPoolExecutor(
+                max_workers=1,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_render_worker,
+            ),
+            workers=1,
+            max_pending=4,
+            kind="process",
+        )
+        try:
+            preview = _preview()
+            pdf, xlsx = await asyncio.gather(
+                pool.run(AdminReportService.generate_pdf, preview),
+                pool.run(AdminReportService.generate_excel, preview),
+            )
+            assert pdf.startswith(b"%PDF")
+            assert xlsx[:2] == b"PK"
+        finally:
+            pool.shutdown()
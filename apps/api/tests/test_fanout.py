@@ -0,0 +1,102 @@
+"""
+Test Query Fan-out
+Concurrency cap, result order, session isolation and cancellation on failure.
+"""
+import asyncio
+from contextlib import asynccontextmanager
+
+import pytest
+from fastapi import HTTPException
+
+from src.utils.fanout import fan_out
+
+
+class _Sessions:
+    """Session factory handing out numbered fake sessions and tracking closes."""
+
+    def __init__(self):
+        self.opened = 0
+        self.closed = 0
+
+    @asynccontextmanager
+    async def __call__(self):
+        self.opened += 1
+        try:
+            yield f"session-{self.opened}"
+        finally:
+            self.closed += 1
+
+
+class TestFanOut:
+    async def test_results_keep_argument_order(self):
+        sessions = _Sessions()
+
+        def query(value, delay):
+            async def run(db):
+                await asyncio.sleep(delay)
+                return value
+            return run
+
+        results = await fan_out(
+            query("slow", 0.03), query("fast", 0), query("middle", 0.01),
+            session_factory=sessions,
+        )
+        assert results == ["slow", "fast", "middle"]
+        assert sessions.opened == sessions.closed == 3
+
+    async def test_each_query_gets_its_own_session(self):
+        seen = []
+
+        async def record(db):
+            seen.append(db)
+
+        await fan_out(record, record, record, session_factory=_Sessions())
+        assert len(set(seen)) == 3
+
+    async def test_concurrency_is_capped(self):
+        running = peak = 0
+
+        async def query(db):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+
+        await fan_out(*[query] * 10, limit=3, session_factory=_Sessions())
+        assert peak == 3
+
+    async def test_latency_follows_the_slowest_query(self):
+        async def query(db):
+            await asyncio.sleep(0.05)
+
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        await fan_out(query, query, query, query, limit=4, session_factory=_Sessions())
+        assert loop.time() - started < 0.15
+
+    async def test_first_failure_cancels_the_rest_and_is_reraised(self):
+        sessions = _Sessions()
+        cancelled = []
+
+        async def slow(db):
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.append(db)
+                raise
+
+        async def failing(db):
+            await asyncio.sleep(0)
+            raise HTTPException(status_code=404, detail="Company not found")
+
+        with pytest.raises(HTTPException) as excinfo:
+            await fan_out(slow, failing, slow, slow, limit=2, session_factory=sessions)
+
+        assert excinfo.value.status_code == 404
+        # The one slow query that had started was cancelled; the queued ones never opened a session
+        assert len(cancelled) == 1
+        assert sessions.opened == sessions.closed == 2
+
+    async def test_no_queries(self):
+        assert await fan_out() == []
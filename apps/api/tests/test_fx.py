@@ -0,0 +1,127 @@
+"""
+Test FX Conversion
+As-of rate lookup, per-row conversion and the converted-totals cache.
+"""
+from datetime import date
+from types import SimpleNamespace
+
+import pytest
+
+from src.services import fx_service
+from src.services.fx_service import (
+    FxRateMissing,
+    FxRateTable,
+    FxService,
+    MetricMatrix,
+    scale_columns,
+)
+
+
+RATES = FxRateTable(
+    [
+        ("USD", date(2025, 2, 28), 296.0),
+        ("USD", date(2025, 1, 31), 300.0),
+        ("EUR", date(2025, 1, 31), 310.0),
+    ],
+    version="v1",
+)
+
+
+def _record(company_id, month, revenue, gp=0, exchange_rate=None, year=2025):
+    return SimpleNamespace(
+        company_id=company_id, year=year, month=month, revenue_lkr=revenue, gp=gp,
+        exchange_rate=exchange_rate,
+    )
+
+
+@pytest.fixture
+def fx(monkeypatch):
+    monkeypatch.setattr(fx_service, "_matrices", fx_service._Lru(16))
+    monkeypatch.setattr(fx_service, "_totals", fx_service._Lru(16))
+    monkeypatch.setattr(fx_service, "_stats", dict.fromkeys(fx_service._stats, 0))
+
+    async def rates(db, force=False):
+        return RATES
+
+    monkeypatch.setattr(FxService, "rates", staticmethod(rates))
+
+
+class TestRateTable:
+    def test_as_of_uses_latest_rate_on_or_before(self):
+        assert RATES.rate_as_of("usd", date(2025, 2, 27)) == 300.0
+        assert RATES.rate_as_of("USD", date(2025, 2, 28)) == 296.0
+        assert RATES.rate_as_of("USD", date(2026, 1, 1)) == 296.0
+        assert RATES.rate_as_of("USD", date(2024, 12, 31)) is None
+        assert RATES.rate_as_of("LKR", date(2020, 1, 1)) == 1.0
+
+    def test_period_rates_resolve_at_month_end(self):
+        assert RATES.period_rates("USD", [(2025, 1), (2025, 2), (2025, 1)]) == [300.0, 296.0, 300.0]
+
+
+class TestConversion:
+    def test_rows_convert_at_their_own_period_rate(self):
+        matrix = MetricMatrix.from_records([
+            _record("CC0001", 1, 3_000_000, gp=600_000),
+            _record("CC0002", 2, 296_000, gp=29_600),
+        ])
+        converted = FxService.convert(RATES, matrix, "USD")
+        assert converted["revenue_lkr"] == pytest.approx([10_000, 1_000])
+        assert converted["gp"] == pytest.approx([2_000, 100])
+
+    def test_effective_rate_is_revenue_weighted(self):
+        # A naive mean of the two entered rates would be 250.
+        matrix = MetricMatrix.from_records([
+            _record("CC0001", 1, 3_000_000, exchange_rate=300, year=2024),
+            _record("CC0002", 1, 1_000, exchange_rate=200, year=2024),
+        ])
+        totals = FxService.totals(FxRateTable(), matrix, "LKR")
+        assert totals["revenue_lkr"] == 3_001_000
+        assert totals["fx_rate"] == pytest.approx(3_001_000 / (10_000 + 5))
+        assert totals["rows"] == 2
+
+    def test_published_rate_wins_over_entered_rate(self):
+        matrix = MetricMatrix.from_records([_record("CC0001", 1, 300_000, exchange_rate=250)])
+        assert FxService.totals(RATES, matrix, "USD")["revenue_lkr"] == pytest.approx(1_000)
+
+    def test_unpublished_currency_is_rejected(self):
+        matrix = MetricMatrix.from_records([_record("CC0001", 1, 1)])
+        with pytest.raises(FxRateMissing):
+            FxService.totals(RATES, matrix, "GBP")
+
+    def test_scale_columns_pure_python_matches(self, monkeypatch):
+        columns = {"a": [1.0, 2.0, 3.0], "b": [0.0, -4.0, 8.0]}
+        factors = [0.5, 0.25, 2.0]
+        vectorized = scale_columns(columns, factors)
+        monkeypatch.setattr(fx_service, "pc", None)
+        assert scale_columns(columns, factors) == vectorized == {"a": [0.5, 0.5, 6.0], "b": [0.0, -1.0, 16.0]}
+
+
+class TestCache:
+    async def test_currency_toggle_reuses_loaded_matrix(self, fx):
+        loads = []
+
+        async def load():
+            loads.append(1)
+            return MetricMatrix.from_records([_record("CC0001", 1, 3_000_000)])
+
+        usd = await FxService.cached_totals(None, "USD", ("overview", "t1"), load)
+        lkr = await FxService.cached_totals(None, "LKR", ("overview", "t1"), load)
+        again = await FxService.cached_totals(None, "usd", ("overview", "t1"), load)
+
+        assert usd["revenue_lkr"] == pytest.approx(10_000)
+        assert lkr["revenue_lkr"] == 3_000_000
+        assert again == usd
+        assert loads == [1]
+        assert fx_service._stats["totals_hits"] == 1
+
+    async def test_new_data_token_reloads(self, fx):
+        loads = []
+
+        async def load():
+            loads.append(1)
+            return MetricMatrix.from_records([])
+
+        await FxService.cached_totals(None, "USD", ("overview", "t1"), load)
+        await FxService.cached_totals(None, "USD", ("overview", "t2"), load)
+        await FxService.cached_totals(None, "USD", None, load)
+        assert len(loads) == 3
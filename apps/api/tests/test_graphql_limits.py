@@ -0,0 +1,129 @@
+"""
+Test GraphQL Limits
+Static cost analysis, cost budgets and persisted queries.
+"""
+import json
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from graphql import parse
+
+from src.gql_schema.extensions import CostBudget, operation_cost
+from src.gql_schema.persisted_queries import (
+    PersistedQueryError,
+    PersistedQueryRegistry,
+    PersistedQueryRouter,
+    query_hash,
+)
+from src.gql_schema.schema import schema
+
+
+class TestOperationCost:
+    def test_root_weights_and_nested_fields(self):
+        doc = parse("{ ceoDashboard(year: 2025, month: 1) { totalCompanies reportingRate } }")
+        assert operation_cost(doc) == 20 + 2
+
+    def test_limit_multiplies_nested_selection(self):
+        doc = parse("query Q($n: Int!) { topPerformers(year: 2025, month: 1, limit: $n) { name rank } }")
+        assert operation_cost(doc, variables={"n": 10}) == 8 + 2 * 10
+
+    def test_aliases_and_fragments_count_every_selection(self):
+        doc = parse(
+            """
+            fragment F on CEODashboardData { totalCompanies }
+            { a: ceoDashboard(year: 2025, month: 1) { ...F }
+              b: ceoDashboard(year: 2025, month: 2) { ...F } }
+            """
+        )
+        assert operation_cost(doc) == 2 * (20 + 1)
+
+    def test_introspection_is_free(self):
+        assert operation_cost(parse("{ __schema { types { name } } }")) == 0
+
+    def test_picks_named_operation(self):
+        doc = parse("query A { health } query B { ceoDashboard(year: 1, month: 1) { totalCompanies } }")
+        assert operation_cost(doc, "A") == 0
+        assert operation_cost(doc, "B") == 21
+
+
+class TestCostBudget:
+    def test_budget_exhaustion_returns_retry_hint(self):
+        budget = CostBudget(per_minute=60)
+        assert budget.consume("u", 50) is None
+        retry = budget.consume("u", 50)
+        assert retry is not None and retry >= 1
+        assert budget.consume("other", 50) is None
+
+
+class TestCostLimitExtension:
+    async def test_over_budget_operation_is_rejected_before_resolving(self):
+        aliases = " ".join(f"m{i}: me {{ id }}" for i in range(150))
+        result = await schema.execute(f"{{ {aliases} }}", context_value={"db": None, "user": None})
+        assert result.errors
+        assert result.errors[0].extensions["code"] == "QUERY_TOO_COSTLY"
+
+    async def test_cheap_operation_runs(self):
+        result = await schema.execute("{ health }", context_value={"db": None, "user": None})
+        assert result.errors is None
+        assert result.data == {"health": "GraphQL API is healthy"}
+
+
+class TestPersistedQueryRegistry:
+    QUERY = "{ health }"
+
+    def _extensions(self, query=QUERY):
+        return {"persistedQuery": {"version": 1, "sha256Hash": query_hash(query)}}
+
+    def test_unknown_hash_asks_for_the_query(self):
+        registry = PersistedQueryRegistry(auto_register=True, persisted_only=False)
+        with pytest.raises(PersistedQueryError) as exc:
+            registry.resolve(None, self._extensions())
+        assert exc.value.code == "PERSISTED_QUERY_NOT_FOUND"
+
+    def test_auto_registration_then_hash_only(self):
+        registry = PersistedQueryRegistry(auto_register=True, persisted_only=False)
+        assert registry.resolve(self.QUERY, self._extensions()) == self.QUERY
+        assert registry.resolve(None, json.dumps(self._extensions())) == self.QUERY
+        assert registry.stats["hits"] == 1
+
+    def test_hash_mismatch_is_rejected(self):
+        registry = PersistedQueryRegistry(auto_register=True, persisted_only=False)
+        with pytest.raises(PersistedQueryError):
+            registry.resolve("{ me { id } }", self._extensions())
+
+    def test_persisted_only_allows_manifest_documents(self, tmp_path):
+        manifest = tmp_path / "queries.json"
+        manifest.write_text(json.dumps({query_hash(self.QUERY): self.QUERY}))
+        registry = PersistedQueryRegistry(auto_register=True, persisted_only=True)
+        registry.load_manifest(str(manifest))
+        assert registry.resolve(None, self._extensions()) == self.QUERY
+        with pytest.raises(PersistedQueryError) as exc:
+            registry.resolve("{ me { id } }", None)
+        assert exc.value.code == "PERSISTED_QUERY_REQUIRED"
+
+    def test_registered_entries_are_bounded(self):
+        registry = PersistedQueryRegistry(auto_register=True, persisted_only=False, max_registered=2)
+        for i in range(3):
+            query = f"query Q{i} {{ health }}"
+            registry.resolve(query, self._extensions(query))
+        assert len(registry) == 2
+
+
+class TestPersistedQueryRouter:
+    def test_apq_round_trip_over_http(self):
+        async def context_getter():
+            return {"db": None, "user": None}
+
+        app = FastAPI()
+        app.include_router(PersistedQueryRouter(schema, context_getter=context_getter), prefix="/graphql")
+        client = TestClient(app)
+        query = "query Apq { health }"
+        extensions = {"persistedQuery": {"version": 1, "sha256Hash": query_hash(query)}}
+
+        miss = client.post("/graphql", json={"extensions": extensions}).json()
+        assert miss["errors"][0]["extensions"]["code"] == "PERSISTED_QUERY_NOT_FOUND"
+
+        client.post("/graphql", json={"query": query, "extensions": extensions})
+        hit = client.post("/graphql", json={"extensions": extensions}).json()
+        assert hit["data"] == {"health": "GraphQL API is healthy"}
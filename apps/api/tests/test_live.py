@@ -0,0 +1,171 @@
+"""
+Tests for live dashboard updates: payload parsing, subscription scoping,
+fan-out back-pressure and the /ws/live protocol.
+"""
+import asyncio
+import importlib
+import json
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+from src.services.acl_service import CompanyAccess
+from src.services.live_service import ChangeListener, DataChange, LiveHub, RESYNC, Subscription, live_hub
+
+live_router = importlib.import_module("src.routers.live_router")
+
+_PERIODS = {61: (2025, 1), 62: (2025, 2), 50: (2024, 2)}
+
+
+def _change(rows, periods=None, table="financial_workflow", op="UPDATE"):
+    payload = {"t": table, "op": op, "periods": periods or sorted({row[1] for row in rows})}
+    if rows is not None:
+        payload["rows"] = rows
+    return DataChange.from_payload(json.dumps(payload), _PERIODS.get)
+
+
+class TestDataChange:
+    def test_resolves_periods_and_status(self):
+        change = _change([["CC0001", 62, 3], ["CC0002", 61, 4]])
+        assert change.kind == "workflow"
+        assert change.rows == [("CC0001", 2025, 2, "Approved"), ("CC0002", 2025, 1, "Rejected")]
+        assert change.periods == [(2025, 1), (2025, 2)]
+
+    def test_fact_rows_have_no_status(self):
+        change = _change([["CC0001", 62, None]], table="financial_fact", op="INSERT")
+        assert change.kind == "facts"
+        assert change.rows == [("CC0001", 2025, 2, None)]
+
+    def test_bulk_payload_without_rows(self):
+        change = _change(None, periods=[62, 50])
+        assert change.rows is None
+        assert change.periods == [(2024, 2), (2025, 2)]
+
+    def test_dsn_only_for_asyncpg(self):
+        assert ChangeListener.dsn("postgresql+asyncpg://u:p@db:5432/app") == "postgresql://u:p@db:5432/app"
+        assert ChangeListener.dsn("sqlite+aiosqlite:///:memory:") is None
+
+
+class TestSubscription:
+    def test_period_filter(self):
+        sub = Subscription.from_message({"periods": [{"year": 2025, "month": 2}]}, None)
+        message = sub.message_for(_change([["CC0001", 62, 3], ["CC0001", 61, 3]]))
+        assert message["changes"] == [{"company_id": "CC0001", "year": 2025, "month": 2, "status": "Approved"}]
+        assert message["periods"] == [{"year": 2025, "month": 2}]
+        assert sub.message_for(_change([["CC0001", 50, 3]])) is None
+
+    def test_whole_year(self):
+        sub = Subscription.from_message({"periods": [{"year": 2024}]}, None)
+        assert sub.message_for(_change([["CC0001", 50, 2]])) is not None
+        assert sub.message_for(_change([["CC0001", 62, 2]])) is None
+
+    def test_access_limits_companies(self):
+        sub = Subscription.from_message({}, CompanyAccess(["CC0002"]))
+        message = sub.message_for(_change([["CC0001", 62, 3], ["CC0002", 62, 3]]))
+        assert [c["company_id"] for c in message["changes"]] == ["CC0002"]
+        assert sub.message_for(_change([["CC0001", 62, 3]])) is None
+
+    def test_requested_companies_cannot_widen_access(self):
+        sub = Subscription.from_message({"company_ids": ["CC0001", "CC0002"]}, CompanyAccess(["CC0002"]))
+        assert sub.message_for(_change([["CC0001", 62, 3]])) is None
+
+    def test_bulk_change_reports_periods_only(self):
+        sub = Subscription.from_message({"periods": [{"year": 2025}]}, CompanyAccess(["CC0002"]))
+        message = sub.message_for(_change(None, periods=[62, 50]))
+        assert message["complete"] is False
+        assert "changes" not in message
+        assert message["periods"] == [{"year": 2025, "month": 2}]
+
+
+class TestLiveHub:
+    async def test_publish_and_pump(self):
+        hub = LiveHub(max_connections=10, queue_size=10)
+        interested = hub.connect(Subscription([(2025, 2)]))
+        other = hub.connect(Subscription([(2024, None)]))
+        assert hub.publish(_change([["CC0001", 62, 3]])) == 1
+        assert other.queue.empty()
+
+        sent = []
+        pump = asyncio.create_task(hub.pump(interested, _append_to(sent)))
+        await asyncio.sleep(0)
+        pump.cancel()
+        await asyncio.gather(pump, return_exceptions=True)
+
+        assert sent[0]["type"] == "change"
+        snapshot = hub.snapshot()
+        assert snapshot["connections"] == 2
+        assert snapshot["events"] == 1 and snapshot["deliveries"] == 1
+        assert snapshot["fanout_ms"]["max"] is not None
+
+    def test_slow_client_gets_resync(self):
+        hub = LiveHub(queue_size=2)
+        client = hub.connect(Subscription())
+        for _ in range(3):
+            hub.publish(_change([["CC0001", 62, 3]]))
+        assert client.queue.qsize() == 1
+        assert client.queue.get_nowait()[1] == RESYNC
+        assert hub.stats["resyncs"] == 1
+
+    def test_connection_cap(self):
+        hub = LiveHub(max_connections=1)
+        client = hub.connect(Subscription())
+        assert hub.connect(Subscription()) is None
+        assert hub.stats["rejected_connections"] == 1
+        hub.disconnect(client)
+        assert hub.connect(Subscription()) is not None
+        assert hub.stats["peak_connections"] == 1
+
+
+def _append_to(sent):
+    async def send(message):
+        sent.append(message)
+    return send
+
+
+class _User:
+    is_active = True
+
+
+@pytest.fixture
+def client(monkeypatch):
+    async def authenticate(token):
+        if token == "md":
+            return _User(), None, None
+        if token == "fo":
+            return _User(), CompanyAccess(["CC0002"]), None
+        return None, None, None
+
+    monkeypatch.setattr(live_router, "_authenticate", authenticate)
+    app = FastAPI()
+    app.include_router(live_router.router)
+    return TestClient(app)
+
+
+class TestWebSocket:
+    def test_rejects_without_token(self, client):
+        with client.websocket_connect("/ws/live") as ws:
+            ws.send_json({"type": "subscribe"})
+            with pytest.raises(WebSocketDisconnect) as exc:
+                ws.receive_json()
+        assert exc.value.code == 1008
+
+    def test_rejects_bad_token(self, client):
+        with client.websocket_connect("/ws/live") as ws:
+            ws.send_json({"type": "subscribe", "token": "nope"})
+            with pytest.raises(WebSocketDisconnect):
+                ws.receive_json()
+
+    def test_subscribe_and_resubscribe(self, client):
+        with client.websocket_connect("/ws/live") as ws:
+            ws.send_json({"type": "subscribe", "token": "fo", "periods": [{"year": 2025, "month": 2}]})
+            ack = ws.receive_json()
+            assert ack == {"type": "subscribed", "periods": [{"year": 2025, "month": 2}], "company_ids": None}
+            assert len(live_hub) == 1
+
+            ws.send_json({"type": "subscribe", "periods": [{"year": 2024}], "company_ids": ["CC0002"]})
+            assert ws.receive_json()["company_ids"] == ["CC0002"]
+            ws.send_json({"type": "ping"})
+            assert ws.receive_json() == {"type": "pong"}
+        assert len(live_hub) == 0
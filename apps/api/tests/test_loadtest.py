@@ -0,0 +1,283 @@
+"""
+Test Load Harness
+Outcome classification and reporting against a stub app, scenario routes
+existing in main.app, baseline regression checks, and pool wait recording.
+"""
+import asyncio
+import copy
+import itertools
+import time
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from starlette.routing import Match
+
+from src.db.session import TimedQueuePool, pool_monitor
+from src.loadtest import harness
+from src.loadtest.harness import (
+    LoadConfig,
+    RoleConfig,
+    Tolerances,
+    compare_to_baseline,
+    format_report,
+    load_baseline,
+    run_load,
+    save_baseline,
+)
+from src.loadtest.scenarios import SCENARIOS
+
+
+def _stub_app(handler, pids=(None,)):
+    app = FastAPI()
+    checkouts = {"n": 0}
+    answers = itertools.cycle(pids)
+
+    @app.get("/health/ready")
+    async def ready():
+        return {"ready": True}
+
+    @app.get("/health/pool")
+    async def pool():
+        checkouts["n"] += 10
+        pid = next(answers)
+        return {**({"pid": pid} if pid is not None else {}),
+                "primary": {"size": 10, "checkouts": checkouts["n"], "timeouts": 0,
+                            "wait_ms_total": checkouts["n"] * 0.5, "wait_ms": {"p95": 1.0, "max": 3.0}}}
+
+    @app.post("/auth/login/dev")
+    async def login(request: Request):
+        body = await request.json()
+        return {"access_token": f"token-{body['email']}"}
+
+    @app.api_route("/{path:path}", methods=["GET", "POST"])
+    async def anything(path: str, request: Request):
+        return await handler(request)
+
+    return app
+
+
+def _config(**roles):
+    return LoadConfig(
+        roles={role: RoleConfig(users=n, accounts=[f"{role}@example.com"], think_seconds=1.0)
+               for role, n in roles.items()},
+        duration_seconds=0.3, ramp_seconds=0.05, think_scale=0, year=2025, month=3,
+    )
+
+
+class TestRun:
+    async def test_outcomes_and_report(self):
+        flaky_calls = {"n": 0}
+
+        async def handler(request: Request):
+            assert request.headers["authorization"].startswith("Bearer token-fo@")
+            path = request.url.path
+            if path == "/flaky":
+                flaky_calls["n"] += 1
+                return JSONResponse({"detail": "boom"}, status_code=500 if flaky_calls["n"] % 2 else 200)
+            if path == "/busy":
+                return JSONResponse({"detail": "shed"}, status_code=503)
+            if path == "/taken":
+                return JSONResponse({"detail": "not submitted"}, status_code=400)
+            if request.headers.get("if-none-match") == '"v1"':
+                return Response(status_code=304)
+            return JSONResponse({"ok": True}, headers={"ETag": '"v1"'})
+
+        async def scenario(vu):
+            assert vu.body(await vu.get("s.dashboard", "/dashboard", conditional=True)) in ({"ok": True}, None)
+            await vu.get("s.flaky", "/flaky")
+            await vu.post("s.busy", "/busy")
+            await vu.post("s.taken", "/taken", conflict=(400,))
+            await asyncio.sleep(0.01)
+
+        report = await run_load(_config(fo=3), {"fo": scenario}, app=_stub_app(handler))
+        endpoints = report["endpoints"]
+        assert report["mix"] == {"fo": 3} and report["iterations"]["fo"] >= 3
+        assert endpoints["auth.login"]["ok"] == 3
+        # First read per user is a 200 with an ETag, later ones revalidate to 304.
+        assert endpoints["s.dashboard"]["error"] == 0
+        assert report["statuses"]["304"] == endpoints["s.dashboard"]["count"] - 3
+        assert 0 < endpoints["s.flaky"]["error"] < endpoints["s.flaky"]["count"]
+        assert endpoints["s.busy"]["shed"] == endpoints["s.busy"]["count"]
+        assert endpoints["s.taken"]["conflict"] == endpoints["s.taken"]["count"]
+        assert report["error"] == endpoints["s.flaky"]["error"]
+        assert report["throughput_rps"] > 0 and report["latency_ms"]["p95"] is not None
+        # POOL_PROBES answers per snapshot; the last of each is compared.
+        assert report["pool"]["primary"]["checkouts"] == 10 * harness.POOL_PROBES
+        assert report["pool"]["primary"]["wait_ms_mean"] == 0.5
+        assert report["pool_note"] is None
+        assert report["locks"] is None
+        assert "s.flaky" in format_report(report)
+
+    async def test_pool_is_not_measured_across_workers(self):
+        async def handler(request: Request):
+            return JSONResponse({"ok": True})
+
+        async def scenario(vu):
+            await vu.get("s.dashboard", "/dashboard")
+            await asyncio.sleep(0.01)
+
+        report = await run_load(_config(fo=1), {"fo": scenario}, app=_stub_app(handler, pids=(101, 102)))
+        assert report["pool"] == {}
+        assert "2 workers (pids 101, 102)" in report["pool_note"]
+        assert "Pool not measured" in format_report(report)
+
+        report = await run_load(_config(fo=1), {"fo": scenario}, app=_stub_app(handler, pids=(101,)))
+        assert report["pool"]["primary"]["checkouts"] == 10 * harness.POOL_PROBES
+        assert report["pool_note"] is None
+
+    async def test_missing_scenario_or_accounts(self):
+        with pytest.raises(ValueError):
+            await run_load(_config(cfo=1), SCENARIOS, app=_stub_app(None))
+        config = _config(fo=1)
+        config.roles["fo"].accounts = []
+        with pytest.raises(ValueError):
+            await run_load(config, SCENARIOS, app=_stub_app(None))
+
+
+class TestScenarios:
+    async def test_routes_exist_in_main_app(self):
+        from src.main import app as main_app
+
+        requested = set()
+
+        async def handler(request: Request):
+            path = request.url.path
+            requested.add((request.method, path))
+            if path == "/fo/actual-entry/companies":
+                return {"items": [{"company_id": "CC0001"}]}
+            if path == "/fd/submitted-actuals":
+                return {"reports": [{"company_id": "CC0001", "period_id": 63}], "total": 1}
+            if path in ("/md/performance-hierarchy", "/ceo/dashboard"):
+                return {"clusters": [{"id": "CL01"}]}
+            return {}
+
+        report = await run_load(_config(fo=2, fd=2, md=1, ceo=1), SCENARIOS, app=_stub_app(handler))
+        assert report["error"] == 0 and report["scenario_errors"] == {}
+        assert {name.split(".")[0] for name in report["endpoints"]} == {"auth", "fo", "fd", "md", "ceo"}
+        assert ("POST", "/fd/approve-actual/CC0001/63") in requested
+        assert ("POST", "/fo/actual-entry/submit") in requested
+
+        for method, path in requested:
+            scope = {"type": "http", "method": method, "path": path, "root_path": "", "query_string": b"",
+                     "headers": []}
+            assert any(route.matches(scope)[0] == Match.FULL for route in main_app.routes), (method, path)
+
+    async def test_read_only_skips_writes(self):
+        async def handler(request: Request):
+            assert request.method == "GET" or request.url.path.endswith("/bundle")
+            if request.url.path == "/fo/actual-entry/companies":
+                return {"items": [{"company_id": "CC0001"}]}
+            return {"reports": [{"company_id": "CC0001", "period_id": 63}]}
+
+        config = _config(fo=1, fd=1)
+        config.writes = False
+        report = await run_load(config, SCENARIOS, app=_stub_app(handler))
+        assert report["error"] == 0 and "fo.save_draft" not in report["endpoints"]
+
+
+def _report():
+    return {
+        "mix": {"fd": 2, "fo": 10}, "think_scale": 1.0, "writes": True,
+        "throughput_rps": 50.0, "error_rate": 0.0, "shed_rate": 0.0,
+        "latency_ms": {"p50": 20.0, "p95": 100.0, "p99": 200.0, "max": 400.0},
+        "endpoints": {
+            "fo.save_draft": {"count": 100, "error_rate": 0.0, "latency_ms": {"p95": 80.0, "p99": 120.0}},
+            "fd.approve": {"count": 5, "error_rate": 0.0, "latency_ms": {"p95": 50.0, "p99": 60.0}},
+        },
+        "pool": {"primary": {"wait_ms_mean": 1.0, "timeouts": 0}},
+        "locks": {"waiting_fraction": 0.0, "longest_wait_ms": 0.0, "deadlocks": 0, "error": None},
+    }
+
+
+class TestBaseline:
+    def test_identical_and_noise_pass(self, tmp_path):
+        baseline = _report()
+        save_baseline({**baseline, "error_samples": ["x"]}, tmp_path / "nested" / "baseline.json")
+        stored = load_baseline(tmp_path / "nested" / "baseline.json")
+        assert "error_samples" not in stored
+        assert compare_to_baseline(baseline, stored) == []
+
+        current = copy.deepcopy(baseline)
+        current["endpoints"]["fo.save_draft"]["latency_ms"]["p95"] = 89.0  # under the 10ms floor
+        current["pool"]["primary"]["wait_ms_mean"] = 2.5  # under the 2ms floor
+        current["throughput_rps"] = 45.0
+        assert compare_to_baseline(current, baseline) == []
+
+    def test_regressions_detected(self):
+        baseline = _report()
+        current = copy.deepcopy(baseline)
+        current["throughput_rps"] = 30.0
+        current["latency_ms"]["p99"] = 300.0
+        current["endpoints"]["fo.save_draft"]["error_rate"] = 0.05
+        # Too few samples to judge.
+        current["endpoints"]["fd.approve"]["latency_ms"]["p95"] = 5000.0
+        current["pool"]["primary"]["wait_ms_mean"] = 40.0
+        current["locks"].update(waiting_fraction=0.3, deadlocks=1)
+
+        regressions = {r.metric for r in compare_to_baseline(current, baseline)}
+        assert regressions == {
+            "throughput_rps", "latency_ms.p99", "fo.save_draft.error_rate", "pool.primary.wait_ms_mean",
+            "locks.waiting_fraction", "locks.deadlocks",
+        }
+        assert {r.metric for r in compare_to_baseline(current, baseline, Tolerances(throughput_ratio=0.5))} \
+            == regressions - {"throughput_rps"}
+
+    def test_different_mix_is_not_comparable(self):
+        current = _report()
+        current["mix"] = {"fd": 2, "fo": 20}
+        with pytest.raises(ValueError):
+            compare_to_baseline(current, _report())
+
+
+class TestPoolMonitor:
+    async def test_checkout_waits_and_timeouts(self, tmp_path):
+        engine = create_async_engine(
+            f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}", poolclass=TimedQueuePool,
+            pool_size=1, max_overflow=0, pool_timeout=0.2, pool_logging_name="test_probe",
+        )
+        try:
+            async def hold(seconds):
+                async with engine.connect() as conn:
+                    await conn.execute(text("SELECT 1"))
+                    await asyncio.sleep(seconds)
+
+            await asyncio.gather(hold(0.1), hold(0))
+            totals = pool_monitor.totals()["test_probe"]
+            assert totals["checkouts"] == 2
+            assert totals["max_wait_seconds"] >= 0.05
+
+            held, timed_out = await asyncio.gather(hold(0.5), hold(0), return_exceptions=True)
+            assert held is None and isinstance(timed_out, PoolTimeoutError)
+            snapshot = pool_monitor.snapshot()["test_probe"]
+            assert snapshot["timeouts"] == 1 and snapshot["wait_ms"]["max"] >= 150
+        finally:
+            await engine.dispose()
+
+    async def test_connect_time_is_not_a_wait(self, tmp_path):
+        engine = create_async_engine(
+            f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}", poolclass=TimedQueuePool,
+            pool_size=1, max_overflow=2, pool_logging_name="test_connect",
+        )
+
+        @event.listens_for(engine.sync_engine, "connect")
+        def slow_connect(dbapi_connection, record):
+            time.sleep(0.1)
+
+        try:
+            async def hold():
+                async with engine.connect() as conn:
+                    await conn.execute(text("SELECT 1"))
+                    await asyncio.sleep(0.05)
+
+            # One pooled and two overflow connections, all opened on checkout.
+            await asyncio.gather(hold(), hold(), hold())
+            snapshot = pool_monitor.snapshot()["test_connect"]
+            assert snapshot["checkouts"] == 3 and snapshot["connects"] == 3
+            assert snapshot["connect_ms_max"] >= 100
+            assert snapshot["wait_ms"]["max"] < 50
+        finally:
+            await engine.dispose()
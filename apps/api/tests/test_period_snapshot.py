@@ -0,0 +1,111 @@
+"""
+Test Period Snapshots
+Packed snapshot encoding and the snapshot / live split of historical reads.
+"""
+from types import SimpleNamespace
+
+import pytest
+
+from src.services import period_snapshot_service
+from src.services.period_snapshot_service import (
+    SNAPSHOT_FIELDS,
+    PeriodSnapshotService,
+    SnapshotRow,
+    pack_rows,
+    unpack_rows,
+)
+
+
+def _row(company_id, scenario, period_id=10, year=2024, month=3, revenue=1000.0, **overrides):
+    values = dict.fromkeys(SNAPSHOT_FIELDS, 1.5)
+    values.update(revenue_lkr=revenue, **overrides)
+    return SimpleNamespace(
+        company_id=company_id, scenario=scenario, period_id=period_id, year=year, month=month, **values
+    )
+
+
+class _LiveDb:
+    """Answers the live view query with projected rows; records its SQL."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.sql = []
+
+    async def execute(self, statement, params=None):
+        self.sql.append(str(statement.compile(compile_kwargs={"literal_binds": True})))
+        return [
+            (r.company_id, r.period_id, r.scenario, r.year, r.month, *(getattr(r, f) for f in SNAPSHOT_FIELDS))
+            for r in self.rows
+        ]
+
+
+class TestEncoding:
+    def test_round_trip_keeps_values_and_nulls(self):
+        rows = [
+            _row("CC0001", "ACTUAL", revenue=1234567.89, exchange_rate=None),
+            _row("CC0002", "BUDGET", revenue=-5.25),
+        ]
+        payload, count = pack_rows(rows)
+        decoded = unpack_rows(payload, 10, 2024, 3)
+
+        assert count == 2
+        assert [(r.company_id, r.scenario, r.revenue_lkr) for r in decoded] == [
+            ("CC0001", "ACTUAL", 1234567.89),
+            ("CC0002", "BUDGET", -5.25),
+        ]
+        assert decoded[0].exchange_rate is None
+        assert decoded[1].ebitda == 1.5
+        assert decoded[0].id == "CC0001_2024_3_ACTUAL"
+
+    def test_payload_is_compact(self):
+        rows = [_row(f"CC{n:04d}", scenario) for n in range(300) for scenario in ("ACTUAL", "BUDGET")]
+        payload, _ = pack_rows(rows)
+        assert len(payload) < 600 * len(SNAPSHOT_FIELDS) * 8 // 4
+
+    def test_rejects_foreign_payload(self):
+        with pytest.raises(ValueError):
+            unpack_rows(b"not a snapshot", 1, 2024, 1)
+
+
+class TestLoadRecords:
+    @pytest.fixture
+    def closed(self, monkeypatch):
+        snapshot = {
+            10: [
+                SnapshotRow("CC0001", 10, "ACTUAL", 2024, 3, [300.0] * len(SNAPSHOT_FIELDS)),
+                SnapshotRow("CC0002", 10, "ACTUAL", 2024, 3, [200.0] * len(SNAPSHOT_FIELDS)),
+                SnapshotRow("CC0001", 10, "BUDGET", 2024, 3, [100.0] * len(SNAPSHOT_FIELDS)),
+            ]
+        }
+
+        async def snapshot_rows(db, year_from, year_to, months):
+            return snapshot
+
+        monkeypatch.setattr(PeriodSnapshotService, "_snapshot_rows", staticmethod(snapshot_rows))
+        monkeypatch.setattr(period_snapshot_service, "_stats", dict.fromkeys(period_snapshot_service._stats, 0))
+
+    async def test_closed_months_come_from_snapshots(self, closed):
+        db = _LiveDb([_row("CC0001", "ACTUAL", period_id=11, month=4), _row("CC0001", "ACTUAL", period_id=9, month=2)])
+        records = await PeriodSnapshotService.load_records(
+            db, "ACTUAL", year_from=2024, year_to=2024, company_ids=["CC0001"]
+        )
+
+        assert [(r.month, r.company_id, r.revenue_lkr) for r in records] == [
+            (2, "CC0001", 1000.0),
+            (3, "CC0001", 300.0),
+            (4, "CC0001", 1000.0),
+        ]
+        assert "period_id NOT IN (10)" in db.sql[0]
+        assert period_snapshot_service._stats["snapshot_periods_read"] == 1
+
+    async def test_without_snapshots_everything_is_live(self, monkeypatch):
+        async def unavailable(db, year_from, year_to, months):
+            return None
+
+        monkeypatch.setattr(PeriodSnapshotService, "_snapshot_rows", staticmethod(unavailable))
+        db = _LiveDb([_row("CC0001", "BUDGET")])
+        records = await PeriodSnapshotService.load_records(
+            db, "BUDGET", year_from=2024, year_to=2024, months=[1, 2, 3]
+        )
+        assert len(records) == 1
+        assert "NOT IN" not in db.sql[0]
@@ -0,0 +1,226 @@
+"""
+Test Sampling Profiler
+Request selection, stacks across task boundaries, wall-clock waits, session
+expiry, sessions shared between workers and the admin endpoints.
+"""
+import asyncio
+import json
+import time
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from src.routers.profiler_router import router as profiler_router
+from src.security.middleware import require_admin
+from src.utils import profiler as profiler_module
+from src.utils.profiler import ProfileSession, ProfilerBusyError, ProfilerMiddleware, SamplingProfiler, profiler
+
+
+def burn(ms):
+    end = time.perf_counter() + ms / 1000
+    n = 0
+    while time.perf_counter() < end:
+        n += 1
+    return n
+
+
+async def child_work():
+    burn(80)
+
+
+def _app(sampler):
+    app = FastAPI()
+    app.add_middleware(ProfilerMiddleware, sampler=sampler)
+
+    @app.get("/reports/{report_id}")
+    async def report(report_id: int):
+        burn(80)
+        await asyncio.gather(asyncio.create_task(child_work(), name="child"))
+        return {"id": report_id}
+
+    @app.get("/slow-io")
+    async def slow_io():
+        await asyncio.sleep(0.15)
+        return {}
+
+    return app
+
+
+def _client(app):
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+
+
+@pytest.fixture
+def sampler():
+    sampler = SamplingProfiler()
+    yield sampler
+    sampler.stop()
+
+
+class TestSessions:
+    async def test_cpu_stacks_cross_task_boundaries(self, sampler):
+        loop = asyncio.get_running_loop()
+        async with _client(_app(sampler)) as client:
+            session = sampler.start(route="/reports/*", interval_ms=1)
+            assert loop.get_task_factory() is not None
+            assert (await client.get("/reports/7")).status_code == 200
+            await client.get("/slow-io")
+            sampler.stop()
+
+        assert loop.get_task_factory() is None
+        assert session.matched == 1 and session.profiled == 1 and session.samples > 0
+        hotspots = session.hotspots(top=5)
+        assert hotspots["routes"][0]["route"] == "GET /reports/{report_id}"
+        assert "burn" in hotspots["self"][0]["function"]
+
+        folded = session.folded()
+        child_stacks = [line for line in folded.splitlines() if "[task child]" in line]
+        assert child_stacks
+        # The parent's suspended frame sits in front of the task boundary.
+        assert all(line.index("report (") < line.index("[task child]") < line.index("child_work") for line in child_stacks)
+
+        svg = session.flamegraph_svg()
+        assert svg.startswith("<svg") and "burn" in svg and "{report_id}" in svg
+
+    async def test_wall_mode_samples_waits(self, sampler):
+        async with _client(_app(sampler)) as client:
+            session = sampler.start(route="/slow-io", mode="wall", interval_ms=2)
+            await client.get("/slow-io")
+            sampler.stop()
+        assert session.samples > 10
+        assert any(line.startswith("GET /slow-io;") and "slow_io" in line and "[await" in line
+                   for line in session.folded().splitlines())
+        assert session.hotspots()["packages"][0]["package"] == "(awaiting)"
+
+    async def test_selection(self, sampler, monkeypatch):
+        async with _client(_app(sampler)) as client:
+            session = sampler.start(route="/reports/*", max_requests=1)
+            await client.get("/reports/1")
+            await client.get("/reports/2")
+            sampler.stop()
+            assert (session.matched, session.profiled) == (2, 1)
+
+            monkeypatch.setattr(profiler_module.random, "random", lambda: 0.6)
+            session = sampler.start(route="/reports/*", sample_percent=50)
+            await client.get("/reports/3")
+            sampler.stop()
+            assert (session.matched, session.profiled, session.samples) == (1, 0, 0)
+
+    async def test_expiry_and_one_session_at_a_time(self, sampler):
+        session = sampler.start(duration_seconds=0.1)
+        with pytest.raises(ProfilerBusyError):
+            sampler.start()
+        await asyncio.sleep(0.3)
+        assert sampler.session is None and session.stop_reason == "expired"
+        assert asyncio.get_running_loop().get_task_factory() is None
+        assert sampler.get(session.id) is session
+        assert sampler.snapshot()["finished"][0]["id"] == session.id
+
+
+def _as_other_worker(store_dir, session_id, pid=1):
+    """Rewrite a saved session as if another worker had written it."""
+    path = store_dir / f"{session_id}.json"
+    record = json.loads(path.read_text())
+    record["summary"]["pid"] = pid
+    path.write_text(json.dumps(record))
+
+
+class TestStore:
+    async def test_finished_session_is_readable_from_other_workers(self, tmp_path):
+        owner, other = SamplingProfiler(store_dir=str(tmp_path)), SamplingProfiler(store_dir=str(tmp_path))
+        async with _client(_app(owner)) as client:
+            session = owner.start(route="/reports/*", interval_ms=1)
+            await client.get("/reports/7")
+            owner.stop()
+
+        loaded = other.get(session.id)
+        assert loaded is not session and loaded.summary() == session.summary()
+        assert loaded.folded() == session.folded()
+        assert other.snapshot()["finished"][0]["id"] == session.id
+        assert other.get("../etc") is None and other.get("missing") is None
+
+    async def test_one_session_across_workers(self, tmp_path):
+        owner, other = SamplingProfiler(store_dir=str(tmp_path)), SamplingProfiler(store_dir=str(tmp_path))
+        session = owner.start(duration_seconds=30)
+        try:
+            _as_other_worker(tmp_path, session.id)
+            assert other.running_elsewhere().id == session.id
+            assert other.snapshot()["active"]["id"] == session.id
+            with pytest.raises(ProfilerBusyError, match="worker 1"):
+                other.start()
+
+            other.request_stop(other.running_elsewhere())
+            await asyncio.sleep(0.8)
+            assert owner.session is None and session.stop_reason == "stopped"
+            assert other.running_elsewhere() is None
+            assert not (tmp_path / f"{session.id}.stop").exists()
+        finally:
+            owner.stop()
+
+    async def test_abandoned_session_does_not_block(self, tmp_path, monkeypatch):
+        other = SamplingProfiler(store_dir=str(tmp_path))
+        session = ProfileSession(route="*", sample_percent=100, duration_seconds=1, interval_ms=5,
+                                 mode="cpu", max_requests=10, pid=1)
+        other._save(session)
+        monkeypatch.setattr(profiler_module.time, "time", lambda: session.ends_at + 60)
+        assert other.running_elsewhere() is None
+        assert other.get(session.id).stop_reason == "abandoned"
+
+
+class TestRouter:
+    @pytest.fixture(autouse=True)
+    def store_dir(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(profiler, "store_dir", tmp_path)
+        return tmp_path
+
+    async def test_admin_endpoints(self):
+        app = FastAPI()
+        app.include_router(profiler_router)
+        async with _client(app) as client:
+            assert (await client.get("/admin/profiler")).status_code in (401, 403)
+
+            app.dependency_overrides[require_admin] = lambda: SimpleNamespace(user_email="admin@example.com")
+            try:
+                response = await client.post("/admin/profiler/start", json={"route": "/md/*", "duration_seconds": 30})
+                assert response.status_code == 200 and response.json()["started_by"] == "admin@example.com"
+                session_id = response.json()["id"]
+                assert (await client.post("/admin/profiler/start", json={})).status_code == 409
+                assert (await client.get("/admin/profiler")).json()["active"]["id"] == session_id
+
+                assert (await client.post("/admin/profiler/stop")).json()["stop_reason"] == "stopped"
+                assert (await client.post("/admin/profiler/stop")).status_code == 409
+                assert (await client.post("/admin/profiler/start",
+                                          json={"duration_seconds": 100000})).status_code == 422
+
+                hotspots = await client.get(f"/admin/profiler/{session_id}/hotspots", params={"top": 5})
+                assert hotspots.json()["total_samples"] == 0
+                svg = await client.get(f"/admin/profiler/{session_id}/flamegraph")
+                assert svg.headers["content-type"] == "image/svg+xml"
+                assert svg.headers["content-disposition"] == f'attachment; filename="profile-{session_id}.svg"'
+                folded = await client.get(f"/admin/profiler/{session_id}/flamegraph", params={"format": "folded"})
+                assert folded.status_code == 200 and folded.text == ""
+                assert (await client.get("/admin/profiler/missing/hotspots")).status_code == 404
+            finally:
+                profiler.stop()
+
+    async def test_session_in_another_worker(self, store_dir):
+        app = FastAPI()
+        app.include_router(profiler_router)
+        app.dependency_overrides[require_admin] = lambda: SimpleNamespace(user_email="admin@example.com")
+        async with _client(app) as client:
+            session_id = (await client.post("/admin/profiler/start", json={"duration_seconds": 30})).json()["id"]
+            running = profiler.session
+            profiler.session = None
+            try:
+                _as_other_worker(store_dir, session_id)
+                assert (await client.post("/admin/profiler/start", json={})).status_code == 409
+                assert (await client.get(f"/admin/profiler/{session_id}/hotspots")).status_code == 409
+
+                response = await client.post("/admin/profiler/stop")
+                assert response.status_code == 202 and response.json()["stop_requested"] is True
+                assert (store_dir / f"{session_id}.stop").exists()
+            finally:
+                profiler.session = running
+                profiler.stop()
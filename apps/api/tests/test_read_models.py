@@ -0,0 +1,52 @@
+"""
+Test Read Models
+Column-projected view queries mapped into __slots__ rows.
+"""
+from sqlalchemy.dialects import postgresql
+
+from src.db.models import FinancialMonthly
+from src.db.read_models import MONTHLY_FIELDS, MonthlyRow, fetch_monthly, monthly_select
+
+
+class _Db:
+    def __init__(self, rows):
+        self.rows = rows
+        self.statements = []
+
+    async def execute(self, statement, params=None):
+        self.statements.append(statement)
+        return iter(self.rows)
+
+
+class TestReadModels:
+    def test_select_projects_columns_and_casts_in_sql(self):
+        sql = str(monthly_select(FinancialMonthly.year == 2025).compile(dialect=postgresql.dialect()))
+        assert "CAST(analytics.financial_monthly_view.revenue_lkr AS FLOAT) AS revenue_lkr" in sql
+        assert sql.count("AS FLOAT") == len(MONTHLY_FIELDS)
+        assert "created_at" not in sql
+        assert "WHERE analytics.financial_monthly_view.year" in sql
+
+    async def test_rows_map_to_slots_records(self):
+        values = [float(i) for i in range(len(MONTHLY_FIELDS))]
+        values[-1] = None
+        db = _Db([("CC0001", 42, "ACTUAL", 2025, 3, *values)])
+
+        rows = await fetch_monthly(db, FinancialMonthly.scenario == "ACTUAL")
+
+        assert len(rows) == 1
+        row = rows[0]
+        assert isinstance(row, MonthlyRow)
+        assert not hasattr(row, "__dict__")
+        assert (row.company_id, row.period_id, row.year, row.month) == ("CC0001", 42, 2025, 3)
+        assert row.revenue_lkr == 0.0 and row.ebitda == values[-2]
+        assert row.exchange_rate is None
+        assert row.id == "CC0001_2025_3_ACTUAL"
+
+    async def test_criteria_extend_a_custom_query(self):
+        db = _Db([])
+        query = monthly_select().order_by(FinancialMonthly.company_id)
+        await fetch_monthly(db, FinancialMonthly.period_id == 7, query=query)
+
+        sql = str(db.statements[0].compile(compile_kwargs={"literal_binds": True}))
+        assert "period_id = 7" in sql
+        assert "ORDER BY analytics.financial_monthly_view.company_id" in sql
@@ -0,0 +1,133 @@
+"""
+Test Read Routing
+Replica selection, staleness policy, fallback and read-your-writes stickiness,
+in-process and through the X-Last-Write marker.
+"""
+import time
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from sqlalchemy import Column, Integer, MetaData, Table, insert
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from src.db.session import ReplicaRouter, read_context_var
+from src.security.read_consistency import LAST_WRITE_HEADER, ReadConsistencyMiddleware
+
+
+def _primary():
+    raise AssertionError("factories are compared, not called")
+
+
+def _replica():
+    raise AssertionError("factories are compared, not called")
+
+
+class _ProbedRouter(ReplicaRouter):
+    """ReplicaRouter whose lag probe returns canned values instead of querying."""
+
+    def __init__(self, lags, **kwargs):
+        kwargs.setdefault("check_interval_seconds", 0)
+        super().__init__(_replica, _primary, replica_engine=object(), **kwargs)
+        self.lags = list(lags)
+        self.probes = 0
+
+    async def _measure_lag(self):
+        self.probes += 1
+        lag = self.lags.pop(0) if len(self.lags) > 1 else self.lags[0]
+        if isinstance(lag, BaseException):
+            raise lag
+        return lag
+
+
+class TestReplicaRouter:
+    async def test_without_replica_everything_uses_primary(self):
+        router = ReplicaRouter(None, _primary)
+        assert not router.enabled
+        assert await router.choose("user") is _primary
+
+    async def test_fresh_replica_serves_reads(self):
+        router = _ProbedRouter([0.5], max_lag_seconds=10)
+        assert await router.choose("user") is _replica
+        assert router.stats["replica"] == 1
+
+    async def test_lagging_replica_falls_back_until_it_catches_up(self):
+        router = _ProbedRouter([45.0, 2.0], max_lag_seconds=10)
+        assert await router.choose() is _primary
+        assert router.stats["primary_lagging"] == 1
+        assert await router.choose() is _replica
+
+    async def test_unreachable_replica_is_skipped_for_retry_window(self):
+        router = _ProbedRouter([ConnectionRefusedError("replica down"), 0.0], retry_seconds=60)
+        assert await router.choose() is _primary
+        assert await router.choose() is _primary
+        assert router.probes == 1
+        assert router.snapshot()["available"] is False
+
+    async def test_writer_sticks_to_primary(self):
+        router = _ProbedRouter([0.0], sticky_seconds=30)
+        router.mark_write("alice")
+        assert await router.choose("alice") is _primary
+        assert await router.choose("bob") is _replica
+        assert router.stats["primary_sticky"] == 1
+
+    async def test_stickiness_expires(self):
+        router = _ProbedRouter([0.0], sticky_seconds=0)
+        router.mark_write("alice")
+        assert await router.choose("alice") is _replica
+
+    async def test_lag_is_sampled_at_most_once_per_interval(self):
+        router = _ProbedRouter([0.0], check_interval_seconds=60)
+        for _ in range(5):
+            await router.choose()
+        assert router.probes == 1
+
+    async def test_marker_from_another_worker_sticks_to_primary(self):
+        router = _ProbedRouter([0.0], sticky_seconds=30)
+        assert await router.choose("alice", last_write_at=time.time() - 5) is _primary
+        assert await router.choose("alice", last_write_at=time.time() - 60) is _replica
+        assert router.stats["primary_sticky"] == 1
+
+
+class TestReadConsistencyMiddleware:
+    async def test_write_returns_marker_and_marker_is_read_back(self, tmp_path):
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'rw.db'}")
+        rows = Table("rows", MetaData(), Column("id", Integer, primary_key=True))
+        async with engine.begin() as conn:
+            await conn.run_sync(rows.metadata.create_all)
+
+        app = FastAPI()
+        app.add_middleware(ReadConsistencyMiddleware)
+
+        @app.post("/save")
+        async def save():
+            async with AsyncSession(engine) as session:
+                await session.execute(insert(rows))
+                await session.flush()
+                await session.commit()
+            return {}
+
+        @app.get("/read")
+        async def read():
+            context = read_context_var.get()
+            return {"key": context.key, "last_write_at": context.last_write_at}
+
+        try:
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                headers = {"Authorization": "Bearer token-a"}
+                before = time.time()
+                saved = await client.post("/save", headers=headers)
+                marker = float(saved.headers[LAST_WRITE_HEADER])
+                assert before <= marker <= time.time()
+                assert LAST_WRITE_HEADER not in (await client.get("/read", headers=headers)).headers
+
+                echoed = (await client.get("/read", headers={**headers, LAST_WRITE_HEADER: str(marker)})).json()
+                assert echoed["key"] and echoed["last_write_at"] == pytest.approx(marker, abs=0.001)
+                # Future markers are clamped to now; garbage is ignored.
+                future = (await client.get("/read", headers={LAST_WRITE_HEADER: str(time.time() + 3600)})).json()
+                assert future["last_write_at"] <= time.time()
+                for bad in ("soon", "nan", "inf"):
+                    assert (await client.get("/read", headers={LAST_WRITE_HEADER: bad})).json()["last_write_at"] is None
+        finally:
+            await engine.dispose()
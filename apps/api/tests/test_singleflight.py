@@ -0,0 +1,117 @@
+"""
+Test Singleflight
+Coalescing, error propagation, timeouts and metrics for concurrent identical calls.
+"""
+import asyncio
+
+import pytest
+
+from src.utils.singleflight import SingleFlight, SingleFlightTimeout, company_fingerprint, make_key
+
+
+class TestSingleFlight:
+    async def test_concurrent_calls_share_one_execution(self):
+        flight = SingleFlight("test")
+        runs = 0
+        release = asyncio.Event()
+
+        async def compute():
+            nonlocal runs
+            runs += 1
+            await release.wait()
+            return {"pbt": 42}
+
+        waiters = [asyncio.create_task(flight.do("k", compute)) for _ in range(50)]
+        await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(*waiters)
+
+        assert runs == 1
+        assert all(r is results[0] for r in results)
+        assert flight.stats["executed"] == 1
+        assert flight.stats["coalesced"] == 49
+        assert flight.in_flight == 0
+
+    async def test_different_keys_run_separately(self):
+        flight = SingleFlight("test")
+
+        async def compute(value):
+            await asyncio.sleep(0.01)
+            return value
+
+        a, b = await asyncio.gather(
+            flight.do("a", lambda: compute(1)),
+            flight.do("b", lambda: compute(2)),
+        )
+        assert (a, b) == (1, 2)
+        assert flight.stats["executed"] == 2
+
+    async def test_completed_key_is_not_cached(self):
+        flight = SingleFlight("test")
+        runs = 0
+
+        async def compute():
+            nonlocal runs
+            runs += 1
+            return runs
+
+        assert await flight.do("k", compute) == 1
+        assert await flight.do("k", compute) == 2
+
+    async def test_error_reaches_every_waiter(self):
+        flight = SingleFlight("test")
+
+        async def compute():
+            await asyncio.sleep(0.01)
+            raise ValueError("query failed")
+
+        results = await asyncio.gather(
+            *(flight.do("k", compute) for _ in range(3)), return_exceptions=True
+        )
+        assert all(isinstance(r, ValueError) for r in results)
+        assert flight.stats["failed"] == 1
+        assert flight.in_flight == 0
+
+    async def test_timeout_cancels_abandoned_computation(self):
+        flight = SingleFlight("test")
+        cancelled = asyncio.Event()
+
+        async def compute():
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        with pytest.raises(SingleFlightTimeout):
+            await flight.do("k", compute, timeout=0.05)
+        await asyncio.wait_for(cancelled.wait(), 1)
+        assert flight.stats["timeouts"] == 1
+        assert flight.stats["abandoned"] == 1
+        assert flight.in_flight == 0
+
+    async def test_one_waiter_leaving_does_not_cancel_the_others(self):
+        flight = SingleFlight("test")
+
+        async def compute():
+            await asyncio.sleep(0.05)
+            return "done"
+
+        impatient = asyncio.create_task(flight.do("k", compute, timeout=0.01))
+        patient = asyncio.create_task(flight.do("k", compute))
+        with pytest.raises(SingleFlightTimeout):
+            await impatient
+        assert await patient == "done"
+        assert flight.stats["abandoned"] == 0
+
+
+class TestKeys:
+    def test_param_order_does_not_matter(self):
+        assert make_key("ceo.dashboard", {"year": 2025, "month": 3}) == make_key(
+            "ceo.dashboard", {"month": 3, "year": 2025}
+        )
+
+    def test_company_fingerprint_is_order_independent(self):
+        assert company_fingerprint(["B", "A"]) == company_fingerprint(["A", "B", "A"])
+        assert company_fingerprint(None) == "all"
+        assert company_fingerprint(["A"]) != company_fingerprint(["B"])
@@ -0,0 +1,250 @@
+"""
+Test Hot Statements
+Registered statements compile once; steady-state executions are compiled-cache
+hits, for the registry itself and for the dashboard endpoints that use it.
+"""
+import importlib
+from datetime import date, datetime
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from sqlalchemy import event, insert, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from src.config.constants import RoleID
+from src.db import session as db_session
+from src.db import statements
+from src.db.models import (
+    Base,
+    ClusterMaster,
+    CompanyMaster,
+    FinancialFact,
+    FinancialMonthly,
+    MetricMaster,
+    PeriodMaster,
+    Report,
+    StatusMaster,
+)
+from src.security.middleware import get_current_active_user
+from src.services.acl_service import CompanyAccess
+
+# src.routers re-exports each module's APIRouter under the module's name
+ceo_router = importlib.import_module("src.routers.ceo_router")
+fd_router = importlib.import_module("src.routers.fd_router")
+md_router = importlib.import_module("src.routers.md_router")
+
+# Two parameter sets per bind name; lists differ in length to exercise expanding binds.
+_PARAMS = [
+    {"year": 2025, "month": 3, "months": [1, 2, 3], "company_id": "CC0001", "cluster_id": "CL01",
+     "company_ids": ["CC0001", "CC0002"], "period_ids": [1, 2, 3], "scenario": "ACTUAL", "metric_id": 1},
+    {"year": 2024, "month": 11, "months": [11], "company_id": "CC0002", "cluster_id": "CL02",
+     "company_ids": ["CC0003"], "period_ids": [7], "scenario": "BUDGET", "metric_id": 4},
+]
+
+
+# The dashboard GET endpoints, as the CEO / MD / FD pages call them.
+_ENDPOINTS = [
+    "/ceo/dashboard?year=2025&month=3",
+    "/ceo/ytd/2025?through_month=3",
+    "/ceo/clusters/CL01?year=2025&month=3",
+    "/ceo/rankings/2025/3",
+    "/ceo/trends?year_from=2024&year_to=2025&grain=quarter",
+    "/md/strategic-overview?year=2025&month=3",
+    "/md/performers?mode=ytd&year=2025&month=3",
+    "/md/cluster-contribution?year=2025&month=3",
+    "/md/risk-radar?year=2025&month=3",
+    "/md/drilldown/cluster/CL01?year=2025&month=3",
+    "/md/pbt-trend?start_year=2024&end_year=2025",
+    "/md/performance-hierarchy?year=2025&month=3",
+    "/md/company-detail?company_id=CC0001&year=2025&month=3",
+    "/fd/companies",
+    "/fd/pending",
+    "/fd/reports",
+    "/fd/dashboard",
+    "/fd/submitted-actuals",
+    "/fd/company-rank?company_id=CC0001&year=2025&month=3",
+    "/fd/company-analytics?company_id=CC0001&year=2025&month=3",
+]
+
+_PORTAL_ROLES = {"ceo": RoleID.MANAGING_DIRECTOR, "md": RoleID.MANAGING_DIRECTOR, "fd": RoleID.FINANCIAL_DIRECTOR}
+
+
+def _params_for(statement, values):
+    names = statements.bind_names(statement)
+    return {name: value for name, value in values.items() if name in names}
+
+
+def _compiles():
+    return {name: counters["compiles"] for name, counters in statements.snapshot()["statements"].items()}
+
+
+@pytest.fixture
+def analytics_tables():
+    return [m.__table__ for m in (
+        PeriodMaster, ClusterMaster, CompanyMaster, StatusMaster, Report, FinancialFact, FinancialMonthly,
+    )]
+
+
+async def _seed(conn):
+    """Two companies in one cluster, 2024-2025 periods, facts, view rows and reports."""
+    # user_master's search_text is a PostgreSQL generated column: create it plain.
+    await conn.execute(text(
+        "CREATE TABLE analytics.user_master (user_id text PRIMARY KEY, user_email text, first_name text, "
+        "last_name text, is_active boolean, created_date timestamp, modified_date timestamp, search_text text)"
+    ))
+    await conn.run_sync(lambda sync_conn: Base.metadata.create_all(
+        sync_conn, tables=[t for t in Base.metadata.sorted_tables if t.name != "user_master"]
+    ))
+    now = datetime(2025, 1, 1)
+    companies = ("CC0001", "CC0002")
+    periods = [
+        {"period_id": (year - 2024) * 12 + month, "year": year, "month": month,
+         "start_date": date(year, month, 1), "end_date": date(year, month, 28)}
+        for year in (2024, 2025) for month in range(1, 13)
+    ]
+    await conn.execute(insert(StatusMaster), [
+        {"status_id": i, "status_name": name} for i, name in enumerate(("Draft", "Submitted", "Approved", "Rejected"), 1)
+    ])
+    await conn.execute(insert(ClusterMaster), [
+        {"cluster_id": "CL01", "cluster_name": "Shipping", "is_active": True, "created_date": now, "modified_date": now}
+    ])
+    await conn.execute(insert(CompanyMaster), [
+        {"company_id": company_id, "cluster_id": "CL01", "company_name": company_id, "fin_year_start_month": 4,
+         "is_active": True, "created_date": now, "modified_date": now}
+        for company_id in companies
+    ])
+    await conn.execute(insert(PeriodMaster), periods)
+    await conn.execute(insert(MetricMaster), [{"metric_id": i, "metric_name": f"metric {i}"} for i in range(1, 25)])
+    await conn.execute(insert(Report), [
+        {"company_id": company_id, "period_id": period["period_id"], "status_id": 3 if company_id == "CC0001" else 2,
+         "submitted_by": "U1", "submitted_date": now}
+        for company_id in companies for period in periods
+    ])
+    await conn.execute(insert(FinancialFact), [
+        {"company_id": company_id, "period_id": period["period_id"], "metric_id": metric_id,
+         "actual_budget": scenario, "amount": 100 * metric_id}
+        for company_id in companies for period in periods for metric_id in (1, 2, 3, 4) for scenario in ("Actual", "Budget")
+    ])
+    await conn.execute(insert(FinancialMonthly), [
+        {"company_id": company_id, "period_id": period["period_id"], "scenario": scenario,
+         "year": period["year"], "month": period["month"], "revenue_lkr": 1000, "gp": 300,
+         "pbt_before_non_ops": 120, "exchange_rate": 300}
+        for company_id in companies for period in periods for scenario in ("ACTUAL", "BUDGET")
+    ])
+
+
+@pytest.fixture
+async def dashboards(sqlite_engine, monkeypatch):
+    """The CEO / MD / FD routers on a seeded SQLite database; yields (client, compile misses)."""
+    async with sqlite_engine.begin() as conn:
+        await _seed(conn)
+    # Request sessions, fan-out sessions and read sessions all come from AsyncSessionLocal.
+    monkeypatch.setitem(db_session.AsyncSessionLocal.kw, "bind", sqlite_engine)
+
+    misses = []
+
+    @event.listens_for(sqlite_engine.sync_engine, "before_cursor_execute")
+    def _note_miss(conn, cursor, statement, parameters, context, executemany):
+        # SAVEPOINT / ROLLBACK TO are emitted by the dialect as plain strings: nothing to compile.
+        if context is not None and context.cache_hit not in (context.dialect.CACHE_HIT, context.dialect.NO_CACHE_KEY):
+            misses.append(statement)
+
+    app = FastAPI()
+    for name in ("ceo_router", "md_router", "fd_router"):
+        app.include_router(importlib.import_module(f"src.routers.{name}").router)
+    current = {}
+    app.dependency_overrides[get_current_active_user] = lambda: current["user"]
+
+    async def get(client, url):
+        current["user"] = SimpleNamespace(
+            user_id="U1", user_email="fd@mclarens.lk", first_name="Test", last_name="User", is_active=True,
+            current_role_id=_PORTAL_ROLES[url.split("/")[1]], company_access=CompanyAccess(["CC0001"]),
+        )
+        return await client.get(url)
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        yield lambda url: get(client, url), misses
+
+
+class TestHotStatements:
+    def test_every_bind_name_is_covered(self):
+        known = set(_PARAMS[0])
+        for name, statement in statements.registered().items():
+            assert statements.bind_names(statement) <= known, name
+
+    def test_steady_state_never_recompiles(self, sqlite_sync_engine):
+        registry = statements.registered()
+        with Session(sqlite_sync_engine) as session:
+            # Warm-up: each statement may compile once per engine.
+            for statement in registry.values():
+                session.execute(statement, _params_for(statement, _PARAMS[0]))
+            before = _compiles()
+            hits_before = statements.snapshot()["compile_hits"]
+
+            for _ in range(3):
+                for values in _PARAMS:
+                    for statement in registry.values():
+                        session.execute(statement, _params_for(statement, values))
+
+        assert _compiles() == before
+        assert statements.snapshot()["compile_hits"] - hits_before == 3 * len(_PARAMS) * len(registry)
+
+    def test_duplicate_names_are_rejected(self):
+        with pytest.raises(ValueError):
+            statements.hot("period_id", statements.PERIOD_ID)
+
+
+class TestRouterHelpers:
+    async def test_router_queries_hit_the_compiled_cache(self, sqlite_engine):
+        """The hot-path helpers shared by the dashboard endpoints, run twice."""
+        async def run_all(session, year, month):
+            await ceo_router.get_approved_company_ids(session, year, month)
+            await ceo_router.get_approved_company_ids(session, year)
+            await md_router.get_approved_company_ids(session, year, months=list(range(1, month + 1)))
+            await fd_router._period_id_for(session, year, month)
+            await fd_router._period_ids_by_month(session, year)
+            await fd_router._get_ytd_metrics(session, "CC0001", list(range(1, month + 1)), "ACTUAL")
+            await fd_router._get_metric_for_periods(session, "CC0001", [1, 2], 1, "BUDGET")
+
+        async with AsyncSession(sqlite_engine) as session:
+            await run_all(session, 2025, 3)
+            before = _compiles()
+            hits_before = statements.snapshot()["compile_hits"]
+            await run_all(session, 2024, 12)
+
+        assert _compiles() == before
+        assert statements.snapshot()["compile_hits"] - hits_before == 7
+
+
+class TestWarm:
+    async def test_warm_compiles_every_statement_ahead_of_requests(self, sqlite_engine):
+        async with AsyncSession(sqlite_engine) as session:
+            assert await statements.warm(session) == len(statements.registered())
+            before = _compiles()
+            hits_before = statements.snapshot()["compile_hits"]
+            await fd_router._period_id_for(session, 2025, 3)
+
+        assert _compiles() == before
+        assert statements.snapshot()["compile_hits"] - hits_before == 1
+
+
+class TestEndpoints:
+    async def test_second_pass_over_dashboard_endpoints_compiles_nothing(self, dashboards):
+        get, misses = dashboards
+        for url in _ENDPOINTS:
+            response = await get(url)
+            assert response.status_code == 200, (url, response.text)
+        assert misses, "the first pass compiles"
+
+        misses.clear()
+        before = _compiles()
+        executions_before = statements.snapshot()["executions"]
+        for url in _ENDPOINTS:
+            assert (await get(url)).status_code == 200, url
+
+        assert misses == []
+        assert _compiles() == before
+        assert statements.snapshot()["executions"] > executions_before
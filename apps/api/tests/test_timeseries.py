@@ -0,0 +1,192 @@
+"""
+Test Metric Series
+Month-array assembly, downsampling, derived metrics and the store / live split.
+"""
+from datetime import date
+
+import pytest
+
+from src.services import timeseries_service
+from src.services.fx_service import FxRateTable
+from src.services.timeseries_service import (
+    EntityType,
+    Grain,
+    TimeSeriesService,
+    assemble,
+    apply_usd_rates,
+    components_for,
+    derive,
+    downsample,
+)
+
+
+def _months(**values):
+    """Twelve-slot array with the given {month: value} filled in."""
+    out = [None] * 12
+    for key, value in values.items():
+        out[int(key[1:]) - 1] = value
+    return out
+
+
+class _Result:
+    def __init__(self, rows):
+        self._rows = rows
+
+    def all(self):
+        return self._rows
+
+
+class _StoreDb:
+    """Answers the metric_series read with fixed rows; records its SQL."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.sql = []
+
+    async def execute(self, statement):
+        self.sql.append(str(statement.compile(compile_kwargs={"literal_binds": True})))
+        return _Result(self.rows)
+
+
+class TestFrameFunctions:
+    def test_assemble_places_years_contiguously(self):
+        series = assemble(
+            [("gp", 2025, _months(m1=5.0)), ("gp", 2024, _months(m12=3.0)), ("gp", 2030, _months(m1=9.0))],
+            2024, 2025, ["gp"],
+        )
+        assert len(series["gp"]) == 24
+        assert series["gp"][11] == 3.0
+        assert series["gp"][12] == 5.0
+        assert sum(v is not None for v in series["gp"]) == 2
+
+    def test_downsample_to_quarters_and_years(self):
+        series = {"gp": _months(m1=1.0, m2=2.0, m6=4.0), "rows": _months(m1=1.0, m2=1.0, m6=1.0)}
+        buckets, quarters = downsample(series, 2024, Grain.QUARTER)
+        assert buckets == [(2024, 1), (2024, 2), (2024, 3), (2024, 4)]
+        assert quarters["gp"] == [3.0, 4.0, None, None]
+
+        buckets, years = downsample(series, 2024, Grain.YEAR)
+        assert buckets == [(2024, 0)]
+        assert years["gp"] == [7.0]
+
+    def test_derive_pbt_and_margins(self):
+        summed = {
+            "rows": [1.0],
+            "revenue_lkr": [1000.0],
+            "gp": [400.0],
+            "other_income": [50.0],
+            "personal_exp": [100.0],
+            "admin_exp": [50.0],
+            "provisions": [-10.0],
+            "exchange_gl": [10.0],
+        }
+        out = derive(summed, ["pbt_before", "gp_margin", "total_overhead", "unknown"])
+        assert out["pbt_before"] == [300.0]
+        assert out["gp_margin_pct"] == [40.0]
+        assert out["total_overheads"] == [150.0]
+        assert "unknown" not in out
+
+    def test_components_cover_derived_metrics(self):
+        assert set(components_for(["np_margin"])) >= {"rows", "revenue_lkr", "gp", "admin_exp"}
+        assert "revenue_lkr" in components_for(["revenue_usd"])
+
+    def test_usd_revenue_uses_published_rate(self):
+        rates = FxRateTable([("USD", date(2024, 1, 1), 300.0)], version="v1")
+        series = {"revenue_lkr": _months(m3=3000.0), "revenue_usd": _months(m3=12.0)}
+        apply_usd_rates(series, rates, 2024)
+        assert series["revenue_usd"][2] == 10.0
+
+
+class TestFetch:
+    @pytest.fixture(autouse=True)
+    def _stats(self, monkeypatch):
+        monkeypatch.setattr(timeseries_service, "_stats", dict.fromkeys(timeseries_service._stats, 0))
+
+    async def test_fresh_years_come_from_the_store(self, monkeypatch):
+        async def nothing_stale(db, years):
+            return set()
+
+        monkeypatch.setattr(TimeSeriesService, "stale_years", staticmethod(nothing_stale))
+        db = _StoreDb([
+            ("rows", 2024, _months(m1=2.0, m4=2.0)),
+            ("revenue_lkr", 2024, _months(m1=100.0, m4=300.0)),
+            ("gp", 2024, _months(m1=30.0, m4=60.0)),
+        ])
+        frame = await TimeSeriesService.fetch(
+            db, ["gp", "gp_margin"], 2024, 2024,
+            entity_type=EntityType.COMPANY, entity_id="CC0001", grain=Grain.QUARTER,
+        )
+
+        assert [frame.label(i) for i, _ in frame.points("gp")] == ["Q1 2024", "Q2 2024"]
+        assert [v for _, v in frame.points("gp")] == [30.0, 60.0]
+        assert [v for _, v in frame.points("gp_margin")] == [30.0, 20.0]
+        assert frame.last_month(1) == 6
+        assert "entity_id = 'CC0001'" in db.sql[0]
+        assert timeseries_service._stats["store_years_read"] == 1
+
+    async def test_stale_years_are_computed_live(self, monkeypatch):
+        async def all_stale(db, years):
+            return set(years)
+
+        calls = []
+
+        async def live_rows(db, years, entity_type, entity_id, scenario, metrics):
+            calls.append((years, entity_type, scenario))
+            return [("rows", 2025, _months(m2=1.0)), ("gp", 2025, _months(m2=7.0))]
+
+        monkeypatch.setattr(TimeSeriesService, "stale_years", staticmethod(all_stale))
+        monkeypatch.setattr(TimeSeriesService, "_live_rows", staticmethod(live_rows))
+        db = _StoreDb([])
+        frame = await TimeSeriesService.fetch(db, ["gp"], 2024, 2025, scenario="BUDGET")
+
+        assert frame.points("gp") == [(13, 7.0)]
+        assert frame.label(13) == "Feb 2025"
+        assert calls == [([2024, 2025], EntityType.GROUP, "BUDGET")]
+        assert db.sql == []
+        assert timeseries_service._stats["live_years_read"] == 2
+
+
+class _SourceDb:
+    """Answers metric_series_year, the per-year digests and the master version, in that order."""
+
+    def __init__(self, covered, digests, master):
+        self.answers = [list(covered.items()), list(digests.items()), master]
+
+    def begin_nested(self):
+        return self
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, statement):
+        answer = self.answers.pop(0)
+        result = _Result(answer)
+        result.scalar = lambda: answer
+        return result
+
+
+class TestStaleYears:
+    def test_digest_query_orders_rows(self):
+        from sqlalchemy.dialects import postgresql
+
+        sql = str(TimeSeriesService._year_digests_query([2025]).compile(dialect=postgresql.dialect()))
+        assert "md5(string_agg(" in sql
+        assert "ORDER BY analytics.data_version.company_id, analytics.data_version.period_id" in sql
+        assert "GROUP BY analytics.period_master.year" in sql
+
+    async def test_changed_digest_is_stale_whatever_its_version(self):
+        built = TimeSeriesService.source_token(7, "aaa")
+        db = _SourceDb({2024: built, 2025: built}, {2024: "aaa", 2025: "bbb"}, 7)
+        # 2025's digest moved (say a write with a lower version committed late): only it is stale.
+        assert await TimeSeriesService.stale_years(db, [2024, 2025, 2026]) == {2025, 2026}
+
+    async def test_master_change_stales_every_year(self):
+        db = _SourceDb({2024: TimeSeriesService.source_token(7, "aaa")}, {2024: "aaa"}, 8)
+        assert await TimeSeriesService.stale_years(db, [2024]) == {2024}
+
+    async def test_year_without_rows_is_fresh_once_built(self):
+        db = _SourceDb({2023: TimeSeriesService.source_token(7, None)}, {}, 7)
+        assert await TimeSeriesService.stale_years(db, [2023]) == set()
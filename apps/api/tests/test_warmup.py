@@ -0,0 +1,170 @@
+"""
+Test Startup Warm-up
+Readiness pipeline, schema revision check and pool prefill.
+"""
+import asyncio
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from src.db.session import (
+    SchemaRevisionError,
+    check_schema_revision,
+    expected_revisions,
+    prefill_pool,
+)
+from src.utils import warmup
+from src.utils.warmup import StartupPipeline
+
+
+def _step(result=None, delay=0.0, error=None, log=None, name=None):
+    async def run():
+        if log is not None:
+            log.append(("start", name))
+        await asyncio.sleep(delay)
+        if log is not None:
+            log.append(("end", name))
+        if error is not None:
+            raise error
+        return result
+    return run
+
+
+class TestStartupPipeline:
+    async def test_ready_after_all_steps(self):
+        pipeline = StartupPipeline(step_timeout_seconds=1)
+        assert pipeline.snapshot()["ready"] is False
+
+        assert await pipeline.run(required=[("schema", _step("009"))], warm=[("jwks", _step(3))])
+
+        state = pipeline.snapshot()
+        assert state["ready"] is True
+        assert state["steps"]["schema"]["status"] == "ok"
+        assert state["steps"]["schema"]["required"] is True
+        assert state["steps"]["schema"]["detail"] == "009"
+        assert state["steps"]["jwks"]["detail"] == 3
+
+    async def test_required_failure_is_retried_with_backoff(self, monkeypatch):
+        delays = []
+        real_sleep = asyncio.sleep
+
+        async def sleep(delay):
+            delays.append(delay)
+            await real_sleep(0)
+
+        monkeypatch.setattr(warmup.asyncio, "sleep", sleep)
+        failures = [ConnectionRefusedError("db down")] * 4
+
+        async def flaky():
+            if failures:
+                raise failures.pop()
+            return "009"
+
+        pipeline = StartupPipeline(step_timeout_seconds=1, retry_initial_seconds=1, retry_max_seconds=5)
+        assert await pipeline.run(required=[("schema", flaky)], warm=[])
+
+        assert delays == [1, 2, 4, 5]
+        state = pipeline.snapshot()
+        assert state["ready"] is True and state["failed"] is False
+        assert state["steps"]["schema"]["attempts"] == 5
+        assert state["steps"]["schema"]["status"] == "ok"
+        assert "error" not in state["steps"]["schema"]
+
+    async def test_failing_required_step_holds_back_readiness_and_later_steps(self):
+        pipeline = StartupPipeline(step_timeout_seconds=1, retry_initial_seconds=0.01, retry_max_seconds=0.01)
+        ran = []
+        pipeline.start(
+            required=[("schema", _step(error=RuntimeError("behind head"))), ("pool", _step(log=ran, name="pool"))],
+            warm=[("statements", _step(log=ran, name="statements"))],
+        )
+        await asyncio.sleep(0.05)
+
+        state = pipeline.snapshot()
+        await pipeline.stop()
+        assert state["ready"] is False and state["failed"] is True
+        assert state["steps"]["schema"]["status"] == "retrying"
+        assert state["steps"]["schema"]["attempts"] >= 2
+        assert state["steps"]["schema"]["error"] == "RuntimeError: behind head"
+        assert state["steps"]["pool"]["status"] == "pending"
+        assert ran == []
+
+    async def test_warm_failures_and_timeouts_do_not_block_readiness(self):
+        pipeline = StartupPipeline(step_timeout_seconds=0.05)
+
+        assert await pipeline.run(
+            required=[],
+            warm=[("jwks", _step(error=OSError("unreachable"))), ("graphql", _step(delay=1)), ("statements", _step(19))],
+        )
+
+        steps = pipeline.snapshot()["steps"]
+        assert steps["jwks"]["status"] == "failed"
+        assert steps["graphql"]["error"].startswith("timed out")
+        assert steps["statements"]["status"] == "ok"
+
+    async def test_warm_steps_run_concurrently_after_required_ones(self):
+        pipeline = StartupPipeline(step_timeout_seconds=1)
+        log = []
+
+        await pipeline.run(
+            required=[("schema", _step(log=log, name="schema"))],
+            warm=[("a", _step(delay=0.02, log=log, name="a")), ("b", _step(delay=0.02, log=log, name="b"))],
+        )
+
+        assert log[:2] == [("start", "schema"), ("end", "schema")]
+        assert {entry for entry in log[2:4]} == {("start", "a"), ("start", "b")}
+
+    async def test_stop_cancels_a_running_pipeline(self):
+        pipeline = StartupPipeline(step_timeout_seconds=5)
+        pipeline.start(required=[("schema", _step(delay=5))], warm=[])
+        await asyncio.sleep(0)
+        await pipeline.stop()
+
+        assert pipeline.snapshot()["steps"]["schema"]["status"] == "cancelled"
+        assert pipeline.ready is False
+
+
+@pytest.fixture
+async def sqlite_engine():
+    engine = create_async_engine("sqlite+aiosqlite://")
+    yield engine
+    await engine.dispose()
+
+
+class TestSchemaRevision:
+    def test_build_has_a_single_head(self):
+        assert len(expected_revisions()) == 1
+
+    async def test_matching_revision_passes(self, sqlite_engine):
+        async with sqlite_engine.begin() as conn:
+            await conn.execute(text("CREATE TABLE alembic_version (version_num VARCHAR(32) NOT NULL)"))
+            await conn.execute(text("INSERT INTO alembic_version VALUES ('009_metric_series')"))
+
+        assert await check_schema_revision(sqlite_engine, {"009_metric_series"}) == "009_metric_series"
+
+    async def test_older_revision_fails(self, sqlite_engine):
+        async with sqlite_engine.begin() as conn:
+            await conn.execute(text("CREATE TABLE alembic_version (version_num VARCHAR(32) NOT NULL)"))
+            await conn.execute(text("INSERT INTO alembic_version VALUES ('008_period_snapshot')"))
+
+        with pytest.raises(SchemaRevisionError, match="alembic upgrade head"):
+            await check_schema_revision(sqlite_engine, {"009_metric_series"})
+
+    async def test_unmigrated_database_fails(self, sqlite_engine):
+        with pytest.raises(SchemaRevisionError, match="no revision"):
+            await check_schema_revision(sqlite_engine, {"009_metric_series"})
+
+
+class TestPrefillPool:
+    async def test_connections_are_returned_to_the_pool(self, tmp_path):
+        engine = create_async_engine(
+            f"sqlite+aiosqlite:///{tmp_path / 'prefill.db'}",
+            poolclass=AsyncAdaptedQueuePool, pool_size=5, max_overflow=0,
+        )
+        try:
+            assert await prefill_pool(engine, 3) == 3
+            assert engine.pool.checkedin() == 3
+            assert engine.pool.checkedout() == 0
+        finally:
+            await engine.dispose()
@@ -744,6 +744,27 @@ function getAuthToken(): string | null {
   return localStorage.getItem('mclarens_token');
 }
 
+// Read-your-writes: the API returns X-Last-Write after a save; echoing the latest
+// one keeps this tab's reads off a lagging replica on whichever worker serves them.
+const LAST_WRITE_HEADER = 'X-Last-Write';
+const LAST_WRITE_KEY = 'mclarens_last_write';
+
+function withLastWrite(headers: Record<string, string>): Record<string, string> {
+  if (typeof window === 'undefined') return headers;
+  const marker = sessionStorage.getItem(LAST_WRITE_KEY);
+  return marker ? { ...headers, [LAST_WRITE_HEADER]: marker } : headers;
+}
+
+function rememberLastWrite(response: Response): void {
+  if (typeof window === 'undefined') return;
+  const marker = response.headers.get(LAST_WRITE_HEADER);
+  if (!marker) return;
+  const previous = Number(sessionStorage.getItem(LAST_WRITE_KEY) || 0);
+  if (Number(marker) > previous) {
+    sessionStorage.setItem(LAST_WRITE_KEY, marker);
+  }
+}
+
 function getFileNameFromDisposition(disposition: string | null, fallback: string): string {
   if (!disposition) return fallback;
   const match = disposition.match(/filename\*?=(?:UTF-8''|")?([^\";]+)/i);
@@ -762,7 +783,7 @@ async function apiFetchBlob(
       headers['Authorization'] = `Bearer ${token}`;
     }
 
-    const response = await fetch(`${API_BASE}${path}`, { method: 'GET', headers });
+    const response = await fetch(`${API_BASE}${path}`, { method: 'GET', headers: withLastWrite(headers) });
     if (!response.ok) {
       const errorBody = await response.text();
       return {
@@ -808,11 +829,12 @@ async function apiFetch<T>(
     
     const response = await fetch(`${API_BASE}${path}`, {
       ...options,
-      headers: {
+      headers: withLastWrite({
         ...headers,
-        ...options?.headers,
-      },
+        ...(options?.headers as Record<string, string> | undefined),
+      }),
     });
+    rememberLastWrite(response);
 
     if (!response.ok) {
       const errorBody = await response.text();